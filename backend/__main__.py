@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Các module backend import lẫn nhau theo tên phẳng (import main, db_pool...)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from server import run
+
+run()
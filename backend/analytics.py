@@ -0,0 +1,283 @@
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from menu_search import InvalidQuery
+
+log = logging.getLogger(__name__)
+
+
+# -------------------------
+# Restaurant sales rollups
+# -------------------------
+# sales_hourly / item_sales_hourly cộng dồn theo (nhà hàng, giờ, trạng thái):
+# create_order cộng các đơn vừa tạo, update_order_status chuyển đơn từ trạng
+# thái cũ sang mới, cùng transaction với thay đổi trên orders. Báo cáo chỉ
+# đọc rollup (tối đa vài dòng mỗi giờ), không quét orders/order_items.
+GRANULARITIES = ("hour", "day")
+DEFAULT_DAYS = {"hour": 2, "day": 30}
+MAX_DAYS = 366
+DEFAULT_TOP = 5
+MAX_TOP = 50
+# Đơn bị huỷ không tính vào doanh thu, số đơn và món bán chạy
+CANCELLED = "cancelled"
+
+# Chuyển trạng thái: trừ ở trạng thái cũ (-1), cộng ở trạng thái mới (+1)
+_MOVE = "(SELECT %s AS status, -1 AS sign UNION ALL SELECT %s, 1) s"
+
+
+def _rollup_statements(bucket, money, sales_upsert, items_upsert):
+    """(ORDER_ROLLUP, ITEM_ROLLUP, ORDER_MOVE, ITEM_MOVE) theo cú pháp của
+    một database: ``bucket`` là biểu thức giờ của o.created_at, ``money``
+    định dạng tổng tiền, các ``*_upsert`` cộng dồn vào dòng đã có. Hai câu
+    ROLLUP là mẫu, ``{orders}`` là điều kiện chọn đơn (xem order_statements)."""
+    return (f"""
+    INSERT INTO sales_hourly (restaurant, bucket, status, orders, revenue)
+    SELECT COALESCE(o.restaurant, ''), {bucket}, COALESCE(o.status, 'pending'), COUNT(*),
+           {money.format("SUM(o.total_amount)")}
+    FROM orders o
+    WHERE {{orders}}
+    GROUP BY 1, 2, 3
+    {sales_upsert}
+""", f"""
+    INSERT INTO item_sales_hourly (restaurant, bucket, status, item_id, quantity, revenue)
+    SELECT COALESCE(o.restaurant, ''), {bucket}, COALESCE(o.status, 'pending'), oi.item_id,
+           SUM(oi.quantity), {money.format("SUM(oi.quantity * oi.price)")}
+    FROM orders o
+    JOIN order_items oi ON oi.order_id = o.id
+    WHERE {{orders}}
+    GROUP BY 1, 2, 3, 4
+    {items_upsert}
+""", f"""
+    INSERT INTO sales_hourly (restaurant, bucket, status, orders, revenue)
+    SELECT COALESCE(o.restaurant, ''), {bucket}, s.status, s.sign, {money.format("s.sign * o.total_amount")}
+    FROM orders o
+    CROSS JOIN {_MOVE}
+    WHERE o.id = %s
+    {sales_upsert}
+""", f"""
+    INSERT INTO item_sales_hourly (restaurant, bucket, status, item_id, quantity, revenue)
+    SELECT COALESCE(o.restaurant, ''), {bucket}, s.status, oi.item_id,
+           SUM(s.sign * oi.quantity), {money.format("SUM(s.sign * oi.quantity * oi.price)")}
+    FROM orders o
+    JOIN order_items oi ON oi.order_id = o.id
+    CROSS JOIN {_MOVE}
+    WHERE o.id = %s
+    GROUP BY 1, 2, 3, 4
+    {items_upsert}
+""")
+
+
+_MYSQL_STATEMENTS = _rollup_statements(
+    bucket="DATE(o.created_at) + INTERVAL HOUR(o.created_at) HOUR",
+    money="{}",
+    sales_upsert="ON DUPLICATE KEY UPDATE orders = orders + VALUES(orders), revenue = revenue + VALUES(revenue)",
+    items_upsert="ON DUPLICATE KEY UPDATE quantity = quantity + VALUES(quantity), revenue = revenue + VALUES(revenue)",
+)
+# SQLite (sqlite_db.py): bucket là chuỗi cùng dạng với thời điểm đã ghi, tiền
+# lưu dạng chuỗi "50000.00"
+_SQLITE_STATEMENTS = _rollup_statements(
+    bucket="strftime('%Y-%m-%d %H:00:00.000', o.created_at)",
+    money="printf('%.2f', {})",
+    sales_upsert="""ON CONFLICT (restaurant, bucket, status) DO UPDATE
+    SET orders = orders + excluded.orders, revenue = printf('%.2f', revenue + excluded.revenue)""",
+    items_upsert="""ON CONFLICT (restaurant, bucket, status, item_id) DO UPDATE
+    SET quantity = quantity + excluded.quantity, revenue = printf('%.2f', revenue + excluded.revenue)""",
+)
+STATEMENTS = {
+    "mysql": _MYSQL_STATEMENTS,
+    "sqlite": _SQLITE_STATEMENTS,
+}
+# Khoảng id đơn (backfill)
+_ID_RANGE = "o.id BETWEEN %s AND %s"
+ORDER_ROLLUP_SQL = _MYSQL_STATEMENTS[0].format(orders=_ID_RANGE)
+ITEM_ROLLUP_SQL = _MYSQL_STATEMENTS[1].format(orders=_ID_RANGE)
+ORDER_MOVE_SQL, ITEM_MOVE_SQL = _MYSQL_STATEMENTS[2:]
+SALES_SQL = """
+    SELECT bucket, status, orders, revenue FROM sales_hourly
+    WHERE restaurant = %s AND bucket >= %s AND bucket < %s
+"""
+ITEM_SALES_SQL = f"""
+    SELECT bucket, item_id, SUM(quantity) AS quantity, SUM(revenue) AS revenue FROM item_sales_hourly
+    WHERE restaurant = %s AND bucket >= %s AND bucket < %s AND status <> '{CANCELLED}'
+    GROUP BY bucket, item_id
+    HAVING SUM(quantity) > 0
+"""
+
+
+def order_statements(order_ids, dialect="mysql"):
+    """Các câu (sql, params) cộng các đơn ``order_ids`` (vừa tạo) vào rollup."""
+    order_rollup, item_rollup, _, _ = STATEMENTS[dialect]
+    orders = "o.id IN (%s)" % ", ".join(["%s"] * len(order_ids))
+    params = tuple(order_ids)
+    return [(order_rollup.format(orders=orders), params), (item_rollup.format(orders=orders), params)]
+
+
+def range_statements(first_id, last_id, dialect="mysql"):
+    """Các câu (sql, params) cộng mọi đơn id ``first_id``..``last_id`` vào rollup."""
+    order_rollup, item_rollup, _, _ = STATEMENTS[dialect]
+    params = (first_id, last_id)
+    return [(order_rollup.format(orders=_ID_RANGE), params), (item_rollup.format(orders=_ID_RANGE), params)]
+
+
+def status_statements(order_id, old_status, new_status, dialect="mysql"):
+    """Các câu (sql, params) chuyển một đơn sang trạng thái mới trong rollup."""
+    old_status = old_status or "pending"
+    if old_status == new_status:
+        return []
+    _, _, order_move, item_move = STATEMENTS[dialect]
+    params = (old_status, new_status, order_id)
+    return [(order_move, params), (item_move, params)]
+
+
+def backfill(get_connection, batch_size=1000, dialect="mysql"):
+    """Dựng lại rollup từ orders/order_items, trả số lô đã chạy.
+
+    Xoá rollup cũ rồi cộng từng khoảng ``batch_size`` id đơn, mỗi khoảng một
+    transaction; INSERT ... SELECT chạy trong MySQL nên không kéo dữ liệu về.
+    Chạy lúc triển khai hoặc bảo trì: đơn tạo/đổi trạng thái trong lúc chạy
+    có thể bị tính lệch.
+    """
+    db = get_connection()
+    cursor = db.cursor()
+    try:
+        cursor.execute("DELETE FROM sales_hourly")
+        cursor.execute("DELETE FROM item_sales_hourly")
+        db.commit()
+        cursor.execute("SELECT MIN(id), MAX(id) FROM orders")
+        low, high = cursor.fetchone()
+        if low is None:
+            return 0
+        batches = 0
+        for start in range(low, high + 1, batch_size):
+            for sql, params in range_statements(start, min(start + batch_size - 1, high), dialect):
+                cursor.execute(sql, params)
+            db.commit()
+            batches += 1
+            log.info("analytics backfill: đơn %d/%d", min(start + batch_size - 1, high), high)
+        return batches
+    finally:
+        cursor.close()
+        db.close()
+
+
+# -------------------------
+# Báo cáo
+# -------------------------
+def _parse_time(value, name):
+    # Có múi giờ (+07:00, Z) thì đổi về giờ địa phương như created_at
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise InvalidQuery(name)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment
+
+
+def _ticket(revenue, orders):
+    return round(revenue / orders, 2) if orders else 0
+
+
+def _top(items, names, limit):
+    ranked = sorted(items.items(), key=lambda entry: (-entry[1][0], -entry[1][1], entry[0]))[:limit]
+    return [{"item_id": item_id, "name": names.get(item_id), "quantity": quantity, "revenue": revenue}
+            for item_id, (quantity, revenue) in ranked]
+
+
+class AnalyticsQuery:
+    """Tham số báo cáo: ``granularity`` (hour/day), khoảng [``start``, ``end``)
+    làm tròn theo giờ, và số món bán chạy ``top`` mỗi mốc."""
+
+    def __init__(self, granularity="day", start=None, end=None, top=DEFAULT_TOP, now=None):
+        if granularity not in GRANULARITIES:
+            raise InvalidQuery("granularity")
+        if not 1 <= top <= MAX_TOP:
+            raise InvalidQuery("top")
+        now = now or datetime.now()
+        end = end or now + timedelta(hours=1)
+        if start is None:
+            start = end - timedelta(days=DEFAULT_DAYS[granularity])
+            if granularity == "day":
+                start = start.replace(hour=0)  # báo cáo theo ngày bắt đầu từ 0h
+        self.granularity = granularity
+        self.start = start.replace(minute=0, second=0, microsecond=0)
+        self.end = end.replace(minute=0, second=0, microsecond=0)
+        if self.start >= self.end or self.end - self.start > timedelta(days=MAX_DAYS):
+            raise InvalidQuery("khoảng thời gian")
+        self.top = top
+
+    @classmethod
+    def from_args(cls, args, now=None):
+        try:
+            top = int(args.get("top", DEFAULT_TOP))
+        except ValueError:
+            raise InvalidQuery("top")
+        start = args.get("from")
+        end = args.get("to")
+        return cls(
+            granularity=args.get("granularity", "day"),
+            start=_parse_time(start, "from") if start else None,
+            end=_parse_time(end, "to") if end else None,
+            top=top,
+            now=now,
+        )
+
+    def sales_sql(self, restaurant):
+        return SALES_SQL, (restaurant, self.start, self.end)
+
+    def items_sql(self, restaurant):
+        return ITEM_SALES_SQL, (restaurant, self.start, self.end)
+
+    def _key(self, bucket):
+        return bucket.date().isoformat() if self.granularity == "day" else bucket.isoformat()
+
+    def report(self, restaurant, sales_rows, item_rows, names):
+        """Gộp các dòng rollup theo giờ thành từng mốc giờ/ngày, kèm tổng cả khoảng.
+
+        ``names``: item_id -> tên món (snapshot menu)."""
+        buckets = OrderedDict()
+        totals = {"orders": 0, "revenue": 0, "cancelled": 0}
+        total_items = {}
+
+        def bucket_for(moment):
+            key = self._key(moment)
+            if key not in buckets:
+                buckets[key] = {"bucket": key, "orders": 0, "revenue": 0, "cancelled": 0, "items": {}}
+            return buckets[key]
+
+        for row in sorted(sales_rows, key=lambda row: row["bucket"]):
+            bucket = bucket_for(row["bucket"])
+            if row["status"] == CANCELLED:
+                bucket["cancelled"] += row["orders"]
+                totals["cancelled"] += row["orders"]
+                continue
+            for target in (bucket, totals):
+                target["orders"] += row["orders"]
+                target["revenue"] += row["revenue"]
+
+        for row in item_rows:
+            bucket = bucket_for(row["bucket"])
+            for items in (bucket["items"], total_items):
+                quantity, revenue = items.get(row["item_id"], (0, 0))
+                items[row["item_id"]] = (quantity + row["quantity"], revenue + row["revenue"])
+
+        result = []
+        for key in sorted(buckets):
+            bucket = buckets[key]
+            if not bucket["orders"] and not bucket["cancelled"]:
+                continue  # chỉ còn dòng đã bị trừ về 0
+            bucket["average_ticket"] = _ticket(bucket["revenue"], bucket["orders"])
+            bucket["top_items"] = _top(bucket.pop("items"), names, self.top)
+            result.append(bucket)
+
+        totals["average_ticket"] = _ticket(totals["revenue"], totals["orders"])
+        totals["top_items"] = _top(total_items, names, self.top)
+        return {
+            "restaurant": restaurant,
+            "granularity": self.granularity,
+            "from": self.start.isoformat(),
+            "to": self.end.isoformat(),
+            "totals": totals,
+            "buckets": result,
+        }
@@ -0,0 +1,396 @@
+"""Chế độ chạy async: cùng các route /api/menu, /api/cart, /api/order và
+/api/orders/... như main.py nhưng trên ASGI (Starlette + uvicorn) với driver
+MySQL async (aiomysql) và pool async.
+
+SQL (dialects.MYSQL), kiểm tra dữ liệu và serialize JSON dùng chung với
+main.py nên hai chế độ trả cùng một JSON. Đăng ký/đăng nhập, upload ảnh và
+stream SSE vẫn chạy ở app Flask.
+
+Chạy: python asgi.py  (hoặc: uvicorn asgi:app --app-dir backend --port 5001)
+"""
+import asyncio
+import contextlib
+import hashlib
+import os
+from datetime import datetime
+
+import aiomysql
+import pymysql
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+from starlette.routing import Route
+
+import analytics
+import main
+import repository
+from cart_view import build_cart_view
+from dialects import MYSQL as SQL
+from idempotency import CachedResponse, IdempotencyConflict, scope_key
+from menu_cache import negotiate, snapshot_headers
+from menu_search import InvalidQuery, MenuQuery
+from order_pages import OrderPage
+from serializers import ORDER_SUMMARY, RESTAURANT_ORDER
+from tokens import AccessDenied, InvalidToken, acting_user, check_restaurant
+
+pool = None
+
+
+# -------------------------
+# Async database pool
+# -------------------------
+async def create_pool():
+    return await aiomysql.create_pool(
+        host=main.DB_CONFIG["host"],
+        port=main.DB_CONFIG["port"],
+        user=main.DB_CONFIG["user"],
+        password=main.DB_CONFIG["password"],
+        db=main.DB_CONFIG["database"],
+        minsize=1,
+        maxsize=int(os.environ.get("DB_POOL_SIZE", 5)) + int(os.environ.get("DB_POOL_MAX_OVERFLOW", 10)),
+        pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", 3600)),
+        autocommit=False,
+    )
+
+
+class Database:
+    """Lấy kết nối từ pool async; rollback trước khi trả về pool như ConnectionPool."""
+
+    async def __aenter__(self):
+        self.conn = await pool.acquire()
+        return self.conn
+
+    async def __aexit__(self, *exc):
+        try:
+            await self.conn.rollback()
+        finally:
+            pool.release(self.conn)
+
+
+def json_response(payload, status=200):
+    # Dùng JSON provider của app Flask để giống hệt jsonify()
+    return Response(main._json_bytes(payload), status_code=status, media_type="application/json")
+
+
+def error_payload(e):
+    return {"success": False, "message": f"Lỗi: {str(e)}"}
+
+
+# -------------------------
+# Session tokens
+# -------------------------
+def session(request):
+    # Verify một lần mỗi request, giống hook load_session của main.py
+    if not hasattr(request.state, "session"):
+        header = request.headers.get("Authorization", "")
+        token = header[len("Bearer "):] if header.startswith("Bearer ") else request.query_params.get("token")
+        request.state.session = main.session_tokens.verify(token) if token else None
+    return request.state.session
+
+
+def request_user(request, claimed):
+    return acting_user(session(request), claimed, main.REQUIRE_SESSION_TOKEN)
+
+
+async def check_cart_owner(request, cursor, cart_id):
+    # Giống main._check_cart_owner, trong cùng transaction với lệnh ghi
+    if session(request) is None and not main.REQUIRE_SESSION_TOKEN:
+        return
+    await cursor.execute(SQL.cart_owner, (cart_id,))
+    row = await cursor.fetchone()
+    request_user(request, row[0] if row else None)
+
+
+async def invalid_token(request, exc):
+    return json_response({"success": False, "message": "Phiên đăng nhập không hợp lệ hoặc đã hết hạn!"}, 401)
+
+
+async def access_denied(request, exc):
+    return json_response({"success": False, "message": exc.message}, exc.status)
+
+
+# -------------------------
+# Idempotency keys
+# -------------------------
+async def with_idempotency(request, handler):
+    key = request.headers.get("Idempotency-Key")
+    if not key:
+        return json_response(await handler())
+
+    store = main.idempotency_store
+    owner = session(request)
+    scoped_key = scope_key(request.url.path, owner["id"] if owner else None, key)
+    fingerprint = hashlib.sha256(await request.body()).hexdigest()
+    try:
+        # Store có thể chờ request trùng đang chạy: không chặn event loop
+        cached = await asyncio.to_thread(store.begin, scoped_key, fingerprint)
+    except IdempotencyConflict:
+        return json_response({"success": False, "message": "Idempotency-Key đã dùng cho request khác!"}, 422)
+    except TimeoutError:
+        return json_response({"success": False, "message": "Request trước với cùng key vẫn đang xử lý!"}, 409)
+    if cached is not None:
+        return Response(cached.body, status_code=cached.status, media_type=cached.mimetype,
+                        headers={"Idempotent-Replayed": "true"})
+
+    try:
+        payload = await handler()
+    except BaseException:
+        await asyncio.to_thread(store.abort, scoped_key)
+        raise
+    response = json_response(payload)
+    if payload.get("success"):
+        await asyncio.to_thread(store.complete, scoped_key,
+                                CachedResponse(200, response.body, "application/json"))
+    else:
+        await asyncio.to_thread(store.abort, scoped_key)
+    return response
+
+
+# -------------------------
+# Menu
+# -------------------------
+async def load_menu_items():
+    async with Database() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(SQL.menu_items)
+            return [main._normalize_image(item) for item in await cursor.fetchall()]
+
+
+async def menu_snapshot():
+    snapshot, version = main.menu_cache.peek()
+    if snapshot is None:
+        snapshot = main.menu_cache.put(version, await load_menu_items())
+    return snapshot
+
+
+async def get_menu(request):
+    try:
+        snapshot = await menu_snapshot()
+        if not request.query_params:
+            status, body, encoding = negotiate(
+                snapshot, request.headers.get("If-None-Match"), request.headers.get("Accept-Encoding"))
+            return Response(body, status_code=status, media_type="application/json",
+                            headers=snapshot_headers(snapshot, encoding))
+
+        query = MenuQuery.from_args(request.query_params)
+        items, next_cursor = snapshot.index.search(query)
+        return json_response({"success": True, "items": items, "next_cursor": next_cursor})
+    except InvalidQuery as e:
+        return json_response({"success": False, "message": f"Tham số không hợp lệ: {str(e)}"})
+    except pymysql.MySQLError as e:
+        return json_response(error_payload(e))
+
+
+# -------------------------
+# Cart
+# -------------------------
+async def add_to_cart(request):
+    data = await request.json()
+    user_id = request_user(request, data.get("user_id"))
+
+    async def handler():
+        try:
+            async with Database() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(SQL.cart_upsert, (
+                        user_id, data.get("item_id"), data.get("quantity", 1)))
+                await conn.commit()
+            return {"success": True, "message": "Đã thêm vào giỏ hàng!"}
+        except pymysql.MySQLError as e:
+            return error_payload(e)
+
+    return await with_idempotency(request, handler)
+
+
+async def add_to_cart_batch(request):
+    data = await request.json()
+    user_id = request_user(request, data.get("user_id"))
+
+    async def handler():
+        try:
+            rows = main._cart_batch_rows(user_id, data.get("items"))
+        except ValueError as e:
+            return {"success": False, "message": str(e)}
+        try:
+            async with Database() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.executemany(SQL.cart_upsert, rows)
+                await conn.commit()
+            return {"success": True, "message": "Đã thêm vào giỏ hàng!", "count": len(rows)}
+        except pymysql.MySQLError as e:
+            return error_payload(e)
+
+    return await with_idempotency(request, handler)
+
+
+async def get_cart(request):
+    user_id = request_user(request, request.path_params["user_id"])
+    try:
+        menu = (await menu_snapshot()).by_id
+        async with Database() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(SQL.cart_lines, (user_id,))
+                lines = await cursor.fetchall()
+        return json_response({"success": True, **build_cart_view(lines, menu)})
+    except pymysql.MySQLError as e:
+        return json_response(error_payload(e))
+
+
+async def update_cart(request):
+    data = await request.json()
+    try:
+        async with Database() as conn:
+            async with conn.cursor() as cursor:
+                await check_cart_owner(request, cursor, data.get("cart_id"))
+                await cursor.execute(SQL.cart_update, (data.get("quantity"), data.get("cart_id")))
+            await conn.commit()
+        return json_response({"success": True, "message": "Đã cập nhật số lượng!"})
+    except pymysql.MySQLError as e:
+        return json_response(error_payload(e))
+
+
+async def remove_from_cart(request):
+    try:
+        async with Database() as conn:
+            async with conn.cursor() as cursor:
+                await check_cart_owner(request, cursor, request.path_params["cart_id"])
+                await cursor.execute(SQL.cart_remove, (request.path_params["cart_id"],))
+            await conn.commit()
+        return json_response({"success": True, "message": "Đã xóa khỏi giỏ hàng!"})
+    except pymysql.MySQLError as e:
+        return json_response(error_payload(e))
+
+
+# -------------------------
+# Orders
+# -------------------------
+async def create_order(request):
+    data = await request.json()
+    user_id = request_user(request, data.get("user_id"))
+
+    async def handler():
+        try:
+            async with Database() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute(SQL.order_cart, (user_id,))
+                    lines = await cursor.fetchall()
+                    view = {"items": []}
+                    if lines:
+                        # Giá/nhà hàng đọc trong transaction như repository.Orders.place_in
+                        await cursor.execute(*repository.in_list(
+                            SQL.order_menu, sorted({line["item_id"] for line in lines})))
+                        view = build_cart_view(lines, {item["id"]: item for item in await cursor.fetchall()})
+                    if not view["items"]:
+                        return {"success": False, "message": "Giỏ hàng trống!"}
+
+                    orders, groups = repository.plan_orders(user_id, view)
+                    for order in orders:
+                        await cursor.execute(SQL.order_insert, (user_id, order["restaurant"], order["total_amount"]))
+                        order["id"] = cursor.lastrowid
+                    await cursor.executemany(SQL.order_items, repository.order_item_rows(orders, groups))
+                    for sql, params in analytics.order_statements([order["id"] for order in orders]):
+                        await cursor.execute(sql, params)
+                    await cursor.execute(*repository.in_list(
+                        SQL.order_clear, [item["id"] for item in view["items"]], user_id))
+                await conn.commit()
+        except pymysql.MySQLError as e:
+            return error_payload(e)
+
+        created_at = datetime.now()
+        for order in orders:
+            order["created_at"] = created_at
+            main._publish_order("created", order)
+        await asyncio.to_thread(main._enqueue_order_jobs, "created", orders)
+        return {"success": True, "message": "Đặt hàng thành công!",
+                "orders": [order["id"] for order in orders]}
+
+    return await with_idempotency(request, handler)
+
+
+async def order_page(request, select, schema, where, value):
+    try:
+        page = OrderPage.from_args(request.query_params, main.ORDER_SYNC_OVERLAP)
+        async with Database() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(*page.sql(select, where, (value,)))
+                orders = schema.rows(await cursor.fetchall())
+        return json_response(page.result(orders))
+    except InvalidQuery as e:
+        return json_response({"success": False, "message": f"Tham số không hợp lệ: {str(e)}"})
+    except pymysql.MySQLError as e:
+        return json_response(error_payload(e))
+
+
+async def get_user_orders(request):
+    return await order_page(request, SQL.user_orders, ORDER_SUMMARY, "WHERE o.user_id = %s",
+                            request_user(request, request.path_params["user_id"]))
+
+
+async def get_restaurant_orders(request):
+    check_restaurant(session(request), request.path_params["restaurant_name"], main.REQUIRE_SESSION_TOKEN)
+    return await order_page(request, SQL.restaurant_orders, RESTAURANT_ORDER, "WHERE o.restaurant = %s",
+                            request.path_params["restaurant_name"])
+
+
+async def update_order_status(request):
+    order_id = request.path_params["order_id"]
+    status = (await request.json()).get("status")
+    try:
+        async with Database() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(SQL.order_status, (order_id,))
+                order = await cursor.fetchone()
+                if order:
+                    check_restaurant(session(request), order["restaurant"], main.REQUIRE_SESSION_TOKEN)
+                await cursor.execute(SQL.order_set_status, (status, order_id))
+                if order:
+                    for sql, params in analytics.status_statements(order_id, order.get("status"), status):
+                        await cursor.execute(sql, params)
+            await conn.commit()
+    except pymysql.MySQLError as e:
+        return json_response(error_payload(e))
+
+    if order:
+        event = {"id": order_id, "user_id": order["user_id"], "restaurant": order["restaurant"], "status": status}
+        main._publish_order("status", event)
+        await asyncio.to_thread(main._enqueue_order_jobs, "status", [event])
+    return json_response({"success": True, "message": "Cập nhật trạng thái thành công!"})
+
+
+# -------------------------
+# App
+# -------------------------
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    global pool
+    pool = await create_pool()
+    try:
+        yield
+    finally:
+        pool.close()
+        await pool.wait_closed()
+
+
+app = Starlette(
+    routes=[
+        Route("/api/menu", get_menu, methods=["GET"]),
+        Route("/api/cart", add_to_cart, methods=["POST"]),
+        Route("/api/cart/batch", add_to_cart_batch, methods=["POST"]),
+        Route("/api/cart/update", update_cart, methods=["PUT"]),
+        Route("/api/cart/{user_id:int}", get_cart, methods=["GET"]),
+        Route("/api/cart/{cart_id:int}", remove_from_cart, methods=["DELETE"]),
+        Route("/api/order", create_order, methods=["POST"]),
+        Route("/api/orders/user/{user_id:int}", get_user_orders, methods=["GET"]),
+        Route("/api/orders/restaurant/{restaurant_name}", get_restaurant_orders, methods=["GET"]),
+        Route("/api/orders/{order_id:int}/status", update_order_status, methods=["PUT"]),
+    ],
+    exception_handlers={InvalidToken: invalid_token, AccessDenied: access_denied},
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])],
+    lifespan=lifespan,
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, port=int(os.environ.get("PORT", 5001)))
@@ -0,0 +1,417 @@
+import atexit
+import contextlib
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+from collections import OrderedDict
+
+from dialects import MYSQL
+
+log = logging.getLogger(__name__)
+
+
+# -------------------------
+# Cart stores
+# -------------------------
+# Câu SQL theo dialect (dialects.py); tên cũ giữ cho MySQL
+CART_UPSERT_SQL = MYSQL.cart_upsert
+CART_SET_SQL = MYSQL.cart_set
+CART_DELETE_ITEM_SQL = MYSQL.cart_delete_item
+CART_LINES_SQL = MYSQL.cart_lines
+CART_OWNER_SQL = MYSQL.cart_owner
+
+# Số id tạm còn nhớ sau khi giỏ được ghi xuống bảng / bỏ khỏi bộ nhớ
+PROVISIONAL_IDS = 100000
+
+
+class TableCartStore:
+    """Giỏ hàng đọc/ghi thẳng bảng cart, mỗi thao tác một transaction.
+
+    ``read(scope)``: kết nối đọc giỏ (replica, xem repository.Repository).
+    """
+
+    def __init__(self, get_connection, dialect=MYSQL, read=None):
+        self._get_connection = get_connection
+        self._read = read or (lambda scope=None: get_connection())
+        self._dialect = dialect
+
+    @contextlib.contextmanager
+    def _cursor(self, commit=False, dictionary=False, prepared=True, read=None):
+        # Câu đơn dùng prepared statement (nếu dialect hỗ trợ); executemany
+        # dùng cursor thường để connector gộp thành một INSERT nhiều dòng
+        db = self._read(read) if read else self._get_connection()
+        if prepared and self._dialect.prepared:
+            cursor = db.cursor(prepared=True, dictionary=dictionary)
+        else:
+            cursor = db.cursor(dictionary=dictionary)
+        try:
+            yield cursor
+            if commit:
+                db.commit()
+        finally:
+            cursor.close()
+            db.close()
+
+    def lines(self, user_id):
+        """Các dòng giỏ [{"id", "item_id", "quantity"}]; thông tin món lấy từ cart_view."""
+        with self._cursor(dictionary=True, read=("user", user_id)) as cursor:
+            cursor.execute(self._dialect.cart_lines, (user_id,))
+            return cursor.fetchall()
+
+    def add(self, rows):
+        """``rows``: [(user_id, item_id, quantity)], cộng dồn vào dòng đã có."""
+        with self._cursor(commit=True, prepared=len(rows) == 1) as cursor:
+            if len(rows) == 1:
+                cursor.execute(self._dialect.cart_upsert, rows[0])
+            else:
+                cursor.executemany(self._dialect.cart_upsert, rows)
+
+    def owner(self, cart_id):
+        """user_id của dòng giỏ ``cart_id``; None nếu không có."""
+        with self._cursor() as cursor:
+            cursor.execute(self._dialect.cart_owner, (cart_id,))
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def update(self, cart_id, quantity):
+        with self._cursor(commit=True) as cursor:
+            cursor.execute(self._dialect.cart_update, (quantity, cart_id))
+
+    def remove(self, cart_id):
+        with self._cursor(commit=True) as cursor:
+            cursor.execute(self._dialect.cart_remove, (cart_id,))
+
+    @contextlib.contextmanager
+    def checkout(self, user_id):
+        # Bảng cart luôn là bản mới nhất: không cần làm gì
+        yield
+
+
+class WriteBehindCartStore:
+    """Giỏ hàng giữ trong bộ nhớ, ghi xuống bảng cart theo lô ở nền.
+
+    - Đọc: O(1) từ bộ nhớ; giỏ chưa có thì nạp từ bảng cart (read-through).
+    - Ghi: cập nhật bộ nhớ, đánh dấu (user_id, item_id) bẩn và ghi vào
+      ``journal`` (nếu có); thread nền flush mỗi ``flush_interval`` giây.
+    - Crash: khởi động lại đọc journal, các thay đổi chưa flush được nạp lại
+      như thay đổi bẩn rồi flush như bình thường.
+    - ``checkout(user_id)``: chặn thao tác khác trên giỏ đó, flush, và bỏ giỏ
+      khỏi bộ nhớ khi xong để create_order đọc đúng bảng cart.
+
+    Dữ liệu nằm trong process: chỉ dùng khi chạy một worker (hoặc định tuyến
+    cố định mỗi user vào một worker); ``serve`` từ chối CART_STORE=memory khi
+    --workers > 1. Journal được nạp lại và mở ở lần dùng đầu tiên trong
+    process (hoặc ``open()`` sau fork), không phải lúc tạo store ở master.
+    """
+
+    def __init__(self, get_connection, journal=None, flush_interval=1.0,
+                 max_users=10000, fsync=False, dialect=MYSQL):
+        self._get_connection = get_connection
+        self._dialect = dialect
+        self.flush_interval = flush_interval
+        self.max_users = max_users
+        self._fsync = fsync
+        self._carts = OrderedDict()  # user_id -> {item_id: [cart_id, quantity]}
+        self._owners = {}            # cart_id -> (user_id, item_id)
+        self._dirty = {}             # (user_id, item_id) -> quantity, None = xoá
+        self._checking_out = set()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._flushes = 0
+        # Id tạm cho dòng chưa được ghi xuống bảng (không trùng id AUTO_INCREMENT thật).
+        # Client có thể giữ id tạm sau khi dòng đã có id thật: nhớ (user_id, item_id)
+        # của nó để update/remove vẫn tìm được dòng
+        self._provisional_ids = None
+        self._provisional = OrderedDict()  # id tạm -> (user_id, item_id)
+        self._flusher = None
+        self._stop = threading.Event()
+        self._journal_path = journal
+        self._journal = None
+        self._opened = False
+        atexit.register(self.close)
+
+    # -------- journal --------
+    def open(self):
+        """Nạp lại journal và mở để ghi trong process hiện tại (gọi sau fork)."""
+        with self._lock:
+            self._open()
+
+    def _open(self):
+        # Gọi khi giữ _lock; chỉ chạy lần đầu trong process
+        if self._opened:
+            return
+        self._opened = True
+        # Id tạm bắt đầu ngẫu nhiên mỗi process: id client còn giữ từ lần
+        # chạy trước không trỏ nhầm sang dòng mới (vẫn < 2**53 cho JSON)
+        self._provisional_ids = itertools.count(10 ** 15 + random.randrange(10 ** 15))
+        if not self._journal_path:
+            return
+        self._recover()
+        self._journal = open(self._journal_path, "a", encoding="utf-8")
+        if self._dirty:
+            self._start_flusher()
+
+    def _recover(self):
+        try:
+            with open(self._journal_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        user_id, item_id, quantity = json.loads(line)
+                    except ValueError:
+                        break  # dòng cuối ghi dở khi crash
+                    self._dirty[(user_id, item_id)] = quantity
+        except FileNotFoundError:
+            return
+        if self._dirty:
+            log.info("cart journal: %d thay đổi chưa flush được nạp lại", len(self._dirty))
+
+    def _log(self, user_id, item_id, quantity):
+        if self._journal is None:
+            return
+        self._journal.write(json.dumps([user_id, item_id, quantity]) + "\n")
+        self._journal.flush()
+        if self._fsync:
+            os.fsync(self._journal.fileno())
+
+    def _compact_journal(self):
+        # Gọi khi giữ _lock: journal chỉ còn các thay đổi chưa flush
+        if self._journal is None:
+            return
+        tmp = self._journal_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for (user_id, item_id), quantity in self._dirty.items():
+                f.write(json.dumps([user_id, item_id, quantity]) + "\n")
+        self._journal.close()
+        os.replace(tmp, self._journal_path)
+        self._journal = open(self._journal_path, "a", encoding="utf-8")
+
+    # -------- bộ nhớ --------
+    def _load(self, user_id):
+        """Trả giỏ của user (gọi khi giữ _lock, có thể nhả lock để đọc DB)."""
+        self._open()
+        while True:
+            cart = self._carts.get(user_id)
+            if cart is not None:
+                self._carts.move_to_end(user_id)
+                return cart
+            flushes = self._flushes
+            self._lock.release()
+            try:
+                db = self._get_connection()
+                try:
+                    cursor = db.cursor(dictionary=True)
+                    cursor.execute(self._dialect.cart_lines, (user_id,))
+                    rows = cursor.fetchall()
+                    cursor.close()
+                finally:
+                    db.close()
+            finally:
+                self._lock.acquire()
+            # Có flush xen giữa thì bảng có thể đã đổi: đọc lại
+            if flushes != self._flushes or user_id in self._carts:
+                continue
+            cart = {row["item_id"]: [row["id"], row["quantity"]] for row in rows}
+            for (owner, item_id), quantity in self._dirty.items():
+                if owner != user_id:
+                    continue
+                if quantity is None:
+                    cart.pop(item_id, None)
+                elif item_id in cart:
+                    cart[item_id][1] = quantity
+                else:
+                    cart[item_id] = [self._new_id(user_id, item_id), quantity]
+            for item_id, line in cart.items():
+                self._owners[line[0]] = (user_id, item_id)
+            self._carts[user_id] = cart
+            self._evict()
+            return cart
+
+    def _evict(self):
+        # Bỏ các giỏ ít dùng nhất, chỉ giỏ không còn thay đổi chưa flush
+        if len(self._carts) <= self.max_users:
+            return
+        dirty_users = {user_id for user_id, _ in self._dirty}
+        for user_id in list(self._carts)[:-1]:
+            if len(self._carts) <= self.max_users:
+                break
+            if user_id not in dirty_users and user_id not in self._checking_out:
+                self._drop(user_id)
+
+    def _drop(self, user_id):
+        for line in self._carts.pop(user_id, {}).values():
+            self._owners.pop(line[0], None)
+
+    def _new_id(self, user_id, item_id):
+        cart_id = next(self._provisional_ids)
+        self._provisional[cart_id] = (user_id, item_id)
+        while len(self._provisional) > PROVISIONAL_IDS:
+            self._provisional.popitem(last=False)
+        return cart_id
+
+    def _locate(self, cart_id):
+        self._open()
+        return self._owners.get(cart_id) or self._provisional.get(cart_id)
+
+    def _wait_checkout(self, user_id):
+        while user_id in self._checking_out:
+            self._changed.wait()
+
+    def _load_for_write(self, user_id):
+        # _load có thể nhả lock: checkout của user có thể bắt đầu trong lúc đó
+        while True:
+            self._wait_checkout(user_id)
+            cart = self._load(user_id)
+            if user_id not in self._checking_out:
+                return cart
+
+    def _set(self, user_id, item_id, quantity):
+        self._open()
+        self._dirty[(user_id, item_id)] = quantity
+        self._log(user_id, item_id, quantity)
+        self._start_flusher()
+
+    def owner(self, cart_id):
+        with self._lock:
+            owner = self._locate(cart_id)
+        if owner is not None:
+            return owner[0]
+        db = self._get_connection()
+        try:
+            cursor = db.cursor()
+            cursor.execute(self._dialect.cart_owner, (cart_id,))
+            row = cursor.fetchone()
+            cursor.close()
+        finally:
+            db.close()
+        return row[0] if row else None
+
+    # -------- API giống TableCartStore --------
+    def lines(self, user_id):
+        with self._lock:
+            cart = self._load(user_id)
+            return [{"id": cart_id, "item_id": item_id, "quantity": quantity}
+                    for item_id, (cart_id, quantity) in cart.items()]
+
+    def add(self, rows):
+        with self._lock:
+            for user_id, item_id, quantity in rows:
+                cart = self._load_for_write(user_id)
+                line = cart.get(item_id)
+                if line is None:
+                    line = cart[item_id] = [self._new_id(user_id, item_id), 0]
+                    self._owners[line[0]] = (user_id, item_id)
+                line[1] += quantity
+                self._set(user_id, item_id, line[1])
+
+    def _change(self, cart_id, quantity):
+        user_id = self.owner(cart_id)
+        if user_id is None:
+            return
+        with self._lock:
+            cart = self._load_for_write(user_id)
+            owner = self._locate(cart_id)
+            # Dòng đã bị xoá (hoặc đã đặt hàng): bỏ qua như UPDATE 0 dòng
+            if owner is None or owner[1] not in cart:
+                return
+            item_id = owner[1]
+            if quantity is None:
+                self._owners.pop(cart.pop(item_id)[0], None)
+            else:
+                cart[item_id][1] = quantity
+            self._set(user_id, item_id, quantity)
+
+    def update(self, cart_id, quantity):
+        self._change(cart_id, quantity)
+
+    def remove(self, cart_id):
+        self._change(cart_id, None)
+
+    @contextlib.contextmanager
+    def checkout(self, user_id):
+        with self._lock:
+            self._wait_checkout(user_id)
+            self._checking_out.add(user_id)
+        try:
+            self.flush(user_id)
+            yield
+        finally:
+            with self._lock:
+                # Đơn đã tạo thì bảng cart đã bị xoá: nạp lại khi cần
+                if not any(owner == user_id for owner, _ in self._dirty):
+                    self._drop(user_id)
+                self._checking_out.discard(user_id)
+                self._changed.notify_all()
+
+    # -------- write-behind --------
+    def flush(self, user_id=None):
+        """Ghi các thay đổi chưa flush (của ``user_id`` hoặc tất cả); trả số dòng."""
+        with self._flush_lock:
+            with self._lock:
+                self._open()
+                pending = {key: quantity for key, quantity in self._dirty.items()
+                           if user_id is None or key[0] == user_id}
+                for key in pending:
+                    del self._dirty[key]
+            if not pending:
+                return 0
+
+            upserts = sorted((u, i, q) for (u, i), q in pending.items() if q is not None)
+            deletes = sorted((u, i) for (u, i), q in pending.items() if q is None)
+            try:
+                db = self._get_connection()
+                try:
+                    cursor = db.cursor()
+                    if upserts:
+                        cursor.executemany(self._dialect.cart_set, upserts)
+                    if deletes:
+                        cursor.executemany(self._dialect.cart_delete_item, deletes)
+                    db.commit()
+                    cursor.close()
+                finally:
+                    db.close()
+            except BaseException:
+                with self._lock:
+                    # Giữ lại để lần sau ghi, trừ khi đã có thay đổi mới hơn
+                    for key, quantity in pending.items():
+                        self._dirty.setdefault(key, quantity)
+                raise
+
+            with self._lock:
+                self._flushes += 1
+                self._compact_journal()
+            return len(pending)
+
+    def _start_flusher(self):
+        # Tạo thread lười (không tạo ở master gunicorn trước khi fork)
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flush_loop, name="cart-flusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                log.exception("cart flush lỗi, sẽ thử lại")
+
+    def pending(self):
+        with self._lock:
+            self._open()
+            return len(self._dirty)
+
+    def close(self):
+        self._stop.set()
+        # Master (preload) chưa dùng store thì không đụng journal của worker
+        if not self._opened:
+            return
+        try:
+            self.flush()
+        except Exception:
+            log.exception("cart flush lúc tắt lỗi; thay đổi còn trong journal")
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
@@ -0,0 +1,46 @@
+from collections import OrderedDict
+
+SHIPPING_FEE = 30000
+
+
+# -------------------------
+# Cart view
+# -------------------------
+def build_cart_view(lines, menu, shipping_fee=SHIPPING_FEE):
+    """Dựng giỏ hàng từ các dòng cart (id, item_id, quantity) và snapshot menu.
+
+    ``menu``: dict item_id -> món (``MenuSnapshot.by_id``, ảnh đã chuẩn hoá),
+    nên tên/giá/ảnh/nhà hàng luôn theo menu hiện tại mà không cần JOIN. Trả
+    các món, tạm tính và phí ship theo từng nhà hàng (mỗi nhà hàng một đơn)
+    và tổng cả giỏ.
+    """
+    items = []
+    restaurants = OrderedDict()
+    for line in lines:
+        menu_item = menu.get(line["item_id"])
+        if menu_item is None:
+            continue  # món đã bị xoá khỏi menu (giống JOIN trước đây)
+        item = {"id": line["id"], "item_id": line["item_id"], "quantity": line["quantity"],
+                "name": menu_item["name"], "price": menu_item["price"],
+                "image": menu_item.get("image"), "restaurant": menu_item.get("restaurant")}
+        if menu_item.get("srcset"):
+            item["srcset"] = menu_item["srcset"]
+        items.append(item)
+
+        group = restaurants.get(item["restaurant"])
+        if group is None:
+            group = restaurants[item["restaurant"]] = {
+                "restaurant": item["restaurant"], "items": [], "subtotal": 0, "shipping_fee": shipping_fee}
+        group["items"].append(item["id"])
+        group["subtotal"] += item["price"] * item["quantity"]
+
+    for group in restaurants.values():
+        group["total"] = group["subtotal"] + group["shipping_fee"]
+    groups = list(restaurants.values())
+    return {
+        "items": items,
+        "restaurants": groups,
+        "subtotal": sum(group["subtotal"] for group in groups),
+        "shipping_fee": sum(group["shipping_fee"] for group in groups),
+        "total": sum(group["total"] for group in groups),
+    }
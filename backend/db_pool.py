@@ -0,0 +1,185 @@
+import threading
+import time
+from collections import deque
+
+from mysql.connector.errors import PoolError
+
+
+# -------------------------
+# Connection pool
+# -------------------------
+class PoolTimeout(PoolError):
+    """Hết thời gian chờ lấy kết nối từ pool."""
+
+
+class PooledConnection:
+    """Bọc kết nối thật: close() trả kết nối về pool thay vì đóng socket."""
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise AttributeError(name)
+        return getattr(raw, name)
+
+    def close(self):
+        if self._raw is None:
+            return
+        raw, self._raw = self._raw, None
+        self._pool._release(raw, self._created_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConnectionPool:
+    """Pool kết nối có giới hạn overflow, ping khi checkout và recycle theo tuổi.
+
+    ``creator`` là hàm trả về một kết nối mới (mysql.connector.connect hoặc
+    một đối tượng giả lập có cursor/commit/rollback/close/ping).
+    """
+
+    def __init__(self, creator, size=5, max_overflow=10, timeout=30.0,
+                 recycle=3600, pre_ping=True, clock=time.monotonic):
+        self._creator = creator
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self._clock = clock
+        self._idle = deque()  # (raw, created_at)
+        self._opened = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "timeouts": 0,
+            "created": 0,
+            "recycled": 0,
+            "ping_failures": 0,
+            "discarded": 0,
+        }
+
+    # Lấy kết nối từ pool
+    def connect(self):
+        deadline = None
+        waited = False
+        started = self._clock()
+        with self._cond:
+            while True:
+                if self._idle:
+                    raw, created_at = self._idle.pop()
+                    break
+                if self._opened < self.size + self.max_overflow:
+                    self._opened += 1
+                    raw = None
+                    break
+                if deadline is None:
+                    deadline = started + self.timeout
+                    waited = True
+                    self._stats["waits"] += 1
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    self._stats["wait_time"] += self._clock() - started
+                    raise PoolTimeout("Hết thời gian chờ kết nối database")
+                self._cond.wait(remaining)
+            self._stats["checkouts"] += 1
+            if waited:
+                self._stats["wait_time"] += self._clock() - started
+
+        try:
+            if raw is None:
+                raw, created_at = self._create()
+            else:
+                raw, created_at = self._validate(raw, created_at)
+        except Exception:
+            self._forget()
+            raise
+        return PooledConnection(self, raw, created_at)
+
+    def _create(self):
+        raw = self._creator()
+        with self._cond:
+            self._stats["created"] += 1
+        return raw, self._clock()
+
+    # Kiểm tra kết nối idle: quá tuổi thì tạo mới, ping lỗi thì tạo mới
+    def _validate(self, raw, created_at):
+        if self.recycle is not None and self._clock() - created_at > self.recycle:
+            self._close_quietly(raw)
+            with self._cond:
+                self._stats["recycled"] += 1
+            return self._create()
+        if self.pre_ping:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                self._close_quietly(raw)
+                with self._cond:
+                    self._stats["ping_failures"] += 1
+                return self._create()
+        return raw, created_at
+
+    # Trả kết nối về pool, rollback để không giữ snapshot/transaction cũ
+    def _release(self, raw, created_at):
+        try:
+            raw.rollback()
+        except Exception:
+            self._close_quietly(raw)
+            with self._cond:
+                self._stats["discarded"] += 1
+            self._forget()
+            return
+
+        with self._cond:
+            if len(self._idle) >= self.size:
+                overflow = True
+            else:
+                overflow = False
+                self._idle.append((raw, created_at))
+                self._cond.notify()
+        if overflow:
+            self._close_quietly(raw)
+            self._forget()
+
+    def _forget(self):
+        with self._cond:
+            self._opened -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    # Đóng toàn bộ kết nối idle (dùng khi fork worker hoặc tắt app)
+    def dispose(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._opened -= len(idle)
+            self._cond.notify_all()
+        for raw, _ in idle:
+            self._close_quietly(raw)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["size"] = self.size
+            stats["max_overflow"] = self.max_overflow
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._opened - len(self._idle)
+            stats["opened"] = self._opened
+        return stats
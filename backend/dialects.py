@@ -0,0 +1,120 @@
+from serializers import CART_LINE, MENU_ITEM, ORDER_SUMMARY, RESTAURANT_ORDER
+
+
+# -------------------------
+# SQL dialects
+# -------------------------
+class Dialect:
+    """Các câu SQL của repository (users, menu, cart, orders) cho MySQL.
+
+    Backend khác kế thừa và chỉ ghi đè các câu khác cú pháp. Mọi câu dùng
+    placeholder %s (kết nối SQLite tự đổi sang ?).
+    """
+
+    name = "mysql"
+    # Câu đơn chạy bằng server-side prepared statement (cursor(prepared=True)),
+    # được giữ lại trên từng kết nối; executemany vẫn dùng text protocol để
+    # connector gộp thành một INSERT nhiều dòng
+    prepared = True
+    # False: SELECT ... FOR UPDATE khoá các dòng cần sửa.
+    # True: không có khoá dòng, phải mở transaction ghi trước khi đọc
+    lock_by_transaction = False
+
+    # users
+    user_insert = "INSERT INTO user (username, email, password, role) VALUES (%s, %s, %s, %s)"
+    user_by_username = "SELECT id, username, email, password, role FROM user WHERE username=%s"
+    user_set_password = "UPDATE user SET password=%s WHERE id=%s"
+
+    # menu
+    menu_items = f"SELECT {MENU_ITEM.select} FROM menu_items"
+    menu_insert = """
+            INSERT INTO menu_items (name, price, description, category, delivery_time, distance, badge, restaurant, image)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+        """
+
+    # cart
+    cart_upsert = """
+    INSERT INTO cart (user_id, item_id, quantity) VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE quantity = quantity + VALUES(quantity)
+"""
+    # Write-behind ghi số lượng tuyệt đối (không cộng dồn) nên ghi lại nhiều lần vẫn đúng
+    cart_set = """
+    INSERT INTO cart (user_id, item_id, quantity) VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE quantity = VALUES(quantity)
+"""
+    cart_delete_item = "DELETE FROM cart WHERE user_id = %s AND item_id = %s"
+    cart_lines = f"SELECT {CART_LINE.select} FROM cart WHERE user_id = %s"
+    cart_owner = "SELECT user_id FROM cart WHERE id = %s"
+    cart_update = "UPDATE cart SET quantity = %s WHERE id = %s"
+    cart_remove = "DELETE FROM cart WHERE id = %s"
+
+    # orders: khoá giỏ của user để hai lần đặt hàng song song không tạo đơn trùng
+    order_cart = f"SELECT {CART_LINE.select} FROM cart WHERE user_id = %s FOR UPDATE"
+    # Mỗi đơn một INSERT để lấy đúng id (lastrowid) của từng đơn
+    order_insert = "INSERT INTO orders (user_id, restaurant, total_amount, status) VALUES (%s, %s, %s, 'pending')"
+    order_items = "INSERT INTO order_items (order_id, item_id, quantity, price) VALUES (%s, %s, %s, %s)"
+    # Giá/nhà hàng của các món trong giỏ đọc trong transaction đặt hàng, và
+    # chỉ xoá các dòng giỏ đã đặt ({ids}: xem repository.in_list)
+    order_menu = "SELECT id, name, price, restaurant FROM menu_items WHERE id IN ({ids})"
+    order_clear = "DELETE FROM cart WHERE user_id = %s AND id IN ({ids})"
+    order_status = "SELECT user_id, restaurant, status FROM orders WHERE id=%s FOR UPDATE"
+    order_set_status = "UPDATE orders SET status=%s WHERE id=%s"
+    # Lịch sử đơn đọc bằng cursor tuple rồi ghép dict theo schema
+    user_orders = f"SELECT {ORDER_SUMMARY.select} FROM orders o"
+    restaurant_orders = f"SELECT {RESTAURANT_ORDER.select} FROM orders o JOIN user u ON o.user_id = u.id"
+
+    # idempotency_keys (IDEMPOTENCY_STORE=table): key đang chạy giữ lease đến
+    # locked_until, hết lease (request chết giữa chừng) thì lần thử lại lấy lại key
+    idem_expire = "DELETE FROM idempotency_keys WHERE idem_key = %s AND created_at < NOW() - INTERVAL %s SECOND"
+    idem_insert = """
+    INSERT IGNORE INTO idempotency_keys (idem_key, fingerprint, status, locked_until)
+    VALUES (%s, %s, %s, NOW(6) + INTERVAL %s SECOND)
+"""
+    idem_take_over = """
+    UPDATE idempotency_keys SET locked_until = NOW(6) + INTERVAL %s SECOND
+    WHERE idem_key = %s AND fingerprint = %s AND status = %s AND locked_until < NOW(6)
+"""
+
+
+def _sqlite_now(sign):
+    # Giờ địa phương cộng/trừ %s giây, cùng dạng với cột mặc định của sqlite_db
+    return f"strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime', '{sign}' || %s || ' seconds')"
+
+
+class SQLiteDialect(Dialect):
+    """SQLite (sqlite_db.py): upsert bằng ON CONFLICT, không có FOR UPDATE.
+
+    sqlite3 tự giữ statement đã biên dịch trên từng kết nối nên không cần
+    prepared cursor.
+    """
+
+    name = "sqlite"
+    prepared = False
+    lock_by_transaction = True
+
+    cart_upsert = """
+    INSERT INTO cart (user_id, item_id, quantity) VALUES (%s, %s, %s)
+    ON CONFLICT (user_id, item_id) DO UPDATE SET quantity = quantity + excluded.quantity
+"""
+    cart_set = """
+    INSERT INTO cart (user_id, item_id, quantity) VALUES (%s, %s, %s)
+    ON CONFLICT (user_id, item_id) DO UPDATE SET quantity = excluded.quantity
+"""
+    order_cart = f"SELECT {CART_LINE.select} FROM cart WHERE user_id = %s"
+    order_status = "SELECT user_id, restaurant, status FROM orders WHERE id=%s"
+
+    idem_expire = f"DELETE FROM idempotency_keys WHERE idem_key = %s AND created_at < {_sqlite_now('-')}"
+    idem_insert = f"""
+    INSERT OR IGNORE INTO idempotency_keys (idem_key, fingerprint, status, locked_until)
+    VALUES (%s, %s, %s, {_sqlite_now('+')})
+"""
+    idem_take_over = f"""
+    UPDATE idempotency_keys SET locked_until = {_sqlite_now('+')}
+    WHERE idem_key = %s AND fingerprint = %s AND status = %s
+      AND locked_until < strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')
+"""
+
+
+MYSQL = Dialect()
+SQLITE = SQLiteDialect()
+DIALECTS = {dialect.name: dialect for dialect in (MYSQL, SQLITE)}
@@ -0,0 +1,105 @@
+import itertools
+import queue
+import threading
+from collections import deque
+
+
+# -------------------------
+# Order events pub/sub
+# -------------------------
+class Event:
+    def __init__(self, id, channel, name, data):
+        self.id = id
+        self.channel = channel
+        self.name = name
+        self.data = data
+
+
+class Subscription:
+    def __init__(self, broker, channels, maxsize):
+        self.broker = broker
+        self.channels = channels
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # Client đọc chậm: bỏ sự kiện, client tự tải lại khi thấy khoảng trống id
+            self.dropped += 1
+
+    def get(self, timeout=None):
+        """Trả Event tiếp theo, hoặc None nếu hết thời gian chờ."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Broker pub/sub trong process, giữ lại vài sự kiện gần nhất mỗi kênh
+    để client kết nối lại (Last-Event-ID) không bỏ lỡ thay đổi.
+
+    Chỉ phân phát trong cùng một process; khi chạy nhiều worker cần thay bằng
+    broker dùng chung có cùng giao diện publish/subscribe/unsubscribe.
+    """
+
+    def __init__(self, history=100, queue_size=1000):
+        self.history = history
+        self.queue_size = queue_size
+        self._ids = itertools.count(1)
+        self._subscribers = {}  # channel -> set(Subscription)
+        self._recent = {}  # channel -> deque(Event)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, name, data):
+        with self._lock:
+            event = Event(next(self._ids), channel, name, data)
+            recent = self._recent.get(channel)
+            if recent is None:
+                recent = self._recent[channel] = deque(maxlen=self.history)
+            recent.append(event)
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+        return event
+
+    def subscribe(self, channels, last_event_id=None):
+        subscription = Subscription(self, list(channels), self.queue_size)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+            if last_event_id is not None:
+                missed = sorted(
+                    (e for channel in subscription.channels
+                     for e in self._recent.get(channel, ()) if e.id > last_event_id),
+                    key=lambda e: e.id
+                )
+                for event in missed:
+                    subscription.put(event)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+def restaurant_channel(restaurant):
+    return f"restaurant:{restaurant}"
@@ -0,0 +1,218 @@
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, g, jsonify, make_response, request
+
+from dialects import MYSQL
+
+
+# -------------------------
+# Idempotency keys
+# -------------------------
+PENDING = "pending"
+DONE = "done"
+
+
+class IdempotencyConflict(Exception):
+    """Key đã được dùng cho một request khác nội dung."""
+
+
+class CachedResponse:
+    def __init__(self, status, body, mimetype):
+        self.status = status
+        self.body = body
+        self.mimetype = mimetype
+
+
+class MemoryIdempotencyStore:
+    """Lưu response theo key trong bộ nhớ: LRU có giới hạn và TTL.
+
+    Request trùng key đến khi request đầu còn đang chạy sẽ chờ kết quả của
+    request đầu thay vì chạy lại handler.
+    """
+
+    def __init__(self, max_entries=10000, ttl=24 * 3600, wait_timeout=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self._entries = OrderedDict()  # key -> [state, fingerprint, response, event, expires]
+        self._lock = threading.Lock()
+
+    def begin(self, key, fingerprint):
+        """Trả None nếu caller được chạy handler, hoặc CachedResponse để phát lại."""
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None or entry[4] < time.monotonic():
+                    self._entries[key] = [PENDING, fingerprint, None, threading.Event(),
+                                          time.monotonic() + self.ttl]
+                    self._entries.move_to_end(key)
+                    self._evict()
+                    return None
+                if entry[1] != fingerprint:
+                    raise IdempotencyConflict(key)
+                self._entries.move_to_end(key)
+                if entry[0] == DONE:
+                    return entry[2]
+                event = entry[3]
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(key)
+            event.wait(remaining)
+
+    def complete(self, key, response):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry[0] = DONE
+            entry[2] = response
+            entry[3].set()
+
+    def abort(self, key):
+        # Handler lỗi: bỏ key để lần thử lại được chạy thật
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry[3].set()
+
+    def _evict(self):
+        # Bỏ các key đã xong cũ nhất, không bỏ key đang chạy
+        if len(self._entries) <= self.max_entries:
+            return
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_entries:
+                break
+            if self._entries[key][0] == DONE:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TableIdempotencyStore:
+    """Lưu key trong bảng idempotency_keys, dùng chung giữa nhiều process.
+
+    Request đang chạy giữ key trong ``lease`` giây (lớn hơn thời gian tối đa
+    của một request, vd. WEB_TIMEOUT). Process chết giữa chừng thì lần thử
+    lại cùng nội dung lấy lại key sau khi hết lease thay vì nhận 409 đến hết TTL.
+    """
+
+    def __init__(self, get_connection, ttl=24 * 3600, wait_timeout=30, poll_interval=0.05,
+                 lease=60, dialect=MYSQL):
+        self.get_connection = get_connection
+        self.ttl = ttl
+        self.lease = lease
+        self.dialect = dialect
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+
+    def _run(self, sql, params, fetch=False):
+        db = self.get_connection()
+        try:
+            cursor = db.cursor()
+            cursor.execute(sql, params)
+            row = cursor.fetchone() if fetch else cursor.rowcount
+            db.commit()
+            cursor.close()
+            return row
+        finally:
+            db.close()
+
+    def begin(self, key, fingerprint):
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            self._run(self.dialect.idem_expire, (key, self.ttl))
+            if self._run(self.dialect.idem_insert, (key, fingerprint, PENDING, self.lease)):
+                return None
+            # Request trước hết lease mà chưa xong: coi như đã chết
+            if self._run(self.dialect.idem_take_over, (self.lease, key, fingerprint, PENDING)):
+                return None
+
+            row = self._run(
+                "SELECT fingerprint, status, status_code, body, mimetype FROM idempotency_keys WHERE idem_key = %s",
+                (key,), fetch=True
+            )
+            if row is not None:
+                if row[0] != fingerprint:
+                    raise IdempotencyConflict(key)
+                if row[1] == DONE:
+                    return CachedResponse(row[2], bytes(row[3]), row[4])
+
+            if time.monotonic() >= deadline:
+                raise TimeoutError(key)
+            time.sleep(self.poll_interval)
+
+    def complete(self, key, response):
+        self._run(
+            "UPDATE idempotency_keys SET status = %s, status_code = %s, body = %s, mimetype = %s "
+            "WHERE idem_key = %s",
+            (DONE, response.status, response.body, response.mimetype, key)
+        )
+
+    def abort(self, key):
+        self._run("DELETE FROM idempotency_keys WHERE idem_key = %s AND status = %s", (key, PENDING))
+
+
+def scope_key(path, user_id, key):
+    """Key lưu trong store cho Idempotency-Key ``key`` của ``user_id`` trên ``path``.
+
+    Băm thay vì cắt còn 255 ký tự: hai key dài chung phần đầu không trùng nhau.
+    """
+    scoped = f"{path}:{user_id if user_id is not None else ''}:{key}"
+    return hashlib.sha256(scoped.encode("utf-8")).hexdigest()
+
+
+def _replay(cached):
+    response = Response(cached.body, status=cached.status, mimetype=cached.mimetype)
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(get_store):
+    """Decorator cho route POST: honour header Idempotency-Key.
+
+    Chỉ lưu response thành công (``success`` = true); response lỗi không được
+    lưu để client thử lại sẽ chạy lại handler.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get("Idempotency-Key")
+            if not key:
+                return view(*args, **kwargs)
+
+            store = get_store()
+            # Key của mỗi user tách riêng (g.session do hook verify token gán)
+            session = g.get("session")
+            scoped_key = scope_key(request.path, session["id"] if session else None, key)
+            fingerprint = hashlib.sha256(request.get_data(cache=True)).hexdigest()
+            try:
+                cached = store.begin(scoped_key, fingerprint)
+            except IdempotencyConflict:
+                return jsonify({"success": False, "message": "Idempotency-Key đã dùng cho request khác!"}), 422
+            except TimeoutError:
+                return jsonify({"success": False, "message": "Request trước với cùng key vẫn đang xử lý!"}), 409
+            if cached is not None:
+                return _replay(cached)
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except BaseException:
+                store.abort(scoped_key)
+                raise
+
+            result = response.get_json(silent=True)
+            if response.status_code < 400 and isinstance(result, dict) and result.get("success"):
+                store.complete(scoped_key, CachedResponse(
+                    response.status_code, response.get_data(), response.mimetype))
+            else:
+                store.abort(scoped_key)
+            return response
+        return wrapper
+    return decorator
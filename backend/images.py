@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow là tuỳ chọn: không có thì chỉ lưu ảnh gốc
+    Image = None
+
+
+# -------------------------
+# Image variants
+# -------------------------
+# Chiều rộng tối đa của mỗi biến thể (không phóng to ảnh nhỏ hơn)
+VARIANTS = (("thumb", 160), ("card", 480), ("full", 1200))
+QUALITY = {"avif": 55, "webp": 80, "jpeg": 82}
+EXTENSIONS = {"avif": "avif", "webp": "webp", "jpeg": "jpg"}
+
+
+def available_formats():
+    if Image is None:
+        return ()
+    # JPEG luôn có để làm fallback
+    return tuple(f for f in ("avif", "webp") if features.check(f)) + ("jpeg",)
+
+
+CONTENT_NAME = re.compile(r"^[0-9a-f]{32}(-[a-z]+)?\.[a-z0-9]+$")
+
+
+def is_content_addressed(name):
+    """Ảnh gốc/biến thể đặt tên theo hash: nội dung không bao giờ đổi."""
+    return CONTENT_NAME.match(name) is not None
+
+
+class InvalidImage(ValueError):
+    """File upload không phải ảnh được hỗ trợ."""
+
+
+class ImageTooLarge(InvalidImage):
+    """File upload vượt quá kích thước cho phép."""
+
+
+CHUNK_SIZE = 64 * 1024
+# Số byte đầu cần có để sniff nhận ra mọi định dạng (WebP/AVIF đọc tới byte 12)
+SNIFF_SIZE = 16
+
+
+def sniff(head):
+    """Đoán định dạng ảnh từ các byte đầu file (không tin tên file/Content-Type)."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[4:8] == b"ftyp" and head[8:12] in (b"avif", b"avis"):
+        return "avif"
+    return None
+
+
+def _write_atomic(directory, name, write):
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, os.path.join(directory, name))
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def store_upload(directory, stream, max_size):
+    """Chép ``stream`` theo từng chunk vào file tạm trong ``directory``, vừa
+    tính SHA-256 vừa kiểm tra kiểu ảnh, rồi đổi tên thành ``<hash>.<ext>``.
+
+    Bộ nhớ dùng cố định (một chunk) bất kể kích thước file. Ảnh đã có (cùng
+    hash) thì giữ file cũ. Trả về tên file trong ``directory``.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    ext = None
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if ext is None:
+                    # read() có thể trả ít byte hơn yêu cầu: gom đủ byte đầu rồi mới đoán
+                    head += chunk[:SNIFF_SIZE - len(head)]
+                    if len(head) >= SNIFF_SIZE:
+                        ext = sniff(head)
+                        if ext is None:
+                            raise InvalidImage("không phải file ảnh")
+                size += len(chunk)
+                if size > max_size:
+                    raise ImageTooLarge(f"vượt quá {max_size} byte")
+                digest.update(chunk)
+                f.write(chunk)
+        if ext is None:
+            if not head:
+                raise InvalidImage("file rỗng")
+            ext = sniff(head)
+            if ext is None:
+                raise InvalidImage("không phải file ảnh")
+        name = f"{digest.hexdigest()[:32]}.{ext}"
+        if os.path.exists(os.path.join(directory, name)):
+            os.unlink(tmp)
+        else:
+            os.replace(tmp, os.path.join(directory, name))
+        return name
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _stem(name):
+    return os.path.splitext(name)[0]
+
+
+def manifest_path(directory, name):
+    return os.path.join(directory, _stem(name) + ".json")
+
+
+def render_variants(directory, name, formats=None):
+    """Tạo các biến thể của ảnh ``name`` rồi ghi manifest (ghi cuối cùng).
+
+    Manifest: {"variants": [{"name", "width", "files": {format: file}}]}.
+    """
+    formats = formats or available_formats()
+    with Image.open(os.path.join(directory, name)) as source:
+        source = ImageOps.exif_transpose(source)
+        variants = []
+        for label, width in VARIANTS:
+            image = source.copy()
+            image.thumbnail((width, width * 4))
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            files = {}
+            for fmt in formats:
+                target = f"{_stem(name)}-{label}.{EXTENSIONS[fmt]}"
+                if not os.path.exists(os.path.join(directory, target)):
+                    frame = image.convert("RGB") if fmt == "jpeg" else image
+                    _write_atomic(directory, target, lambda f: frame.save(
+                        f, format=fmt.upper(), quality=QUALITY[fmt]))
+                files[fmt] = target
+            variants.append({"name": label, "width": image.width, "files": files})
+            # Ảnh gốc nhỏ: các biến thể lớn hơn sẽ trùng, bỏ qua
+            if image.width < width:
+                break
+
+    manifest = {"variants": variants}
+    _write_atomic(directory, os.path.basename(manifest_path(directory, name)),
+                  lambda f: f.write(json.dumps(manifest).encode("utf-8")))
+    return manifest
+
+
+def load_manifest(directory, name):
+    try:
+        with open(manifest_path(directory, name), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def srcset(manifest, prefix="uploads/"):
+    """{"webp": "uploads/x-thumb.webp 160w, ...", ...} cho từng định dạng."""
+    result = {}
+    for variant in manifest["variants"]:
+        for fmt, file in variant["files"].items():
+            result.setdefault(fmt, []).append(f"{prefix}{file} {variant['width']}w")
+    return {fmt: ", ".join(entries) for fmt, entries in result.items()}
+
+
+class ImagePipeline:
+    """Xử lý ảnh upload trên thread pool riêng để request POST trả về ngay.
+
+    ``on_done(name)`` được gọi khi các biến thể của ảnh đã sẵn sàng.
+    """
+
+    def __init__(self, workers=2, on_done=None):
+        self.on_done = on_done
+        self.enabled = Image is not None
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="images")
+
+    def submit(self, directory, name):
+        if not self.enabled or load_manifest(directory, name) is not None:
+            return None
+        return self._executor.submit(self._process, directory, name)
+
+    def _process(self, directory, name):
+        try:
+            manifest = render_variants(directory, name)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            # Không đọc được ảnh: giữ nguyên ảnh gốc
+            return None
+        if self.on_done:
+            self.on_done(name)
+        return manifest
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,192 @@
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+# -------------------------
+# Background job queue
+# -------------------------
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL,
+        run_at REAL NOT NULL,
+        locked_by TEXT,
+        last_error TEXT,
+        created_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, run_at);
+"""
+QUEUED = "queued"
+DEAD = "dead"
+
+
+class Job:
+    def __init__(self, id, name, payload, attempts):
+        self.id = id
+        self.name = name
+        self.payload = payload
+        self.attempts = attempts
+
+
+class JobQueue:
+    """Hàng đợi job bền vững trên một file SQLite (WAL), dùng chung giữa các
+    worker gunicorn và process ``python -m backend worker`` trên cùng máy.
+
+    - ``enqueue``: một INSERT + commit, gọi sau khi transaction MySQL đã commit.
+    - ``claim``: lấy các job đến hạn và ẩn chúng ``visibility_timeout`` giây
+      (đẩy ``run_at`` lên); worker chết giữa chừng thì job tự hiện lại.
+    - ``ack``: xoá job đã xong. ``fail``: thử lại sau ``backoff`` (tăng gấp
+      đôi, có jitter), quá ``max_attempts`` lần thì giữ lại với status dead
+      (kể cả khi lần claim cuối hết ``visibility_timeout`` mà không ack/fail).
+
+    Giao ít nhất một lần: handler phải chịu được chạy lặp.
+    """
+
+    def __init__(self, path, visibility_timeout=60, max_attempts=5, backoff=1.0,
+                 max_backoff=300, clock=time.time):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._clock = clock
+        self._local = threading.local()
+
+    def _db(self):
+        # Mỗi thread một kết nối (sqlite3 không chia sẻ kết nối giữa các thread),
+        # mở lần đầu dùng nên import main không tạo file
+        db = getattr(self._local, "db", None)
+        if db is None or getattr(self._local, "pid", None) != os.getpid():
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCHEMA)
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def _transaction(self):
+        return _Transaction(self._db())
+
+    def enqueue(self, name, payload, delay=0, max_attempts=None):
+        return self.enqueue_many([(name, payload)], delay, max_attempts)[0]
+
+    def enqueue_many(self, jobs, delay=0, max_attempts=None):
+        """``jobs``: [(name, payload)] ghi trong một transaction; trả các id."""
+        now = self._clock()
+        rows = [(name, json.dumps(payload, default=str), max_attempts or self.max_attempts, now + delay, now)
+                for name, payload in jobs]
+        with self._transaction() as db:
+            ids = []
+            for row in rows:
+                cursor = db.execute(
+                    "INSERT INTO jobs (name, payload, max_attempts, run_at, created_at) VALUES (?, ?, ?, ?, ?)", row)
+                ids.append(cursor.lastrowid)
+            return ids
+
+    def claim(self, worker, limit=10):
+        now = self._clock()
+        with self._transaction() as db:
+            # Job hết hạn sau lần claim cuối mà không được ack/fail (worker chết
+            # hoặc treo quá visibility_timeout): không giao lại nữa
+            expired = db.execute(
+                "UPDATE jobs SET status = ?, last_error = ?, locked_by = NULL "
+                "WHERE status = ? AND run_at <= ? AND attempts >= max_attempts",
+                (DEAD, "không ack trong visibility_timeout", QUEUED, now)).rowcount
+            if expired:
+                log.warning("%d job hết số lần thử (không ack), chuyển sang dead", expired)
+            rows = db.execute(
+                "SELECT id, name, payload, attempts FROM jobs WHERE status = ? AND run_at <= ? "
+                "ORDER BY run_at, id LIMIT ?", (QUEUED, now, limit)).fetchall()
+            if rows:
+                db.executemany(
+                    "UPDATE jobs SET run_at = ?, attempts = attempts + 1, locked_by = ? WHERE id = ?",
+                    [(now + self.visibility_timeout, worker, row[0]) for row in rows])
+        return [Job(id, name, json.loads(payload), attempts + 1) for id, name, payload, attempts in rows]
+
+    def ack(self, job):
+        # attempts là "vé" của lần claim: job đã hết hạn và bị worker khác
+        # claim lại thì lần ack cũ không xoá nhầm
+        with self._transaction() as db:
+            cursor = db.execute("DELETE FROM jobs WHERE id = ? AND attempts = ?", (job.id, job.attempts))
+            return cursor.rowcount == 1
+
+    def fail(self, job, error):
+        now = self._clock()
+        with self._transaction() as db:
+            row = db.execute("SELECT max_attempts FROM jobs WHERE id = ? AND attempts = ?",
+                             (job.id, job.attempts)).fetchone()
+            if row is None:
+                return None
+            if job.attempts >= row[0]:
+                db.execute("UPDATE jobs SET status = ?, last_error = ?, locked_by = NULL WHERE id = ?",
+                           (DEAD, error, job.id))
+                return DEAD
+            delay = min(self.backoff * 2 ** (job.attempts - 1), self.max_backoff)
+            delay *= random.uniform(0.5, 1.0)
+            db.execute("UPDATE jobs SET run_at = ?, last_error = ?, locked_by = NULL WHERE id = ?",
+                       (now + delay, error, job.id))
+            return QUEUED
+
+    def stats(self):
+        counts = dict(self._db().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {"queued": counts.get(QUEUED, 0), "dead": counts.get(DEAD, 0)}
+
+
+class _Transaction:
+    """``with`` trên kết nối autocommit: BEGIN IMMEDIATE ... COMMIT/ROLLBACK."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+class Worker:
+    """Chạy job từ ``queue`` bằng ``handlers`` (tên job -> hàm(payload))."""
+
+    def __init__(self, queue, handlers, name=None, batch_size=10, poll_interval=0.5):
+        self.queue = queue
+        self.handlers = handlers
+        self.name = name or f"{os.getpid()}-{threading.get_ident()}"
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+    def run_once(self):
+        """Claim và chạy một lô; trả số job đã claim."""
+        jobs = self.queue.claim(self.name, self.batch_size)
+        for job in jobs:
+            handler = self.handlers.get(job.name)
+            try:
+                if handler is None:
+                    raise LookupError(f"không có handler cho job {job.name}")
+                handler(job.payload)
+            except Exception as e:
+                status = self.queue.fail(job, f"{type(e).__name__}: {e}")
+                log.warning("job %s #%d lần %d lỗi (%s): %s", job.name, job.id, job.attempts, status, e)
+            else:
+                self.queue.ack(job)
+        return len(jobs)
+
+    def run(self, stop=None):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            if not self.run_once():
+                stop.wait(self.poll_interval)
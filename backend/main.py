@@ -1,11 +1,49 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, abort, g, has_request_context, request, jsonify, send_from_directory
+from werkzeug.exceptions import HTTPException
+from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
+from urllib.parse import quote as url_quote
 from flask_cors import CORS
+import mimetypes
 import mysql.connector
 import os
+import sqlite3
+import time
+import zipfile
+from datetime import datetime, timedelta
+
+from cart_store import TableCartStore, WriteBehindCartStore
+from cart_view import build_cart_view
+from db_pool import ConnectionPool
+from dialects import DIALECTS
+from events import InProcessBroker, restaurant_channel, user_channel
+import analytics
+import images
+import jobs
+import menu_import
+import metrics as app_metrics
+import sqlite_db
+from idempotency import MemoryIdempotencyStore, TableIdempotencyStore, idempotent
+from menu_cache import MenuCache, snapshot_response
+from menu_search import InvalidQuery, MenuQuery
+from order_pages import OrderPage
+from passwords import HasherBusy, PasswordHasher, PasswordTooLong
+from rate_limit import LoginLimiter, TokenBucket
+from replicas import Replica, ReplicaRouter, replica_lag
+from repository import PreparedStatementConnection, Repository
+from tokens import AccessDenied, InvalidToken, TokenSigner, acting_user, check_restaurant
 
 app = Flask(__name__)
-CORS(app)
+# Client đọc được header mốc read-your-writes (xem remember_writes)
+CORS(app, expose_headers=["X-Read-Your-Writes-Until"])
+
+# Số reverse proxy (nginx, load balancer) đứng trước app: lấy IP client từ
+# X-Forwarded-For (giới hạn đăng nhập theo IP, read-your-writes). 0 = không tin
+# header này, tránh client tự khai IP giả
+TRUSTED_PROXIES = int(os.environ.get("TRUSTED_PROXIES", 0))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES, x_proto=TRUSTED_PROXIES)
 
 # -------------------------
 # Configuration
@@ -16,23 +54,346 @@ UPLOADS_DIR = os.path.join(BASE_DIR, 'uploads')
 # Tạo folder uploads nếu chưa tồn tại
 os.makedirs(UPLOADS_DIR, exist_ok=True)
 
+# Giới hạn ảnh upload; body lớn hơn bị từ chối (413) trước khi đọc
+UPLOAD_MAX_BYTES = int(os.environ.get("UPLOAD_MAX_BYTES", 10 * 1024 * 1024))
+app.config["MAX_CONTENT_LENGTH"] = UPLOAD_MAX_BYTES + 64 * 1024  # chừa cho các field form
+
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({"success": False, "message": "Ảnh quá lớn!"}), 413
+
+# Serialize giống hệt jsonify(), dùng cho dữ liệu cache và chế độ async
+def _json_bytes(payload):
+    return app.json.encode(payload)
+
+# Broker phát sự kiện đơn hàng cho các stream SSE
+order_events = InProcessBroker()
+SSE_HEARTBEAT = 15
+
+# Việc phụ sau khi đặt hàng/đổi trạng thái chạy ở process riêng
+# (python -m backend worker), request chỉ ghi job sau khi commit.
+# JOB_QUEUE là file SQLite của hàng đợi, dùng chung với worker trên cùng máy.
+job_queue = jobs.JobQueue(
+    os.environ.get("JOB_QUEUE", os.path.join(BASE_DIR, "jobs.sqlite3")),
+    visibility_timeout=int(os.environ.get("JOB_VISIBILITY_TIMEOUT", 60)),
+    max_attempts=int(os.environ.get("JOB_MAX_ATTEMPTS", 5)),
+)
+
+# Cache menu trong process, làm mới khi thêm món hoặc sau MENU_CACHE_TTL giây
+menu_cache = MenuCache(
+    _json_bytes,
+    ttl=int(os.environ.get("MENU_CACHE_TTL", 60)),
+)
+
+# Ảnh upload được resize/chuyển định dạng trên thread pool riêng;
+# xong thì làm mới cache menu để trả srcset mới
+image_pipeline = images.ImagePipeline(
+    workers=int(os.environ.get("IMAGE_WORKERS", 2)),
+    on_done=lambda name: menu_cache.invalidate(),
+)
+
 # -------------------------
 # Serve uploaded images
 # -------------------------
+# Ảnh tên theo hash được cache vĩnh viễn; ảnh cũ (food1.jpg...) thì
+# trình duyệt revalidate bằng ETag/Last-Modified sau UPLOADS_MAX_AGE giây
+UPLOADS_MAX_AGE = int(os.environ.get("UPLOADS_MAX_AGE", 0))
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Để proxy phía trước gửi file (sendfile) thay cho Python:
+# UPLOADS_OFFLOAD=x-accel (nginx, location internal UPLOADS_ACCEL_PREFIX)
+# hoặc UPLOADS_OFFLOAD=x-sendfile (Apache/lighttpd)
+UPLOADS_OFFLOAD = os.environ.get("UPLOADS_OFFLOAD", "")
+UPLOADS_ACCEL_PREFIX = os.environ.get("UPLOADS_ACCEL_PREFIX", "/_uploads/")
+app.config["USE_X_SENDFILE"] = UPLOADS_OFFLOAD == "x-sendfile"
+
 @app.route('/uploads/<filename>')
 def uploaded_file(filename):
-    return send_from_directory(UPLOADS_DIR, filename)
+    immutable = images.is_content_addressed(filename)
+    max_age = IMMUTABLE_MAX_AGE if immutable else UPLOADS_MAX_AGE
+
+    if UPLOADS_OFFLOAD == "x-accel":
+        path = safe_join(UPLOADS_DIR, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        # nginx tự xử lý ETag/Last-Modified/Range; chỉ cần Cache-Control
+        response = Response(mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream")
+        response.headers["X-Accel-Redirect"] = UPLOADS_ACCEL_PREFIX + url_quote(filename)
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    else:
+        # Hash trong tên file chính là ETag mạnh; Range/304 do send_file xử lý
+        etag = os.path.splitext(filename)[0] if immutable else True
+        response = send_from_directory(UPLOADS_DIR, filename, max_age=max_age, etag=etag)
+        if not immutable and not max_age:
+            response.cache_control.no_cache = True
+    if immutable:
+        response.cache_control.immutable = True
+    return response
 
 # -------------------------
 # Database connection
 # -------------------------
+DB_CONFIG = {
+    "host": os.environ.get("DB_HOST", "localhost"),
+    "port": int(os.environ.get("DB_PORT", 3306)),
+    "user": os.environ.get("DB_USER", "root"),
+    "password": os.environ.get("DB_PASSWORD", "longga1505"),
+    "database": os.environ.get("DB_NAME", "FoodDelivery"),
+}
+
+# Số prepared statement giữ trên mỗi kết nối MySQL (0: không dùng prepared
+# statement, mọi câu chạy bằng text protocol)
+DB_STATEMENT_CACHE = int(os.environ.get("DB_STATEMENT_CACHE", 64))
+
+def _connect_mysql(**overrides):
+    config = dict(DB_CONFIG, **overrides)
+    return PreparedStatementConnection(mysql.connector.connect(**config), DB_STATEMENT_CACHE)
+
+# DB_BACKEND=sqlite chạy trên một file SQLite (SQLITE_PATH) thay MySQL: để
+# chạy thử, test và benchmark trên máy không có MySQL
+DB_BACKEND = os.environ.get("DB_BACKEND", "mysql")
+SQLITE_PATH = os.environ.get("SQLITE_PATH", os.path.join(BASE_DIR, "fooddelivery.sqlite3"))
+db_dialect = DIALECTS[DB_BACKEND]
+
+if DB_BACKEND == "sqlite":
+    sqlite_db.create_schema(SQLITE_PATH)
+    _connect = lambda: sqlite_db.connect(SQLITE_PATH, DB_STATEMENT_CACHE)
+else:
+    _connect = _connect_mysql
+
+# Pool kết nối dùng chung, kết nối được mở lười khi có request đầu tiên
+DB_POOL_SETTINGS = {
+    "size": int(os.environ.get("DB_POOL_SIZE", 5)),
+    "max_overflow": int(os.environ.get("DB_POOL_MAX_OVERFLOW", 10)),
+    "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+    "recycle": int(os.environ.get("DB_POOL_RECYCLE", 3600)),
+    "pre_ping": os.environ.get("DB_POOL_PRE_PING", "1") != "0",
+}
+db_pool = ConnectionPool(_connect, **DB_POOL_SETTINGS)
+
+# Read replica: DB_REPLICAS="host[:port],..." (user/password/database như
+# primary; với DB_BACKEND=sqlite là đường dẫn file, mở chỉ đọc để làm
+# stand-in). Menu, giỏ hàng và lịch sử đơn đọc từ replica khoẻ, trễ không
+# quá DB_REPLICA_MAX_LAG giây; người vừa ghi (và dữ liệu vừa đổi) đọc từ
+# primary trong READ_YOUR_WRITES_WINDOW giây (mặc định DB_REPLICA_MAX_LAG +
+# DB_REPLICA_CHECK_INTERVAL).
+def _replica(spec):
+    if DB_BACKEND == "sqlite":
+        return Replica(spec, ConnectionPool(
+            lambda: sqlite_db.connect(spec, DB_STATEMENT_CACHE, readonly=True), **DB_POOL_SETTINGS))
+    host, _, port = spec.partition(":")
+    return Replica(spec, ConnectionPool(
+        lambda: _connect_mysql(host=host, port=int(port or 3306)), **DB_POOL_SETTINGS))
+
+db_router = ReplicaRouter(
+    db_pool,
+    [_replica(spec.strip()) for spec in os.environ.get("DB_REPLICAS", "").split(",") if spec.strip()],
+    # Stand-in SQLite đọc chính file của primary: không trễ
+    lag=replica_lag if DB_BACKEND == "mysql" else (lambda conn: 0.0),
+    max_lag=float(os.environ.get("DB_REPLICA_MAX_LAG", 5)),
+    check_interval=float(os.environ.get("DB_REPLICA_CHECK_INTERVAL", 2)),
+    window=float(os.environ["READ_YOUR_WRITES_WINDOW"]) if os.environ.get("READ_YOUR_WRITES_WINDOW") else None,
+)
+
+# Mốc hết cửa sổ read-your-writes (epoch giây) trả cho client sau mỗi lần
+# ghi; client gửi lại qua cookie (trình duyệt tự gửi) hoặc header nên request
+# sau vẫn đọc primary dù rơi vào worker khác
+READ_YOUR_WRITES_COOKIE = "rw_until"
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes-Until"
+
 def get_db_connection():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="longga1505",
-        database="FoodDelivery"
+    # db.close() trả kết nối về pool; thời gian chờ pool và từng truy vấn
+    # được ghi vào /metrics
+    return metrics.connect(db_pool.connect)
+
+# Người gửi request: user trong token, không có token thì theo IP
+def _requester():
+    if not has_request_context():
+        return None
+    if g.get("session"):
+        return ("user", g.session["id"])
+    return ("ip", request.remote_addr)
+
+def _client_wrote_recently():
+    if not has_request_context():
+        return False
+    value = request.headers.get(READ_YOUR_WRITES_HEADER) or request.cookies.get(READ_YOUR_WRITES_COOKIE)
+    try:
+        until = float(value)
+    except (TypeError, ValueError):
+        return False
+    # Mốc xa hơn một cửa sổ là giả mạo/đồng hồ lệch: bỏ qua
+    now = time.time()
+    return now < until <= now + db_router.window
+
+def get_read_connection(scope=None):
+    # Kết nối chỉ đọc (replica hoặc primary), ``scope`` là dữ liệu cần đọc
+    # để áp read-your-writes, vd. ("user", 1)
+    if not db_router.replicas:
+        return get_db_connection()
+    return metrics.connect(lambda: db_router.read(_requester(), scope, pinned=_client_wrote_recently()))
+
+# Lưu response theo Idempotency-Key: mặc định trong bộ nhớ, hoặc bảng
+# idempotency_keys khi chạy nhiều process (IDEMPOTENCY_STORE=table)
+if os.environ.get("IDEMPOTENCY_STORE") == "table":
+    idempotency_store = TableIdempotencyStore(
+        lambda: get_db_connection(),
+        lease=float(os.environ.get("IDEMPOTENCY_LEASE", 60)),
+        dialect=db_dialect,
     )
+else:
+    idempotency_store = MemoryIdempotencyStore(
+        max_entries=int(os.environ.get("IDEMPOTENCY_MAX_ENTRIES", 10000)))
+
+@app.route("/api/pool/stats", methods=["GET"])
+def pool_stats():
+    return jsonify({"success": True, "pool": db_pool.stats(), "replicas": db_router.stats()})
+
+# -------------------------
+# Metrics & profiling
+# -------------------------
+# Latency theo route, thời gian DB/JSON, kích thước response; METRICS=0 tắt.
+# PROFILE_SLOW_MS bật profiler lấy mẫu: request chậm hơn ngưỡng được ghi
+# stack dạng folded (flamegraph) vào PROFILE_DIR
+metrics = app_metrics.Metrics(
+    enabled=os.environ.get("METRICS", "1") != "0",
+    profiler=app_metrics.SamplingProfiler(
+        os.environ.get("PROFILE_DIR", os.path.join(BASE_DIR, "profiles")),
+        slow=float(os.environ["PROFILE_SLOW_MS"]) / 1000,
+        interval=float(os.environ.get("PROFILE_INTERVAL_MS", 5)) / 1000,
+    ) if os.environ.get("PROFILE_SLOW_MS") else None,
+)
+app.json = app_metrics.TimedJSONProvider(app, metrics)
+
+# Đăng ký trước load_session để đo cả request bị từ chối 401
+@app.before_request
+def begin_metrics():
+    rule = request.url_rule
+    metrics.begin(request.method, rule.rule if rule else "<unmatched>")
+
+@app.after_request
+def finish_metrics(response):
+    finished = metrics.finish(response.status_code, response.content_length)
+    if finished:
+        response.headers["Server-Timing"] = metrics.server_timing(*finished)
+    return response
+
+@app.teardown_request
+def discard_metrics(exc):
+    metrics.discard()
+
+POOL_GAUGES = ("size", "max_overflow", "idle", "in_use", "opened")
+
+def _replica_metrics(stats):
+    if not stats["replicas"]:
+        return []
+    values = [(app_metrics.series("db_primary_reads_total", reason=reason), "counter", stats[f"{reason}_reads"])
+              for reason in ("pinned", "fallback")]
+    for replica in stats["replicas"]:
+        name = replica["name"]
+        values.append((app_metrics.series("db_replica_up", replica=name), "gauge", int(replica["usable"])))
+        if replica["lag"] is not None:
+            values.append((app_metrics.series("db_replica_lag_seconds", replica=name), "gauge", replica["lag"]))
+        values.append((app_metrics.series("db_replica_reads_total", replica=name), "counter", replica["reads"]))
+        values.append((app_metrics.series("db_replica_failures_total", replica=name), "counter", replica["failures"]))
+    return values
+
+# Mỗi worker gunicorn trả số liệu của riêng nó
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    pool = db_pool.stats()
+    values = [(f"db_pool_{name}", "gauge", value) for name, value in pool.items() if name in POOL_GAUGES]
+    values += [(f"db_pool_{name}_total", "counter", value) for name, value in pool.items() if name not in POOL_GAUGES]
+    values += _replica_metrics(db_router.stats())
+    return Response(metrics.render(values), mimetype="text/plain; version=0.0.4")
+
+# Hash mật khẩu trên thread pool riêng. PASSWORD_SCHEME: argon2 | bcrypt |
+# method của werkzeug (vd. scrypt:32768:8:1); mặc định argon2 nếu đã cài
+password_hasher = PasswordHasher(
+    scheme=os.environ.get("PASSWORD_SCHEME") or None,
+    cost=int(os.environ["PASSWORD_COST"]) if os.environ.get("PASSWORD_COST") else None,
+    workers=int(os.environ.get("PASSWORD_WORKERS", os.cpu_count())),
+)
+
+# Chặn dò mật khẩu: token bucket theo IP và theo username
+login_limiter = LoginLimiter(
+    per_ip=TokenBucket(rate=float(os.environ.get("LOGIN_IP_RATE", 1)),
+                       burst=int(os.environ.get("LOGIN_IP_BURST", 20))),
+    per_user=TokenBucket(rate=float(os.environ.get("LOGIN_USER_RATE", 0.1)),
+                         burst=int(os.environ.get("LOGIN_USER_BURST", 5))),
+)
+
+def _too_many_attempts(wait):
+    response = jsonify({"success": False, "message": "Đăng nhập quá nhiều lần, vui lòng thử lại sau!"})
+    response.headers["Retry-After"] = str(int(wait) + 1)
+    return response, 429
+
+def _hasher_busy():
+    return jsonify({"success": False, "message": "Hệ thống đang bận, vui lòng thử lại!"}), 503
+
+# -------------------------
+# Session tokens
+# -------------------------
+# SESSION_KEYS="kid2:secret2,kid1:secret1": key đầu để ký, các key sau chỉ để
+# verify token cũ khi xoay key. REQUIRE_SESSION_TOKEN=1 bắt buộc có token.
+session_tokens = TokenSigner.from_env(
+    os.environ.get("SESSION_KEYS"),
+    ttl=int(os.environ.get("SESSION_TTL", 24 * 3600)),
+)
+REQUIRE_SESSION_TOKEN = os.environ.get("REQUIRE_SESSION_TOKEN") == "1"
+
+def _request_token():
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        return header[len("Bearer "):]
+    # EventSource không gửi được header
+    return request.args.get("token")
+
+# Verify token một lần cho mỗi request, không truy vấn database
+@app.before_request
+def load_session():
+    g.session = None
+    token = _request_token()
+    if token:
+        try:
+            g.session = session_tokens.verify(token)
+        except InvalidToken:
+            return jsonify({"success": False, "message": "Phiên đăng nhập không hợp lệ hoặc đã hết hạn!"}), 401
+
+@app.errorhandler(AccessDenied)
+def access_denied(e):
+    return jsonify({"success": False, "message": e.message}), e.status
+
+# Request ghi thành công: người gửi đọc từ primary trong cửa sổ
+# read-your-writes (xem db_router). Handler báo lỗi bằng 200 kèm
+# {"success": false} nên chỉ tính response có success = true
+@app.after_request
+def remember_writes(response):
+    if request.method not in ("POST", "PUT", "DELETE") or response.status_code >= 400:
+        return response
+    result = response.get_json(silent=True)
+    if isinstance(result, dict) and result.get("success"):
+        db_router.wrote(_requester())
+        if db_router.replicas and db_router.window:
+            until = "%.3f" % (time.time() + db_router.window)
+            response.set_cookie(READ_YOUR_WRITES_COOKIE, until, max_age=int(db_router.window) + 1,
+                                httponly=True, samesite="Lax")
+            response.headers[READ_YOUR_WRITES_HEADER] = until
+    return response
+
+def _acting_user(claimed):
+    return acting_user(g.session, claimed, REQUIRE_SESSION_TOKEN)
+
+def _check_restaurant(restaurant):
+    check_restaurant(g.session, restaurant, REQUIRE_SESSION_TOKEN)
+
+# Dòng giỏ của người khác: 403 (trừ admin). Không có token thì bỏ qua như
+# _acting_user nên không cần tra chủ dòng
+def _check_cart_owner(cart_id):
+    if g.session is None and not REQUIRE_SESSION_TOKEN:
+        return
+    _acting_user(cart_store.owner(cart_id))
 
 # -------------------------
 # User registration
@@ -45,23 +406,24 @@ def register():
     password = data.get("password")
     confirm_password = data.get("confirm_password")
 
+    if not all(isinstance(value, str) and value for value in (username, email, password)):
+        return jsonify({"success": False, "message": "Thiếu tên đăng nhập, email hoặc mật khẩu!"}), 400
+
     if password != confirm_password:
         return jsonify({"success": False, "message": "Mật khẩu xác nhận không khớp!"})
 
     try:
-        db = get_db_connection()
-        cursor = db.cursor()
-        cursor.execute(
-            "INSERT INTO user (username, email, password, role) VALUES (%s, %s, %s, %s)",
-            (username, email, password, "user")
-        )
-        db.commit()
+        password_hash = password_hasher.hash(password)
+    except HasherBusy:
+        return _hasher_busy()
+    except PasswordTooLong:
+        return jsonify({"success": False, "message": "Mật khẩu quá dài!"}), 400
+
+    try:
+        repository.users.create(username, email, password_hash)
         return jsonify({"success": True, "message": "Đăng ký thành công!"})
     except mysql.connector.Error as e:
         return jsonify({"success": False, "message": f"Lỗi: {str(e)}"})
-    finally:
-        cursor.close()
-        db.close()
 
 # -------------------------
 # User login
@@ -71,16 +433,34 @@ def login():
     data = request.json
     username = data.get("username")
     password = data.get("password")
+    if not (isinstance(username, str) and username and isinstance(password, str)):
+        return jsonify({"success": False, "message": "Thiếu tên đăng nhập hoặc mật khẩu!"}), 400
+
+    # Kiểm tra trước khi đụng tới DB/hash: request bị chặn gần như không tốn gì
+    wait = login_limiter.check(request.remote_addr, username)
+    if wait:
+        return _too_many_attempts(wait)
 
     try:
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM user WHERE username=%s", (username,))
-        user = cursor.fetchone()
+        user = repository.users.by_username(username)
 
-        if user and user["password"] == password:
+        if user:
+            valid, stale = password_hasher.verify(user["password"], password)
+        else:
+            password_hasher.dummy_verify(password)
+            valid = stale = False
+
+        if valid:
+            # Mật khẩu plaintext cũ hoặc hash theo cấu hình cũ: hash lại
+            if stale:
+                try:
+                    repository.users.set_password(user["id"], password_hasher.hash(password))
+                except PasswordTooLong:
+                    # Không hash được theo scheme mới: giữ hash cũ
+                    pass
             return jsonify({
                 "success": True,
+                "token": session_tokens.sign({"id": user["id"], "name": user["username"], "role": user["role"]}),
                 "user": {
                     "id": user["id"],
                     "username": user["username"],
@@ -90,35 +470,43 @@ def login():
             })
         else:
             return jsonify({"success": False, "message": "Sai tên đăng nhập hoặc mật khẩu!"})
+    except HasherBusy:
+        return _hasher_busy()
     except mysql.connector.Error as e:
         return jsonify({"success": False, "message": f"Lỗi: {str(e)}"})
-    finally:
-        cursor.close()
-        db.close()
 
 # -------------------------
 # Get menu items
 # -------------------------
+def _normalize_image(item):
+    if item.get('image'):
+        if not item['image'].startswith('uploads/'):
+            item['image'] = f"uploads/{item['image']}"
+        # Ảnh đã có biến thể: thêm srcset cho từng định dạng
+        manifest = images.load_manifest(UPLOADS_DIR, os.path.basename(item['image']))
+        if manifest:
+            item['srcset'] = images.srcset(manifest)
+    return item
+
+# Đọc toàn bộ menu từ database để dựng snapshot cho cache
+def _load_menu_items():
+    return [_normalize_image(item) for item in repository.menu.items()]
+
 @app.route("/api/menu", methods=["GET"])
 def get_menu():
     try:
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM menu_items")
-        items = cursor.fetchall()
-
-        # Fix image paths
-        for item in items:
-            if item.get('image'):
-                if not item['image'].startswith('uploads/'):
-                    item['image'] = f"uploads/{item['image']}"
-
-        return jsonify({"success": True, "items": items})
+        snapshot = menu_cache.get(_load_menu_items)
+        if not request.args:
+            return snapshot_response(snapshot, request)
+
+        # Tìm kiếm / lọc / sắp xếp / phân trang trên chỉ mục của snapshot
+        query = MenuQuery.from_args(request.args)
+        items, next_cursor = snapshot.index.search(query)
+        return jsonify({"success": True, "items": items, "next_cursor": next_cursor})
+    except InvalidQuery as e:
+        return jsonify({"success": False, "message": f"Tham số không hợp lệ: {str(e)}"})
     except mysql.connector.Error as e:
         return jsonify({"success": False, "message": f"Lỗi: {str(e)}"})
-    finally:
-        cursor.close()
-        db.close()
 # -------------------------
 # Post menu items
 # -------------------------
@@ -134,97 +522,201 @@ def add_menu_item():
         distance = request.form.get("distance")
         badge = request.form.get("badge")
         restaurant = request.form.get("restaurant")
+        if not restaurant and g.session and g.session["role"] == "restaurant":
+            restaurant = g.session["name"]
+        _check_restaurant(restaurant)
 
         # Lấy file ảnh
         image = request.files.get("image")
-        if not image:
+        if not image or not secure_filename(image.filename):
             return jsonify({"success": False, "message": "Thiếu hình ảnh!"})
 
-        # Lưu file ảnh vào /uploads
-        filename = secure_filename(image.filename)
-        filepath = os.path.join(UPLOADS_DIR, filename)
-        image.save(filepath)
+        # Chép ảnh gốc vào /uploads theo từng chunk, tên theo hash nội dung.
+        # request.files: werkzeug đã đọc hết body vào file tạm (SpooledTemporaryFile,
+        # trên 500KB thì ghi ra đĩa) trước khi tới đây, nên upload không stream
+        # thẳng từ socket; bộ nhớ vẫn giới hạn nhưng ảnh được ghi đĩa hai lần.
+        try:
+            filename = images.store_upload(UPLOADS_DIR, image.stream, UPLOAD_MAX_BYTES)
+        except images.ImageTooLarge:
+            return jsonify({"success": False, "message": "Ảnh quá lớn!"}), 413
+        except images.InvalidImage:
+            return jsonify({"success": False, "message": "File không phải hình ảnh hợp lệ!"})
 
         # Lưu vào database
-        db = get_db_connection()
-        cursor = db.cursor()
-        cursor.execute("""
-            INSERT INTO menu_items (name, price, description, category, delivery_time, distance, badge, restaurant, image)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
-        """, (name, price, description, category, delivery_time, distance, badge, restaurant, f"uploads/{filename}"))
-        db.commit()
-
-        return jsonify({"success": True, "message": "Thêm món thành công!"})
+        repository.menu.add(name, price, description, category, delivery_time, distance, badge, restaurant,
+                            f"uploads/{filename}")
+        db_router.wrote("menu")
+        menu_cache.invalidate()
+        image_pipeline.submit(UPLOADS_DIR, filename)
+
+        return jsonify({"success": True, "message": "Thêm món thành công!", "image": f"uploads/{filename}"})
     except mysql.connector.Error as e:
         return jsonify({"success": False, "message": f"Lỗi database: {str(e)}"})
+    except (HTTPException, AccessDenied):
+        # 413 khi body vượt MAX_CONTENT_LENGTH, 401/403: để errorhandler trả JSON
+        raise
     except Exception as e:
         return jsonify({"success": False, "message": f"Lỗi: {str(e)}"})
+
+# -------------------------
+# Bulk menu import / export
+# -------------------------
+# Body import (CSV/NDJSON, có thể kèm zip ảnh) lớn hơn nhiều so với upload một món
+MENU_IMPORT_MAX_BYTES = int(os.environ.get("MENU_IMPORT_MAX_BYTES", 512 * 1024 * 1024))
+MENU_IMPORT_BATCH = int(os.environ.get("MENU_IMPORT_BATCH", menu_import.BATCH_SIZE))
+MENU_IMPORT_TRANSACTION_ROWS = int(os.environ.get("MENU_IMPORT_TRANSACTION_ROWS", menu_import.TRANSACTION_ROWS))
+
+# Body là CSV (text/csv) hoặc NDJSON (application/x-ndjson) đọc dần từ stream;
+# hoặc multipart với field "file" và field "images" là zip ảnh (cột image là
+# tên file trong zip). ?restaurant= gán/kiểm tra nhà hàng cho mọi dòng.
+@app.route("/api/menu/import", methods=["POST"])
+def import_menu():
+    restaurant = request.args.get("restaurant") or None
+    if restaurant is None and g.session and g.session["role"] == "restaurant":
+        restaurant = g.session["name"]
+    _check_restaurant(restaurant)
+    request.max_content_length = MENU_IMPORT_MAX_BYTES
+
+    archive = None
+    try:
+        if request.mimetype == "multipart/form-data":
+            upload = request.files.get("file")
+            if upload is None:
+                return jsonify({"success": False, "message": "Thiếu file menu!"})
+            fmt = menu_import.detect_format(request.args.get("format"), upload.mimetype, upload.filename)
+            stream = upload.stream
+            if request.files.get("images"):
+                archive = zipfile.ZipFile(request.files["images"].stream)
+        else:
+            fmt = menu_import.detect_format(request.args.get("format"), request.mimetype)
+            stream = request.stream
+        if fmt is None:
+            return jsonify({"success": False, "message": "Chỉ hỗ trợ CSV hoặc NDJSON!"})
+
+        resolver = menu_import.ImageResolver(UPLOADS_DIR, archive, UPLOAD_MAX_BYTES)
+        importer = menu_import.MenuImporter(
+            get_db_connection, resolver, restaurant,
+            batch_size=MENU_IMPORT_BATCH, transaction_rows=MENU_IMPORT_TRANSACTION_ROWS)
+        report = importer.run(menu_import.read_rows(stream, fmt))
+        return jsonify({"success": True, **report})
+    except zipfile.BadZipFile:
+        return jsonify({"success": False, "message": "File ảnh không phải zip hợp lệ!"})
+    except mysql.connector.Error as e:
+        # Các lô đã commit trước lỗi vẫn được giữ
+        return jsonify({"success": False, "message": f"Lỗi database: {str(e)}", **importer.report()})
     finally:
-        if 'cursor' in locals(): cursor.close()
-        if 'db' in locals(): db.close()
+        if archive is not None:
+            archive.close()
+        if 'importer' in locals() and importer.inserted:
+            db_router.wrote("menu")
+            menu_cache.invalidate()
+        if 'resolver' in locals():
+            for filename in resolver.stored.values():
+                image_pipeline.submit(UPLOADS_DIR, filename)
+
+# Xuất menu dạng NDJSON (mặc định), CSV (?format=csv) hoặc một document JSON
+# như /api/menu (?format=json), stream theo lô
+@app.route("/api/menu/export", methods=["GET"])
+def export_menu():
+    restaurant = request.args.get("restaurant") or None
+    if restaurant is not None:
+        _check_restaurant(restaurant)
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in menu_import.EXPORT_FORMATS:
+        return jsonify({"success": False, "message": "Chỉ hỗ trợ CSV, NDJSON hoặc JSON!"})
+    mimetype = {"csv": "text/csv", "json": "application/json"}.get(fmt, "application/x-ndjson")
+    return Response(menu_import.export_menu(get_db_connection, fmt, restaurant), mimetype=mimetype, headers={
+        "Content-Disposition": f"attachment; filename=menu.{fmt}",
+    })
+
 # -------------------------
 # Cart operations
 # -------------------------
+CART_BATCH_LIMIT = 100
+
+# Giỏ hàng: mặc định đọc/ghi thẳng bảng cart. CART_STORE=memory giữ giỏ
+# trong bộ nhớ và ghi xuống bảng theo lô (chỉ dùng khi chạy một worker);
+# CART_JOURNAL là file journal để khôi phục thay đổi chưa ghi khi crash.
+if os.environ.get("CART_STORE") == "memory":
+    cart_store = WriteBehindCartStore(
+        lambda: get_db_connection(),
+        journal=os.environ.get("CART_JOURNAL") or None,
+        flush_interval=float(os.environ.get("CART_FLUSH_INTERVAL", 1)),
+        max_users=int(os.environ.get("CART_MAX_USERS", 10000)),
+        dialect=db_dialect,
+    )
+else:
+    cart_store = TableCartStore(lambda: get_db_connection(), db_dialect,
+                                read=lambda scope=None: get_read_connection(scope))
+
+# Truy cập dữ liệu của các route (users, menu, cart, orders) theo dialect
+repository = Repository(lambda: get_db_connection(), db_dialect, cart=cart_store,
+                        read=lambda scope=None: get_read_connection(scope))
+
+# Giỏ hàng kèm tên/giá/ảnh/nhà hàng từ snapshot menu (không JOIN menu_items),
+# tạm tính và phí ship theo từng nhà hàng giống create_order
+def _cart_view(lines):
+    return build_cart_view(lines, menu_cache.get(_load_menu_items).by_id)
+
 @app.route("/api/cart", methods=["POST"])
+@idempotent(lambda: idempotency_store)
 def add_to_cart():
     data = request.json
-    user_id = data.get("user_id")
+    user_id = _acting_user(data.get("user_id"))
     item_id = data.get("item_id")
     quantity = data.get("quantity", 1)
 
     try:
-        db = get_db_connection()
-        cursor = db.cursor()
-        cursor.execute(
-            "SELECT * FROM cart WHERE user_id=%s AND item_id=%s",
-            (user_id, item_id)
-        )
-        existing = cursor.fetchone()
-
-        if existing:
-            cursor.execute(
-                "UPDATE cart SET quantity = quantity + %s WHERE user_id=%s AND item_id=%s",
-                (quantity, user_id, item_id)
-            )
-        else:
-            cursor.execute(
-                "INSERT INTO cart (user_id, item_id, quantity) VALUES (%s, %s, %s)",
-                (user_id, item_id, quantity)
-            )
-
-        db.commit()
+        # Upsert một câu lệnh dựa trên unique key (user_id, item_id)
+        cart_store.add([(user_id, item_id, quantity)])
         return jsonify({"success": True, "message": "Đã thêm vào giỏ hàng!"})
     except mysql.connector.Error as e:
         return jsonify({"success": False, "message": f"Lỗi: {str(e)}"})
-    finally:
-        cursor.close()
-        db.close()
+
+# Kiểm tra và gộp danh sách món của /api/cart/batch thành các dòng upsert
+def _cart_batch_rows(user_id, items):
+    items = items or []
+    if not isinstance(items, list) or not items:
+        raise ValueError("Danh sách món trống!")
+    if len(items) > CART_BATCH_LIMIT:
+        raise ValueError(f"Tối đa {CART_BATCH_LIMIT} món mỗi lần!")
+
+    # Gộp các món trùng trước khi ghi
+    quantities = {}
+    for entry in items:
+        item_id = entry.get("item_id")
+        quantity = entry.get("quantity", 1)
+        if not isinstance(item_id, int) or not isinstance(quantity, int) or quantity < 1:
+            raise ValueError("Dữ liệu món không hợp lệ!")
+        quantities[item_id] = quantities.get(item_id, 0) + quantity
+
+    # Sắp xếp theo item_id để các giao dịch song song khoá hàng cùng thứ tự
+    return [(user_id, item_id, quantities[item_id]) for item_id in sorted(quantities)]
+
+# Thêm nhiều món vào giỏ trong một request
+@app.route("/api/cart/batch", methods=["POST"])
+@idempotent(lambda: idempotency_store)
+def add_to_cart_batch():
+    data = request.json
+    try:
+        rows = _cart_batch_rows(_acting_user(data.get("user_id")), data.get("items"))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)})
+
+    try:
+        cart_store.add(rows)
+        return jsonify({"success": True, "message": "Đã thêm vào giỏ hàng!", "count": len(rows)})
+    except mysql.connector.Error as e:
+        return jsonify({"success": False, "message": f"Lỗi: {str(e)}"})
 
 @app.route("/api/cart/<int:user_id>", methods=["GET"])
 def get_cart(user_id):
+    user_id = _acting_user(user_id)
     try:
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT c.id, c.quantity, m.name, m.price, m.image 
-            FROM cart c 
-            JOIN menu_items m ON c.item_id = m.id 
-            WHERE c.user_id = %s
-        """, (user_id,))
-        cart_items = cursor.fetchall()
-
-        # Fix image paths
-        for item in cart_items:
-            if item.get('image'):
-                if not item['image'].startswith('uploads/'):
-                    item['image'] = f"uploads/{item['image']}"
-
-        return jsonify({"success": True, "items": cart_items})
+        view = _cart_view(cart_store.lines(user_id))
+        return jsonify({"success": True, **view})
     except mysql.connector.Error as e:
         return jsonify({"success": False, "message": f"Lỗi: {str(e)}"})
-    finally:
-        cursor.close()
-        db.close()
 
 @app.route("/api/cart/update", methods=["PUT"])
 def update_cart():
@@ -233,137 +725,95 @@ def update_cart():
     quantity = data.get("quantity")
 
     try:
-        db = get_db_connection()
-        cursor = db.cursor()
-        cursor.execute(
-            "UPDATE cart SET quantity = %s WHERE id = %s",
-            (quantity, cart_id)
-        )
-        db.commit()
+        _check_cart_owner(cart_id)
+        cart_store.update(cart_id, quantity)
         return jsonify({"success": True, "message": "Đã cập nhật số lượng!"})
     except mysql.connector.Error as e:
         return jsonify({"success": False, "message": f"Lỗi: {str(e)}"})
-    finally:
-        cursor.close()
-        db.close()
 
 @app.route("/api/cart/<int:cart_id>", methods=["DELETE"])
 def remove_from_cart(cart_id):
     try:
-        db = get_db_connection()
-        cursor = db.cursor()
-        cursor.execute("DELETE FROM cart WHERE id = %s", (cart_id,))
-        db.commit()
+        _check_cart_owner(cart_id)
+        cart_store.remove(cart_id)
         return jsonify({"success": True, "message": "Đã xóa khỏi giỏ hàng!"})
     except mysql.connector.Error as e:
         return jsonify({"success": False, "message": f"Lỗi: {str(e)}"})
-    finally:
-        cursor.close()
-        db.close()
 
 # -------------------------
 # Orders
 # -------------------------
 @app.route("/api/order", methods=["POST"])
+@idempotent(lambda: idempotency_store)
 def create_order():
     data = request.json
-    user_id = data.get("user_id")
+    user_id = _acting_user(data.get("user_id"))
 
     try:
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True)
-
-        # Lấy giỏ hàng theo user
-        cursor.execute("""
-            SELECT c.item_id, c.quantity, m.price, m.restaurant
-            FROM cart c
-            JOIN menu_items m ON c.item_id = m.id
-            WHERE c.user_id = %s
-        """, (user_id,))
-        cart_items = cursor.fetchall()
-
-        if not cart_items:
+        # Giỏ trong bộ nhớ được ghi xuống bảng trước khi đọc FOR UPDATE
+        with cart_store.checkout(user_id):
+            # Giá và nhà hàng đọc từ menu_items trong transaction, số round
+            # trip không phụ thuộc số món (xem repository.Orders.place_in)
+            created_orders = repository.orders.place(user_id)
+
+        if created_orders is None:
             return jsonify({"success": False, "message": "Giỏ hàng trống!"})
 
-        # Nhóm theo restaurant
-        restaurant_groups = {}
-        for item in cart_items:
-            restaurant = item["restaurant"]
-            if restaurant not in restaurant_groups:
-                restaurant_groups[restaurant] = []
-            restaurant_groups[restaurant].append(item)
-
-        created_orders = []
-
-        # Tạo 1 đơn cho mỗi nhà hàng
-        for restaurant, items in restaurant_groups.items():
-            total_amount = sum(i["price"] * i["quantity"] for i in items) + 30000  # Cộng phí ship
-            cursor.execute(
-                "INSERT INTO orders (user_id, restaurant, total_amount, status) VALUES (%s, %s, %s, 'pending')",
-                (user_id, restaurant, total_amount)
-            )
-            order_id = cursor.lastrowid
-
-            # Thêm các món vào order_items
-            for i in items:
-                cursor.execute(
-                    "INSERT INTO order_items (order_id, item_id, quantity, price) VALUES (%s, %s, %s, %s)",
-                    (order_id, i["item_id"], i["quantity"], i["price"])
-                )
-
-            created_orders.append(order_id)
-
-        # Xóa giỏ hàng
-        cursor.execute("DELETE FROM cart WHERE user_id = %s", (user_id,))
-        db.commit()
-
-        return jsonify({"success": True, "message": "Đặt hàng thành công!", "orders": created_orders})
+        created_at = datetime.now()
+        for order in created_orders:
+            order["created_at"] = created_at
+            _publish_order("created", order)
+        _enqueue_order_jobs("created", created_orders)
+
+        return jsonify({"success": True, "message": "Đặt hàng thành công!",
+                        "orders": [order["id"] for order in created_orders]})
     except mysql.connector.Error as e:
         return jsonify({"success": False, "message": f"Lỗi: {str(e)}"})
-    finally:
-        cursor.close()
-        db.close()
 
-# Lấy đơn hàng của 1 user (khách hàng)
+# Khoảng chồng lấn của ?since= (giây, >= thời gian tối đa của một transaction):
+# đơn đổi gần đây được trả lại ở lần đồng bộ sau, client bỏ trùng theo id
+ORDER_SYNC_OVERLAP = timedelta(seconds=float(os.environ.get("ORDER_SYNC_OVERLAP", 10)))
+
+# Lấy đơn hàng của 1 user (khách hàng), phân trang theo (created_at, id)
+# hoặc đồng bộ tăng dần với ?since=
 @app.route("/api/orders/user/<int:user_id>", methods=["GET"])
 def get_user_orders(user_id):
+    user_id = _acting_user(user_id)
     try:
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT o.id, o.restaurant, o.total_amount, o.status, o.created_at
-            FROM orders o
-            WHERE o.user_id = %s
-            ORDER BY o.created_at DESC
-        """, (user_id,))
-        orders = cursor.fetchall()
-        return jsonify({"success": True, "orders": orders})
+        page = OrderPage.from_args(request.args, ORDER_SYNC_OVERLAP)
+        return jsonify(page.result(repository.orders.for_user(user_id, page)))
+    except InvalidQuery as e:
+        return jsonify({"success": False, "message": f"Tham số không hợp lệ: {str(e)}"})
     except mysql.connector.Error as e:
         return jsonify({"success": False, "message": f"Lỗi: {str(e)}"})
-    finally:
-        cursor.close()
-        db.close()
 
 # Lấy tất cả đơn hàng (cho nhà hàng) - ĐÃ SỬA LỖI
 @app.route("/api/orders/restaurant/<restaurant_name>", methods=["GET"])
 def get_restaurant_orders(restaurant_name):
+    _check_restaurant(restaurant_name)
     try:
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT o.id, u.username, o.total_amount, o.status, o.created_at
-            FROM orders o
-            JOIN user u ON o.user_id = u.id
-            WHERE o.restaurant = %s
-            ORDER BY o.created_at DESC
-        """, (restaurant_name,))
-        orders = cursor.fetchall()
-        return jsonify({"success": True, "orders": orders})
+        page = OrderPage.from_args(request.args, ORDER_SYNC_OVERLAP)
+        return jsonify(page.result(repository.orders.for_restaurant(restaurant_name, page)))
+    except InvalidQuery as e:
+        return jsonify({"success": False, "message": f"Tham số không hợp lệ: {str(e)}"})
+    except mysql.connector.Error as e:
+        return jsonify({"success": False, "message": f"Lỗi: {str(e)}"})
+
+# Báo cáo doanh thu của nhà hàng theo giờ/ngày từ các bảng rollup:
+# ?granularity=hour|day&from=<ISO>&to=<ISO>&top=5
+@app.route("/api/analytics/restaurant/<restaurant_name>", methods=["GET"])
+def get_restaurant_analytics(restaurant_name):
+    _check_restaurant(restaurant_name)
+    try:
+        query = analytics.AnalyticsQuery.from_args(request.args)
+        menu = menu_cache.get(_load_menu_items).by_id
+        sales, items = repository.orders.sales(restaurant_name, query)
+        names = {item_id: item["name"] for item_id, item in menu.items()}
+        return jsonify({"success": True, **query.report(restaurant_name, sales, items, names)})
+    except InvalidQuery as e:
+        return jsonify({"success": False, "message": f"Tham số không hợp lệ: {str(e)}"})
     except mysql.connector.Error as e:
         return jsonify({"success": False, "message": f"Lỗi: {str(e)}"})
-    finally:
-        cursor.close()
-        db.close()
 
 # Nhà hàng xác nhận/hủy đơn
 @app.route("/api/orders/<int:order_id>/status", methods=["PUT"])
@@ -372,19 +822,86 @@ def update_order_status(order_id):
     status = data.get("status")  # 'confirmed' hoặc 'cancelled'
 
     try:
-        db = get_db_connection()
-        cursor = db.cursor()
-        cursor.execute("UPDATE orders SET status=%s WHERE id=%s", (status, order_id))
-        db.commit()
+        # Trả user/nhà hàng của đơn để đẩy thay đổi đến đúng kênh
+        order = repository.orders.set_status(
+            order_id, status, check=lambda order: _check_restaurant(order["restaurant"]))
+
+        if order:
+            event = {"id": order_id, "user_id": order["user_id"],
+                     "restaurant": order["restaurant"], "status": status}
+            _publish_order("status", event)
+            _enqueue_order_jobs("status", [event])
         return jsonify({"success": True, "message": "Cập nhật trạng thái thành công!"})
     except mysql.connector.Error as e:
         return jsonify({"success": False, "message": f"Lỗi: {str(e)}"})
-    finally:
-        cursor.close()
-        db.close()
+
+# -------------------------
+# Background jobs
+# -------------------------
+# Gọi sau commit: lỗi ghi job không làm hỏng đơn đã tạo
+def _enqueue_order_jobs(name, orders):
+    try:
+        job_queue.enqueue_many([(f"order.{name}", order) for order in orders])
+    except sqlite3.Error:
+        app.logger.exception("Không ghi được job order.%s", name)
+
+# Handler chạy ở worker; job có thể chạy lại nên handler phải chạy lặp được
+def _notify_order_created(order):
+    app.logger.info("Thông báo nhà hàng %s: đơn mới #%s (%s VNĐ)",
+                    order["restaurant"], order["id"], order["total_amount"])
+
+def _notify_order_status(order):
+    app.logger.info("Thông báo user %s: đơn #%s chuyển sang %s",
+                    order["user_id"], order["id"], order["status"])
+
+JOB_HANDLERS = {
+    "order.created": _notify_order_created,
+    "order.status": _notify_order_status,
+}
+
+# -------------------------
+# Order event streams (Server-Sent Events)
+# -------------------------
+def _publish_order(name, order):
+    # Khách/nhà hàng nhận sự kiện rồi tải lại: đọc từ primary cho kịp thấy đơn
+    db_router.wrote(("user", order["user_id"]), ("restaurant", order["restaurant"]))
+    order_events.publish(user_channel(order["user_id"]), name, order)
+    order_events.publish(restaurant_channel(order["restaurant"]), name, order)
+
+def _order_stream(channel):
+    last_event_id = request.headers.get("Last-Event-ID", type=int)
+    subscription = order_events.subscribe([channel], last_event_id)
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                event = subscription.get(timeout=SSE_HEARTBEAT)
+                if event is None:
+                    # Giữ kết nối qua proxy, đồng thời phát hiện client đã đóng
+                    yield ": ping\n\n"
+                    continue
+                yield f"id: {event.id}\nevent: {event.name}\ndata: {app.json.dumps(event.data)}\n\n"
+        finally:
+            subscription.close()
+
+    return Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+@app.route("/api/orders/user/<int:user_id>/stream", methods=["GET"])
+def stream_user_orders(user_id):
+    return _order_stream(user_channel(_acting_user(user_id)))
+
+@app.route("/api/orders/restaurant/<restaurant_name>/stream", methods=["GET"])
+def stream_restaurant_orders(restaurant_name):
+    _check_restaurant(restaurant_name)
+    return _order_stream(restaurant_channel(restaurant_name))
 
 # -------------------------
 # Run app
 # -------------------------
+# Server dev (debug, reload). Production: python -m backend serve
 if __name__ == "__main__":
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    app.run(debug=True, port=int(os.environ.get("PORT", 5000)))
\ No newline at end of file
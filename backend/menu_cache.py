@@ -0,0 +1,135 @@
+import gzip
+import hashlib
+import threading
+import time
+
+from flask import Response
+from werkzeug.http import parse_accept_header, parse_etags
+
+from menu_search import MenuIndex
+
+try:
+    import brotli
+except ImportError:  # brotli là tuỳ chọn, không có thì chỉ nén gzip
+    brotli = None
+
+
+# -------------------------
+# Menu snapshot cache
+# -------------------------
+class MenuSnapshot:
+    """Bản chụp menu đã serialize sẵn thành bytes kèm ETag và các bản nén."""
+
+    def __init__(self, version, items, body):
+        self.version = version
+        self.items = items
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.encoded = {"gzip": gzip.compress(body, compresslevel=9)}
+        if brotli is not None:
+            self.encoded["br"] = brotli.compress(body)
+        self.created_at = time.monotonic()
+        self._index = None
+        self._by_id = None
+
+    @property
+    def index(self):
+        # Dựng chỉ mục tìm kiếm lần đầu có truy vấn lọc/tìm kiếm
+        if self._index is None:
+            self._index = MenuIndex(self.items)
+        return self._index
+
+    @property
+    def by_id(self):
+        if self._by_id is None:
+            self._by_id = {item["id"]: item for item in self.items}
+        return self._by_id
+
+
+class MenuCache:
+    """Cache menu trong process, bị vô hiệu khi có món mới.
+
+    ``ttl`` giới hạn độ cũ khi chạy nhiều worker (mỗi worker có cache riêng
+    và chỉ nhận invalidate từ chính nó).
+    """
+
+    def __init__(self, serialize, ttl=60):
+        self.serialize = serialize
+        self.ttl = ttl
+        self._version = 0
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self._version
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+
+    def peek(self):
+        """Trả (snapshot còn hạn hoặc None, version hiện tại)."""
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and not self._expired(snapshot):
+                return snapshot, self._version
+            return None, self._version
+
+    def put(self, version, items):
+        """Dựng snapshot từ danh sách món đọc được ở ``version``."""
+        snapshot = MenuSnapshot(version, items, self.serialize({"success": True, "items": items}))
+        with self._lock:
+            # Không ghi đè nếu đã có invalidate trong lúc đang dựng
+            if self._version == version:
+                self._snapshot = snapshot
+        return snapshot
+
+    def get(self, build):
+        """Trả snapshot hiện tại, hoặc gọi ``build()`` -> danh sách món để dựng lại."""
+        snapshot = self._snapshot
+        if snapshot is not None and not self._expired(snapshot):
+            return snapshot
+
+        snapshot, version = self.peek()
+        if snapshot is not None:
+            return snapshot
+        return self.put(version, build())
+
+    def _expired(self, snapshot):
+        return self.ttl is not None and time.monotonic() - snapshot.created_at > self.ttl
+
+
+def negotiate(snapshot, if_none_match, accept_encoding):
+    """Chọn (status, body, encoding) cho snapshot từ các header của request."""
+    if parse_etags(if_none_match).contains(snapshot.etag):
+        return 304, b"", None
+    accepted = parse_accept_header(accept_encoding)
+    for name in ("br", "gzip"):
+        if name in snapshot.encoded and accepted[name]:
+            return 200, snapshot.encoded[name], name
+    return 200, snapshot.body, None
+
+
+def snapshot_headers(snapshot, encoding):
+    headers = {
+        "ETag": f'"{snapshot.etag}"',
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return headers
+
+
+def snapshot_response(snapshot, req):
+    """Dựng response cho snapshot: 304 nếu khớp If-None-Match, chọn bản nén theo Accept-Encoding."""
+    status, body, encoding = negotiate(
+        snapshot, req.headers.get("If-None-Match"), req.headers.get("Accept-Encoding"))
+    if status == 304:
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype="application/json")
+    response.headers.update(snapshot_headers(snapshot, encoding))
+    return response
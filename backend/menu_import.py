@@ -0,0 +1,296 @@
+import csv
+import io
+import json
+import os
+import zipfile
+from decimal import Decimal, InvalidOperation
+
+import images
+from serializers import MENU_ITEM, dumps, fetch_batches, stream_array
+
+
+# -------------------------
+# Bulk menu import / export
+# -------------------------
+FORMATS = ("csv", "ndjson")
+EXPORT_FORMATS = FORMATS + ("json",)  # json: một document {"success", "items"}, chỉ để xuất
+BATCH_SIZE = 500          # số dòng mỗi lần executemany (connector gộp thành một INSERT nhiều dòng)
+TRANSACTION_ROWS = 5000   # commit sau chừng này dòng để transaction không phình to
+MAX_ERRORS = 1000         # chỉ trả chi tiết chừng này lỗi, còn lại chỉ đếm
+
+IMPORT_COLUMNS = ("name", "description", "price", "image", "restaurant", "rating", "reviews",
+                  "delivery_time", "distance", "category", "badge")
+INSERT_SQL = (f"INSERT INTO menu_items ({', '.join(IMPORT_COLUMNS)}) "
+              f"VALUES ({', '.join(['%s'] * len(IMPORT_COLUMNS))})")
+
+
+class InvalidRow(ValueError):
+    pass
+
+
+def detect_format(requested, content_type, filename=None):
+    """Định dạng từ ?format=, phần mở rộng file hoặc Content-Type; None nếu không rõ."""
+    if requested:
+        return requested if requested in FORMATS else None
+    if filename:
+        ext = os.path.splitext(filename)[1].lower()
+        if ext == ".csv":
+            return "csv"
+        if ext in (".ndjson", ".jsonl"):
+            return "ndjson"
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+def read_rows(stream, fmt):
+    """Đọc dần ``stream`` (bytes), sinh (số dòng, dict hoặc None, lỗi hoặc None).
+
+    Số dòng tính từ 1 và không gồm dòng tiêu đề CSV.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="" if fmt == "csv" else None)
+    try:
+        if fmt == "csv":
+            for number, row in enumerate(csv.DictReader(text), 1):
+                if None in row:
+                    yield number, None, "thừa cột so với tiêu đề"
+                else:
+                    yield number, row, None
+            return
+        for number, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield number, None, "JSON không hợp lệ"
+                continue
+            if isinstance(row, dict):
+                yield number, row, None
+            else:
+                yield number, None, "mỗi dòng phải là một object JSON"
+    except UnicodeDecodeError:
+        yield None, None, "file không phải UTF-8"
+    finally:
+        # Không để wrapper đóng stream của request
+        if not text.closed:
+            text.detach()
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _text(row, name, limit, required=False, default=None):
+    value = row.get(name)
+    if _blank(value):
+        if required:
+            raise InvalidRow(f"thiếu {name}")
+        return default
+    value = str(value).strip()
+    if len(value) > limit:
+        raise InvalidRow(f"{name} dài quá {limit} ký tự")
+    return value
+
+
+def _decimal(row, name, places, maximum, required=False, default=None):
+    value = row.get(name)
+    if _blank(value):
+        if required:
+            raise InvalidRow(f"thiếu {name}")
+        return default
+    try:
+        number = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise InvalidRow(f"{name} không phải số")
+    if not number.is_finite() or number < 0 or number > maximum:
+        raise InvalidRow(f"{name} phải trong khoảng 0..{maximum}")
+    if number != number.quantize(Decimal(1).scaleb(-places)):
+        raise InvalidRow(f"{name} có quá {places} chữ số thập phân")
+    return number
+
+
+def _int(row, name, maximum, default):
+    value = row.get(name)
+    if _blank(value):
+        return default
+    try:
+        number = int(str(value).strip())
+    except ValueError:
+        raise InvalidRow(f"{name} không phải số nguyên")
+    if number < 0 or number > maximum:
+        raise InvalidRow(f"{name} phải trong khoảng 0..{maximum}")
+    return number
+
+
+class ImageResolver:
+    """Đổi cột image của dòng thành đường dẫn uploads/<file>.
+
+    Có ``archive`` (zip đi kèm): image là tên file trong zip, được chép vào
+    uploads theo hash như khi upload từng món (mỗi file chép một lần).
+    Không có zip: image phải là ảnh đã có trong ``directory``.
+    """
+
+    def __init__(self, directory, archive=None, max_size=10 * 1024 * 1024):
+        self.directory = directory
+        self.archive = archive
+        self.max_size = max_size
+        self.stored = {}  # tên trong zip -> tên file trong uploads
+
+    def resolve(self, value):
+        if value is None:
+            return None
+        if self.archive is not None:
+            return f"uploads/{self._extract(value)}"
+        name = value[len("uploads/"):] if value.startswith("uploads/") else value
+        if os.path.basename(name) != name or not os.path.isfile(os.path.join(self.directory, name)):
+            raise InvalidRow(f"không có ảnh {value}")
+        return f"uploads/{name}"
+
+    def _extract(self, member):
+        if member in self.stored:
+            return self.stored[member]
+        try:
+            info = self.archive.getinfo(member)
+        except KeyError:
+            raise InvalidRow(f"không có ảnh {member} trong file zip")
+        try:
+            with self.archive.open(info) as f:
+                name = images.store_upload(self.directory, f, self.max_size)
+        except images.ImageTooLarge:
+            raise InvalidRow(f"ảnh {member} quá lớn")
+        except (images.InvalidImage, zipfile.BadZipFile):
+            raise InvalidRow(f"{member} không phải hình ảnh hợp lệ")
+        self.stored[member] = name
+        return name
+
+
+class MenuImporter:
+    """Kiểm tra từng dòng khi đọc, ghi các dòng hợp lệ theo lô ``batch_size``
+    và commit sau mỗi ``transaction_rows`` dòng. Dòng lỗi bị bỏ qua và ghi
+    vào báo cáo; các lô đã commit được giữ lại nếu lỗi database giữa chừng.
+
+    ``restaurant``: nhà hàng mặc định của các dòng; nếu có thì mọi dòng phải
+    thuộc nhà hàng này.
+    """
+
+    def __init__(self, get_connection, resolver, restaurant=None, batch_size=BATCH_SIZE,
+                 transaction_rows=TRANSACTION_ROWS, max_errors=MAX_ERRORS):
+        self._get_connection = get_connection
+        self.resolver = resolver
+        self.restaurant = restaurant
+        self.batch_size = batch_size
+        self.transaction_rows = transaction_rows
+        self.max_errors = max_errors
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def validate(self, row):
+        restaurant = _text(row, "restaurant", 100, default=self.restaurant)
+        if restaurant is None:
+            raise InvalidRow("thiếu restaurant")
+        if self.restaurant is not None and restaurant != self.restaurant:
+            raise InvalidRow(f"món của nhà hàng khác ({restaurant})")
+        values = {
+            "name": _text(row, "name", 100, required=True),
+            "description": _text(row, "description", 65535),
+            "price": _decimal(row, "price", 2, Decimal("99999999.99"), required=True),
+            "restaurant": restaurant,
+            # Mặc định giống cột trong qldapm_2.sql
+            "rating": _decimal(row, "rating", 1, Decimal(5), default=Decimal(0)),
+            "reviews": _int(row, "reviews", 2 ** 31 - 1, 0),
+            "delivery_time": _int(row, "delivery_time", 2 ** 31 - 1, 30),
+            "distance": _decimal(row, "distance", 1, Decimal("99.9"), default=Decimal(0)),
+            "category": _text(row, "category", 50),
+            "badge": _text(row, "badge", 20),
+        }
+        # Chép ảnh sau cùng để dòng lỗi không để lại file
+        values["image"] = self.resolver.resolve(_text(row, "image", 255))
+        return tuple(values[column] for column in IMPORT_COLUMNS)
+
+    def _error(self, number, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": number, "message": message})
+
+    def run(self, rows):
+        """``rows``: kết quả của read_rows(). Trả báo cáo (xem ``report``)."""
+        db = self._get_connection()
+        try:
+            cursor = db.cursor()
+            batch = []
+            pending = 0
+            for number, row, error in rows:
+                if error is None:
+                    try:
+                        batch.append(self.validate(row))
+                    except InvalidRow as e:
+                        error = str(e)
+                if error is not None:
+                    self._error(number, error)
+                    continue
+                if len(batch) >= self.batch_size:
+                    cursor.executemany(INSERT_SQL, batch)
+                    pending += len(batch)
+                    batch = []
+                    if pending >= self.transaction_rows:
+                        db.commit()
+                        self.inserted += pending
+                        pending = 0
+            if batch:
+                cursor.executemany(INSERT_SQL, batch)
+                pending += len(batch)
+            if pending:
+                db.commit()
+                self.inserted += pending
+            cursor.close()
+        finally:
+            db.close()
+        return self.report()
+
+    def report(self):
+        return {
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def export_menu(get_connection, fmt, restaurant=None, batch_size=1000):
+    """Sinh bytes của toàn bộ menu (hoặc của ``restaurant``) dạng NDJSON/CSV/JSON,
+    đọc từng lô bằng fetchmany nên không giữ cả catalog trong bộ nhớ."""
+    db = get_connection()
+    try:
+        cursor = db.cursor()
+        sql = f"SELECT {MENU_ITEM.select} FROM menu_items"
+        params = ()
+        if restaurant is not None:
+            sql += " WHERE restaurant = %s"
+            params = (restaurant,)
+        cursor.execute(sql + " ORDER BY id", params)
+        if fmt == "json":
+            yield from stream_array({"success": True}, "items",
+                                    (MENU_ITEM.rows(batch) for batch in fetch_batches(cursor, batch_size)))
+            cursor.close()
+            return
+        if fmt == "csv":
+            yield _csv_lines([MENU_ITEM.keys])
+        for batch in fetch_batches(cursor, batch_size):
+            if fmt == "csv":
+                yield _csv_lines(batch)
+            else:
+                yield b"".join(dumps(row) + b"\n" for row in MENU_ITEM.rows(batch))
+        cursor.close()
+    finally:
+        db.close()
+
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
@@ -0,0 +1,227 @@
+import base64
+import json
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+
+
+# -------------------------
+# Menu search index
+# -------------------------
+TOKEN_RE = re.compile(r"\w+")
+
+# Sort key -> (field, descending), giống các lựa chọn trong menu.html
+SORT_KEYS = {
+    "id": ("id", False),
+    "popular": ("reviews", True),
+    "rating": ("rating", True),
+    "price-low": ("price", False),
+    "price-high": ("price", True),
+    "distance": ("distance", False),
+}
+
+# Các khoảng lọc có sẵn của menu.html: (min, max, min_inclusive, max_inclusive)
+DISTANCE_BANDS = {
+    "near": (None, 2, True, False),
+    "medium": (2, 5, True, True),
+    "far": (5, None, False, True),
+}
+PRICE_BANDS = {
+    "budget": (None, 200000, True, False),
+    "medium": (200000, 400000, True, True),
+    "premium": (400000, None, False, True),
+}
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class InvalidQuery(ValueError):
+    pass
+
+
+def fold(text):
+    """Bỏ dấu tiếng Việt và đưa về chữ thường: 'Phở Bò' -> 'pho bo'."""
+    text = unicodedata.normalize("NFD", str(text).lower())
+    text = "".join(ch for ch in text if unicodedata.category(ch) != "Mn")
+    return text.replace("đ", "d")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(fold(text)) if text else []
+
+
+def _number(value):
+    return float(value) if value is not None else 0.0
+
+
+def encode_cursor(key, item_id):
+    raw = json.dumps([key, item_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key, item_id = json.loads(raw)
+        return float(key), int(item_id)
+    except (ValueError, TypeError):
+        raise InvalidQuery("cursor")
+
+
+class Range:
+    def __init__(self, low=None, high=None, low_inclusive=True, high_inclusive=True):
+        self.low = low
+        self.high = high
+        self.low_inclusive = low_inclusive
+        self.high_inclusive = high_inclusive
+
+    def __contains__(self, value):
+        value = _number(value)
+        if self.low is not None:
+            if value < self.low or (value == self.low and not self.low_inclusive):
+                return False
+        if self.high is not None:
+            if value > self.high or (value == self.high and not self.high_inclusive):
+                return False
+        return True
+
+
+class MenuQuery:
+    """Tham số tìm kiếm đã được kiểm tra, dựng từ query string của GET /api/menu."""
+
+    def __init__(self, q="", category=None, restaurant=None, price=None,
+                 distance=None, min_rating=None, sort="id", limit=DEFAULT_LIMIT,
+                 cursor=None):
+        if sort not in SORT_KEYS:
+            raise InvalidQuery("sort")
+        self.terms = tokenize(q)
+        self.category = fold(category) if category else None
+        self.restaurant = fold(restaurant) if restaurant else None
+        self.price = price
+        self.distance = distance
+        self.min_rating = min_rating
+        self.sort = sort
+        self.limit = max(1, min(limit, MAX_LIMIT))
+        self.cursor = decode_cursor(cursor) if cursor else None
+
+    @classmethod
+    def from_args(cls, args):
+        try:
+            return cls(
+                q=args.get("q", ""),
+                category=args.get("category"),
+                restaurant=args.get("restaurant"),
+                price=_range(args, "price", PRICE_BANDS),
+                distance=_range(args, "distance", DISTANCE_BANDS),
+                min_rating=_float(args.get("min_rating")),
+                sort=args.get("sort", "id"),
+                limit=int(args.get("limit", DEFAULT_LIMIT)),
+                cursor=args.get("cursor"),
+            )
+        except (TypeError, ValueError) as e:
+            raise InvalidQuery(str(e))
+
+
+def _float(value):
+    return float(value) if value not in (None, "") else None
+
+
+def _range(args, name, bands):
+    band = args.get(name)
+    low = _float(args.get(f"min_{name}"))
+    high = _float(args.get(f"max_{name}"))
+    if band:
+        if band not in bands:
+            raise InvalidQuery(name)
+        return Range(*bands[band])
+    if low is None and high is None:
+        return None
+    return Range(low, high)
+
+
+class MenuIndex:
+    """Chỉ mục trong bộ nhớ cho một snapshot menu.
+
+    Gồm chỉ mục ngược token -> vị trí món (token đã bỏ dấu, tìm theo tiền tố)
+    và các danh sách đã sắp xếp theo (khoá sắp xếp, id) để phân trang keyset.
+    """
+
+    def __init__(self, items):
+        self.items = items
+        self._postings = {}
+        self._folded = []
+        for pos, item in enumerate(items):
+            text = " ".join(str(item.get(f) or "") for f in ("name", "restaurant", "description"))
+            for token in set(tokenize(text)):
+                self._postings.setdefault(token, []).append(pos)
+            self._folded.append((fold(item.get("category") or ""), fold(item.get("restaurant") or "")))
+        self._vocabulary = sorted(self._postings)
+
+        # sort -> (keys, positions, ranks): keys[r] là khoá của món thứ r,
+        # positions[r] là vị trí món đó, ranks[pos] là thứ hạng của món
+        self._orders = {}
+        for sort, (field, descending) in SORT_KEYS.items():
+            sign = -1 if descending else 1
+            keyed = sorted((sign * _number(item.get(field)), item["id"], pos)
+                           for pos, item in enumerate(items))
+            positions = [pos for _, _, pos in keyed]
+            ranks = [0] * len(items)
+            for rank, pos in enumerate(positions):
+                ranks[pos] = rank
+            self._orders[sort] = ([(key, item_id) for key, item_id, _ in keyed], positions, ranks)
+
+    def _match_terms(self, terms):
+        matched = None
+        for term in terms:
+            lo = bisect_left(self._vocabulary, term)
+            hi = bisect_right(self._vocabulary, term + "\uffff")
+            positions = set()
+            for token in self._vocabulary[lo:hi]:
+                positions.update(self._postings[token])
+            matched = positions if matched is None else matched & positions
+            if not matched:
+                return set()
+        return matched
+
+    def _accept(self, pos, query):
+        item = self.items[pos]
+        category, restaurant = self._folded[pos]
+        if query.category is not None and category != query.category:
+            return False
+        if query.restaurant is not None and restaurant != query.restaurant:
+            return False
+        if query.price is not None and item.get("price") not in query.price:
+            return False
+        if query.distance is not None and item.get("distance") not in query.distance:
+            return False
+        if query.min_rating is not None and _number(item.get("rating")) < query.min_rating:
+            return False
+        return True
+
+    def search(self, query):
+        """Trả (items, next_cursor) cho một trang kết quả."""
+        candidates = self._match_terms(query.terms) if query.terms else None
+        keys, positions, ranks = self._orders[query.sort]
+        start = bisect_right(keys, query.cursor) if query.cursor else 0
+
+        if candidates is None:
+            order = range(start, len(positions))
+        elif len(candidates) * 4 > len(positions):
+            # Từ khoá phổ biến: duyệt theo thứ tự sẵn có, dừng sớm khi đủ trang
+            order = (rank for rank in range(start, len(positions)) if positions[rank] in candidates)
+        else:
+            # Ít món khớp: chỉ sắp xếp các món khớp thay vì duyệt cả danh sách
+            order = sorted(rank for rank in (ranks[pos] for pos in candidates) if rank >= start)
+
+        page = []
+        last = None
+        for rank in order:
+            pos = positions[rank]
+            if not self._accept(pos, query):
+                continue
+            if len(page) == query.limit:
+                return page, encode_cursor(*last)
+            page.append(self.items[pos])
+            last = keys[rank]
+        return page, None
@@ -0,0 +1,375 @@
+import bisect
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+from serializers import FastJSONProvider
+
+
+# -------------------------
+# Metrics (Prometheus text format)
+# -------------------------
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+BACKGROUND = "-"  # nhãn route cho truy vấn ngoài request (flush giỏ, backfill...)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def series(name, **labels):
+    """Tên series có nhãn cho ``Metrics.render(values)``, vd. db_replica_up{replica="a"}."""
+    pairs = ",".join(f'{label}="{_escape(value)}"' for label, value in labels.items())
+    return f"{name}{{{pairs}}}" if pairs else name
+
+
+class Histogram:
+    """Histogram có nhãn; mỗi bộ nhãn giữ số đếm theo bucket, tổng và số mẫu."""
+
+    def __init__(self, name, help, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [đếm theo bucket..., +Inf, tổng]
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, values in sorted(series.items()):
+            pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labels, labels)]
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values):
+                cumulative += count
+                le = bound if bound == "+Inf" else _format(bound)
+                bucket_labels = ",".join(pairs + ['le="%s"' % le])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            prefix = "{%s}" % ",".join(pairs) if pairs else ""
+            lines.append(f"{self.name}_sum{prefix} {_format(values[-1])}")
+            lines.append(f"{self.name}_count{prefix} {cumulative}")
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class RequestTrace:
+    """Thời gian của một request, cộng dồn từ kết nối/truy vấn/serialize."""
+
+    __slots__ = ("method", "route", "started", "connect", "db", "queries", "json")
+
+    def __init__(self, method, route):
+        self.method = method
+        self.route = route
+        self.started = time.perf_counter()
+        self.connect = 0.0
+        self.db = 0.0
+        self.queries = 0
+        self.json = 0.0
+
+
+class Metrics:
+    """Thu thập số liệu của process: latency theo route, thời gian DB theo
+    truy vấn, thời gian lấy kết nối từ pool, serialize JSON và kích thước
+    response. Mỗi worker gunicorn có bộ số liệu riêng.
+
+    Request đang chạy được giữ trong thread-local để cursor/JSON provider biết
+    cộng vào route nào. ``enabled=False`` bỏ qua toàn bộ việc đo.
+    """
+
+    def __init__(self, enabled=True, profiler=None):
+        self.enabled = enabled
+        self.profiler = profiler
+        self._local = threading.local()
+        self.request_seconds = Histogram(
+            "http_request_duration_seconds", "Thời gian xử lý request", ("method", "route", "status"))
+        self.request_db_seconds = Histogram(
+            "http_request_db_seconds", "Tổng thời gian DB (lấy kết nối + truy vấn) trong một request", ("route",))
+        self.response_bytes = Histogram(
+            "http_response_size_bytes", "Kích thước body response", ("route",), SIZE_BUCKETS)
+        self.connect_seconds = Histogram(
+            "db_connect_seconds", "Thời gian lấy kết nối từ pool", ("route",))
+        self.query_seconds = Histogram(
+            "db_query_duration_seconds", "Thời gian một execute/executemany/commit", ("route", "statement"))
+        self.json_seconds = Histogram(
+            "json_serialize_seconds", "Thời gian serialize JSON", ("route",))
+        self._histograms = (self.request_seconds, self.request_db_seconds, self.response_bytes,
+                            self.connect_seconds, self.query_seconds, self.json_seconds)
+
+    @property
+    def current(self):
+        return getattr(self._local, "trace", None)
+
+    # Gọi ở before_request / after_request / teardown_request
+    def begin(self, method, route):
+        if not self.enabled:
+            return None
+        trace = self._local.trace = RequestTrace(method, route)
+        if self.profiler:
+            self.profiler.start()
+        return trace
+
+    def finish(self, status, size):
+        trace = self.current
+        if trace is None:
+            return None
+        self._local.trace = None
+        elapsed = time.perf_counter() - trace.started
+        self.request_seconds.observe((trace.method, trace.route, str(status)), elapsed)
+        self.request_db_seconds.observe((trace.route,), trace.connect + trace.db)
+        if size is not None:
+            self.response_bytes.observe((trace.route,), size)
+        if self.profiler:
+            self.profiler.stop(elapsed, f"{trace.method} {trace.route}")
+        return elapsed, trace
+
+    def discard(self):
+        # Request lỗi trước after_request: không để trace sót sang request sau
+        if self.current is not None:
+            self._local.trace = None
+            if self.profiler:
+                self.profiler.stop(0, None)
+
+    def record_connect(self, elapsed):
+        trace = self.current
+        if trace:
+            trace.connect += elapsed
+        self.connect_seconds.observe((trace.route if trace else BACKGROUND,), elapsed)
+
+    def record_query(self, sql, elapsed):
+        trace = self.current
+        if trace:
+            trace.db += elapsed
+            trace.queries += 1
+        self.query_seconds.observe((trace.route if trace else BACKGROUND, statement_kind(sql)), elapsed)
+
+    def record_json(self, elapsed):
+        trace = self.current
+        if trace:
+            trace.json += elapsed
+        self.json_seconds.observe((trace.route if trace else BACKGROUND,), elapsed)
+
+    def connect(self, connect):
+        """Gọi ``connect()`` (vd. pool.connect), đo thời gian và bọc kết nối."""
+        if not self.enabled:
+            return connect()
+        start = time.perf_counter()
+        conn = connect()
+        self.record_connect(time.perf_counter() - start)
+        return TimedConnection(conn, self)
+
+    def server_timing(self, elapsed, trace):
+        return (f'connect;dur={trace.connect * 1000:.2f}, '
+                f'db;dur={trace.db * 1000:.2f};desc="{trace.queries} queries", '
+                f'json;dur={trace.json * 1000:.2f}, total;dur={elapsed * 1000:.2f}')
+
+    def render(self, values=()):
+        """``values``: [(tên, gauge|counter, giá trị)] thêm vào cuối (vd. số liệu
+        pool); tên có thể kèm nhãn (xem series())."""
+        lines = []
+        for histogram in self._histograms:
+            lines.extend(histogram.render())
+        typed = set()
+        for name, kind, value in values:
+            family = name.split("{", 1)[0]
+            if family not in typed:
+                typed.add(family)
+                lines.append(f"# TYPE {family} {kind}")
+            lines.append(f"{name} {_format(value)}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        for histogram in self._histograms:
+            histogram.reset()
+
+
+def statement_kind(sql):
+    # SELECT/INSERT/UPDATE...: giữ nhãn ít giá trị, không đưa câu SQL vào nhãn
+    word = sql.lstrip().split(None, 1)[0] if sql and sql.strip() else ""
+    return word.upper() or "OTHER"
+
+
+class TimedConnection:
+    """Bọc kết nối (PooledConnection): cursor() trả TimedCursor, commit được đo."""
+
+    def __init__(self, raw, metrics):
+        self._raw = raw
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._raw.cursor(*args, **kwargs), self._metrics)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            return self._raw.commit()
+        finally:
+            self._metrics.record_query("COMMIT", time.perf_counter() - start)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TimedCursor:
+    """Bọc cursor: đo execute/executemany, các thuộc tính khác chuyển thẳng."""
+
+    def __init__(self, raw, metrics):
+        self._raw = raw
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def execute(self, operation, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._raw.execute(operation, *args, **kwargs)
+        finally:
+            self._metrics.record_query(operation, time.perf_counter() - start)
+
+    def executemany(self, operation, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._raw.executemany(operation, *args, **kwargs)
+        finally:
+            self._metrics.record_query(operation, time.perf_counter() - start)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TimedJSONProvider(FastJSONProvider):
+    """JSON provider của Flask có đo thời gian serialize (jsonify và _json_bytes)."""
+
+    def __init__(self, app, metrics):
+        super().__init__(app)
+        self.metrics = metrics
+
+    def encode(self, obj):
+        if not self.metrics.enabled:
+            return super().encode(obj)
+        start = time.perf_counter()
+        try:
+            return super().encode(obj)
+        finally:
+            self.metrics.record_json(time.perf_counter() - start)
+
+
+# -------------------------
+# Sampling profiler
+# -------------------------
+class SamplingProfiler:
+    """Lấy mẫu stack của các thread đang xử lý request mỗi ``interval`` giây
+    (sys._current_frames, một thread nền). Request chạy lâu hơn ``slow`` giây
+    thì stack được ghi ra ``out_dir`` dạng "folded" (mỗi dòng
+    ``hàm;hàm;hàm số_mẫu``) cho flamegraph.pl hoặc speedscope.
+
+    Chỉ giữ ``max_files`` file mới nhất.
+    """
+
+    def __init__(self, out_dir, slow=0.5, interval=0.005, max_files=100):
+        self.out_dir = out_dir
+        self.slow = slow
+        self.interval = interval
+        self.max_files = max_files
+        self._active = {}  # thread id -> Counter(stack)
+        self._lock = threading.Lock()
+        self._files = deque()
+        self._pid = None
+        self.samples = 0
+
+    def _ensure_thread(self):
+        # Thread nền không sống sót qua fork (gunicorn preload): mở lại theo pid
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name="sampling-profiler", daemon=True).start()
+
+    def start(self):
+        with self._lock:
+            self._ensure_thread()
+            self._active[threading.get_ident()] = Counter()
+
+    def stop(self, elapsed, label):
+        """Kết thúc lấy mẫu cho thread hiện tại; trả đường dẫn file nếu có ghi."""
+        with self._lock:
+            stacks = self._active.pop(threading.get_ident(), None)
+        if label is None or not stacks or elapsed < self.slow:
+            return None
+        return self._dump(stacks, elapsed, label)
+
+    def _run(self):
+        pid = os.getpid()
+        me = threading.get_ident()
+        while self._pid == pid:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for ident, stacks in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None and ident != me:
+                        stacks[fold(frame)] += 1
+                        self.samples += 1
+
+    def _dump(self, stacks, elapsed, label):
+        os.makedirs(self.out_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_")
+        name = f"{datetime.now():%Y%m%dT%H%M%S%f}-{os.getpid()}-{slug}-{elapsed * 1000:.0f}ms.folded"
+        path = os.path.join(self.out_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with self._lock:
+            self._files.append(path)
+            old = self._files.popleft() if len(self._files) > self.max_files else None
+        if old:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+        return path
+
+
+def fold(frame):
+    # Gốc trước, lá sau; tên hàm kèm file:dòng định nghĩa để gộp mẫu cùng hàm
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names)).replace(" ", "_")
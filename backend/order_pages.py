@@ -0,0 +1,117 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+from menu_search import InvalidQuery
+
+
+# -------------------------
+# Order history pagination
+# -------------------------
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+# updated_at là lúc câu lệnh chạy, không phải lúc commit: transaction commit
+# muộn có thể mang updated_at sớm hơn token client đã nhận. Đơn đổi trong
+# khoảng này (>= thời gian chạy tối đa của một transaction) chưa được coi là
+# đã chốt và sẽ được trả lại ở lần đồng bộ sau.
+SYNC_OVERLAP = timedelta(seconds=10)
+
+
+def encode_token(moment, order_id):
+    raw = json.dumps([moment.isoformat(), order_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_token(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        moment, order_id = json.loads(raw)
+        return datetime.fromisoformat(moment), int(order_id)
+    except (ValueError, TypeError):
+        raise InvalidQuery("cursor")
+
+
+def _decode_since(value):
+    # Nhận token sync_token đã trả trước đó, hoặc một mốc thời gian ISO
+    # (có múi giờ thì đổi về giờ địa phương như cột updated_at)
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return decode_token(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment, 0
+
+
+class OrderPage:
+    """Tham số phân trang cho danh sách đơn.
+
+    - Lịch sử: sắp xếp (created_at, id) giảm dần, ``cursor`` là vị trí của
+      dòng cuối trang trước.
+    - Đồng bộ (``since``): chỉ các đơn mới/đã đổi có (updated_at, id) lớn hơn
+      token, tăng dần; ``sync_token`` trả về dùng cho lần gọi tiếp theo.
+      Token không vượt quá ``now - overlap`` (xem SYNC_OVERLAP) nên đơn đổi
+      gần đây có thể được trả lại nhiều lần: client bỏ trùng theo id.
+    """
+
+    def __init__(self, limit=DEFAULT_LIMIT, cursor=None, since=None, overlap=SYNC_OVERLAP,
+                 clock=datetime.now):
+        self.limit = max(1, min(limit, MAX_LIMIT))
+        self.cursor = decode_token(cursor) if cursor else None
+        self.since = _decode_since(since) if since else None
+        self.overlap = overlap
+        self._clock = clock
+
+    @classmethod
+    def from_args(cls, args, overlap=SYNC_OVERLAP):
+        try:
+            return cls(
+                limit=int(args.get("limit", DEFAULT_LIMIT)),
+                cursor=args.get("cursor"),
+                since=args.get("since"),
+                overlap=overlap,
+            )
+        except (TypeError, ValueError) as e:
+            raise InvalidQuery(str(e))
+
+    def sql(self, select, where, params):
+        """Ghép câu truy vấn trang; ``select`` phải lấy o.id, o.created_at, o.updated_at."""
+        params = list(params)
+        if self.since is not None:
+            moment, order_id = self.since
+            where += " AND (o.updated_at > %s OR (o.updated_at = %s AND o.id > %s))"
+            params += [moment, moment, order_id]
+            order = "ORDER BY o.updated_at ASC, o.id ASC"
+        else:
+            if self.cursor is not None:
+                moment, order_id = self.cursor
+                where += " AND (o.created_at < %s OR (o.created_at = %s AND o.id < %s))"
+                params += [moment, moment, order_id]
+            order = "ORDER BY o.created_at DESC, o.id DESC"
+        # Lấy dư một dòng để biết còn trang sau hay không
+        params.append(self.limit + 1)
+        return f"{select} {where} {order} LIMIT %s", params
+
+    def result(self, rows):
+        more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        payload = {"success": True, "orders": rows}
+        if self.since is not None:
+            # Đơn đổi sau mốc này có thể còn transaction chưa commit mang
+            # updated_at sớm hơn: token không vượt qua mốc
+            settled = (self._clock() - self.overlap, 0)
+            if rows:
+                last = (rows[-1]["updated_at"], rows[-1]["id"])
+                token = min(last, settled)
+                if more and token <= self.since:
+                    # Cả trang nằm trong khoảng chưa chốt: vẫn phải tiến để
+                    # không trả lại đúng trang này mãi
+                    token = last
+            else:
+                token = min(self.since, settled)
+            payload["sync_token"] = encode_token(*token)
+            payload["has_more"] = more
+        else:
+            last = rows[-1] if more else None
+            payload["next_cursor"] = encode_token(last["created_at"], last["id"]) if last else None
+        return payload
@@ -0,0 +1,142 @@
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+try:
+    import argon2
+except ImportError:  # argon2-cffi là tuỳ chọn
+    argon2 = None
+
+try:
+    import bcrypt
+except ImportError:  # bcrypt là tuỳ chọn
+    bcrypt = None
+
+
+# -------------------------
+# Password hashing
+# -------------------------
+WERKZEUG_PREFIXES = ("scrypt:", "pbkdf2:")
+
+
+class HasherBusy(Exception):
+    """Hàng đợi hash mật khẩu đã đầy."""
+
+
+class PasswordTooLong(ValueError):
+    """Mật khẩu dài hơn giới hạn của scheme (bcrypt chỉ dùng 72 byte đầu)."""
+
+
+# bcrypt bỏ qua (hoặc báo lỗi với) phần sau 72 byte: từ chối thay vì cắt ngầm
+BCRYPT_MAX_BYTES = 72
+
+
+def default_scheme():
+    if argon2 is not None:
+        return "argon2"
+    if bcrypt is not None:
+        return "bcrypt"
+    return "scrypt:32768:8:1"
+
+
+def scheme_of(stored):
+    if stored.startswith("$argon2"):
+        return "argon2"
+    if stored.startswith(("$2a$", "$2b$", "$2y$")):
+        return "bcrypt"
+    if stored.startswith(WERKZEUG_PREFIXES):
+        return stored.split("$", 1)[0]
+    # Dòng cũ lưu mật khẩu dạng plaintext
+    return None
+
+
+class PasswordHasher:
+    """Hash/verify mật khẩu trên thread pool giới hạn.
+
+    ``scheme``: "argon2" (argon2-cffi), "bcrypt", hoặc method của werkzeug
+    ("scrypt:N:r:p", "pbkdf2:sha256:iterations"). ``cost``: time_cost của
+    argon2 hoặc số rounds (log2) của bcrypt. Hash kiểu khác hoặc cost khác
+    cấu hình hiện tại (kể cả plaintext cũ) được ``verify`` báo cần hash lại.
+
+    Tối đa ``workers`` hash chạy cùng lúc và ``max_pending`` request đang
+    hash/chờ; quá ``wait_timeout`` giây chưa có chỗ thì báo HasherBusy.
+    """
+
+    def __init__(self, scheme=None, cost=None, workers=None, max_pending=64, wait_timeout=10):
+        self.scheme = scheme or default_scheme()
+        self.cost = cost
+        if self.scheme == "argon2":
+            if argon2 is None:
+                raise RuntimeError("scheme argon2 cần cài argon2-cffi")
+            self._argon2 = argon2.PasswordHasher(
+                **({"time_cost": cost} if cost else {}))
+        elif self.scheme == "bcrypt" and bcrypt is None:
+            raise RuntimeError("scheme bcrypt cần cài bcrypt")
+        self.wait_timeout = wait_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count(),
+                                            thread_name_prefix="passwords")
+
+    # Chạy trực tiếp (không qua pool)
+    def _hash(self, password):
+        if self.scheme == "argon2":
+            return self._argon2.hash(password)
+        if self.scheme == "bcrypt":
+            secret = password.encode("utf-8")
+            if len(secret) > BCRYPT_MAX_BYTES:
+                raise PasswordTooLong(f"mật khẩu vượt quá {BCRYPT_MAX_BYTES} byte")
+            salt = bcrypt.gensalt(rounds=self.cost or 12)
+            return bcrypt.hashpw(secret, salt).decode("ascii")
+        return generate_password_hash(password, method=self.scheme)
+
+    def _verify(self, stored, password):
+        """Trả (khớp, cần_hash_lại)."""
+        scheme = scheme_of(stored)
+        if scheme is None:
+            return hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8")), True
+        if scheme == "argon2":
+            if argon2 is None:
+                return False, False
+            try:
+                argon2.PasswordHasher().verify(stored, password)
+            except (argon2.exceptions.VerificationError, argon2.exceptions.InvalidHashError):
+                return False, False
+            stale = self.scheme != "argon2" or self._argon2.check_needs_rehash(stored)
+            return True, stale
+        if scheme == "bcrypt":
+            if bcrypt is None:
+                return False, False
+            secret = password.encode("utf-8")
+            if len(secret) > BCRYPT_MAX_BYTES:
+                return False, False
+            try:
+                ok = bcrypt.checkpw(secret, stored.encode("ascii"))
+            except ValueError:
+                return False, False
+            stale = self.scheme != "bcrypt" or int(stored.split("$")[2]) != (self.cost or 12)
+            return ok, ok and stale
+        ok = check_password_hash(stored, password)
+        return ok, ok and scheme != self.scheme
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            raise HasherBusy()
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(self._hash, password)
+
+    def verify(self, stored, password):
+        return self._run(self._verify, stored, password)
+
+    def dummy_verify(self, password):
+        # Username không tồn tại: vẫn tốn thời gian như khi verify thật
+        if not hasattr(self, "_dummy"):
+            self._dummy = self._hash("dummy-password")
+        self.verify(self._dummy, password)
@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# -------------------------
+# Rate limiting
+# -------------------------
+class TokenBucket:
+    """Giới hạn theo key: mỗi key có ``burst`` token, hồi ``rate`` token/giây.
+
+    Các bucket giữ trong bộ nhớ (LRU, khoảng ``max_keys``). Chỉ bucket đã hồi
+    đầy mới bị đẩy ra (tạo lại cũng đầy nên không sai kết quả); bucket đang
+    cạn được giữ dù vượt ``max_keys``, nên rải nhiều key khác nhau không xoá
+    được lượt chặn của key đang bị giới hạn.
+    """
+
+    def __init__(self, rate, burst, max_keys=100000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets = OrderedDict()  # key -> [tokens, updated_at]
+        self._lock = threading.Lock()
+
+    def take(self, key, tokens=1):
+        """Trả 0 nếu được phép, hoặc số giây cần chờ."""
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+                self._evict(now)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= tokens:
+                bucket[0] -= tokens
+                return 0
+            return (tokens - bucket[0]) / self.rate
+
+    def _evict(self, now):
+        # Gọi khi giữ _lock: bỏ các bucket cũ nhất đã hồi đầy, dừng ở bucket
+        # cũ nhất còn đang hồi
+        while len(self._buckets) > self.max_keys:
+            key, (tokens, updated_at) = next(iter(self._buckets.items()))
+            if tokens + (now - updated_at) * self.rate < self.burst:
+                return
+            del self._buckets[key]
+
+
+class LoginLimiter:
+    """Token bucket theo IP và theo username trước /api/login."""
+
+    def __init__(self, per_ip, per_user):
+        self.per_ip = per_ip
+        self.per_user = per_user
+
+    def check(self, ip, username):
+        wait = self.per_ip.take(ip)
+        if wait:
+            return wait
+        return self.per_user.take((username or "").lower())
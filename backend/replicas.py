@@ -0,0 +1,214 @@
+import itertools
+import logging
+import threading
+import time
+
+from mysql.connector import errors
+
+log = logging.getLogger(__name__)
+
+
+# -------------------------
+# Read replicas
+# -------------------------
+def replica_lag(conn):
+    """Số giây replica MySQL chậm hơn primary; None nếu replication không chạy."""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")  # MySQL 8.0.22+
+        except errors.ProgrammingError:
+            cursor.execute("SHOW SLAVE STATUS")  # MySQL cũ, MariaDB
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    # Server không cấu hình replication thì không biết dữ liệu cũ đến đâu
+    if not rows:
+        return None
+    lag = rows[0].get("Seconds_Behind_Source", rows[0].get("Seconds_Behind_Master"))
+    return None if lag is None else float(lag)
+
+
+class Replica:
+    """Một replica: pool kết nối riêng và kết quả lần kiểm tra gần nhất."""
+
+    def __init__(self, name, pool):
+        self.name = name
+        self.pool = pool
+        # Chưa kiểm tra lần nào thì chưa nhận truy vấn đọc
+        self.healthy = False
+        self.lag = None
+        self.error = None
+        self.checked_at = None
+        self.reads = 0
+        self.failures = 0
+
+
+class ReplicaRouter:
+    """Chia truy vấn đọc cho các replica, ghi luôn vào primary.
+
+    ``read(*keys)`` lấy kết nối của replica tiếp theo (round-robin) trong các
+    replica khoẻ và trễ không quá ``max_lag`` giây; không còn replica nào
+    dùng được thì đọc từ primary. Trong ``window`` giây sau ``wrote(key)``
+    các ``read`` có ``key`` đó đọc từ primary (read-your-writes). Replica
+    được kiểm tra (kết nối + ``lag(conn)``) mỗi ``check_interval`` giây trên
+    thread nền; replica lỗi khi lấy kết nối bị loại đến lần kiểm tra sau.
+
+    Replica được coi là trễ tối đa ``max_lag + check_interval`` giây (trễ
+    thêm giữa hai lần kiểm tra), nên ``window`` mặc định bằng tổng này.
+
+    ``primary`` và ``Replica.pool`` là ConnectionPool (có connect()/dispose()).
+    Mốc ghi giữ trong bộ nhớ của process: với nhiều worker, người ghi cần
+    tự mang mốc theo request (xem main.remember_writes) và gọi
+    ``read(..., pinned=True)``; mốc trong bộ nhớ vẫn dùng cho dữ liệu người
+    khác vừa đổi (đơn mới của nhà hàng...).
+    """
+
+    def __init__(self, primary, replicas=(), lag=replica_lag, max_lag=5.0, check_interval=2.0,
+                 window=None, max_keys=10000, clock=time.monotonic):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        if window is None:
+            window = max_lag + check_interval
+        elif 0 < window < max_lag + check_interval:
+            log.warning("cửa sổ read-your-writes %ss ngắn hơn độ trễ replica tối đa %ss", window,
+                        max_lag + check_interval)
+        self.window = window
+        self.max_keys = max_keys
+        self._lag = lag
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._written = {}  # key -> thời điểm hết cửa sổ read-your-writes
+        self._next = itertools.count()
+        self._checker = None
+        self._stop = threading.Event()
+        self.pinned_reads = 0
+        self.fallback_reads = 0
+
+    def _usable(self, replica):
+        return replica.healthy and replica.lag is not None and replica.lag <= self.max_lag
+
+    def _pinned(self, keys):
+        now = self._clock()
+        with self._lock:
+            return any(self._written.get(key, now) > now for key in keys if key is not None)
+
+    def read(self, *keys, pinned=False):
+        """Kết nối cho truy vấn chỉ đọc; ``keys``: người gửi/dữ liệu cần đọc.
+        ``pinned``: người gửi vừa ghi (mốc do client mang theo), đọc primary."""
+        if not self.replicas:
+            return self.primary.connect()
+        self._start_checker()
+        if pinned or self._pinned(keys):
+            with self._lock:
+                self.pinned_reads += 1
+            return self.primary.connect()
+
+        candidates = [replica for replica in self.replicas if self._usable(replica)]
+        start = next(self._next)
+        for n in range(len(candidates)):
+            replica = candidates[(start + n) % len(candidates)]
+            try:
+                conn = replica.pool.connect()
+            except errors.Error as e:
+                self._set_state(replica, False, None, e)
+                continue
+            with self._lock:
+                replica.reads += 1
+            return conn
+
+        with self._lock:
+            self.fallback_reads += 1
+        return self.primary.connect()
+
+    def wrote(self, *keys):
+        """Ghi nhận vừa ghi cho ``keys``: ``read`` với các key này đọc primary."""
+        if not self.replicas or not self.window:
+            return
+        now = self._clock()
+        with self._lock:
+            for key in keys:
+                if key is not None:
+                    self._written[key] = now + self.window
+            if len(self._written) > self.max_keys:
+                self._written = {key: until for key, until in self._written.items() if until > now}
+
+    def _set_state(self, replica, healthy, lag, error=None):
+        with self._lock:
+            was_usable = self._usable(replica)
+            replica.healthy = healthy
+            replica.lag = lag
+            replica.error = str(error) if error else None
+            replica.checked_at = self._clock()
+            if not healthy:
+                replica.failures += 1
+            usable = self._usable(replica)
+        if was_usable and not usable:
+            log.warning("replica %s bị loại: %s", replica.name,
+                        replica.error or ("trễ %ss" % lag if lag is not None else "replication không chạy"))
+        elif usable and not was_usable:
+            log.info("replica %s nhận truy vấn đọc (trễ %ss)", replica.name, lag)
+
+    def check(self):
+        """Kiểm tra kết nối và độ trễ của mọi replica ngay."""
+        for replica in self.replicas:
+            try:
+                conn = replica.pool.connect()
+                try:
+                    lag = self._lag(conn)
+                finally:
+                    conn.close()
+            except errors.Error as e:
+                self._set_state(replica, False, None, e)
+                continue
+            self._set_state(replica, True, lag)
+
+    def _start_checker(self):
+        # Tạo thread lười (không tạo ở master gunicorn trước khi fork);
+        # check_interval=0 thì chỉ kiểm tra khi gọi check()
+        if not self.check_interval:
+            return
+        if self._checker is None or not self._checker.is_alive():
+            with self._lock:
+                if self._checker is None or not self._checker.is_alive():
+                    self._checker = threading.Thread(target=self._check_loop, name="replica-check",
+                                                     daemon=True)
+                    self._checker.start()
+
+    def _check_loop(self):
+        while True:
+            try:
+                self.check()
+            except Exception:
+                log.exception("kiểm tra replica lỗi")
+            if self._stop.wait(self.check_interval):
+                return
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_lag": self.max_lag,
+                "window": self.window,
+                "pinned_reads": self.pinned_reads,
+                "fallback_reads": self.fallback_reads,
+                "replicas": [{
+                    "name": replica.name,
+                    "usable": self._usable(replica),
+                    "healthy": replica.healthy,
+                    "lag": replica.lag,
+                    "error": replica.error,
+                    "reads": replica.reads,
+                    "failures": replica.failures,
+                } for replica in self.replicas],
+            }
+
+    def dispose(self):
+        """Đóng kết nối rảnh của các replica (pool primary do nơi tạo quản lý)."""
+        for replica in self.replicas:
+            replica.pool.dispose()
+
+    def close(self):
+        self._stop.set()
+        self.dispose()
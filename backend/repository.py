@@ -0,0 +1,302 @@
+import contextlib
+from collections import OrderedDict
+
+from mysql.connector.errors import Error
+
+from cart_view import build_cart_view
+from dialects import MYSQL
+from serializers import ORDER_SUMMARY, RESTAURANT_ORDER
+import analytics
+
+
+# -------------------------
+# Prepared statement cache
+# -------------------------
+class PreparedStatementConnection:
+    """Bọc kết nối MySQL: giữ prepared statement theo câu SQL trên kết nối.
+
+    ``cursor(prepared=True)`` trả CachedCursor: mỗi câu SQL chỉ PREPARE một
+    lần cho mỗi kết nối (kết nối quay lại pool vẫn giữ statement), các lần
+    sau chỉ EXECUTE với tham số nhị phân. Giữ tối đa ``size`` statement,
+    statement ít dùng nhất bị đóng (COM_STMT_CLOSE). Cursor thường đi thẳng
+    xuống kết nối thật.
+    """
+
+    def __init__(self, raw, size=64):
+        self._raw = raw
+        self.size = size
+        self._statements = OrderedDict()  # (sql, dictionary) -> (sql, cursor)
+        self.prepared = 0
+        self.reused = 0
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        if kwargs.get("prepared") and self.size:
+            return CachedCursor(self, kwargs.get("dictionary", False))
+        return self._raw.cursor(*args, **kwargs)
+
+    def statement(self, sql, dictionary=False):
+        """Trả (sql, cursor prepared) của câu ``sql``, tạo mới nếu chưa có."""
+        key = (sql, dictionary)
+        entry = self._statements.get(key)
+        if entry is not None:
+            self._statements.move_to_end(key)
+            self.reused += 1
+            return entry
+        entry = self._statements[key] = (sql, self._raw.cursor(prepared=True, dictionary=dictionary))
+        self.prepared += 1
+        while len(self._statements) > self.size:
+            _, (_, cursor) = self._statements.popitem(last=False)
+            _close_quietly(cursor)
+        return entry
+
+    def close(self):
+        statements, self._statements = self._statements, OrderedDict()
+        for _, cursor in statements.values():
+            _close_quietly(cursor)
+        self._raw.close()
+
+
+def _close_quietly(cursor):
+    # Kết nối đã hỏng thì statement cũng mất theo phiên
+    try:
+        cursor.close()
+    except Error:
+        pass
+
+
+class CachedCursor:
+    """Cursor chạy trên statement đã prepare của kết nối; close() không huỷ statement."""
+
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._dictionary = dictionary
+        self._cursor = None
+
+    def __getattr__(self, name):
+        # fetchone/fetchall/lastrowid/rowcount... của statement vừa chạy
+        return getattr(self._cursor, name)
+
+    def _drain(self):
+        # Đọc nốt kết quả còn lại để kết nối nhận lệnh tiếp theo
+        if self._cursor is not None and self._cursor.with_rows:
+            self._cursor.fetchall()
+
+    def execute(self, sql, params=()):
+        self._drain()
+        # Connector chỉ PREPARE lại khi chuỗi SQL khác đối tượng đã chạy lần
+        # trước, nên chạy bằng đúng chuỗi đã lưu trong cache
+        sql, self._cursor = self._connection.statement(sql, self._dictionary)
+        self._cursor.execute(sql, params)
+
+    def close(self):
+        self._drain()
+        self._cursor = None
+
+
+# -------------------------
+# Repositories
+# -------------------------
+class _Repository:
+    # ``read(scope)``: kết nối cho truy vấn chỉ đọc (có thể là replica),
+    # ``scope`` là dữ liệu cần đọc, vd. ("user", 1); mặc định đọc primary
+    def __init__(self, get_connection, dialect=MYSQL, read=None):
+        self._get_connection = get_connection
+        self._read = read or (lambda scope=None: get_connection())
+        self.dialect = dialect
+
+    def _cursor_args(self, dictionary=False):
+        args = {"prepared": True} if self.dialect.prepared else {}
+        if dictionary:
+            args["dictionary"] = True
+        return args
+
+    @contextlib.contextmanager
+    def _cursor(self, commit=False, dictionary=False, read=None):
+        db = self._read(read) if read else self._get_connection()
+        try:
+            cursor = db.cursor(**self._cursor_args(dictionary))
+            try:
+                yield cursor
+                if commit:
+                    db.commit()
+            finally:
+                cursor.close()
+        finally:
+            db.close()
+
+
+class Users(_Repository):
+    def create(self, username, email, password_hash, role="user"):
+        with self._cursor(commit=True) as cursor:
+            cursor.execute(self.dialect.user_insert, (username, email, password_hash, role))
+
+    def by_username(self, username):
+        """{"id", "username", "email", "password", "role"} hoặc None."""
+        with self._cursor(dictionary=True) as cursor:
+            cursor.execute(self.dialect.user_by_username, (username,))
+            return cursor.fetchone()
+
+    def set_password(self, user_id, password_hash):
+        with self._cursor(commit=True) as cursor:
+            cursor.execute(self.dialect.user_set_password, (password_hash, user_id))
+
+
+class Menu(_Repository):
+    def items(self):
+        """Toàn bộ menu_items (dict theo MENU_ITEM) để dựng snapshot cache."""
+        with self._cursor(dictionary=True, read="menu") as cursor:
+            cursor.execute(self.dialect.menu_items)
+            return cursor.fetchall()
+
+    def add(self, name, price, description, category, delivery_time, distance, badge, restaurant, image):
+        with self._cursor(commit=True) as cursor:
+            cursor.execute(self.dialect.menu_insert, (
+                name, price, description, category, delivery_time, distance, badge, restaurant, image))
+
+
+# Điền danh sách IN (...) cho ``values``; câu có số tham số thay đổi nên chạy
+# trên cursor thường, không đưa vào cache prepared statement
+def in_list(template, values, *params):
+    return template.format(ids=", ".join(["%s"] * len(values))), (*params, *values)
+
+
+# Mỗi nhà hàng trong giỏ một đơn (tổng đã gồm phí ship), trả các đơn và
+# các món của từng đơn
+def plan_orders(user_id, view):
+    items = {item["id"]: item for item in view["items"]}
+    orders = []
+    groups = []
+    for group in view["restaurants"]:
+        orders.append({"user_id": user_id, "restaurant": group["restaurant"],
+                       "total_amount": group["total"], "status": "pending"})
+        groups.append([items[cart_id] for cart_id in group["items"]])
+    return orders, groups
+
+
+# Các dòng order_items của các đơn đã có id
+def order_item_rows(orders, groups):
+    return [
+        (order["id"], i["item_id"], i["quantity"], i["price"])
+        for order, items in zip(orders, groups)
+        for i in items
+    ]
+
+
+class Orders(_Repository):
+    @contextlib.contextmanager
+    def _transaction(self):
+        db = self._get_connection()
+        try:
+            if self.dialect.lock_by_transaction:
+                db.start_transaction()
+            cursor = db.cursor(**self._cursor_args(dictionary=True))
+            try:
+                yield db, cursor
+            finally:
+                cursor.close()
+        finally:
+            db.close()
+
+    def place(self, user_id):
+        """Tạo đơn từ giỏ hàng trong một transaction; trả các đơn đã tạo, hoặc
+        None nếu giỏ trống."""
+        with self._transaction() as (db, cursor):
+            orders = self.place_in(db, cursor, user_id)
+            if orders is not None:
+                db.commit()
+            return orders
+
+    # Số round trip không phụ thuộc số món: khoá giỏ, đọc giá các món, mỗi
+    # nhà hàng 1 INSERT orders, 1 executemany cho order_items, rollup doanh
+    # thu, xoá các dòng đã đặt
+    def place_in(self, db, cursor, user_id):
+        cursor.execute(self.dialect.order_cart, (user_id,))
+        lines = cursor.fetchall()
+        if not lines:
+            return None
+
+        plain = db.cursor(dictionary=True)
+        try:
+            # Giá và nhà hàng lấy từ menu_items trong transaction, không từ
+            # snapshot menu (có thể cũ tới MENU_CACHE_TTL giây)
+            plain.execute(*in_list(self.dialect.order_menu, sorted({line["item_id"] for line in lines})))
+            view = build_cart_view(lines, {item["id"]: item for item in plain.fetchall()})
+            if not view["items"]:
+                return None
+
+            # Không suy id từ lastrowid của INSERT nhiều dòng: id không liên tiếp
+            # khi auto_increment_increment > 1 hoặc chạy Galera
+            orders, groups = plan_orders(user_id, view)
+            for order in orders:
+                cursor.execute(self.dialect.order_insert, (user_id, order["restaurant"], order["total_amount"]))
+                order["id"] = cursor.lastrowid
+
+            # executemany trên cursor thường để connector gộp thành một INSERT
+            # nhiều dòng (prepared statement chạy từng dòng một)
+            plain.executemany(self.dialect.order_items, order_item_rows(orders, groups))
+
+            # Cộng các đơn vừa tạo vào rollup doanh thu (cùng transaction)
+            for sql, params in analytics.order_statements([order["id"] for order in orders], self.dialect.name):
+                cursor.execute(sql, params)
+
+            # Dòng của món đã bị xoá khỏi menu không được đặt nên giữ lại
+            plain.execute(*in_list(self.dialect.order_clear, [item["id"] for item in view["items"]], user_id))
+        finally:
+            plain.close()
+        return orders
+
+    def for_user(self, user_id, page):
+        with self._cursor(read=("user", user_id)) as cursor:
+            cursor.execute(*page.sql(self.dialect.user_orders, "WHERE o.user_id = %s", (user_id,)))
+            return ORDER_SUMMARY.rows(cursor.fetchall())
+
+    def for_restaurant(self, restaurant, page):
+        with self._cursor(read=("restaurant", restaurant)) as cursor:
+            cursor.execute(*page.sql(self.dialect.restaurant_orders, "WHERE o.restaurant = %s", (restaurant,)))
+            return RESTAURANT_ORDER.rows(cursor.fetchall())
+
+    def sales(self, restaurant, query):
+        """Các dòng rollup (theo giờ, theo món) của nhà hàng trong khoảng của
+        ``query`` (analytics.AnalyticsQuery)."""
+        with self._cursor(dictionary=True, read=("restaurant", restaurant)) as cursor:
+            cursor.execute(*query.sales_sql(restaurant))
+            sales = cursor.fetchall()
+            cursor.execute(*query.items_sql(restaurant))
+            return sales, cursor.fetchall()
+
+    def set_status(self, order_id, status, check=None):
+        """Đổi trạng thái và chuyển đơn trong rollup; trả {"user_id",
+        "restaurant", "status" cũ} hoặc None nếu không có đơn.
+
+        ``check(order)`` chạy sau khi khoá đơn, trước khi đổi; báo lỗi thì
+        không đổi gì (transaction bị rollback khi trả kết nối)."""
+        with self._transaction() as (db, cursor):
+            cursor.execute(self.dialect.order_status, (order_id,))
+            order = cursor.fetchone()
+            if order and check is not None:
+                check(order)
+            cursor.execute(self.dialect.order_set_status, (status, order_id))
+            if order:
+                for sql, params in analytics.status_statements(order_id, order.get("status"), status,
+                                                               self.dialect.name):
+                    cursor.execute(sql, params)
+            db.commit()
+            return order
+
+
+class Repository:
+    """Truy cập dữ liệu của các route: users, menu, cart (cart store), orders.
+
+    Ghi, transaction và đăng nhập dùng ``get_connection`` (primary); danh
+    sách menu và lịch sử đơn đọc qua ``read(scope)`` nếu có (replica).
+    """
+
+    def __init__(self, get_connection, dialect=MYSQL, cart=None, read=None):
+        self.dialect = dialect
+        self.users = Users(get_connection, dialect)
+        self.menu = Menu(get_connection, dialect, read)
+        self.orders = Orders(get_connection, dialect, read)
+        self.cart = cart
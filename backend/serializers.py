@@ -0,0 +1,130 @@
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson là tuỳ chọn, không có thì dùng json chuẩn
+    orjson = None
+
+
+# -------------------------
+# JSON serialization
+# -------------------------
+_DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+def http_date(value):
+    """Giống werkzeug.http.http_date (định dạng jsonify vẫn trả cho
+    created_at...) nhưng nhanh hơn vài lần; datetime không múi giờ coi là UTC."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        hour, minute, second = value.hour, value.minute, value.second
+    else:
+        hour = minute = second = 0
+    return "%s, %02d %s %04d %02d:%02d:%02d GMT" % (
+        _DAYS[value.weekday()], value.day, _MONTHS[value.month - 1], value.year, hour, minute, second)
+
+
+def _default(value):
+    # DECIMAL của MySQL (giá, total_amount) giữ nguyên dạng chuỗi để không mất độ chính xác
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, date):
+        return http_date(value)
+    raise TypeError(f"Không serialize được {type(value).__name__}")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def dumps(payload):
+        """Serialize ``payload`` thành bytes UTF-8."""
+        return orjson.dumps(payload, default=_default, option=_OPTIONS)
+else:
+    _encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(",", ":"))
+
+    def dumps(payload):
+        """Serialize ``payload`` thành bytes UTF-8."""
+        return _encoder.encode(payload).encode("utf-8")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider của Flask dùng ``dumps`` ở trên: jsonify() ở mọi route
+    ghi bytes thẳng vào response, không qua str. Giá trị trả về giống
+    DefaultJSONProvider (Decimal -> chuỗi, datetime -> HTTP date), chỉ khác
+    thứ tự khoá (giữ thứ tự cột) và không escape ký tự ngoài ASCII.
+    """
+
+    def encode(self, obj):
+        return dumps(obj)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.encode(obj).decode("utf-8")
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encode(obj), mimetype=self.mimetype)
+
+
+def stream_array(head, key, batches):
+    """Sinh bytes của ``{**head, key: [...]}`` theo từng lô dòng.
+
+    ``batches`` là iterable các list dòng (vd. từ cursor.fetchmany), nên mảng
+    lớn không phải nằm hết trong bộ nhớ cùng lúc.
+    """
+    opening = dumps(dict(head, **{key: []}))
+    yield opening[:-2]  # bỏ "]}" ở cuối
+    first = True
+    for batch in batches:
+        if not batch:
+            continue
+        body = dumps(batch)[1:-1]
+        yield body if first else b"," + body
+        first = False
+    yield b"]}"
+
+
+def fetch_batches(cursor, size=1000):
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield rows
+
+
+# -------------------------
+# Row schemas
+# -------------------------
+class RowSchema:
+    """Các cột của một loại dòng trả về API, theo đúng thứ tự trong SELECT.
+
+    Dùng với cursor thường (tuple): ``select`` là danh sách cột cho câu
+    truy vấn, ``rows()`` ghép tuple thành dict bằng zip (nhanh hơn cursor
+    dictionary), sau đó encode thẳng bằng ``dumps``.
+    """
+
+    def __init__(self, *columns):
+        self.select = ", ".join(columns)
+        self.keys = tuple(column.rsplit(".", 1)[-1] for column in columns)
+
+    def rows(self, rows):
+        keys = self.keys
+        return [dict(zip(keys, row)) for row in rows]
+
+
+MENU_ITEM = RowSchema(
+    "id", "name", "description", "price", "image", "restaurant", "rating", "reviews",
+    "delivery_time", "distance", "category", "badge", "created_at",
+)
+CART_LINE = RowSchema("id", "item_id", "quantity")
+ORDER_SUMMARY = RowSchema("o.id", "o.restaurant", "o.total_amount", "o.status", "o.created_at", "o.updated_at")
+RESTAURANT_ORDER = RowSchema(
+    "o.id", "o.user_id", "u.username", "o.total_amount", "o.status", "o.created_at", "o.updated_at",
+)
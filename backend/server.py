@@ -0,0 +1,213 @@
+"""Chạy backend trên gunicorn (pre-fork, nhiều worker, preload app).
+
+    python -m backend serve [--bind 0.0.0.0:5000] [--workers N] [--threads N]
+    python -m backend backfill-analytics [--batch-size 1000]
+    python -m backend worker [--threads 1] [--batch-size 10]
+
+Cấu hình lấy từ biến môi trường (tham số dòng lệnh ghi đè):
+    WEB_BIND, WEB_WORKERS, WEB_THREADS, WEB_TIMEOUT, WEB_MAX_REQUESTS
+    DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME, DB_STATEMENT_CACHE
+    DB_BACKEND=sqlite, SQLITE_PATH: chạy trên file SQLite thay MySQL
+    DB_REPLICAS, DB_REPLICA_MAX_LAG, DB_REPLICA_CHECK_INTERVAL,
+    READ_YOUR_WRITES_WINDOW: truy vấn đọc chia cho read replica
+    DB_POOL_SIZE, DB_POOL_MAX_OVERFLOW: pool của MỖI worker
+    DB_MAX_CONNECTIONS: tổng số kết nối MySQL cho cả server, chia đều cho các worker
+    METRICS, PROFILE_SLOW_MS, PROFILE_DIR: /metrics và profiler request chậm
+    IDEMPOTENCY_STORE=table: Idempotency-Key dùng chung giữa các worker (nên
+    đặt khi WEB_WORKERS > 1; serve cảnh báo các trạng thái chỉ có trong worker)
+    CART_STORE=memory, CART_JOURNAL: giỏ trong bộ nhớ, chỉ chạy với một worker
+
+Với preload, main.py (pool, cache, index) được import một lần ở master rồi
+fork sang worker. ``kill -HUP <master>`` khởi động lại worker lần lượt
+(graceful); để nạp code mới khi preload thì dùng ``kill -USR2`` rồi
+``kill -QUIT`` master cũ.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import threading
+
+
+def default_workers():
+    return multiprocessing.cpu_count() * 2 + 1
+
+
+def pool_settings(workers, threads, max_connections=None):
+    """Kích thước pool cho mỗi worker.
+
+    Mặc định mỗi thread có một kết nối thường trực. Khi có giới hạn tổng
+    ``max_connections`` thì mỗi worker chỉ được ``max_connections // workers``
+    kết nối (gồm cả overflow).
+    """
+    if not max_connections:
+        return {"size": threads, "max_overflow": threads}
+    per_worker = max(1, max_connections // workers)
+    size = min(threads, per_worker)
+    return {"size": size, "max_overflow": per_worker - size}
+
+
+# Như mặc định của gunicorn nhưng bỏ query string (%(U)s thay %(r)s) và
+# Referer: stream SSE nhận ?token= trên URL, không ghi token ra log
+ACCESS_LOG_FORMAT = '%(h)s %(l)s %(u)s %(t)s "%(m)s %(U)s %(H)s" %(s)s %(b)s "%(a)s"'
+
+
+def shared_state_problems(workers, env=os.environ):
+    """Trạng thái giữ trong bộ nhớ từng worker, sai lệch khi chạy nhiều worker."""
+    if workers <= 1:
+        return []
+    problems = [
+        # Chưa có broker dùng chung (events.InProcessBroker chỉ phát trong process)
+        "sự kiện đơn hàng (SSE) chỉ tới client kết nối cùng worker với request ghi",
+        "thêm món chỉ làm mới menu cache của một worker, worker khác cũ tối đa MENU_CACHE_TTL giây",
+    ]
+    if env.get("IDEMPOTENCY_STORE") != "table":
+        problems.insert(0, "Idempotency-Key giữ trong bộ nhớ: retry sang worker khác có thể đặt đơn hai lần "
+                           "(đặt IDEMPOTENCY_STORE=table)")
+    return problems
+
+
+def single_worker_only(workers, env=os.environ):
+    """Lý do không chạy được nhiều worker (None nếu chạy được)."""
+    if workers > 1 and env.get("CART_STORE") == "memory":
+        # Mỗi worker một giỏ khác nhau, và mỗi worker compact journal chung
+        # chỉ với thay đổi của mình (xoá thay đổi chưa flush của worker khác)
+        return "CART_STORE=memory chỉ chạy với --workers 1"
+    return None
+
+
+def build_options(args):
+    return {
+        "bind": args.bind,
+        "workers": args.workers,
+        "threads": args.threads,
+        "worker_class": "gthread" if args.threads > 1 else "sync",
+        "timeout": args.timeout,
+        "graceful_timeout": args.timeout,
+        "preload_app": args.preload,
+        "max_requests": args.max_requests,
+        "max_requests_jitter": args.max_requests // 10,
+        "accesslog": "-",
+        "access_log_format": ACCESS_LOG_FORMAT,
+        "pre_fork": _pre_fork,
+        "post_fork": _post_fork,
+    }
+
+
+def _pre_fork(server, worker):
+    # Không để worker thừa hưởng socket MySQL mở ở master; không preload thì
+    # master chưa import main (và không nên import)
+    if not server.cfg.preload_app:
+        return
+    import main
+    main.db_pool.dispose()
+    main.db_router.dispose()
+
+
+def _post_fork(server, worker):
+    # Journal giỏ hàng (CART_STORE=memory) nạp lại và mở trong worker, không
+    # dùng file handle/thay đổi thừa hưởng từ master
+    import main
+    if hasattr(main.cart_store, "open"):
+        main.cart_store.open()
+
+
+def _configure_pool(args):
+    # Đặt trước khi import main: pool được tạo lúc import
+    settings = pool_settings(args.workers, args.threads, args.max_connections)
+    if args.max_connections or "DB_POOL_SIZE" not in os.environ:
+        os.environ["DB_POOL_SIZE"] = str(settings["size"])
+    if args.max_connections or "DB_POOL_MAX_OVERFLOW" not in os.environ:
+        os.environ["DB_POOL_MAX_OVERFLOW"] = str(settings["max_overflow"])
+
+
+def serve(args):
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            import main
+            return main.app
+
+    import logging
+    reason = single_worker_only(args.workers)
+    if reason:
+        raise SystemExit(reason)
+    for problem in shared_state_problems(args.workers):
+        logging.getLogger(__name__).warning("%d worker: %s", args.workers, problem)
+    _configure_pool(args)
+    Application(build_options(args)).run()
+
+
+def parse_args(argv=None):
+    env = os.environ
+    parser = argparse.ArgumentParser(prog="python -m backend")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="chạy server production (gunicorn)")
+    serve_parser.add_argument("--bind", default=env.get("WEB_BIND", "0.0.0.0:5000"))
+    serve_parser.add_argument("--workers", type=int, default=int(env.get("WEB_WORKERS", default_workers())))
+    serve_parser.add_argument("--threads", type=int, default=int(env.get("WEB_THREADS", 4)))
+    serve_parser.add_argument("--timeout", type=int, default=int(env.get("WEB_TIMEOUT", 30)))
+    serve_parser.add_argument("--max-requests", type=int, default=int(env.get("WEB_MAX_REQUESTS", 0)))
+    serve_parser.add_argument("--max-connections", type=int,
+                              default=int(env.get("DB_MAX_CONNECTIONS", 0)) or None)
+    serve_parser.add_argument("--no-preload", dest="preload", action="store_false")
+    backfill_parser = commands.add_parser("backfill-analytics",
+                                          help="dựng lại rollup doanh thu từ orders/order_items")
+    backfill_parser.add_argument("--batch-size", type=int, default=1000)
+    worker_parser = commands.add_parser("worker", help="chạy job nền (hàng đợi JOB_QUEUE)")
+    worker_parser.add_argument("--threads", type=int, default=int(env.get("JOB_WORKER_THREADS", 1)))
+    worker_parser.add_argument("--batch-size", type=int, default=10)
+    worker_parser.add_argument("--poll-interval", type=float, default=0.5)
+    return parser.parse_args(argv)
+
+
+def run_worker(args):
+    import logging
+    import jobs
+    import main
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(threadName)s %(message)s")
+    stop = threading.Event()
+    # SIGTERM/SIGINT: làm xong lô đang chạy rồi thoát, job chưa ack sẽ hiện lại
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+    threads = []
+    for n in range(args.threads):
+        worker = jobs.Worker(main.job_queue, main.JOB_HANDLERS, name=f"{os.getpid()}-{n}",
+                             batch_size=args.batch_size, poll_interval=args.poll_interval)
+        thread = threading.Thread(target=worker.run, args=(stop,), name=f"job-worker-{n}")
+        thread.start()
+        threads.append(thread)
+    while any(thread.is_alive() for thread in threads):
+        for thread in threads:
+            thread.join(timeout=1)
+
+
+def backfill_analytics(args):
+    import logging
+    import analytics
+    import main
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    batches = analytics.backfill(main.get_db_connection, args.batch_size, main.db_dialect.name)
+    print(f"đã dựng rollup doanh thu: {batches} lô")
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    if args.command == "serve":
+        serve(args)
+    elif args.command == "backfill-analytics":
+        backfill_analytics(args)
+    elif args.command == "worker":
+        run_worker(args)
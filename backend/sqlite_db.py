@@ -0,0 +1,243 @@
+import os
+import sqlite3
+from datetime import datetime
+from decimal import Decimal
+from urllib.request import pathname2url
+
+from mysql.connector import errors
+
+
+# -------------------------
+# SQLite backend
+# -------------------------
+# Chạy app/test/benchmark không cần MySQL (DB_BACKEND=sqlite). Các câu SQL
+# riêng của SQLite nằm ở dialects.SQLITE; kết nối ở đây chỉ đổi placeholder
+# %s -> ? và trả lỗi dạng mysql.connector để các route xử lý như với MySQL.
+# Schema theo qldapm_2.sql.
+
+# Cột DECIMAL khai báo "DECIMAL TEXT": affinity TEXT giữ nguyên "50000.00",
+# converter DECIMAL trả Decimal như mysql.connector
+sqlite3.register_adapter(Decimal, str)
+# Thời điểm luôn ghi cùng một dạng (đến mili giây như cột mặc định) để so
+# sánh chuỗi trong WHERE đúng thứ tự thời gian
+sqlite3.register_adapter(datetime, lambda value: f"{value:%Y-%m-%d %H:%M:%S}.{value.microsecond // 1000:03d}")
+sqlite3.register_converter('DECIMAL', lambda raw: Decimal(raw.decode()))
+sqlite3.register_converter('TIMESTAMP', lambda raw: datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter('DATETIME', lambda raw: datetime.fromisoformat(raw.decode()))
+
+# Giờ địa phương như NOW() của MySQL, đến mili giây
+_NOW = "(strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))"
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS user (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(50) UNIQUE NOT NULL,
+    email VARCHAR(100) UNIQUE NOT NULL,
+    password VARCHAR(255) NOT NULL,
+    role VARCHAR(20) DEFAULT 'user',
+    created_at TIMESTAMP DEFAULT {_NOW}
+);
+CREATE TABLE IF NOT EXISTS menu_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(100) NOT NULL,
+    description TEXT,
+    price DECIMAL TEXT NOT NULL,
+    image VARCHAR(255),
+    restaurant VARCHAR(100),
+    rating DECIMAL TEXT DEFAULT '0.0',
+    reviews INT DEFAULT 0,
+    delivery_time INT DEFAULT 30,
+    distance DECIMAL TEXT DEFAULT '0.0',
+    category VARCHAR(50),
+    badge VARCHAR(20),
+    created_at TIMESTAMP DEFAULT {_NOW}
+);
+CREATE TABLE IF NOT EXISTS cart (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INT NOT NULL REFERENCES user(id) ON DELETE CASCADE,
+    item_id INT NOT NULL REFERENCES menu_items(id) ON DELETE CASCADE,
+    quantity INT DEFAULT 1,
+    created_at TIMESTAMP DEFAULT {_NOW},
+    UNIQUE (user_id, item_id)
+);
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INT NOT NULL REFERENCES user(id) ON DELETE CASCADE,
+    restaurant VARCHAR(100),
+    total_amount DECIMAL TEXT NOT NULL,
+    status VARCHAR(20) DEFAULT 'pending',
+    created_at TIMESTAMP DEFAULT {_NOW},
+    updated_at TIMESTAMP DEFAULT {_NOW}
+);
+CREATE INDEX IF NOT EXISTS idx_orders_user_created ON orders (user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_orders_restaurant_created ON orders (restaurant, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_orders_user_updated ON orders (user_id, updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_orders_restaurant_updated ON orders (restaurant, updated_at, id);
+-- ON UPDATE CURRENT_TIMESTAMP(6) của MySQL
+CREATE TRIGGER IF NOT EXISTS orders_touch AFTER UPDATE OF status ON orders BEGIN
+    UPDATE orders SET updated_at = {_NOW} WHERE id = NEW.id;
+END;
+CREATE TABLE IF NOT EXISTS order_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id INT NOT NULL REFERENCES orders(id) ON DELETE CASCADE,
+    item_id INT NOT NULL REFERENCES menu_items(id) ON DELETE CASCADE,
+    quantity INT NOT NULL,
+    price DECIMAL TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    idem_key VARCHAR(255) PRIMARY KEY,
+    fingerprint CHAR(64) NOT NULL,
+    status VARCHAR(10) NOT NULL,
+    status_code INT,
+    body BLOB,
+    mimetype VARCHAR(100),
+    locked_until DATETIME,
+    created_at TIMESTAMP DEFAULT {_NOW}
+);
+CREATE TABLE IF NOT EXISTS sales_hourly (
+    restaurant VARCHAR(100) NOT NULL,
+    bucket DATETIME NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    orders INT NOT NULL DEFAULT 0,
+    revenue DECIMAL TEXT NOT NULL DEFAULT '0.00',
+    PRIMARY KEY (restaurant, bucket, status)
+);
+CREATE TABLE IF NOT EXISTS item_sales_hourly (
+    restaurant VARCHAR(100) NOT NULL,
+    bucket DATETIME NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    item_id INT NOT NULL,
+    quantity INT NOT NULL DEFAULT 0,
+    revenue DECIMAL TEXT NOT NULL DEFAULT '0.00',
+    PRIMARY KEY (restaurant, bucket, status, item_id)
+);
+"""
+
+
+def _error(e):
+    if isinstance(e, sqlite3.IntegrityError):
+        return errors.IntegrityError(msg=f"sqlite: {e}")
+    if isinstance(e, sqlite3.OperationalError):
+        return errors.OperationalError(msg=f"sqlite: {e}")
+    return errors.DatabaseError(msg=f"sqlite: {e}")
+
+
+_WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def _verb(sql):
+    return sql.lstrip()[:6].upper()
+
+
+class Cursor:
+    """Cursor kiểu mysql.connector (``dictionary=True`` trả dict)."""
+
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._raw = connection.raw.cursor()
+        self._dictionary = dictionary
+        self.lastrowid = None
+
+    @property
+    def rowcount(self):
+        return self._raw.rowcount
+
+    @property
+    def description(self):
+        return self._raw.description
+
+    def execute(self, sql, params=()):
+        try:
+            self._connection.begin(_verb(sql) in _WRITES)
+            self._raw.execute(sql.replace('%s', '?'), tuple(params or ()))
+        except sqlite3.Error as e:
+            raise _error(e)
+        self.lastrowid = self._raw.lastrowid
+
+    def executemany(self, sql, rows):
+        try:
+            self._connection.begin(_verb(sql) in _WRITES)
+            self._raw.executemany(sql.replace('%s', '?'), [tuple(row) for row in rows])
+        except sqlite3.Error as e:
+            raise _error(e)
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip((column[0] for column in self._raw.description), row))
+
+    def fetchone(self):
+        return self._row(self._raw.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._row(row) for row in self._raw.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(row) for row in self._raw.fetchall()]
+
+    def close(self):
+        self._raw.close()
+
+
+class Connection:
+    """Kết nối kiểu mysql.connector trên một file SQLite.
+
+    Autocommit cho đến câu ghi đầu tiên (hoặc start_transaction()), khi đó
+    mở BEGIN IMMEDIATE và giữ đến commit()/rollback(). SQLite khoá cả file
+    thay cho khoá dòng của InnoDB nên các transaction ghi chạy tuần tự.
+    ``statement_cache``: số statement đã biên dịch sqlite3 giữ trên kết nối.
+    ``readonly``: mở file chỉ đọc (stand-in cho replica), câu ghi báo lỗi.
+    """
+
+    def __init__(self, path, statement_cache=128, readonly=False):
+        try:
+            if readonly:
+                path = "file:%s?mode=ro" % pathname2url(os.path.abspath(path))
+            self.raw = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False,
+                                       detect_types=sqlite3.PARSE_DECLTYPES, cached_statements=statement_cache,
+                                       uri=readonly)
+            if not readonly:
+                self.raw.execute('PRAGMA journal_mode=WAL')
+            self.raw.execute('PRAGMA synchronous=NORMAL')
+            self.raw.execute('PRAGMA foreign_keys=ON')
+        except sqlite3.Error as e:
+            raise _error(e)
+
+    def begin(self, write):
+        if write and not self.raw.in_transaction:
+            self.raw.execute('BEGIN IMMEDIATE')
+
+    def start_transaction(self):
+        try:
+            self.begin(True)
+        except sqlite3.Error as e:
+            raise _error(e)
+
+    def cursor(self, dictionary=False, **kwargs):
+        return Cursor(self, dictionary)
+
+    def commit(self):
+        if self.raw.in_transaction:
+            self.raw.execute('COMMIT')
+
+    def rollback(self):
+        if self.raw.in_transaction:
+            self.raw.execute('ROLLBACK')
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        self.raw.close()
+
+
+def connect(path, statement_cache=128, readonly=False):
+    return Connection(path, statement_cache, readonly)
+
+
+def create_schema(path):
+    db = sqlite3.connect(path)
+    try:
+        db.executescript(SCHEMA)
+    finally:
+        db.close()
@@ -0,0 +1,123 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+
+
+# -------------------------
+# Session tokens
+# -------------------------
+class InvalidToken(Exception):
+    """Token sai chữ ký, sai định dạng hoặc đã hết hạn."""
+
+
+class AccessDenied(Exception):
+    """Request không được phép: ``status`` 401 (thiếu token) hoặc 403."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def parse_keys(value):
+    """"kid1:secret1,kid2:secret2" -> [(kid, secret)]; key đầu tiên dùng để ký."""
+    keys = []
+    for part in value.split(","):
+        kid, _, secret = part.strip().partition(":")
+        if not kid or not secret or "." in kid:
+            raise ValueError(f"SESSION_KEYS không hợp lệ: {part!r}")
+        keys.append((kid, secret.encode("utf-8")))
+    return keys
+
+
+class TokenSigner:
+    """Token dạng ``<kid>.<payload>.<chữ ký>`` ký bằng HMAC-SHA256.
+
+    Xoay key: thêm key mới lên đầu ``keys`` (dùng để ký), giữ key cũ phía sau
+    cho tới khi các token cũ hết hạn. Verify không cần truy vấn database.
+    """
+
+    def __init__(self, keys, ttl=24 * 3600, clock=time.time):
+        if not keys:
+            raise ValueError("cần ít nhất một key")
+        self.active_kid = keys[0][0]
+        self.keys = dict(keys)
+        self.ttl = ttl
+        self._clock = clock
+
+    @classmethod
+    def from_env(cls, value=None, ttl=24 * 3600):
+        if value:
+            return cls(parse_keys(value), ttl=ttl)
+        # Không cấu hình: key ngẫu nhiên theo process, token mất hiệu lực khi
+        # restart và không dùng chung được giữa các worker không preload
+        return cls([("dev", os.urandom(32))], ttl=ttl)
+
+    def _signature(self, secret, message):
+        return _b64encode(hmac.new(secret, message.encode("ascii"), hashlib.sha256).digest())
+
+    def sign(self, claims):
+        payload = dict(claims, exp=int(self._clock()) + self.ttl)
+        body = _b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        message = f"{self.active_kid}.{body}"
+        return f"{message}.{self._signature(self.keys[self.active_kid], message)}"
+
+    def verify(self, token):
+        try:
+            kid, body, signature = token.split(".")
+        except ValueError:
+            raise InvalidToken("định dạng")
+        secret = self.keys.get(kid)
+        if secret is None:
+            raise InvalidToken("key không còn hiệu lực")
+        try:
+            valid = hmac.compare_digest(signature, self._signature(secret, f"{kid}.{body}"))
+        except (TypeError, ValueError):  # ký tự ngoài ASCII
+            valid = False
+        if not valid:
+            raise InvalidToken("chữ ký")
+        try:
+            claims = json.loads(_b64decode(body))
+        except ValueError:
+            raise InvalidToken("payload")
+        if not isinstance(claims, dict) or claims.get("exp", 0) < self._clock():
+            raise InvalidToken("hết hạn")
+        return claims
+
+
+def acting_user(session, claimed, required=False):
+    """user_id request được dùng: lấy từ token; client gửi id khác thì 403
+    (trừ admin). Không có token thì dùng id client gửi như trước, trừ khi
+    ``required``.
+    """
+    if session is None:
+        if required:
+            raise AccessDenied(401, "Vui lòng đăng nhập!")
+        return claimed
+    if session["role"] == "admin" and claimed not in (None, ""):
+        return claimed
+    if claimed not in (None, "") and str(claimed) != str(session["id"]):
+        raise AccessDenied(403, "Không có quyền truy cập dữ liệu của người dùng khác!")
+    return session["id"]
+
+
+def check_restaurant(session, restaurant, required=False):
+    if session is None:
+        if required:
+            raise AccessDenied(401, "Vui lòng đăng nhập!")
+        return
+    if session["role"] == "admin":
+        return
+    if session["role"] != "restaurant" or session.get("name") != restaurant:
+        raise AccessDenied(403, "Không có quyền xem đơn của nhà hàng này!")
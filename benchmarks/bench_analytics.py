@@ -0,0 +1,132 @@
+"""Đo độ trễ báo cáo doanh thu nhà hàng: đọc rollup (sales_hourly,
+item_sales_hourly) so với GROUP BY trực tiếp trên orders/order_items.
+
+Tạo N đơn (mặc định 200.000, mỗi đơn 3 món) trải đều trong 90 ngày cho một
+nhà hàng benchmark, cộng vào rollup như create_order(), rồi đo báo cáo theo
+ngày và theo giờ ở các khoảng 1, 7, 30 và 90 ngày. Cần MySQL thật với schema
+qldapm_2.sql (cấu hình như backend/main.py). Dữ liệu benchmark bị xoá khi
+chạy xong, trừ khi có --keep.
+
+Chạy: python benchmarks/bench_analytics.py [--orders 200000] [--keep]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+import main as backend
+import analytics
+from analytics import AnalyticsQuery
+
+RESTAURANT = 'Bench Analytics'
+START = datetime(2020, 1, 1)
+DAYS = 90
+RANGES = (1, 7, 30, 90)
+ITEMS_PER_ORDER = 3
+
+ADHOC_SALES_SQL = """
+    SELECT DATE(o.created_at) + INTERVAL HOUR(o.created_at) HOUR AS bucket, o.status,
+           COUNT(*) AS orders, SUM(o.total_amount) AS revenue
+    FROM orders o
+    WHERE o.restaurant = %s AND o.created_at >= %s AND o.created_at < %s
+    GROUP BY 1, 2
+"""
+ADHOC_ITEMS_SQL = """
+    SELECT DATE(o.created_at) + INTERVAL HOUR(o.created_at) HOUR AS bucket, oi.item_id,
+           SUM(oi.quantity) AS quantity, SUM(oi.quantity * oi.price) AS revenue
+    FROM orders o
+    JOIN order_items oi ON oi.order_id = o.id
+    WHERE o.restaurant = %s AND o.created_at >= %s AND o.created_at < %s AND o.status <> 'cancelled'
+    GROUP BY 1, 2
+"""
+
+
+def seed(cursor, db, orders, item_ids, batch=5000):
+    cursor.execute(
+        "INSERT INTO user (username, email, password, role) "
+        "VALUES ('bench_analytics', 'bench_analytics@local', '-', 'user')"
+    )
+    user_id = cursor.lastrowid
+    step = DAYS * 86400 // orders or 1
+    done = 0
+    while done < orders:
+        n = min(batch, orders - done)
+        # Từng đơn một để lấy đúng id (id của INSERT nhiều dòng không chắc liên tiếp)
+        order_ids = []
+        for i in range(done, done + n):
+            status = 'cancelled' if i % 20 == 0 else 'confirmed'
+            cursor.execute(
+                "INSERT INTO orders (user_id, restaurant, total_amount, status, created_at) "
+                "VALUES (%s, %s, %s, %s, TIMESTAMP('2020-01-01') + INTERVAL %s SECOND)",
+                (user_id, RESTAURANT, 100000 + i % 400000, status, i * step)
+            )
+            order_ids.append(cursor.lastrowid)
+        cursor.executemany(backend.db_dialect.order_items, [
+            (order_id, item_ids[(k + j) % len(item_ids)], 1 + j, 10000 * (1 + j))
+            for k, order_id in enumerate(order_ids) for j in range(ITEMS_PER_ORDER)
+        ])
+        # Giống create_order(): cộng lô đơn vừa tạo vào rollup
+        for sql, params in analytics.order_statements(order_ids, backend.db_dialect.name):
+            cursor.execute(sql, params)
+        db.commit()
+        done += n
+        print(f"\rseeded {done}/{orders}", end='', flush=True)
+    print()
+    return user_id
+
+
+def timed(cursor, statements):
+    start = time.perf_counter()
+    results = []
+    for sql, params in statements:
+        cursor.execute(sql, params)
+        results.append(cursor.fetchall())
+    return (time.perf_counter() - start) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--orders', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--keep', action='store_true')
+    args = parser.parse_args()
+
+    db = backend.get_db_connection()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("SELECT id FROM menu_items LIMIT 10")
+    item_ids = [row['id'] for row in cursor.fetchall()]
+    if not item_ids:
+        sys.exit("cần ít nhất một món trong menu_items")
+    user_id = seed(cursor, db, args.orders, item_ids)
+
+    try:
+        print(f"{'granularity':>11} {'days':>5} {'rollup ms':>10} {'group by ms':>12}")
+        for granularity in ('day', 'hour'):
+            for days in RANGES:
+                query = AnalyticsQuery(granularity, START, START + timedelta(days=days))
+                rollup = adhoc = float('inf')
+                for _ in range(args.repeat):
+                    elapsed, (sales, items) = timed(cursor, [query.sales_sql(RESTAURANT),
+                                                             query.items_sql(RESTAURANT)])
+                    query.report(RESTAURANT, sales, items, {})
+                    rollup = min(rollup, elapsed)
+
+                    params = (RESTAURANT, query.start, query.end)
+                    elapsed, (sales, items) = timed(cursor, [(ADHOC_SALES_SQL, params), (ADHOC_ITEMS_SQL, params)])
+                    query.report(RESTAURANT, sales, items, {})
+                    adhoc = min(adhoc, elapsed)
+                print(f"{granularity:>11} {days:>5} {rollup:>10.2f} {adhoc:>12.2f}")
+    finally:
+        if not args.keep:
+            cursor.execute("DELETE FROM user WHERE id = %s", (user_id,))
+            cursor.execute("DELETE FROM sales_hourly WHERE restaurant = %s", (RESTAURANT,))
+            cursor.execute("DELETE FROM item_sales_hourly WHERE restaurant = %s", (RESTAURANT,))
+            db.commit()
+        cursor.close()
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Đo số thao tác giỏ hàng/giây: TableCartStore (mỗi thao tác một lần vào
+MySQL) so với WriteBehindCartStore (bộ nhớ + ghi theo lô).
+
+Mỗi vòng mô phỏng cart.html: đọc giỏ, bấm +/- vài lần, thêm món. Cần MySQL
+thật với schema qldapm_2.sql và vài món trong menu_items; giỏ của các user
+benchmark (id lấy từ bảng user) được xoá khi chạy xong.
+
+Chạy: python benchmarks/bench_cart_store.py [--users 20] [--rounds 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+import main as backend
+from cart_store import TableCartStore, WriteBehindCartStore
+
+
+def run(store, users, items, rounds, rng):
+    ops = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        user_id = rng.choice(users)
+        store.add([(user_id, rng.choice(items), 1)])
+        lines = store.lines(user_id)
+        for _ in range(5):
+            line = rng.choice(lines)
+            store.update(line["id"], rng.randrange(1, 5))
+        store.lines(user_id)
+        ops += 8
+    return ops / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    db = backend.get_db_connection()
+    cursor = db.cursor()
+    cursor.execute("SELECT id FROM user ORDER BY id LIMIT %s", (args.users,))
+    users = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT id FROM menu_items")
+    items = [row[0] for row in cursor.fetchall()]
+    if not users or not items:
+        sys.exit("cần ít nhất một user và một món trong database")
+
+    def clear():
+        cursor.executemany("DELETE FROM cart WHERE user_id = %s", [(u,) for u in users])
+        db.commit()
+
+    try:
+        clear()
+        table = TableCartStore(backend.get_db_connection)
+        print(f"{'table':>14} {run(table, users, items, args.rounds, random.Random(1)):>10.0f} ops/s")
+
+        clear()
+        memory = WriteBehindCartStore(backend.get_db_connection, flush_interval=1.0)
+        rate = run(memory, users, items, args.rounds, random.Random(1))
+        start = time.perf_counter()
+        written = memory.flush()
+        print(f"{'write-behind':>14} {rate:>10.0f} ops/s  (flush cuối {written} dòng, "
+              f"{1000 * (time.perf_counter() - start):.1f} ms)")
+        memory.close()
+    finally:
+        clear()
+        cursor.close()
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Đo độ trễ đọc giỏ hàng (GET /api/cart) với giỏ 1, 10 và 100 món.
+
+So sánh cách cũ (JOIN cart với menu_items rồi sửa đường dẫn ảnh từng món
+trong Python, mỗi món một lần tìm manifest ảnh trên đĩa) với cart view mới
+(chỉ đọc các dòng cart, tên/giá/ảnh/nhà hàng lấy từ snapshot menu trong bộ
+nhớ, tạm tính và phí ship tính sẵn theo nhà hàng).
+
+Mặc định chỉ đo phần xử lý trong process. Với --mysql, đo cả câu truy vấn
+trên MySQL thật (cấu hình như backend/main.py); user và món benchmark được
+tạo rồi xoá sau khi chạy.
+
+Chạy: python benchmarks/bench_cart_view.py [--iterations 2000] [--mysql]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+import main as backend
+from cart_view import build_cart_view
+
+CART_SIZES = (1, 10, 100)
+RESTAURANTS = 5
+LEGACY_CART_SQL = """
+    SELECT c.id, c.quantity, m.name, m.price, m.image
+    FROM cart c
+    JOIN menu_items m ON c.item_id = m.id
+    WHERE c.user_id = %s
+"""
+
+
+def make_menu(size):
+    return [
+        {'id': i + 1, 'name': f'Bench {i + 1}', 'price': Decimal(50000 + i * 1000),
+         'image': f'bench{i + 1}.jpg', 'restaurant': f'Bench {i % RESTAURANTS}'}
+        for i in range(size)
+    ]
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def report(label, lines, samples):
+    print(f"{label:>8} lines={lines:>3} p50={percentile(samples, 0.5) * 1e6:>8.1f}us "
+          f"p99={percentile(samples, 0.99) * 1e6:>8.1f}us")
+
+
+def legacy_view(rows):
+    # Như get_cart() cũ: kết quả JOIN, sửa đường dẫn ảnh từng món
+    return [backend._normalize_image(item) for item in rows]
+
+
+def run_in_process(iterations):
+    menu = make_menu(max(CART_SIZES))
+    snapshot = backend.menu_cache.put(backend.menu_cache.version,
+                                      [backend._normalize_image(dict(item)) for item in menu])
+    for lines in CART_SIZES:
+        joined = [{'id': i, 'quantity': 1, 'name': item['name'], 'price': item['price'], 'image': item['image']}
+                  for i, item in enumerate(menu[:lines])]
+        cart = [{'id': i, 'item_id': item['id'], 'quantity': 1} for i, item in enumerate(menu[:lines])]
+        for label, read in (('join', lambda: legacy_view([dict(row) for row in joined])),
+                            ('view', lambda: build_cart_view([dict(row) for row in cart], snapshot.by_id))):
+            samples = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                read()
+                samples.append(time.perf_counter() - start)
+            report(label, lines, samples)
+
+
+def run_mysql(iterations):
+    db = backend.get_db_connection()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute(
+        "INSERT INTO user (username, email, password, role) VALUES ('bench_cart', 'bench_cart@local', '-', 'user')"
+    )
+    user_id = cursor.lastrowid
+    item_ids = []
+    for item in make_menu(max(CART_SIZES)):
+        cursor.execute(
+            "INSERT INTO menu_items (name, price, image, restaurant) VALUES (%s, %s, %s, %s)",
+            (item['name'], item['price'], item['image'], item['restaurant'])
+        )
+        item_ids.append(cursor.lastrowid)
+    db.commit()
+    backend.menu_cache.invalidate()
+
+    try:
+        for lines in CART_SIZES:
+            cursor.execute("DELETE FROM cart WHERE user_id = %s", (user_id,))
+            cursor.executemany(backend.db_dialect.cart_upsert, [(user_id, i, 1) for i in item_ids[:lines]])
+            db.commit()
+
+            def join():
+                cursor.execute(LEGACY_CART_SQL, (user_id,))
+                return legacy_view(cursor.fetchall())
+
+            def view():
+                menu = backend.menu_cache.get(backend._load_menu_items).by_id
+                cursor.execute(backend.db_dialect.cart_lines, (user_id,))
+                return build_cart_view(cursor.fetchall(), menu)
+
+            for label, read in (('join', join), ('view', view)):
+                samples = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    read()
+                    samples.append(time.perf_counter() - start)
+                report(label, lines, samples)
+    finally:
+        cursor.execute("DELETE FROM cart WHERE user_id = %s", (user_id,))
+        cursor.execute("DELETE FROM user WHERE id = %s", (user_id,))
+        cursor.execute("DELETE FROM menu_items WHERE id IN (%s)" % ','.join(map(str, item_ids)))
+        db.commit()
+        cursor.close()
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--mysql', action='store_true')
+    args = parser.parse_args()
+
+    # Thư mục ảnh trống: cách cũ vẫn phải tìm manifest trên đĩa cho từng món
+    with tempfile.TemporaryDirectory() as uploads, patch.object(backend, 'UPLOADS_DIR', uploads):
+        if args.mysql:
+            run_mysql(args.iterations)
+        else:
+            run_in_process(args.iterations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""Đo orders/giây và p99 của việc tạo đơn với giỏ 1, 10 và 100 món.
+
+Mặc định chạy với kết nối giả lập có độ trễ mạng cố định mỗi round trip
+(--rtt-ms) để so sánh cách cũ (mỗi món một INSERT) với
+repository.Orders.place_in() mới. Với --mysql, chạy Orders.place() trên MySQL
+thật (cấu hình như backend/main.py), dữ liệu benchmark được tạo rồi xoá sau
+khi chạy.
+
+Chạy: python benchmarks/bench_create_order.py [--rtt-ms 0.5] [--mysql]
+"""
+import argparse
+import os
+import sys
+import time
+from decimal import Decimal
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+import main as backend
+from cart_view import SHIPPING_FEE
+
+CART_SIZES = (1, 10, 100)
+RESTAURANTS = 5
+
+
+def make_cart(lines):
+    return [
+        {'id': i + 1, 'item_id': i + 1, 'quantity': 1 + i % 3, 'name': f'Bench {i + 1}',
+         'price': Decimal(50000 + i * 1000), 'restaurant': f'Bench {i % RESTAURANTS}'}
+        for i in range(lines)
+    ]
+
+
+class SimulatedCursor:
+    """Cursor giả: mỗi execute/executemany tốn một round trip. Dùng luôn làm
+    kết nối (cursor() trả chính nó)."""
+
+    def __init__(self, rows, rtt):
+        self.rows = rows
+        self.rtt = rtt
+        self.lastrowid = 0
+        self.round_trips = 0
+
+    def _round_trip(self):
+        self.round_trips += 1
+        time.sleep(self.rtt)
+
+    def execute(self, sql, params=None):
+        self._round_trip()
+        self.lastrowid += 1
+
+    def executemany(self, sql, rows):
+        self._round_trip()
+
+    def fetchall(self):
+        return self.rows
+
+    def cursor(self, **kwargs):
+        return self
+
+    def close(self):
+        pass
+
+
+# Cách tạo đơn cũ: một INSERT cho mỗi đơn và mỗi món
+def legacy_place_order(cursor, user_id):
+    cursor.execute("SELECT ... FROM cart c JOIN menu_items m ...", (user_id,))
+    cart_items = cursor.fetchall()
+    groups = {}
+    for item in cart_items:
+        groups.setdefault(item['restaurant'], []).append(item)
+    created = []
+    for restaurant, items in groups.items():
+        total = sum(i['price'] * i['quantity'] for i in items) + SHIPPING_FEE
+        cursor.execute("INSERT INTO orders ...", (user_id, restaurant, total))
+        order_id = cursor.lastrowid
+        for i in items:
+            cursor.execute("INSERT INTO order_items ...", (order_id, i['item_id'], i['quantity'], i['price']))
+        created.append(order_id)
+    cursor.execute("DELETE FROM cart WHERE user_id = %s", (user_id,))
+    return created
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def report(label, lines, samples, round_trips=None):
+    total = sum(samples)
+    extra = f" round_trips={round_trips}" if round_trips is not None else ''
+    print(f"{label:>8} lines={lines:>3} orders/s={len(samples) / total:>8.1f} "
+          f"p50={percentile(samples, 0.5) * 1000:>7.2f}ms p99={percentile(samples, 0.99) * 1000:>7.2f}ms{extra}")
+
+
+def run_simulated(rtt, iterations):
+    for lines in CART_SIZES:
+        rows = make_cart(lines)
+        # Dòng giả vừa là kết quả JOIN (cách cũ) vừa là dòng giỏ và dòng
+        # menu_items (cách mới, id món = id dòng giỏ)
+        batched = lambda cursor, user_id: backend.repository.orders.place_in(cursor, cursor, user_id)
+        for label, place in (('legacy', legacy_place_order), ('batched', batched)):
+            samples = []
+            for _ in range(iterations):
+                cursor = SimulatedCursor(rows, rtt)
+                start = time.perf_counter()
+                place(cursor, 1)
+                samples.append(time.perf_counter() - start)
+            report(label, lines, samples, cursor.round_trips)
+
+
+def run_mysql(iterations):
+    db = backend.get_db_connection()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute(
+        "INSERT INTO user (username, email, password, role) VALUES ('bench_order', 'bench_order@local', '-', 'user')"
+    )
+    user_id = cursor.lastrowid
+    item_ids = []
+    for item in make_cart(max(CART_SIZES)):
+        cursor.execute(
+            "INSERT INTO menu_items (name, price, restaurant) VALUES (%s, %s, %s)",
+            (f"Bench {item['item_id']}", item['price'], item['restaurant'])
+        )
+        item_ids.append(cursor.lastrowid)
+    db.commit()
+
+    try:
+        for lines in CART_SIZES:
+            samples = []
+            for _ in range(iterations):
+                cursor.executemany(backend.db_dialect.cart_upsert, [(user_id, i, 1) for i in item_ids[:lines]])
+                db.commit()
+                start = time.perf_counter()
+                backend.repository.orders.place(user_id)
+                samples.append(time.perf_counter() - start)
+            report('mysql', lines, samples)
+    finally:
+        cursor.execute("DELETE FROM user WHERE id = %s", (user_id,))
+        cursor.execute("DELETE FROM menu_items WHERE id IN (%s)" % ','.join(map(str, item_ids)))
+        db.commit()
+        cursor.close()
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rtt-ms', type=float, default=0.5)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--mysql', action='store_true')
+    args = parser.parse_args()
+
+    if args.mysql:
+        run_mysql(args.iterations)
+    else:
+        run_simulated(args.rtt_ms / 1000, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
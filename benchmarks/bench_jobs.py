@@ -0,0 +1,85 @@
+"""Đo hàng đợi job nền: độ trễ enqueue (phần create_order() phải chờ sau
+commit) và số job/giây worker xử lý với 1, 2, 4 thread và 2 process.
+
+Dùng file SQLite tạm, handler mô phỏng việc phụ tốn --work-ms mili giây
+(I/O như gửi thông báo). Không cần MySQL.
+
+Chạy: python benchmarks/bench_jobs.py [--jobs 5000] [--work-ms 0]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from jobs import JobQueue, Worker
+
+ORDER = {'id': 1, 'user_id': 1, 'restaurant': 'Bench', 'total_amount': '330000.00', 'status': 'pending'}
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def bench_enqueue(queue, count):
+    samples = []
+    for n in range(count):
+        start = time.perf_counter()
+        queue.enqueue('order.created', dict(ORDER, id=n))
+        samples.append(time.perf_counter() - start)
+    print(f"enqueue  p50={percentile(samples, 0.5) * 1000:.3f}ms p99={percentile(samples, 0.99) * 1000:.3f}ms")
+
+
+def drain(path, work, threads):
+    queue = JobQueue(path)
+    handlers = {'order.created': lambda payload: time.sleep(work) if work else None}
+    stop = threading.Event()
+    workers = [Worker(queue, handlers, name=f'{os.getpid()}-{n}', batch_size=50, poll_interval=0.01)
+               for n in range(threads)]
+    running = [threading.Thread(target=worker.run, args=(stop,)) for worker in workers]
+    for thread in running:
+        thread.start()
+    while queue.stats()['queued']:
+        time.sleep(0.01)
+    stop.set()
+    for thread in running:
+        thread.join()
+
+
+def bench_workers(path, count, work, threads, processes):
+    queue = JobQueue(path)
+    queue.enqueue_many([('order.created', dict(ORDER, id=n)) for n in range(count)])
+    start = time.perf_counter()
+    children = [multiprocessing.Process(target=drain, args=(path, work, threads)) for _ in range(processes)]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+    elapsed = time.perf_counter() - start
+    print(f"workers processes={processes} threads={threads:>2} {count / elapsed:>8.0f} jobs/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=5000)
+    parser.add_argument('--work-ms', type=float, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'jobs.sqlite3')
+        queue = JobQueue(path)
+        bench_enqueue(queue, min(args.jobs, 2000))
+        cleaner = Worker(queue, {'order.created': lambda payload: None}, batch_size=500)
+        while cleaner.run_once():
+            pass
+
+        for processes, threads in ((1, 1), (1, 2), (1, 4), (2, 2)):
+            bench_workers(path, args.jobs, args.work_ms / 1000, threads, processes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Đo throughput /api/login với cấu hình hash hiện tại (PASSWORD_SCHEME,
+PASSWORD_COST, PASSWORD_WORKERS) và chi phí chặn request của rate limiter.
+
+DB được thay bằng kết nối giả trả về một user có mật khẩu đã hash, nên số
+đo là phần việc của Python (hash + Flask), không gồm MySQL.
+
+Chạy: python benchmarks/bench_login.py [--threads 8] [--seconds 5]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+import main as backend
+from rate_limit import LoginLimiter, TokenBucket
+
+
+def fake_db(stored):
+    conn = MagicMock()
+    conn.cursor.return_value.fetchone.return_value = {
+        'id': 1, 'username': 'bench', 'email': 'bench@local', 'password': stored, 'role': 'user'
+    }
+    return conn
+
+
+def hammer(threads, seconds, username='bench', password='secret'):
+    """Gửi login liên tục từ ``threads`` thread; trả (req/s, {status: count})."""
+    counts = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    body = json.dumps({'username': username, 'password': password})
+
+    def worker():
+        client = backend.app.test_client()
+        local = {}
+        while time.perf_counter() < deadline:
+            status = client.post('/api/login', data=body, content_type='application/json').status_code
+            local[status] = local.get(status, 0) + 1
+        with lock:
+            for status, n in local.items():
+                counts[status] = counts.get(status, 0) + n
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return sum(counts.values()) / (time.perf_counter() - start), counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    hasher = backend.password_hasher
+    start = time.perf_counter()
+    stored = hasher.hash('secret')
+    print(f"scheme={hasher.scheme} cost={hasher.cost} hash={1000 * (time.perf_counter() - start):.1f}ms")
+
+    unlimited = LoginLimiter(per_ip=TokenBucket(1e9, 1e9), per_user=TokenBucket(1e9, 1e9))
+    with patch.object(backend, 'get_db_connection', lambda: fake_db(stored)):
+        with patch.object(backend, 'login_limiter', unlimited):
+            rps, counts = hammer(args.threads, args.seconds)
+        print(f"{'login, không giới hạn':>28} {rps:>10.1f} req/s {counts}")
+
+        # Cùng một IP dò mật khẩu: hầu hết bị chặn bằng 429 trước khi hash
+        rps, counts = hammer(args.threads, args.seconds, password='guess')
+        print(f"{'login, có rate limiter':>28} {rps:>10.1f} req/s {counts}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Đo rows/giây khi nhập menu hàng loạt (POST /api/menu/import) với 100k món.
+
+Mặc định dùng kết nối giả lập: mỗi executemany/commit tốn một round trip
+(--rtt-ms), mỗi dòng thêm --row-us micro giây phía server; so sánh các cỡ
+lô (1 dòng/INSERT giống gọi add_menu_item() từng món, 100, 500, 2000) cho
+cả CSV và NDJSON. Với --mysql, nhập thật vào MySQL (cấu hình như
+backend/main.py) rồi xoá các món benchmark.
+
+Chạy: python benchmarks/bench_menu_import.py [--rows 100000] [--rtt-ms 0.5] [--mysql]
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+import main as backend
+import menu_import
+
+RESTAURANT = 'Bench Import'
+BATCH_SIZES = (1, 100, 500, 2000)
+
+
+class SimulatedCursor:
+    def __init__(self, rtt, row_cost):
+        self.rtt = rtt
+        self.row_cost = row_cost
+        self.round_trips = 0
+
+    def executemany(self, sql, rows):
+        self.round_trips += 1
+        time.sleep(self.rtt + self.row_cost * len(rows))
+
+    def close(self):
+        pass
+
+
+class SimulatedConnection:
+    def __init__(self, rtt, row_cost):
+        self.cursor_ = SimulatedCursor(rtt, row_cost)
+
+    def cursor(self):
+        return self.cursor_
+
+    def commit(self):
+        self.cursor_.round_trips += 1
+        time.sleep(self.cursor_.rtt)
+
+    def close(self):
+        pass
+
+
+def make_body(rows, fmt):
+    items = ({'name': f'Món {n}', 'description': 'Món benchmark', 'price': f'{50000 + n % 400 * 1000}.00',
+              'category': 'Món chính', 'delivery_time': 20 + n % 30, 'distance': f'{n % 90 / 10:.1f}'}
+             for n in range(rows))
+    if fmt == 'ndjson':
+        return ''.join(json.dumps(item, ensure_ascii=False) + '\n' for item in items).encode('utf-8')
+    lines = ['name,description,price,category,delivery_time,distance']
+    lines += [f"{i['name']},{i['description']},{i['price']},{i['category']},{i['delivery_time']},{i['distance']}"
+              for i in items]
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def run(connect, body, fmt, batch_size):
+    with tempfile.TemporaryDirectory() as tmp:
+        importer = menu_import.MenuImporter(connect, menu_import.ImageResolver(tmp), RESTAURANT,
+                                            batch_size=batch_size, transaction_rows=max(batch_size, 5000))
+        start = time.perf_counter()
+        report = importer.run(menu_import.read_rows(io.BytesIO(body), fmt))
+        elapsed = time.perf_counter() - start
+    assert report['failed'] == 0, report['errors'][:3]
+    return report['inserted'], elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--rtt-ms', type=float, default=0.5)
+    parser.add_argument('--row-us', type=float, default=2)
+    parser.add_argument('--mysql', action='store_true')
+    args = parser.parse_args()
+
+    for fmt in ('csv', 'ndjson'):
+        body = make_body(args.rows, fmt)
+        print(f"{fmt}: {len(body) / 1024 / 1024:.1f} MiB")
+        for batch_size in BATCH_SIZES:
+            # Lô 1 dòng rất chậm: chỉ chạy trên 2% số dòng rồi quy đổi
+            rows = args.rows if batch_size > 1 else max(1, args.rows // 50)
+            sample = body if rows == args.rows else make_body(rows, fmt)
+            if args.mysql:
+                connect = backend.get_db_connection
+                round_trips = ''
+            else:
+                conn = SimulatedConnection(args.rtt_ms / 1000, args.row_us / 1e6)
+                connect = lambda: conn
+            inserted, elapsed = run(connect, sample, fmt, batch_size)
+            if not args.mysql:
+                round_trips = f"{conn.cursor_.round_trips:>7} round trips"
+            print(f"  batch={batch_size:>5} {inserted / elapsed:>10.0f} rows/s {round_trips}")
+
+    if args.mysql:
+        db = backend.get_db_connection()
+        cursor = db.cursor()
+        cursor.execute("DELETE FROM menu_items WHERE restaurant = %s", (RESTAURANT,))
+        db.commit()
+        cursor.close()
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
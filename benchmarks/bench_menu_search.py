@@ -0,0 +1,87 @@
+"""Đo độ trễ tìm kiếm/lọc menu theo kích thước catalog.
+
+Chạy: python benchmarks/bench_menu_search.py [--sizes 1000,10000,100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from menu_search import MenuIndex, MenuQuery, fold
+
+WORDS = ['phở', 'bò', 'gà', 'bún', 'huế', 'cay', 'pizza', 'sushi', 'cá', 'hồi',
+         'cơm', 'tấm', 'sườn', 'nướng', 'bánh', 'mì', 'thịt', 'chả', 'giò', 'tôm']
+CATEGORIES = ['vietnamese', 'pizza', 'burger', 'sushi', 'chicken', 'pasta', 'japanese']
+
+QUERIES = [
+    {},
+    {'q': 'pho bo'},
+    {'q': 'ca', 'sort': 'price-low'},
+    {'category': 'vietnamese', 'sort': 'rating'},
+    {'distance': 'near', 'price': 'budget', 'sort': 'popular'},
+    {'min_rating': '4.5', 'sort': 'distance'},
+]
+
+
+def make_items(n, rng):
+    items = []
+    for i in range(1, n + 1):
+        name = ' '.join(rng.sample(WORDS, 3))
+        items.append({
+            'id': i,
+            'name': name.title(),
+            'restaurant': f"Quán {rng.choice(WORDS).title()} {i % 500}",
+            'description': ' '.join(rng.sample(WORDS, 6)),
+            'category': rng.choice(CATEGORIES),
+            'price': Decimal(rng.randrange(20, 600) * 1000),
+            'distance': Decimal(rng.randrange(1, 100)) / 10,
+            'rating': Decimal(rng.randrange(30, 50)) / 10,
+            'reviews': rng.randrange(0, 500),
+        })
+    return items
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'items':>8} {'build ms':>9} {'p50 us':>8} {'p99 us':>8} {'linear p50 us':>14}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        items = make_items(size, rng)
+        start = time.perf_counter()
+        index = MenuIndex(items)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        samples = []
+        for _ in range(args.repeat):
+            for params in QUERIES:
+                query = MenuQuery.from_args(dict(params, limit='20'))
+                start = time.perf_counter()
+                index.search(query)
+                samples.append((time.perf_counter() - start) * 1e6)
+
+        # So sánh: lọc tuyến tính như filterAndSort() cũ trong trình duyệt
+        linear = []
+        for _ in range(max(1, args.repeat // 20)):
+            start = time.perf_counter()
+            found = [i for i in items if 'pho' in fold(i['name']) or 'pho' in fold(i['description'])]
+            found.sort(key=lambda i: i['price'])
+            linear.append((time.perf_counter() - start) * 1e6)
+
+        print(f"{size:>8} {build_ms:>9.1f} {percentile(samples, 0.5):>8.0f} "
+              f"{percentile(samples, 0.99):>8.0f} {percentile(linear, 0.5):>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Đo chi phí của middleware metrics và profiler lấy mẫu.
+
+Gửi request qua Flask test client tới /api/orders/user/<id> (1 truy vấn,
+kết nối giả lập trả --rows đơn) và /api/menu (cache), lần lượt với metrics
+tắt, bật, và bật thêm profiler (PROFILE_SLOW_MS). Kết quả: µs/request và
+phần trăm tăng so với khi tắt, cùng chi phí thuần của phần đo (không qua
+Flask). Không cần MySQL.
+
+Chạy: python benchmarks/bench_metrics.py [--requests 5000] [--rows 20] [--rounds 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+import main as backend
+import metrics as app_metrics
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self.rows)
+
+    def close(self):
+        pass
+
+
+def run(client, path, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        client.get(path)
+    return (time.perf_counter() - start) / count
+
+
+def bench_hooks(count=20000):
+    # Chi phí thuần của phần đo cho một request 1 truy vấn, không tính Flask
+    registry = app_metrics.Metrics()
+    connection = FakeConnection([])
+    start = time.perf_counter()
+    for _ in range(count):
+        registry.begin('GET', '/api/orders/user/<int:user_id>')
+        cursor = registry.connect(lambda: connection).cursor(dictionary=True)
+        cursor.execute('SELECT 1')
+        registry.record_json(0.0)
+        registry.server_timing(*registry.finish(200, 1024))
+    print(f"instrumentation thuần: {(time.perf_counter() - start) / count * 1e6:.1f} µs/request")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--rows', type=int, default=20)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    created = datetime(2025, 1, 1, 12)
+    rows = [{'id': n, 'restaurant': 'Bench', 'total_amount': Decimal('130000.00'), 'status': 'pending',
+             'created_at': created, 'updated_at': created} for n in range(args.rows, 0, -1)]
+    menu = [{'id': n, 'name': f'Món {n}', 'price': Decimal(50000), 'restaurant': 'Bench',
+             'image': None, 'description': ''} for n in range(200)]
+    connection = FakeConnection(rows)
+    backend.db_pool.connect = lambda: connection
+    backend._load_menu_items = lambda: menu
+    client = backend.app.test_client()
+
+    bench_hooks()
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = app_metrics.SamplingProfiler(tmp, slow=10)
+        modes = (('tắt', False, None), ('bật', True, None), ('bật + profiler', True, profiler))
+        for path in ('/api/orders/user/1?limit=20', '/api/menu'):
+            client.get(path)
+            # Chạy xen kẽ các chế độ nhiều lượt, lấy min để bớt nhiễu
+            best = {label: float('inf') for label, _, _ in modes}
+            for _ in range(args.rounds):
+                for label, enabled, prof in modes:
+                    backend.metrics.enabled = enabled
+                    backend.metrics.profiler = prof
+                    best[label] = min(best[label], run(client, path, args.requests // args.rounds))
+            baseline = best[modes[0][0]]
+            for label, per_request in best.items():
+                print(f"{path:<30} metrics {label:<15} {per_request * 1e6:>8.1f} µs/request "
+                      f"{(per_request / baseline - 1) * 100:>+6.1f}%")
+
+
+if __name__ == '__main__':
+    main()
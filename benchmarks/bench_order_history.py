@@ -0,0 +1,98 @@
+"""Đo độ trễ mỗi trang lịch sử đơn hàng trên bảng orders lớn.
+
+Tạo N đơn (mặc định 1.000.000) cho một nhà hàng và một user benchmark, rồi
+so sánh phân trang keyset (OrderPage) với LIMIT/OFFSET ở các trang sâu dần.
+Cần MySQL thật với schema qldapm_2.sql (cấu hình như backend/main.py).
+Dữ liệu benchmark bị xoá khi chạy xong, trừ khi có --keep.
+
+Chạy: python benchmarks/bench_order_history.py [--orders 1000000] [--keep]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+import main as backend
+from order_pages import OrderPage
+
+RESTAURANT = 'Bench History'
+SELECT = "SELECT o.id, o.restaurant, o.total_amount, o.status, o.created_at, o.updated_at FROM orders o"
+PAGES = (1, 10, 100, 1000, 10000)
+
+
+def seed(cursor, db, orders, batch=10000):
+    cursor.execute(
+        "INSERT INTO user (username, email, password, role) VALUES ('bench_history', 'bench_history@local', '-', 'user')"
+    )
+    user_id = cursor.lastrowid
+    done = 0
+    while done < orders:
+        n = min(batch, orders - done)
+        rows = []
+        for i in range(done, done + n):
+            # Mỗi đơn cách nhau 1 giây để created_at trải dài
+            rows.extend((user_id, RESTAURANT, 100000 + i % 500000, i))
+        placeholders = ", ".join(
+            ["(%s, %s, %s, 'confirmed', TIMESTAMP('2020-01-01') + INTERVAL %s SECOND)"] * n)
+        cursor.execute(
+            f"INSERT INTO orders (user_id, restaurant, total_amount, status, created_at) VALUES {placeholders}",
+            rows
+        )
+        db.commit()
+        done += n
+        print(f"\rseeded {done}/{orders}", end='', flush=True)
+    print()
+    return user_id
+
+
+def timed(cursor, sql, params):
+    start = time.perf_counter()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    return (time.perf_counter() - start) * 1000, rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--orders', type=int, default=1000000)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--keep', action='store_true')
+    args = parser.parse_args()
+
+    db = backend.get_db_connection()
+    cursor = db.cursor(dictionary=True)
+    user_id = seed(cursor, db, args.orders)
+
+    try:
+        print(f"{'page':>6} {'keyset ms':>10} {'offset ms':>10}")
+        page = OrderPage(limit=args.limit)
+        current = 1
+        for target in PAGES:
+            if target * args.limit > args.orders:
+                break
+            # Đi theo cursor tới trang cần đo, đo riêng trang đó
+            while True:
+                elapsed, rows = timed(cursor, *page.sql(SELECT, "WHERE o.user_id = %s", (user_id,)))
+                result = page.result(rows)
+                if current == target:
+                    break
+                page.cursor = OrderPage(cursor=result['next_cursor']).cursor
+                current += 1
+
+            offset_ms, _ = timed(cursor, f"{SELECT} WHERE o.user_id = %s "
+                                          "ORDER BY o.created_at DESC, o.id DESC LIMIT %s OFFSET %s",
+                                 (user_id, args.limit, (target - 1) * args.limit))
+            print(f"{target:>6} {elapsed:>10.2f} {offset_ms:>10.2f}")
+            page.cursor = OrderPage(cursor=result['next_cursor']).cursor
+            current += 1
+    finally:
+        if not args.keep:
+            cursor.execute("DELETE FROM user WHERE id = %s", (user_id,))
+            db.commit()
+        cursor.close()
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""So sánh serialize response: jsonify() mặc định của Flask với lớp
+serializers (orjson nếu đã cài, RowSchema từ cursor tuple, stream theo lô)
+trên menu 10k món và lịch sử 10k đơn. Không cần MySQL.
+
+Chạy: python benchmarks/bench_serialize.py [--rows 10000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from flask.json.provider import DefaultJSONProvider
+
+import main as backend
+import serializers
+from serializers import MENU_ITEM, ORDER_SUMMARY, dumps, stream_array
+
+
+def menu_rows(count):
+    created = datetime(2025, 1, 1)
+    return [(n, f'Món {n}', 'Mô tả món ăn ' * 3, Decimal(50000 + n % 400 * 1000), f'uploads/food{n % 9}.jpg',
+             f'Nhà hàng {n % 50}', Decimal('4.5'), n % 500, 30, Decimal('2.5'), 'Món chính', None, created)
+            for n in range(count)]
+
+
+def order_rows(count):
+    start = datetime(2025, 1, 1)
+    return [(n, f'Nhà hàng {n % 50}', Decimal(130000 + n % 100 * 1000), 'pending',
+             start + timedelta(minutes=n), start + timedelta(minutes=n, microseconds=n))
+            for n in range(count, 0, -1)]
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    jsonify = DefaultJSONProvider(backend.app)
+    print(f"encoder: {'orjson' if serializers.orjson else 'json chuẩn'}")
+    for label, schema, key, tuples in (('menu', MENU_ITEM, 'items', menu_rows(args.rows)),
+                                       ('orders', ORDER_SUMMARY, 'orders', order_rows(args.rows))):
+        keys = schema.keys
+        # Cách cũ: cursor dictionary + jsonify
+        cases = [
+            ('jsonify (dict cursor)',
+             lambda: jsonify.dumps({'success': True, key: [dict(zip(keys, row)) for row in tuples]}).encode()),
+            ('RowSchema + dumps',
+             lambda: dumps({'success': True, key: schema.rows(tuples)})),
+            ('stream_array (lô 1000)',
+             lambda: b''.join(stream_array({'success': True}, key, (
+                 schema.rows(tuples[i:i + 1000]) for i in range(0, len(tuples), 1000))))),
+        ]
+        baseline = None
+        for name, fn in cases:
+            ms, size = timed(fn, args.repeat)
+            baseline = baseline or ms
+            print(f"{label:<7} {name:<24} {ms:>8.1f} ms {size / 1024:>8.0f} KiB  x{baseline / ms:.1f}")
+
+
+if __name__ == '__main__':
+    main()
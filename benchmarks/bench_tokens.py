@@ -0,0 +1,66 @@
+"""Đo chi phí verify session token mỗi request (không truy vấn database).
+
+So sánh: verify token thuần, hook load_session trong một request context
+Flask, và một SELECT user theo id qua pool (cách cũ: đọc user mỗi request,
+cần MySQL thật; bỏ qua nếu không kết nối được).
+
+Chạy: python benchmarks/bench_tokens.py [--iterations 100000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+import main as backend
+
+
+def per_call_us(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=100000)
+    args = parser.parse_args()
+
+    signer = backend.session_tokens
+    token = signer.sign({'id': 1, 'name': 'bench', 'role': 'user'})
+    print(f"token {len(token)} bytes")
+    print(f"{'sign':>24} {per_call_us(lambda: signer.sign({'id': 1, 'role': 'user'}), args.iterations):>8.2f} us")
+    print(f"{'verify':>24} {per_call_us(lambda: signer.verify(token), args.iterations):>8.2f} us")
+
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def hook():
+        with backend.app.test_request_context('/api/cart/1', headers=headers):
+            backend.load_session()
+
+    def empty_context():
+        with backend.app.test_request_context('/api/cart/1', headers=headers):
+            pass
+
+    base = per_call_us(empty_context, args.iterations // 10)
+    print(f"{'load_session hook':>24} {per_call_us(hook, args.iterations // 10) - base:>8.2f} us")
+
+    try:
+        db = backend.get_db_connection()
+    except Exception as e:
+        print(f"{'SELECT user (MySQL)':>24}  bỏ qua: {e}")
+        return
+    cursor = db.cursor(dictionary=True)
+
+    def lookup():
+        cursor.execute("SELECT id, username, role FROM user WHERE id = %s", (1,))
+        cursor.fetchall()
+
+    print(f"{'SELECT user (MySQL)':>24} {per_call_us(lookup, args.iterations // 100):>8.2f} us")
+    cursor.close()
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Đo số ảnh/giây khi /uploads do Python gửi file so với chế độ offload
+(X-Accel-Redirect: Python chỉ trả header, nginx gửi file bằng sendfile).
+
+Mặc định chạy trong process qua Flask test client trên các ảnh ở
+backend/uploads, nên chỉ đo phần việc của Python. Để đo cả proxy, chạy
+server thật rồi dùng benchmarks/load_test.py với --path /uploads/<file>.
+
+Chạy: python benchmarks/bench_uploads.py [--requests 5000]
+"""
+import argparse
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+import main as backend
+
+
+def run(client, files, requests, headers=None):
+    sent = 0
+    start = time.perf_counter()
+    for i in range(requests):
+        response = client.get(f'/uploads/{files[i % len(files)]}', headers=headers or {})
+        sent += len(response.get_data())
+    elapsed = time.perf_counter() - start
+    return requests / elapsed, sent / elapsed / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    files = sorted(f for f in os.listdir(backend.UPLOADS_DIR) if not f.endswith('.json') and not f.startswith('.'))
+    if not files:
+        sys.exit('backend/uploads không có ảnh nào')
+    client = backend.app.test_client()
+
+    print(f"{'mode':>22} {'images/s':>10} {'MB/s':>8}")
+    rps, mbps = run(client, files, args.requests)
+    print(f"{'python (200)':>22} {rps:>10.0f} {mbps:>8.1f}")
+
+    etags = {}
+    for name in files:
+        etags[name] = client.get(f'/uploads/{name}').headers['ETag']
+    start = time.perf_counter()
+    for i in range(args.requests):
+        name = files[i % len(files)]
+        client.get(f'/uploads/{name}', headers={'If-None-Match': etags[name]})
+    print(f"{'python (304)':>22} {args.requests / (time.perf_counter() - start):>10.0f} {0:>8.1f}")
+
+    with patch.object(backend, 'UPLOADS_OFFLOAD', 'x-accel'):
+        rps, _ = run(client, files, args.requests)
+    print(f"{'x-accel (headers)':>22} {rps:>10.0f} {0:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
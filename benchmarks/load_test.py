@@ -0,0 +1,142 @@
+"""Load test HTTP đơn giản (chỉ dùng thư viện chuẩn) để so sánh chế độ sync
+(Flask trên gunicorn, server.py) và async (ASGI, asgi.py).
+
+Mỗi client ảo giữ một kết nối keep-alive và gửi request liên tục trong
+--duration giây. Kết quả (requests/giây, p50, p99, lỗi) in ra và ghi JSON.
+
+Chạy hai server trước, ví dụ:
+    python -m backend serve --bind 127.0.0.1:5000   # sync (gunicorn), cổng 5000
+    python backend/asgi.py                          # async, cổng 5001
+rồi:
+    python benchmarks/load_test.py --target sync=http://127.0.0.1:5000 \\
+        --target async=http://127.0.0.1:5001 --concurrency 10,100,1000
+
+Với 1000 client cần tăng giới hạn file mở (ulimit -n).
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = ['/api/menu', '/api/menu?q=pho&limit=20', '/api/cart/1', '/api/orders/user/1?limit=20']
+
+
+def percentile(samples, p):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+    length = 0
+    chunked = False
+    close = False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        value = value.strip()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding' and 'chunked' in value.lower():
+            chunked = True
+        elif name == 'connection' and value.lower() == 'close':
+            close = True
+    body = b''
+    if chunked:
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            chunks.append((await reader.readexactly(size + 2))[:-2])
+            if size == 0:
+                break
+        body = b''.join(chunks)
+    elif length:
+        body = await reader.readexactly(length)
+    return status, close, body
+
+
+async def client(host, port, paths, deadline, latencies, errors, offset):
+    reader = writer = None
+    i = offset
+    while time.monotonic() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            request = (f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+                       f"Accept-Encoding: identity\r\nConnection: keep-alive\r\n\r\n")
+            start = time.perf_counter()
+            writer.write(request.encode('ascii'))
+            status, close, _ = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status >= 500:
+                errors.append(status)
+            if close:
+                writer.close()
+                writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            errors.append(type(e).__name__)
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.01)
+    if writer is not None:
+        writer.close()
+
+
+async def run_level(url, concurrency, duration, paths):
+    parts = urlsplit(url)
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    start = time.monotonic()
+    await asyncio.gather(*(
+        client(parts.hostname, parts.port or 80, paths, deadline, latencies, errors, n)
+        for n in range(concurrency)
+    ))
+    elapsed = time.monotonic() - start
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': (percentile(latencies, 0.5) or 0) * 1000,
+        'p99_ms': (percentile(latencies, 0.99) or 0) * 1000,
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--target', action='append', required=True, help='name=url, có thể lặp lại')
+    parser.add_argument('--concurrency', default='10,100,1000')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--path', action='append', help='đường dẫn cần gọi (mặc định: menu, cart, orders)')
+    parser.add_argument('--output', default='load_test_results.json')
+    args = parser.parse_args()
+
+    paths = args.path or DEFAULT_PATHS
+    results = {}
+    for target in args.target:
+        name, _, url = target.partition('=')
+        results[name] = []
+        for level in (int(c) for c in args.concurrency.split(',')):
+            result = asyncio.run(run_level(url, level, args.duration, paths))
+            results[name].append(result)
+            print(f"{name:>6} c={level:>5} rps={result['rps']:>9.1f} p50={result['p50_ms']:>8.2f}ms "
+                  f"p99={result['p99_ms']:>8.2f}ms errors={result['errors']}")
+
+    with open(args.output, 'w') as f:
+        json.dump({'paths': paths, 'duration': args.duration, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,420 @@
+"""Load test theo kịch bản của frontend trên dữ liệu seed (seed_data.py).
+
+Mỗi client ảo đăng nhập (index.html) rồi lặp một kịch bản, chọn theo --mix:
+- browse: trang chủ (món nổi bật + badge giỏ), trang menu theo danh mục và
+  trang kế tiếp, tìm kiếm (home.html, menu.html)
+- cart: xem menu, thêm một món, xem giỏ
+- checkout: thêm món, xem giỏ, sửa số lượng, đặt hàng, xem lịch sử đơn
+  (cart.html, orders.html)
+- restaurant: tài khoản nhà hàng tải danh sách đơn, poll đơn mới bằng
+  ?since= và xác nhận đơn đang chờ (orders.html)
+
+Kết quả: throughput và p50/p90/p95/p99 theo từng bước và từng kịch bản, in
+ra và ghi JSON (kèm commit, quy mô dữ liệu, tham số) để so sánh giữa các
+commit bằng --compare.
+
+Chạy:
+    # Seed một file SQLite rồi chạy backend (python -m backend serve,
+    # DB_BACKEND=sqlite) trong process con
+    python benchmarks/scenarios.py --embedded [--scale small] [--clients 20] [--duration 30]
+    # Server thật trên MySQL đã seed bằng seed_data.py --mysql (cùng --seed/--scale);
+    # server cần LOGIN_IP_BURST/LOGIN_USER_BURST đủ lớn cho các client đăng nhập
+    python benchmarks/scenarios.py --url http://127.0.0.1:5000
+    # So sánh với lần chạy trước, exit 1 nếu p95/throughput xấu hơn --threshold
+    python benchmarks/scenarios.py --embedded --compare benchmarks/results/<commit>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from urllib.parse import quote, urlencode, urlsplit
+
+import load_test
+import seed_data
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCENARIOS = ('browse', 'cart', 'checkout', 'restaurant')
+DEFAULT_MIX = 'browse=60,cart=20,checkout=10,restaurant=10'
+PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+class Recorder:
+    """Độ trễ theo bước; chỉ ghi khi ``recording`` (sau warm-up)."""
+
+    def __init__(self):
+        self.recording = False
+        self.steps = {}
+        self.iterations = {}
+        self.logins = []
+
+    def step(self, name, elapsed, ok):
+        if not self.recording:
+            return
+        entry = self.steps.setdefault(name, {'latencies': [], 'errors': 0})
+        entry['latencies'].append(elapsed)
+        if not ok:
+            entry['errors'] += 1
+
+    def iteration(self, scenario, elapsed):
+        if self.recording:
+            self.iterations.setdefault(scenario, []).append(elapsed)
+
+
+class Client:
+    """Một kết nối keep-alive, gửi JSON và đọc JSON như fetch() của frontend."""
+
+    def __init__(self, host, port, recorder):
+        self.host = host
+        self.port = port
+        self.recorder = recorder
+        self.token = None
+        self.reader = self.writer = None
+
+    async def request(self, name, method, path, body=None):
+        headers = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                   "Accept-Encoding: identity", "Connection: keep-alive"]
+        if self.token:
+            headers.append(f"Authorization: Bearer {self.token}")
+        payload = b''
+        if body is not None:
+            payload = json.dumps(body).encode('utf-8')
+            headers += ["Content-Type: application/json", f"Content-Length: {len(payload)}"]
+        raw = ('\r\n'.join(headers) + '\r\n\r\n').encode('utf-8') + payload
+
+        start = time.perf_counter()
+        for _ in range(2):
+            reused = self.writer is not None
+            try:
+                if self.writer is None:
+                    self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+                self.writer.write(raw)
+                status, close, data = await load_test.read_response(self.reader)
+                break
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+                self.close()
+                # Server đã đóng kết nối keep-alive rảnh (gunicorn: 2 giây):
+                # gửi lại một lần trên kết nối mới như trình duyệt
+                if not reused:
+                    self.recorder.step(name, time.perf_counter() - start, False)
+                    return None
+        elapsed = time.perf_counter() - start
+        if close:
+            self.close()
+        try:
+            result = json.loads(data) if data else None
+        except ValueError:
+            result = None
+        ok = status < 400 and not (isinstance(result, dict) and result.get('success') is False)
+        self.recorder.step(name, elapsed, ok)
+        return result if ok else None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+# -------------------------
+# Kịch bản
+# -------------------------
+def _menu_query(rng, **extra):
+    params = {'category': rng.choice(seed_data.CATEGORIES), 'sort': 'popular', 'limit': 24}
+    params.update(extra)
+    return '/api/menu?' + urlencode(params)
+
+
+async def browse(client, user, rng):
+    await client.request('menu_home', 'GET', '/api/menu?sort=popular&limit=3')
+    await client.request('cart_view', 'GET', f"/api/cart/{user['id']}")
+    page = await client.request('menu_page', 'GET', _menu_query(rng))
+    if page and page.get('next_cursor'):
+        await client.request('menu_next_page', 'GET', _menu_query(rng, cursor=page['next_cursor']))
+    await client.request('menu_search', 'GET', '/api/menu?' + urlencode(
+        {'q': rng.choice(seed_data.DISHES), 'limit': 24}))
+
+
+async def _add_to_cart(client, user, rng, count):
+    page = await client.request('menu_page', 'GET', _menu_query(rng))
+    items = (page or {}).get('items') or []
+    for item in rng.sample(items, min(count, len(items))):
+        await client.request('cart_add', 'POST', '/api/cart',
+                             {'user_id': user['id'], 'item_id': item['id'], 'quantity': 1})
+
+
+async def add_to_cart(client, user, rng):
+    await _add_to_cart(client, user, rng, 1)
+    await client.request('cart_view', 'GET', f"/api/cart/{user['id']}")
+
+
+async def checkout(client, user, rng):
+    await _add_to_cart(client, user, rng, rng.randint(1, 3))
+    cart = await client.request('cart_view', 'GET', f"/api/cart/{user['id']}")
+    if cart and cart.get('items'):
+        await client.request('cart_update', 'PUT', '/api/cart/update',
+                             {'cart_id': cart['items'][0]['id'], 'quantity': 2})
+    await client.request('order_create', 'POST', '/api/order', {'user_id': user['id']})
+    await client.request('orders_user', 'GET', f"/api/orders/user/{user['id']}?limit=20")
+
+
+async def restaurant(client, user, rng):
+    path = f"/api/orders/restaurant/{quote(user['username'])}"
+    if 'sync_token' not in user:
+        # Lần đầu mở trang: tải danh sách, sau đó chỉ poll thay đổi từ lúc này
+        await client.request('orders_restaurant', 'GET', f"{path}?limit=20")
+        user['sync_token'] = datetime.now().isoformat()
+        return
+    changes = await client.request('orders_poll', 'GET', f"{path}?" + urlencode({'since': user['sync_token']}))
+    if not changes:
+        return
+    user['sync_token'] = changes['sync_token']
+    for order in changes['orders']:
+        if order['status'] == 'pending':
+            await client.request('order_confirm', 'PUT', f"/api/orders/{order['id']}/status",
+                                 {'status': 'confirmed'})
+
+
+FLOWS = {'browse': browse, 'cart': add_to_cart, 'checkout': checkout, 'restaurant': restaurant}
+
+
+# -------------------------
+# Chạy
+# -------------------------
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in FLOWS:
+            raise SystemExit(f"kịch bản không hợp lệ: {name} (có: {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def virtual_client(n, args, config, mix, recorder, ready, deadline):
+    rng = random.Random(args.seed * 100003 + n)
+    scenario = rng.choices(list(mix), weights=list(mix.values()))[0]
+    if scenario == 'restaurant':
+        username = seed_data.restaurant_name(n % config['restaurants'] + 1)
+    else:
+        username = seed_data.username(n % config['users'] + 1)
+
+    client = Client(args.host, args.port, recorder)
+    start = time.perf_counter()
+    login = await client.request('login', 'POST', '/api/login',
+                                 {'username': username, 'password': seed_data.PASSWORD})
+    recorder.logins.append(time.perf_counter() - start)
+    if not login:
+        client.close()
+        return scenario, False
+    client.token = login.get('token')
+    user = dict(login['user'])
+    await ready.wait()
+
+    flow = FLOWS[scenario]
+    # Trang đơn của nhà hàng poll theo chu kỳ, các trang khác theo think time
+    pause = args.poll_ms if scenario == 'restaurant' else args.think_ms
+    while time.monotonic() < deadline():
+        start = time.perf_counter()
+        await flow(client, user, rng)
+        recorder.iteration(scenario, time.perf_counter() - start)
+        if pause:
+            await asyncio.sleep(rng.expovariate(1000 / pause))
+    client.close()
+    return scenario, True
+
+
+async def run(args, config, mix):
+    recorder = Recorder()
+    ready = asyncio.Event()
+    end = {'at': float('inf')}
+    tasks = [asyncio.create_task(virtual_client(n, args, config, mix, recorder, ready, lambda: end['at']))
+             for n in range(args.clients)]
+
+    # Chờ tất cả đăng nhập rồi mới tính giờ; warm-up không được ghi
+    while len(recorder.logins) < args.clients:
+        await asyncio.sleep(0.05)
+    ready.set()
+    await asyncio.sleep(args.warmup)
+    recorder.recording = True
+    started = time.monotonic()
+    end['at'] = started + args.duration
+    results = await asyncio.gather(*tasks)
+    elapsed = time.monotonic() - started
+    recorder.recording = False
+    return recorder, elapsed, results
+
+
+def summarize(latencies, errors, elapsed):
+    summary = {'requests': len(latencies), 'rps': len(latencies) / elapsed if elapsed else 0, 'errors': errors}
+    for p in PERCENTILES:
+        summary[f"p{int(p * 100)}_ms"] = (load_test.percentile(latencies, p) or 0) * 1000
+    summary['max_ms'] = max(latencies, default=0) * 1000
+    return summary
+
+
+def report(recorder, elapsed, results):
+    steps = {name: summarize(entry['latencies'], entry['errors'], elapsed)
+             for name, entry in sorted(recorder.steps.items())}
+    scenarios = {}
+    for scenario in SCENARIOS:
+        clients = [ok for name, ok in results if name == scenario]
+        if not clients:
+            continue
+        summary = summarize(recorder.iterations.get(scenario, []), clients.count(False), elapsed)
+        summary['clients'] = len(clients)
+        # Với kịch bản, "requests" là số lượt chạy hết flow
+        summary['iterations'] = summary.pop('requests')
+        summary['iterations_per_s'] = summary.pop('rps')
+        summary['login_failures'] = summary.pop('errors')
+        scenarios[scenario] = summary
+    total = sum(len(entry['latencies']) for entry in recorder.steps.values())
+    return {
+        'elapsed_s': elapsed,
+        'total': {'requests': total, 'rps': total / elapsed if elapsed else 0,
+                  'errors': sum(entry['errors'] for entry in recorder.steps.values())},
+        'login': summarize(recorder.logins, 0, elapsed),
+        'scenarios': scenarios,
+        'steps': steps,
+    }
+
+
+def print_report(result):
+    print(f"{'step':<18}{'req':>8}{'rps':>9}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'max':>9}{'err':>6}")
+    for name, s in result['steps'].items():
+        print(f"{name:<18}{s['requests']:>8}{s['rps']:>9.1f}{s['p50_ms']:>9.2f}{s['p90_ms']:>9.2f}"
+              f"{s['p95_ms']:>9.2f}{s['p99_ms']:>9.2f}{s['max_ms']:>9.1f}{s['errors']:>6}")
+    for name, s in result['scenarios'].items():
+        print(f"scenario {name:<11} clients={s['clients']:<4} iterations/s={s['iterations_per_s']:>8.1f} "
+              f"p50={s['p50_ms']:.1f}ms p95={s['p95_ms']:.1f}ms")
+    total = result['total']
+    print(f"total {total['requests']} requests, {total['rps']:.1f} req/s, {total['errors']} errors")
+
+
+def compare(result, baseline, threshold):
+    """In thay đổi so với ``baseline``; trả danh sách bước bị chậm đi."""
+    regressions = []
+    print(f"\nso với {baseline['meta'].get('commit', '?')[:12]} (ngưỡng {threshold:.0%}):")
+    for name, s in result['steps'].items():
+        old = baseline['steps'].get(name)
+        if not old or not old['requests'] or not s['requests']:
+            continue
+        p95 = s['p95_ms'] / old['p95_ms'] - 1 if old['p95_ms'] else 0
+        rps = s['rps'] / old['rps'] - 1 if old['rps'] else 0
+        flag = p95 > threshold or rps < -threshold
+        if flag:
+            regressions.append(name)
+        print(f"  {name:<18} p95 {old['p95_ms']:>8.2f} -> {s['p95_ms']:>8.2f}ms ({p95:+.0%})  "
+              f"rps {old['rps']:>8.1f} -> {s['rps']:>8.1f} ({rps:+.0%}){'  REGRESSION' if flag else ''}")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BENCH_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_embedded(args, config, workdir):
+    path = os.path.join(workdir, 'bench.sqlite3')
+    start = time.perf_counter()
+    counts = seed_data.seed(seed_data.sqlite_database(path), config, seed=args.seed, dialect='sqlite')
+    print(f"seed: {counts} ({time.perf_counter() - start:.1f}s)")
+    port = free_port()
+    # Mọi client đăng nhập từ cùng một IP; hàng đợi job riêng cho lần chạy
+    env = dict(os.environ, DB_BACKEND='sqlite', SQLITE_PATH=path, JOB_QUEUE=os.path.join(workdir, 'jobs.sqlite3'),
+               METRICS='0', LOGIN_IP_BURST='1000000', LOGIN_USER_BURST='1000000')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'backend', 'serve', '--bind', f'127.0.0.1:{port}',
+         '--workers', '1', '--threads', str(args.threads)],
+        cwd=os.path.dirname(BENCH_DIR), env=env, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            break
+        except OSError:
+            if server.poll() is not None or time.monotonic() > deadline:
+                server.kill()
+                raise SystemExit("không khởi động được server SQLite")
+            time.sleep(0.1)
+    return server, f"http://127.0.0.1:{port}", counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--embedded', action='store_true', help='seed SQLite và chạy backend trên SQLite')
+    target.add_argument('--url', help='server đã chạy trên dữ liệu seed_data.py --mysql')
+    seed_data.add_arguments(parser)
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--think-ms', type=float, default=0)
+    parser.add_argument('--poll-ms', type=float, default=1000, help='chu kỳ poll của nhà hàng')
+    parser.add_argument('--mix', default=DEFAULT_MIX)
+    parser.add_argument('--threads', type=int, default=8, help='số thread của server --embedded')
+    parser.add_argument('--output', help='mặc định benchmarks/results/<commit>.json')
+    parser.add_argument('--compare', metavar='BASELINE.json')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+
+    config = seed_data.config_from_args(args)
+    mix = parse_mix(args.mix)
+    server = None
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.embedded:
+            server, url, _ = start_embedded(args, config, workdir)
+        else:
+            url = args.url
+        parts = urlsplit(url)
+        args.host, args.port = parts.hostname, parts.port or 80
+        try:
+            recorder, elapsed, results = asyncio.run(run(args, config, mix))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    result = report(recorder, elapsed, results)
+    commit = git_commit()
+    result['meta'] = {
+        'commit': commit,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'target': 'embedded' if args.embedded else url,
+        'scale': args.scale, 'data': config, 'seed': args.seed,
+        'clients': args.clients, 'duration': args.duration, 'warmup': args.warmup,
+        'think_ms': args.think_ms, 'poll_ms': args.poll_ms, 'mix': mix, 'threads': args.threads if args.embedded else None,
+        'python': platform.python_version(), 'cpus': os.cpu_count(),
+    }
+    print_report(result)
+
+    output = args.output or os.path.join(BENCH_DIR, 'results', f"{(commit or 'unknown')[:12]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"kết quả: {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(result, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+"""Sinh dữ liệu benchmark (users, menu_items, cart, orders/order_items) theo
+schema qldapm_2.sql, với quy mô chọn được và seed cố định nên hai lần chạy
+cùng tham số cho cùng dữ liệu.
+
+- User khách: bench_user_00001... ; tài khoản nhà hàng (role restaurant) có
+  username trùng tên nhà hàng "Bench Restaurant 001"... ; tất cả dùng mật
+  khẩu PASSWORD (hash một lần).
+- Món phân bố đều theo nhà hàng; giỏ hàng cho một phần user; đơn trải đều
+  trong --days ngày gần nhất, rollup doanh thu dựng bằng analytics.backfill.
+
+Chạy:
+    python benchmarks/seed_data.py --sqlite /tmp/bench.sqlite3 [--scale small|medium|large]
+    python benchmarks/seed_data.py --mysql [--reset]      # cấu hình như backend/main.py
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+import analytics
+import sqlite_db
+from passwords import PasswordHasher
+
+PASSWORD = 'bench-password'
+USER_PREFIX = 'bench_user_'
+RESTAURANT_PREFIX = 'Bench Restaurant '
+CATEGORIES = ('pizza', 'burger', 'sushi', 'japanese', 'pasta', 'chicken', 'vietnamese')
+BADGES = ('', '', '', 'popular', 'new')
+DISHES = ('Phở', 'Bún chả', 'Cơm tấm', 'Pizza', 'Burger', 'Sushi', 'Mì Ý', 'Gà rán', 'Bánh mì', 'Lẩu')
+STATUSES = ('pending', 'confirmed', 'confirmed', 'confirmed', 'cancelled')
+
+SCALES = {
+    'small': {'users': 200, 'restaurants': 20, 'items': 500, 'carts': 0.3, 'orders': 2000},
+    'medium': {'users': 5000, 'restaurants': 100, 'items': 5000, 'carts': 0.3, 'orders': 50000},
+    'large': {'users': 50000, 'restaurants': 500, 'items': 50000, 'carts': 0.3, 'orders': 500000},
+}
+BATCH = 1000
+CENTS = Decimal('0.01')
+
+
+def username(n):
+    return f"{USER_PREFIX}{n:05d}"
+
+
+def restaurant_name(n):
+    return f"{RESTAURANT_PREFIX}{n:03d}"
+
+
+def scale_config(name='small', **overrides):
+    config = dict(SCALES[name])
+    config.update({key: value for key, value in overrides.items() if value is not None})
+    return config
+
+
+def _insert(cursor, db, sql, rows):
+    for start in range(0, len(rows), BATCH):
+        cursor.executemany(sql, rows[start:start + BATCH])
+        db.commit()
+
+
+def _ids(cursor, sql, params):
+    cursor.execute(sql, params)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def seed(get_connection, config, seed=1, days=30, now=None, dialect='mysql'):
+    """Ghi dữ liệu vào database của ``get_connection``; trả số dòng mỗi bảng."""
+    rng = random.Random(seed)
+    now = (now or datetime.now()).replace(microsecond=0)
+    password_hash = PasswordHasher().hash(PASSWORD)
+    restaurants = [restaurant_name(n) for n in range(1, config['restaurants'] + 1)]
+
+    db = get_connection()
+    cursor = db.cursor()
+    try:
+        users = [(username(n), f"{username(n)}@bench.local", password_hash, 'user')
+                 for n in range(1, config['users'] + 1)]
+        users += [(name, f"restaurant{n + 1:03d}@bench.local", password_hash, 'restaurant')
+                  for n, name in enumerate(restaurants)]
+        _insert(cursor, db, "INSERT INTO user (username, email, password, role) VALUES (%s, %s, %s, %s)", users)
+        user_ids = _ids(cursor, "SELECT id FROM user WHERE username LIKE %s ORDER BY id", (USER_PREFIX + '%',))
+
+        items = []
+        for n in range(config['items']):
+            category = rng.choice(CATEGORIES)
+            items.append((
+                f"{rng.choice(DISHES)} {n + 1}", f"Món benchmark số {n + 1} ({category})",
+                Decimal(rng.randrange(30, 500) * 1000).quantize(CENTS), f"uploads/food{n % 9 + 1}.jpg",
+                restaurants[n % len(restaurants)], Decimal(rng.randrange(30, 51)) / 10, rng.randrange(0, 500),
+                rng.randrange(15, 60), Decimal(rng.randrange(1, 100)) / 10, category, rng.choice(BADGES),
+            ))
+        _insert(cursor, db, """
+            INSERT INTO menu_items (name, description, price, image, restaurant, rating, reviews,
+                                    delivery_time, distance, category, badge)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, items)
+        cursor.execute("SELECT id, price, restaurant FROM menu_items WHERE restaurant LIKE %s ORDER BY id",
+                       (RESTAURANT_PREFIX + '%',))
+        menu = cursor.fetchall()
+        by_restaurant = {}
+        for item in menu:
+            by_restaurant.setdefault(item[2], []).append(item)
+
+        carts = []
+        for user_id in rng.sample(user_ids, int(len(user_ids) * config['carts'])):
+            for item in rng.sample(menu, rng.randint(1, 5)):
+                carts.append((user_id, item[0], rng.randint(1, 3)))
+        _insert(cursor, db, "INSERT INTO cart (user_id, item_id, quantity) VALUES (%s, %s, %s)", carts)
+
+        # Đơn ghi theo lô: mỗi đơn 1-5 món của cùng một nhà hàng, tổng gồm phí ship
+        orders = order_items = 0
+        span = days * 24 * 3600
+        for start in range(0, config['orders'], BATCH):
+            count = min(BATCH, config['orders'] - start)
+            planned = []
+            for _ in range(count):
+                lines = rng.sample(by_restaurant[rng.choice(restaurants)], rng.randint(1, 5))
+                lines = [(item, rng.randint(1, 3)) for item in lines]
+                created = now - timedelta(seconds=rng.randrange(span))
+                total = (sum(item[1] * quantity for item, quantity in lines) + 30000).quantize(CENTS)
+                planned.append(((rng.choice(user_ids), lines[0][0][2], total, rng.choice(STATUSES),
+                                 created, created), lines))
+            # Từng đơn một để lấy đúng id (id của INSERT nhiều dòng không chắc liên tiếp)
+            order_ids = []
+            for order, _ in planned:
+                cursor.execute("INSERT INTO orders (user_id, restaurant, total_amount, status, created_at, "
+                               "updated_at) VALUES (%s, %s, %s, %s, %s, %s)", order)
+                order_ids.append(cursor.lastrowid)
+            rows = [(order_id, item[0], quantity, item[1])
+                    for order_id, (_, lines) in zip(order_ids, planned) for item, quantity in lines]
+            cursor.executemany("INSERT INTO order_items (order_id, item_id, quantity, price) "
+                               "VALUES (%s, %s, %s, %s)", rows)
+            db.commit()
+            orders += count
+            order_items += len(rows)
+        cursor.close()
+    finally:
+        db.close()
+
+    # Rollup dựng lại từ toàn bộ đơn (gồm cả đơn có sẵn, nếu có)
+    analytics.backfill(get_connection, batch_size=10000, dialect=dialect)
+    return {'user': len(users), 'menu_items': len(items), 'cart': len(carts),
+            'orders': orders, 'order_items': order_items}
+
+
+def reset(get_connection):
+    """Xoá dữ liệu benchmark (giỏ/đơn của bench user xoá theo ON DELETE CASCADE)."""
+    db = get_connection()
+    cursor = db.cursor()
+    try:
+        cursor.execute("DELETE FROM user WHERE username LIKE %s OR username LIKE %s",
+                       (USER_PREFIX + '%', RESTAURANT_PREFIX + '%'))
+        cursor.execute("DELETE FROM orders WHERE restaurant LIKE %s", (RESTAURANT_PREFIX + '%',))
+        cursor.execute("DELETE FROM menu_items WHERE restaurant LIKE %s", (RESTAURANT_PREFIX + '%',))
+        db.commit()
+        cursor.close()
+    finally:
+        db.close()
+    analytics.backfill(get_connection, batch_size=10000)
+
+
+def sqlite_database(path):
+    """Tạo file SQLite mới (xoá file cũ) theo schema của backend/sqlite_db.py."""
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    sqlite_db.create_schema(path)
+    return lambda: sqlite_db.connect(path)
+
+
+def add_arguments(parser):
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--users', type=int)
+    parser.add_argument('--restaurants', type=int)
+    parser.add_argument('--items', type=int)
+    parser.add_argument('--orders', type=int)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--days', type=int, default=30)
+
+
+def config_from_args(args):
+    return scale_config(args.scale, users=args.users, restaurants=args.restaurants,
+                        items=args.items, orders=args.orders)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--sqlite', metavar='PATH')
+    target.add_argument('--mysql', action='store_true')
+    parser.add_argument('--reset', action='store_true', help='MySQL: xoá dữ liệu benchmark cũ trước')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.sqlite:
+        get_connection = sqlite_database(args.sqlite)
+        dialect = 'sqlite'
+    else:
+        dialect = 'mysql'
+        import main as backend
+        get_connection = backend._connect_mysql
+        if args.reset:
+            reset(get_connection)
+
+    start = time.perf_counter()
+    counts = seed(get_connection, config_from_args(args), seed=args.seed, days=args.days, dialect=dialect)
+    print(', '.join(f"{table}={count}" for table, count in counts.items()),
+          f"({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Stress test thêm vào giỏ hàng: nhiều thread cùng thêm một (user, món).
+
+So sánh cách cũ (SELECT rồi UPDATE/INSERT) với upsert một câu lệnh, đếm số
+dòng trùng và thông lượng. Cần MySQL thật (cấu hình như backend/main.py);
+script tự tạo và xoá hai bảng tạm cart_stress_*.
+
+Chạy: python benchmarks/stress_cart.py [--threads 32] [--ops 200]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from main import get_db_connection
+
+TABLE_DDL = """
+    CREATE TABLE {name} (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL,
+        item_id INT NOT NULL,
+        quantity INT DEFAULT 1
+        {unique}
+    )
+"""
+
+
+def legacy_add(cursor, table, user_id, item_id):
+    cursor.execute(f"SELECT * FROM {table} WHERE user_id=%s AND item_id=%s", (user_id, item_id))
+    if cursor.fetchone():
+        cursor.execute(f"UPDATE {table} SET quantity = quantity + %s WHERE user_id=%s AND item_id=%s",
+                       (1, user_id, item_id))
+    else:
+        cursor.execute(f"INSERT INTO {table} (user_id, item_id, quantity) VALUES (%s, %s, %s)",
+                       (user_id, item_id, 1))
+
+
+def upsert_add(cursor, table, user_id, item_id):
+    cursor.execute(f"""
+        INSERT INTO {table} (user_id, item_id, quantity) VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE quantity = quantity + VALUES(quantity)
+    """, (user_id, item_id, 1))
+
+
+def run(table, add, threads, ops):
+    errors = []
+
+    def worker():
+        for _ in range(ops):
+            db = get_db_connection()
+            cursor = db.cursor()
+            try:
+                add(cursor, table, 1, 1)
+                db.commit()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                cursor.close()
+                db.close()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    db = get_db_connection()
+    cursor = db.cursor()
+    cursor.execute(f"SELECT COUNT(*), COALESCE(SUM(quantity), 0) FROM {table}")
+    rows, quantity = cursor.fetchone()
+    cursor.close()
+    db.close()
+    return {
+        'ops_per_sec': threads * ops / elapsed,
+        'rows': rows,
+        'duplicates': max(0, rows - 1),
+        'quantity': int(quantity),
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--ops', type=int, default=200)
+    args = parser.parse_args()
+
+    modes = [
+        ('cart_stress_legacy', '', legacy_add),
+        ('cart_stress_upsert', ', UNIQUE KEY uq_user_item (user_id, item_id)', upsert_add),
+    ]
+    db = get_db_connection()
+    cursor = db.cursor()
+    for table, unique, _ in modes:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        cursor.execute(TABLE_DDL.format(name=table, unique=unique))
+    db.commit()
+
+    try:
+        for table, _, add in modes:
+            result = run(table, add, args.threads, args.ops)
+            print(f"{table}: {result['ops_per_sec']:.0f} ops/s, rows={result['rows']}, "
+                  f"duplicates={result['duplicates']}, quantity={result['quantity']}"
+                  f"/{args.threads * args.ops}, errors={result['errors']}")
+    finally:
+        for table, _, _ in modes:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        db.commit()
+        cursor.close()
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -35,6 +35,7 @@ CREATE TABLE cart (
     item_id INT NOT NULL,
     quantity INT DEFAULT 1,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_cart_user_item (user_id, item_id),
     FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE,
     FOREIGN KEY (item_id) REFERENCES menu_items(id) ON DELETE CASCADE
 );
@@ -43,9 +44,15 @@ CREATE TABLE cart (
 CREATE TABLE orders (
     id INT AUTO_INCREMENT PRIMARY KEY,
     user_id INT NOT NULL,
+    restaurant VARCHAR(100),
     total_amount DECIMAL(10,2) NOT NULL,
     status VARCHAR(20) DEFAULT 'pending',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    INDEX idx_orders_user_created (user_id, created_at, id),
+    INDEX idx_orders_restaurant_created (restaurant, created_at, id),
+    INDEX idx_orders_user_updated (user_id, updated_at, id),
+    INDEX idx_orders_restaurant_updated (restaurant, updated_at, id),
     FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE
 );
 
@@ -60,6 +67,39 @@ CREATE TABLE order_items (
     FOREIGN KEY (item_id) REFERENCES menu_items(id) ON DELETE CASCADE
 );
 
+-- Idempotency keys (khi chạy IDEMPOTENCY_STORE=table)
+CREATE TABLE idempotency_keys (
+    idem_key VARCHAR(255) PRIMARY KEY,
+    fingerprint CHAR(64) NOT NULL,
+    status VARCHAR(10) NOT NULL,
+    status_code INT,
+    body MEDIUMBLOB,
+    mimetype VARCHAR(100),
+    locked_until DATETIME(6),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Rollup doanh thu theo nhà hàng/giờ/trạng thái, cập nhật khi tạo đơn và
+-- đổi trạng thái; dựng lại từ đơn cũ: python -m backend backfill-analytics
+CREATE TABLE sales_hourly (
+    restaurant VARCHAR(100) NOT NULL,
+    bucket DATETIME NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    orders INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (restaurant, bucket, status)
+);
+
+CREATE TABLE item_sales_hourly (
+    restaurant VARCHAR(100) NOT NULL,
+    bucket DATETIME NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    item_id INT NOT NULL,
+    quantity INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (restaurant, bucket, status, item_id)
+);
+
 -- Insert sample menu items
 INSERT INTO menu_items (name, description, price, image, restaurant, rating, reviews, delivery_time, distance, category, badge) VALUES
 ('Pizza Margherita Đặc Biệt', 'Pizza cổ điển với sốt cà chua tươi, phô mai mozzarella cao cấp và lá húng quế thơm.', 299000, 'uploads/food1.jpg', 'Bella Vista Italian', 4.8, 156, 25, 1.2, 'pizza', 'popular'),
@@ -70,4 +110,18 @@ INSERT INTO menu_items (name, description, price, image, restaurant, rating, rev
 ('Bánh Mì Thịt Nướng', 'Bánh mì giòn với thịt nướng thơm lừng, pate, mayonnaise và rau sống tươi mát.', 35000, 'uploads/food6.jpg', 'Bánh Mì Sài Gòn', 4.5, 267, 10, 0.3, 'vietnamese', 'popular'),
 ('Pasta Carbonara Ý', 'Mì Ý carbonara với bacon giòn, phô mai Parmesan và lòng đỏ trứng gà trang trại.', 199000, 'uploads/food7.jpg', 'Roma Restaurant', 4.6, 134, 22, 1.5, 'pasta', ''),
 ('Tôm Tempura Nhật', 'Tôm tempura giòn với bột chiên đặc biệt, kèm sốt tentsuyu truyền thống.', 289000, 'uploads/food8.jpg', 'Sakura Japanese', 4.8, 95, 25, 2.3, 'japanese', 'new'),
-('Bún Bò Huế Cay', 'Bún bò Huế cay nồng với nước dùng đậm đà, thịt bò và chả cá Huế.', 65000, 'uploads/food9.jpg', 'Cô Ba Huế', 4.7, 289, 20, 1.1, 'vietnamese', 'popular');
\ No newline at end of file
+('Bún Bò Huế Cay', 'Bún bò Huế cay nồng với nước dùng đậm đà, thịt bò và chả cá Huế.', 65000, 'uploads/food9.jpg', 'Cô Ba Huế', 4.7, 289, 20, 1.1, 'vietnamese', 'popular');
+
+-- Nâng cấp database cũ: gộp các dòng giỏ hàng trùng rồi thêm unique key
+-- UPDATE cart c JOIN (SELECT user_id, item_id, MIN(id) AS keep_id, SUM(quantity) AS total
+--     FROM cart GROUP BY user_id, item_id HAVING COUNT(*) > 1) d
+--     ON c.id = d.keep_id SET c.quantity = d.total;
+-- DELETE c FROM cart c JOIN cart k
+--     ON c.user_id = k.user_id AND c.item_id = k.item_id AND c.id > k.id;
+-- ALTER TABLE cart ADD UNIQUE KEY uq_cart_user_item (user_id, item_id);
+-- ALTER TABLE orders ADD COLUMN restaurant VARCHAR(100) AFTER user_id,
+--     ADD COLUMN updated_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+--     ADD INDEX idx_orders_user_created (user_id, created_at, id),
+--     ADD INDEX idx_orders_restaurant_created (restaurant, created_at, id),
+--     ADD INDEX idx_orders_user_updated (user_id, updated_at, id),
+--     ADD INDEX idx_orders_restaurant_updated (restaurant, updated_at, id);
@@ -0,0 +1,160 @@
+import unittest
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+import sys
+
+sys.path.append('../backend')
+import analytics
+from analytics import AnalyticsQuery
+from main import app, menu_cache
+from menu_search import InvalidQuery
+
+NOW = datetime(2025, 3, 10, 14, 25)
+
+
+class AnalyticsQueryTestCase(unittest.TestCase):
+    def test_defaults(self):
+        query = AnalyticsQuery.from_args({}, now=NOW)
+        self.assertEqual((query.granularity, query.top), ('day', 5))
+        self.assertEqual(query.end, datetime(2025, 3, 10, 15))
+        self.assertEqual(query.start, datetime(2025, 2, 8))
+
+        query = AnalyticsQuery.from_args({'granularity': 'hour'}, now=NOW)
+        self.assertEqual(query.start, datetime(2025, 3, 8, 15))
+
+    def test_invalid(self):
+        for args in ({'granularity': 'week'}, {'top': 'x'}, {'top': '0'}, {'from': 'hôm qua'},
+                     {'from': '2025-03-10', 'to': '2025-03-01'}, {'from': '2020-01-01', 'to': '2025-01-01'}):
+            with self.assertRaises(InvalidQuery, msg=args):
+                AnalyticsQuery.from_args(args, now=NOW)
+
+    def test_offset_timestamps_converted_to_local(self):
+        # Mốc có múi giờ so được với NOW (giờ địa phương, không múi giờ)
+        query = AnalyticsQuery.from_args({'from': '2025-03-01T00:00:00+07:00', 'to': '2025-03-03T00:00:00Z'},
+                                         now=NOW)
+        start = datetime(2025, 3, 1, tzinfo=timezone(timedelta(hours=7))).astimezone()
+        end = datetime(2025, 3, 3, tzinfo=timezone.utc).astimezone()
+        self.assertEqual(query.start, start.replace(tzinfo=None, minute=0))
+        self.assertEqual(query.end, end.replace(tzinfo=None, minute=0))
+        self.assertIsNone(AnalyticsQuery.from_args({'from': '2025-03-01T00:00:00Z'}, now=NOW).start.tzinfo)
+
+    def test_report_rolls_hours_into_days(self):
+        query = AnalyticsQuery.from_args({'from': '2025-03-01', 'to': '2025-03-03', 'top': '2'}, now=NOW)
+        sales = [
+            {'bucket': datetime(2025, 3, 1, 11), 'status': 'confirmed', 'orders': 2, 'revenue': Decimal('400000')},
+            {'bucket': datetime(2025, 3, 1, 19), 'status': 'pending', 'orders': 1, 'revenue': Decimal('200000')},
+            {'bucket': datetime(2025, 3, 1, 19), 'status': 'cancelled', 'orders': 1, 'revenue': Decimal('90000')},
+            {'bucket': datetime(2025, 3, 2, 12), 'status': 'confirmed', 'orders': 1, 'revenue': Decimal('130000')},
+            # Đơn đã chuyển hết sang trạng thái khác: dòng còn 0
+            {'bucket': datetime(2025, 3, 2, 20), 'status': 'pending', 'orders': 0, 'revenue': Decimal('0')},
+        ]
+        items = [
+            {'bucket': datetime(2025, 3, 1, 11), 'item_id': 1, 'quantity': 3, 'revenue': Decimal('300000')},
+            {'bucket': datetime(2025, 3, 1, 19), 'item_id': 2, 'quantity': 4, 'revenue': Decimal('140000')},
+            {'bucket': datetime(2025, 3, 1, 19), 'item_id': 1, 'quantity': 1, 'revenue': Decimal('100000')},
+            {'bucket': datetime(2025, 3, 2, 12), 'item_id': 3, 'quantity': 1, 'revenue': Decimal('100000')},
+        ]
+        report = query.report('A', sales, items, {1: 'Pizza', 2: 'Bánh Mì'})
+
+        self.assertEqual([b['bucket'] for b in report['buckets']], ['2025-03-01', '2025-03-02'])
+        day = report['buckets'][0]
+        self.assertEqual((day['orders'], day['revenue'], day['cancelled']), (3, 600000, 1))
+        self.assertEqual(day['average_ticket'], Decimal('200000'))
+        self.assertEqual([(i['name'], i['quantity']) for i in day['top_items']], [('Pizza', 4), ('Bánh Mì', 4)])
+        # Món không còn trong menu: tên None
+        self.assertEqual(report['buckets'][1]['top_items'][0], {'item_id': 3, 'name': None, 'quantity': 1,
+                                                                'revenue': Decimal('100000')})
+        totals = report['totals']
+        self.assertEqual((totals['orders'], totals['revenue'], totals['cancelled']), (4, 730000, 1))
+        self.assertEqual(totals['average_ticket'], Decimal('182500'))
+
+    def test_backfill_in_id_batches(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+        cursor.fetchone.return_value = (1, 2500)
+        self.assertEqual(analytics.backfill(lambda: conn, batch_size=1000), 3)
+        ranges = [c[0][1] for c in cursor.execute.call_args_list if c[0][0] == analytics.ORDER_ROLLUP_SQL]
+        self.assertEqual(ranges, [(1, 1000), (1001, 2000), (2001, 2500)])
+        # Xoá rollup cũ + mỗi lô một commit
+        self.assertEqual(conn.commit.call_count, 4)
+
+        cursor.fetchone.return_value = (None, None)
+        self.assertEqual(analytics.backfill(lambda: conn), 0)
+
+    def test_status_statements(self):
+        self.assertEqual(analytics.status_statements(7, 'confirmed', 'confirmed'), [])
+        statements = analytics.status_statements(7, None, 'cancelled')
+        self.assertEqual([params for _, params in statements], [('pending', 'cancelled', 7)] * 2)
+
+
+class RollupMaintenanceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.testing = True
+        menu_cache.invalidate()
+        self.cursor = MagicMock()
+        conn = MagicMock()
+        conn.cursor.return_value = self.cursor
+        for target in (patch('main.get_db_connection', return_value=conn),
+                       patch('main._load_menu_items', return_value=[
+                           {'id': 1, 'name': 'Pizza', 'price': 100000, 'restaurant': 'A'},
+                           {'id': 2, 'name': 'Phở', 'price': 50000, 'restaurant': 'B'}])):
+            target.start()
+            self.addCleanup(target.stop)
+
+    def executed(self):
+        return [c[0] for c in self.cursor.execute.call_args_list]
+
+    def test_create_order_adds_new_orders_in_same_transaction(self):
+        self.cursor.fetchall.side_effect = [
+            [{'id': 1, 'item_id': 1, 'quantity': 2}, {'id': 2, 'item_id': 2, 'quantity': 1}],
+            [{'id': 1, 'name': 'Pizza', 'price': 100000, 'restaurant': 'A'},
+             {'id': 2, 'name': 'Phở', 'price': 50000, 'restaurant': 'B'}]]
+        ids = iter([40, 42])
+
+        def execute(sql, params=None):
+            if sql.startswith('INSERT INTO orders'):
+                self.cursor.lastrowid = next(ids)
+        self.cursor.execute.side_effect = execute
+        self.app.post('/api/order', data=json.dumps({'user_id': 1}), content_type='application/json')
+        statements = self.executed()
+        # Đúng id của từng đơn, không suy ra từ khoảng id
+        for statement in analytics.order_statements([40, 42]):
+            self.assertIn(statement, statements)
+        # Trước khi xoá giỏ và commit
+        self.assertEqual(statements[-1], ('DELETE FROM cart WHERE user_id = %s AND id IN (%s, %s)', (1, 1, 2)))
+
+    def test_status_change_moves_order(self):
+        self.cursor.fetchone.return_value = {'user_id': 3, 'restaurant': 'A', 'status': 'pending'}
+        self.app.put('/api/orders/9/status', data=json.dumps({'status': 'cancelled'}),
+                     content_type='application/json')
+        self.assertIn((analytics.ORDER_MOVE_SQL, ('pending', 'cancelled', 9)), self.executed())
+
+        self.cursor.reset_mock()
+        self.cursor.fetchone.return_value = {'user_id': 3, 'restaurant': 'A', 'status': 'cancelled'}
+        self.app.put('/api/orders/9/status', data=json.dumps({'status': 'cancelled'}),
+                     content_type='application/json')
+        self.assertEqual(len(self.executed()), 2)  # SELECT ... FOR UPDATE, UPDATE
+
+    def test_report_endpoint_reads_rollups_only(self):
+        self.cursor.fetchall.side_effect = [
+            [{'bucket': datetime(2025, 3, 1, 11), 'status': 'confirmed', 'orders': 2, 'revenue': 260000}],
+            [{'bucket': datetime(2025, 3, 1, 11), 'item_id': 1, 'quantity': 2, 'revenue': 200000}],
+        ]
+        response = self.app.get('/api/analytics/restaurant/A?granularity=hour&from=2025-03-01&to=2025-03-02')
+        result = json.loads(response.data)
+        self.assertTrue(result['success'])
+        self.assertEqual(result['buckets'][0]['bucket'], '2025-03-01T11:00:00')
+        self.assertEqual(result['totals']['average_ticket'], 130000)
+        self.assertEqual(result['totals']['top_items'][0]['name'], 'Pizza')
+        tables = [sql for sql, _ in self.executed()]
+        self.assertEqual(tables, [analytics.SALES_SQL, analytics.ITEM_SALES_SQL])
+
+        response = self.app.get('/api/analytics/restaurant/A?granularity=week')
+        self.assertFalse(json.loads(response.data)['success'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,17 +2,23 @@ import unittest
 import json
 import tempfile
 import os
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
 from unittest.mock import patch, MagicMock
 import sys
 
 sys.path.append('../backend')
-from main import app
+from main import app, menu_cache
+from order_pages import OrderPage, decode_token, encode_token
+from passwords import PasswordHasher, PasswordTooLong
+from rate_limit import LoginLimiter, TokenBucket
 
 
 class FoodDeliveryTestCase(unittest.TestCase):
     def setUp(self):
         self.app = app.test_client()
         self.app.testing = True
+        menu_cache.invalidate()
 
     @patch('main.get_db_connection')
     def test_register_success(self, mock_db):
@@ -53,6 +59,35 @@ class FoodDeliveryTestCase(unittest.TestCase):
         self.assertFalse(result['success'])
         self.assertIn('không khớp', result['message'])
 
+    @patch('main.get_db_connection')
+    def test_register_requires_fields(self, mock_db):
+        for missing in ('username', 'email', 'password'):
+            data = {'username': 'u', 'email': 'u@test.com', 'password': 'secret', 'confirm_password': 'secret'}
+            del data[missing]
+            response = self.app.post('/api/register', data=json.dumps(data), content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+            self.assertFalse(json.loads(response.data)['success'])
+        mock_db.assert_not_called()
+
+    @patch('main.get_db_connection')
+    def test_login_rejects_non_string_fields(self, mock_db):
+        for data in ({'username': 123, 'password': 'x'}, {'username': 'u', 'password': ['x']},
+                     {'password': 'x'}):
+            response = self.app.post('/api/login', data=json.dumps(data), content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+            self.assertFalse(json.loads(response.data)['success'])
+        mock_db.assert_not_called()
+
+    @patch('main.get_db_connection')
+    def test_register_password_too_long(self, mock_db):
+        hasher = MagicMock()
+        hasher.hash.side_effect = PasswordTooLong()
+        data = {'username': 'u', 'email': 'u@test.com', 'password': 'x' * 100, 'confirm_password': 'x' * 100}
+        with patch('main.password_hasher', hasher):
+            response = self.app.post('/api/register', data=json.dumps(data), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        mock_db.assert_not_called()
+
     @patch('main.get_db_connection')
     def test_login_success(self, mock_db):
         mock_conn = MagicMock()
@@ -94,6 +129,61 @@ class FoodDeliveryTestCase(unittest.TestCase):
         result = json.loads(response.data)
         self.assertFalse(result['success'])
 
+    @patch('main.get_db_connection')
+    def test_register_stores_hash(self, mock_db):
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_db.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+
+        data = {'username': 'u', 'email': 'u@test.com', 'password': 'secret', 'confirm_password': 'secret'}
+        with patch('main.password_hasher', PasswordHasher(scheme='pbkdf2:sha256:1000', workers=1)):
+            self.app.post('/api/register', data=json.dumps(data), content_type='application/json')
+
+        stored = mock_cursor.execute.call_args[0][1][2]
+        self.assertNotEqual(stored, 'secret')
+        self.assertTrue(stored.startswith('pbkdf2:sha256:1000$'))
+
+    @patch('main.get_db_connection')
+    def test_login_rehashes_plaintext(self, mock_db):
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_db.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+        mock_cursor.fetchone.return_value = {
+            'id': 7, 'username': 'legacy', 'email': 'l@test.com', 'password': 'password123', 'role': 'user'
+        }
+
+        data = {'username': 'legacy', 'password': 'password123'}
+        with patch('main.password_hasher', PasswordHasher(scheme='pbkdf2:sha256:1000', workers=1)):
+            response = self.app.post('/api/login', data=json.dumps(data), content_type='application/json')
+
+        self.assertTrue(json.loads(response.data)['success'])
+        sql, params = mock_cursor.execute.call_args[0]
+        self.assertIn('UPDATE user SET password', sql)
+        self.assertTrue(params[0].startswith('pbkdf2:sha256:1000$'))
+        self.assertEqual(params[1], 7)
+        mock_conn.commit.assert_called_once()
+
+    @patch('main.get_db_connection')
+    def test_login_rate_limited(self, mock_db):
+        limiter = LoginLimiter(per_ip=TokenBucket(rate=0.01, burst=100),
+                               per_user=TokenBucket(rate=0.01, burst=2))
+        data = json.dumps({'username': 'victim', 'password': 'guess'})
+        mock_db.return_value.cursor.return_value.fetchone.return_value = None
+        with patch('main.login_limiter', limiter), \
+                patch('main.password_hasher', PasswordHasher(scheme='pbkdf2:sha256:1000', workers=1)):
+            for _ in range(2):
+                self.app.post('/api/login', data=data, content_type='application/json')
+            mock_db.reset_mock()
+            response = self.app.post('/api/login', data=data, content_type='application/json')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response.headers)
+        self.assertFalse(json.loads(response.data)['success'])
+        # Bị chặn trước khi đụng tới database
+        mock_db.assert_not_called()
+
     @patch('main.get_db_connection')
     def test_get_menu(self, mock_db):
         mock_conn = MagicMock()
@@ -118,6 +208,101 @@ class FoodDeliveryTestCase(unittest.TestCase):
         self.assertEqual(len(result['items']), 1)
         self.assertEqual(result['items'][0]['name'], 'Pizza')
 
+    @patch('main.get_db_connection')
+    def test_get_menu_etag_not_modified(self, mock_db):
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_db.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+
+        mock_cursor.fetchall.return_value = [
+            {'id': 1, 'name': 'Pizza', 'price': 150000, 'image': 'pizza.jpg'}
+        ]
+
+        first = self.app.get('/api/menu')
+        etag = first.headers['ETag']
+        second = self.app.get('/api/menu', headers={'If-None-Match': etag})
+
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.data, b'')
+        # Lần thứ hai lấy từ cache, không truy vấn lại database
+        self.assertEqual(mock_cursor.execute.call_count, 1)
+        self.assertEqual(json.loads(first.data)['items'][0]['image'], 'uploads/pizza.jpg')
+
+    @patch('main.get_db_connection')
+    def test_get_menu_gzip(self, mock_db):
+        import gzip
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_db.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+
+        mock_cursor.fetchall.return_value = [{'id': 1, 'name': 'Pizza', 'price': 150000}]
+
+        response = self.app.get('/api/menu', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        result = json.loads(gzip.decompress(response.data))
+        self.assertEqual(result['items'][0]['name'], 'Pizza')
+
+    @patch('main.get_db_connection')
+    def test_get_menu_search_and_paginate(self, mock_db):
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_db.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+
+        mock_cursor.fetchall.return_value = [
+            {'id': 1, 'name': 'Phở Bò', 'restaurant': 'Phở Hà Nội', 'price': 89000, 'reviews': 10},
+            {'id': 2, 'name': 'Phở Gà', 'restaurant': 'Phở Hà Nội', 'price': 79000, 'reviews': 30},
+            {'id': 3, 'name': 'Pizza', 'restaurant': 'Bella', 'price': 150000, 'reviews': 20}
+        ]
+
+        response = self.app.get('/api/menu?q=pho&sort=popular&limit=1')
+        result = json.loads(response.data)
+        self.assertTrue(result['success'])
+        self.assertEqual([i['id'] for i in result['items']], [2])
+
+        response = self.app.get(f"/api/menu?q=pho&sort=popular&limit=1&cursor={result['next_cursor']}")
+        result = json.loads(response.data)
+        self.assertEqual([i['id'] for i in result['items']], [1])
+        self.assertIsNone(result['next_cursor'])
+
+        response = self.app.get('/api/menu?sort=unknown')
+        self.assertFalse(json.loads(response.data)['success'])
+
+    @patch('main.get_db_connection')
+    def test_menu_cache_invalidated_by_new_item(self, mock_db):
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_db.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+
+        mock_cursor.fetchall.return_value = [{'id': 1, 'name': 'Pizza', 'price': 150000}]
+        etag = self.app.get('/api/menu').headers['ETag']
+
+        version = menu_cache.version
+        with tempfile.TemporaryDirectory() as uploads, \
+                patch('main.UPLOADS_DIR', uploads), \
+                tempfile.NamedTemporaryFile(suffix='.jpg') as tmp:
+            tmp.write(b'\xff\xd8\xff\xe0fake image data')
+            tmp.flush()
+            with open(tmp.name, 'rb') as test_file:
+                self.app.post('/api/menu',
+                              data={'name': 'Burger', 'price': '1', 'image': (test_file, 'burger.jpg')},
+                              content_type='multipart/form-data')
+        self.assertGreater(menu_cache.version, version)
+
+        mock_cursor.fetchall.return_value = [
+            {'id': 1, 'name': 'Pizza', 'price': 150000},
+            {'id': 2, 'name': 'Burger', 'price': 1}
+        ]
+        response = self.app.get('/api/menu', headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.data)['items']), 2)
+
     @patch('main.get_db_connection')
     def test_add_to_cart(self, mock_db):
         mock_conn = MagicMock()
@@ -136,19 +321,70 @@ class FoodDeliveryTestCase(unittest.TestCase):
         self.assertTrue(result['success'])
 
     @patch('main.get_db_connection')
-    def test_get_cart(self, mock_db):
+    def test_add_to_cart_single_upsert(self, mock_db):
         mock_conn = MagicMock()
         mock_cursor = MagicMock()
         mock_db.return_value = mock_conn
         mock_conn.cursor.return_value = mock_cursor
 
+        data = {'user_id': 1, 'item_id': 1, 'quantity': 2}
+        self.app.post('/api/cart',
+                      data=json.dumps(data),
+                      content_type='application/json')
+
+        self.assertEqual(mock_cursor.execute.call_count, 1)
+        sql, params = mock_cursor.execute.call_args[0]
+        self.assertIn('ON DUPLICATE KEY UPDATE', sql)
+        self.assertEqual(params, (1, 1, 2))
+
+    @patch('main.get_db_connection')
+    def test_add_to_cart_batch(self, mock_db):
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_db.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+
+        data = {'user_id': 1, 'items': [
+            {'item_id': 5, 'quantity': 1},
+            {'item_id': 2, 'quantity': 3},
+            {'item_id': 5, 'quantity': 2}
+        ]}
+        response = self.app.post('/api/cart/batch',
+                                 data=json.dumps(data),
+                                 content_type='application/json')
+
+        result = json.loads(response.data)
+        self.assertTrue(result['success'])
+        mock_cursor.executemany.assert_called_once()
+        rows = mock_cursor.executemany.call_args[0][1]
+        self.assertEqual(rows, [(1, 2, 3), (1, 5, 3)])
+        mock_conn.commit.assert_called_once()
+
+    @patch('main.get_db_connection')
+    def test_add_to_cart_batch_invalid(self, mock_db):
+        for items in ([], [{'item_id': 1, 'quantity': 0}], [{'item_id': 'x'}]):
+            response = self.app.post('/api/cart/batch',
+                                     data=json.dumps({'user_id': 1, 'items': items}),
+                                     content_type='application/json')
+            self.assertFalse(json.loads(response.data)['success'])
+        mock_db.assert_not_called()
+
+    @patch('main.get_db_connection')
+    @patch('main._load_menu_items')
+    def test_get_cart(self, mock_menu, mock_db):
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_db.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+
+        mock_menu.return_value = [
+            {'id': 7, 'name': 'Pizza', 'price': 150000, 'image': 'uploads/pizza.jpg', 'restaurant': 'Pizza House'}
+        ]
         mock_cursor.fetchall.return_value = [
             {
                 'id': 1,
-                'quantity': 2,
-                'name': 'Pizza',
-                'price': 150000,
-                'image': 'pizza.jpg'
+                'item_id': 7,
+                'quantity': 2
             }
         ]
 
@@ -157,6 +393,11 @@ class FoodDeliveryTestCase(unittest.TestCase):
 
         self.assertTrue(result['success'])
         self.assertEqual(len(result['items']), 1)
+        self.assertEqual(result['items'][0]['name'], 'Pizza')
+        self.assertEqual(result['total'], 330000)
+        # Chỉ đọc các dòng cart, không JOIN menu_items
+        sql = mock_cursor.execute.call_args[0][0]
+        self.assertNotIn('JOIN', sql)
 
     @patch('main.get_db_connection')
     def test_update_cart(self, mock_db):
@@ -192,13 +433,10 @@ class FoodDeliveryTestCase(unittest.TestCase):
         mock_db.return_value = mock_conn
         mock_conn.cursor.return_value = mock_cursor
 
-        mock_cursor.fetchall.return_value = [
-            {
-                'item_id': 1,
-                'quantity': 2,
-                'price': 150000,
-                'restaurant': 'Pizza House'
-            }
+        # Dòng giỏ (FOR UPDATE), rồi giá/nhà hàng từ menu_items
+        mock_cursor.fetchall.side_effect = [
+            [{'id': 1, 'item_id': 1, 'quantity': 2}],
+            [{'id': 1, 'name': 'Pizza', 'price': 150000, 'restaurant': 'Pizza House'}],
         ]
         mock_cursor.lastrowid = 1
 
@@ -210,6 +448,51 @@ class FoodDeliveryTestCase(unittest.TestCase):
         result = json.loads(response.data)
         self.assertTrue(result['success'])
 
+    @patch('main.get_db_connection')
+    def test_create_order_multi_restaurant_batched(self, mock_db):
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_db.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+
+        mock_cursor.fetchall.side_effect = [[
+            {'id': 21, 'item_id': 1, 'quantity': 2},
+            {'id': 22, 'item_id': 2, 'quantity': 1},
+            {'id': 23, 'item_id': 3, 'quantity': 1},
+            {'id': 24, 'item_id': 4, 'quantity': 1}  # món đã bị xoá khỏi menu
+        ], [
+            {'id': 1, 'name': 'X', 'price': 100000, 'restaurant': 'A'},
+            {'id': 2, 'name': 'Y', 'price': 50000, 'restaurant': 'B'},
+            {'id': 3, 'name': 'Z', 'price': 20000, 'restaurant': 'A'}
+        ]]
+        # id không liên tiếp (vd. auto_increment_increment = 2)
+        ids = iter([10, 12])
+
+        def execute(sql, params=None):
+            if sql.startswith('INSERT INTO orders'):
+                mock_cursor.lastrowid = next(ids)
+        mock_cursor.execute.side_effect = execute
+
+        response = self.app.post('/api/order',
+                                 data=json.dumps({'user_id': 1}),
+                                 content_type='application/json')
+
+        result = json.loads(response.data)
+        self.assertEqual(result['orders'], [10, 12])
+        # SELECT giỏ, SELECT giá các món, mỗi nhà hàng một INSERT orders, 2 câu
+        # rollup doanh thu, DELETE các dòng đã đặt: số câu lệnh không phụ thuộc số món
+        calls = [c[0] for c in mock_cursor.execute.call_args_list]
+        self.assertEqual(len(calls), 7)
+        self.assertEqual(calls[1], ('SELECT id, name, price, restaurant FROM menu_items WHERE id IN (%s, %s, %s, %s)',
+                                    (1, 2, 3, 4)))
+        self.assertTrue(all(sql.startswith('INSERT INTO orders') for sql, _ in calls[2:4]))
+        self.assertEqual([params for _, params in calls[2:4]], [(1, 'A', 250000), (1, 'B', 80000)])
+        self.assertEqual(calls[4][1], (10, 12))
+        self.assertEqual(calls[6], ('DELETE FROM cart WHERE user_id = %s AND id IN (%s, %s, %s)', (1, 21, 22, 23)))
+        rows = mock_cursor.executemany.call_args[0][1]
+        self.assertEqual(rows, [(10, 1, 2, 100000), (10, 3, 1, 20000), (12, 2, 1, 50000)])
+        mock_conn.commit.assert_called_once()
+
     @patch('main.get_db_connection')
     def test_create_order_empty_cart(self, mock_db):
         mock_conn = MagicMock()
@@ -235,14 +518,9 @@ class FoodDeliveryTestCase(unittest.TestCase):
         mock_db.return_value = mock_conn
         mock_conn.cursor.return_value = mock_cursor
 
+        # Cursor tuple: (id, restaurant, total_amount, status, created_at, updated_at)
         mock_cursor.fetchall.return_value = [
-            {
-                'id': 1,
-                'restaurant': 'Pizza House',
-                'total_amount': 180000,
-                'status': 'pending',
-                'created_at': '2025-01-01'
-            }
+            (1, 'Pizza House', Decimal('180000.00'), 'pending', datetime(2025, 1, 1), datetime(2025, 1, 1))
         ]
 
         response = self.app.get('/api/orders/user/1')
@@ -250,6 +528,81 @@ class FoodDeliveryTestCase(unittest.TestCase):
 
         self.assertTrue(result['success'])
         self.assertEqual(len(result['orders']), 1)
+        # Giữ định dạng của jsonify: DECIMAL -> chuỗi, datetime -> HTTP date
+        self.assertEqual(result['orders'][0]['total_amount'], '180000.00')
+        self.assertEqual(result['orders'][0]['created_at'], 'Wed, 01 Jan 2025 00:00:00 GMT')
+        # Cursor tuple trên prepared statement (dialect MySQL)
+        mock_conn.cursor.assert_called_with(prepared=True)
+
+    @patch('main.get_db_connection')
+    def test_get_user_orders_keyset_pages(self, mock_db):
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_db.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+
+        mock_cursor.fetchall.return_value = [
+            (9, 'A', Decimal('1'), 'pending', datetime(2025, 1, 3), datetime(2025, 1, 3)),
+            (8, 'A', Decimal('1'), 'pending', datetime(2025, 1, 2), datetime(2025, 1, 2)),
+            (7, 'A', Decimal('1'), 'pending', datetime(2025, 1, 1), datetime(2025, 1, 1))
+        ]
+
+        response = self.app.get('/api/orders/user/1?limit=2')
+        result = json.loads(response.data)
+        self.assertEqual([o['id'] for o in result['orders']], [9, 8])
+        sql, params = mock_cursor.execute.call_args[0]
+        self.assertIn('ORDER BY o.created_at DESC, o.id DESC LIMIT %s', sql)
+        self.assertEqual(params, [1, 3])
+
+        self.app.get(f"/api/orders/user/1?limit=2&cursor={result['next_cursor']}")
+        sql, params = mock_cursor.execute.call_args[0]
+        self.assertIn('o.created_at < %s OR (o.created_at = %s AND o.id < %s)', sql)
+        self.assertEqual(params, [1, datetime(2025, 1, 2), datetime(2025, 1, 2), 8, 3])
+
+    @patch('main.get_db_connection')
+    def test_get_restaurant_orders_since(self, mock_db):
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_db.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+
+        mock_cursor.fetchall.return_value = [
+            (4, 3, 'an', Decimal('1'), 'confirmed', datetime(2025, 1, 1), datetime(2025, 1, 5, 10, 0, 0, 500))
+        ]
+
+        response = self.app.get('/api/orders/restaurant/Pizza%20House?since=2025-01-05T00:00:00')
+        result = json.loads(response.data)
+        sql, params = mock_cursor.execute.call_args[0]
+        self.assertIn('ORDER BY o.updated_at ASC, o.id ASC', sql)
+        self.assertEqual(params[:4], ['Pizza House', datetime(2025, 1, 5), datetime(2025, 1, 5), 0])
+        self.assertFalse(result['has_more'])
+
+        self.app.get(f"/api/orders/restaurant/Pizza%20House?since={result['sync_token']}")
+        params = mock_cursor.execute.call_args[0][1]
+        self.assertEqual(params[1:4], [datetime(2025, 1, 5, 10, 0, 0, 500)] * 2 + [4])
+
+    def test_sync_token_held_back_within_overlap(self):
+        now = datetime(2025, 1, 5, 10, 0, 30)
+        since = encode_token(datetime(2025, 1, 5, 10), 3)
+        page = OrderPage(limit=2, since=since, overlap=timedelta(seconds=10), clock=lambda: now)
+        rows = [{'id': 4, 'updated_at': datetime(2025, 1, 5, 10, 0, 5)},
+                {'id': 5, 'updated_at': datetime(2025, 1, 5, 10, 0, 25)}]
+
+        # Đơn đổi trong 10 giây gần nhất chưa chốt: token dừng ở now - overlap
+        result = page.result(rows)
+        self.assertEqual(decode_token(result['sync_token']), (datetime(2025, 1, 5, 10, 0, 20), 0))
+        self.assertEqual(decode_token(page.result([])['sync_token']), (datetime(2025, 1, 5, 10), 3))
+
+        # Cả trang chưa chốt nhưng còn trang sau: vẫn phải tiến
+        page = OrderPage(limit=1, since=since, overlap=timedelta(seconds=60), clock=lambda: now)
+        result = page.result(rows)
+        self.assertTrue(result['has_more'])
+        self.assertEqual(decode_token(result['sync_token']), (datetime(2025, 1, 5, 10, 0, 5), 4))
+
+        # Mốc ISO có múi giờ đổi về giờ địa phương như updated_at
+        moment = datetime(2025, 1, 5, 10, tzinfo=timezone.utc)
+        self.assertEqual(OrderPage(since=moment.isoformat()).since,
+                         (moment.astimezone().replace(tzinfo=None), 0))
 
     @patch('main.get_db_connection')
     def test_get_restaurant_orders(self, mock_db):
@@ -258,14 +611,9 @@ class FoodDeliveryTestCase(unittest.TestCase):
         mock_db.return_value = mock_conn
         mock_conn.cursor.return_value = mock_cursor
 
+        # (id, user_id, username, total_amount, status, created_at, updated_at)
         mock_cursor.fetchall.return_value = [
-            {
-                'id': 1,
-                'username': 'customer1',
-                'total_amount': 180000,
-                'status': 'pending',
-                'created_at': '2025-01-01'
-            }
+            (1, 3, 'customer1', Decimal('180000.00'), 'pending', datetime(2025, 1, 1), datetime(2025, 1, 1))
         ]
 
         response = self.app.get('/api/orders/restaurant/Pizza%20House')
@@ -299,7 +647,7 @@ class FoodDeliveryTestCase(unittest.TestCase):
         mock_secure.return_value = 'test.jpg'
 
         with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp:
-            tmp.write(b'fake image data')
+            tmp.write(b'\xff\xd8\xff\xe0fake image data')
             tmp.flush()
 
             with open(tmp.name, 'rb') as test_file:
@@ -313,9 +661,10 @@ class FoodDeliveryTestCase(unittest.TestCase):
                     'restaurant': 'Test Restaurant'
                 }
 
-                response = self.app.post('/api/menu',
-                                         data=dict(data, image=test_file),
-                                         content_type='multipart/form-data')
+                with tempfile.TemporaryDirectory() as uploads, patch('main.UPLOADS_DIR', uploads):
+                    response = self.app.post('/api/menu',
+                                             data=dict(data, image=test_file),
+                                             content_type='multipart/form-data')
 
         os.unlink(tmp.name)
         result = json.loads(response.data)
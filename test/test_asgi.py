@@ -0,0 +1,117 @@
+import unittest
+import json
+from unittest.mock import patch, MagicMock, AsyncMock
+import sys
+
+sys.path.append('../backend')
+import main
+from main import app, menu_cache
+
+try:
+    from starlette.applications import Starlette
+    from starlette.testclient import TestClient
+    import asgi
+except ImportError:  # chế độ async là tuỳ chọn
+    asgi = None
+
+
+class FakeAsyncPool:
+    """Pool async giả: trả cùng một kết nối có cursor AsyncMock."""
+
+    def __init__(self, rows):
+        self.cursor = MagicMock()
+        self.cursor.execute = AsyncMock(side_effect=self.execute)
+        self.cursor.executemany = AsyncMock()
+        self.cursor.fetchall = AsyncMock(return_value=rows)
+        self.cursor.fetchone = AsyncMock(return_value=None)
+        self.cursor.lastrowid = 0
+        self.cursor.__aenter__ = AsyncMock(return_value=self.cursor)
+        self.cursor.__aexit__ = AsyncMock(return_value=False)
+        self.conn = MagicMock()
+        self.conn.cursor.return_value = self.cursor
+        self.conn.commit = AsyncMock()
+        self.conn.rollback = AsyncMock()
+
+    async def execute(self, sql, params=None):
+        # Mỗi INSERT orders một id mới như AUTO_INCREMENT
+        if sql.startswith('INSERT INTO orders'):
+            self.cursor.lastrowid += 1
+
+    async def acquire(self):
+        return self.conn
+
+    def release(self, conn):
+        pass
+
+
+@unittest.skipIf(asgi is None, 'starlette/aiomysql chưa được cài')
+class AsgiParityTestCase(unittest.TestCase):
+    def setUp(self):
+        self.flask = app.test_client()
+        self.flask.testing = True
+        # Không chạy lifespan (không cần MySQL thật)
+        self.asgi = TestClient(Starlette(routes=asgi.app.routes,
+                                         exception_handlers=asgi.app.exception_handlers))
+        menu_cache.invalidate()
+
+    def both(self, rows, method, url, one=None, **kwargs):
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [dict(r) for r in rows]
+        mock_cursor.fetchone.return_value = one
+        mock_cursor.lastrowid = 0
+
+        def execute(sql, params=None):
+            if sql.startswith('INSERT INTO orders'):
+                mock_cursor.lastrowid += 1
+        mock_cursor.execute.side_effect = execute
+        with patch('main.get_db_connection', return_value=mock_conn):
+            flask_response = getattr(self.flask, method)(url, **kwargs)
+
+        menu_cache.invalidate()
+        pool = FakeAsyncPool([dict(r) for r in rows])
+        pool.cursor.fetchone.return_value = one
+        with patch('asgi.pool', pool):
+            asgi_response = getattr(self.asgi, method)(url, **kwargs)
+        return flask_response, asgi_response
+
+    def test_menu_identical(self):
+        rows = [{'id': 1, 'name': 'Phở Bò', 'price': 89000, 'image': 'food4.jpg'},
+                {'id': 2, 'name': 'Pizza', 'price': 299000, 'image': 'uploads/food1.jpg'}]
+        for url in ('/api/menu', '/api/menu?q=pho', '/api/menu?sort=bad'):
+            flask_response, asgi_response = self.both(rows, 'get', url)
+            self.assertEqual(flask_response.data, asgi_response.content, url)
+
+    def test_create_order_identical(self):
+        # Cùng các dòng cho SELECT giỏ và SELECT menu_items (id dòng = id món)
+        rows = [{'id': 1, 'item_id': 1, 'quantity': 2, 'name': 'X', 'price': 150000, 'restaurant': 'A'},
+                {'id': 2, 'item_id': 2, 'quantity': 1, 'name': 'Y', 'price': 50000, 'restaurant': 'B'}]
+        flask_response, asgi_response = self.both(
+            rows, 'post', '/api/order', data=json.dumps({'user_id': 1}),
+            headers={'Content-Type': 'application/json'})
+        self.assertEqual(flask_response.data, asgi_response.content)
+        self.assertEqual(json.loads(asgi_response.content)['orders'], [1, 2])
+
+    def test_cart_batch_validation_identical(self):
+        flask_response, asgi_response = self.both(
+            [], 'post', '/api/cart/batch', data=json.dumps({'user_id': 1, 'items': []}),
+            headers={'Content-Type': 'application/json'})
+        self.assertEqual(flask_response.data, asgi_response.content)
+
+    def test_owner_checks_identical(self):
+        headers = {'Authorization': 'Bearer ' + main.session_tokens.sign({'id': 5, 'name': 'an', 'role': 'user'}),
+                   'Content-Type': 'application/json'}
+        for method, url, body, one in (
+            ('delete', '/api/cart/42', None, (6,)),
+            ('put', '/api/cart/update', {'cart_id': 42, 'quantity': 2}, (6,)),
+            ('put', '/api/orders/3/status', {'status': 'confirmed'}, {'user_id': 5, 'restaurant': 'A', 'status': 'pending'}),
+        ):
+            kwargs = {'data': json.dumps(body)} if body else {}
+            flask_response, asgi_response = self.both([], method, url, one=one, headers=headers, **kwargs)
+            self.assertEqual((flask_response.status_code, asgi_response.status_code), (403, 403), url)
+            self.assertEqual(flask_response.data, asgi_response.content)
+
+
+if __name__ == '__main__':
+    unittest.main()
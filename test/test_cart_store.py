@@ -0,0 +1,274 @@
+import unittest
+import os
+import tempfile
+import threading
+import time
+import sys
+
+sys.path.append('../backend')
+import cart_store
+from cart_store import WriteBehindCartStore
+
+class FakeCartTable:
+    """Bảng cart giả: hiểu đúng các câu SQL của cart_store."""
+
+    def __init__(self, rows=()):
+        self.rows = {}  # (user_id, item_id) -> [id, quantity]
+        self.next_id = 1
+        self.statements = []
+        for user_id, item_id, quantity in rows:
+            self.insert(user_id, item_id, quantity)
+        self.statements.clear()
+        self.fail = False
+
+    def insert(self, user_id, item_id, quantity):
+        self.rows[(user_id, item_id)] = [self.next_id, quantity]
+        self.next_id += 1
+
+    def connect(self):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, table):
+        self.table = table
+        self.result = []
+
+    def cursor(self, dictionary=False):
+        return self
+
+    def execute(self, sql, params):
+        table = self.table
+        table.statements.append(sql)
+        if sql == cart_store.CART_LINES_SQL:
+            self.result = [{'id': line[0], 'item_id': item_id, 'quantity': line[1]}
+                           for (user_id, item_id), line in sorted(table.rows.items()) if user_id == params[0]]
+        elif sql == cart_store.CART_OWNER_SQL:
+            self.result = [(user_id,) for (user_id, _), line in table.rows.items() if line[0] == params[0]]
+        else:
+            raise AssertionError(sql)
+
+    def executemany(self, sql, rows):
+        table = self.table
+        if table.fail:
+            raise OSError('database down')
+        table.statements.append(sql)
+        for row in rows:
+            if sql == cart_store.CART_SET_SQL:
+                user_id, item_id, quantity = row
+                if (user_id, item_id) in table.rows:
+                    table.rows[(user_id, item_id)][1] = quantity
+                else:
+                    table.insert(user_id, item_id, quantity)
+            elif sql == cart_store.CART_DELETE_ITEM_SQL:
+                table.rows.pop(tuple(row), None)
+            else:
+                raise AssertionError(sql)
+
+    def fetchall(self):
+        return self.result
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class WriteBehindCartStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.journal = os.path.join(self.tmp.name, 'cart.journal')
+        self.table = FakeCartTable([(1, 1, 2)])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_store(self, **kwargs):
+        store = WriteBehindCartStore(self.table.connect, journal=self.journal,
+                                     flush_interval=3600, **kwargs)
+        self.addCleanup(store.close)
+        return store
+
+    def test_read_through_then_memory(self):
+        store = self.make_store()
+        lines = store.lines(1)
+        self.assertEqual(lines, [{'id': 1, 'item_id': 1, 'quantity': 2}])
+        store.lines(1)
+        store.lines(1)
+        # Chỉ đọc bảng một lần
+        self.assertEqual(self.table.statements, [cart_store.CART_LINES_SQL])
+
+    def test_writes_are_batched(self):
+        store = self.make_store()
+        store.add([(1, 1, 1), (1, 2, 1)])
+        cart = {line['item_id']: line for line in store.lines(1)}
+        for _ in range(20):
+            store.update(cart[2]['id'], 5)
+            store.update(cart[1]['id'], 4)
+        self.assertEqual(self.table.rows[(1, 1)], [1, 2])
+
+        self.assertEqual(store.flush(), 2)
+        self.assertEqual(self.table.statements.count(cart_store.CART_SET_SQL), 1)
+        self.assertEqual(self.table.rows[(1, 1)][1], 4)
+        self.assertEqual(self.table.rows[(1, 2)][1], 5)
+
+        store.remove(cart[2]['id'])
+        store.flush()
+        self.assertNotIn((1, 2), self.table.rows)
+        self.assertEqual(store.pending(), 0)
+
+    def test_update_unknown_cart_line_reads_owner(self):
+        self.table.insert(2, 2, 1)
+        store = self.make_store()
+        store.update(2, 7)
+        self.assertEqual(store.lines(2)[0]['quantity'], 7)
+        store.update(999, 1)  # không tồn tại: bỏ qua như UPDATE 0 dòng
+        store.flush()
+        self.assertEqual(self.table.rows[(2, 2)][1], 7)
+
+    def test_checkout_sees_pending_writes(self):
+        store = self.make_store()
+        store.add([(1, 2, 3)])
+        with store.checkout(1):
+            # create_order đọc bảng: thay đổi đã được ghi
+            self.assertEqual(self.table.rows[(1, 2)][1], 3)
+            self.table.rows = {key: line for key, line in self.table.rows.items() if key[0] != 1}
+        self.assertEqual(store.lines(1), [])
+
+    def test_checkout_blocks_concurrent_add(self):
+        store = self.make_store()
+        store.lines(1)
+        added = threading.Event()
+
+        def add():
+            store.add([(1, 2, 1)])
+            added.set()
+
+        with store.checkout(1):
+            thread = threading.Thread(target=add)
+            thread.start()
+            self.assertFalse(added.wait(0.1))
+            self.table.rows.clear()
+        thread.join()
+        # Món thêm trong lúc đặt hàng nằm ở giỏ mới, không bị mất
+        self.assertEqual([line['item_id'] for line in store.lines(1)], [2])
+
+    def test_add_rechecks_checkout_started_during_load(self):
+        connect = self.table.connect
+        started = threading.Event()
+
+        def checkout():
+            with store.checkout(1):
+                started.set()
+                time.sleep(0.1)
+                self.table.rows.clear()
+
+        def connect_during_checkout():
+            # Checkout bắt đầu đúng lúc add đang đọc giỏ (đã nhả lock)
+            if not started.is_set():
+                threading.Thread(target=checkout).start()
+                started.wait()
+            return connect()
+
+        self.table.connect = connect_during_checkout
+        store = self.make_store()
+        store.add([(1, 2, 1)])
+        # Giỏ cũ (món 1 đã đặt) không được dùng lại
+        self.assertEqual([(line['item_id'], line['quantity']) for line in store.lines(1)], [(2, 1)])
+
+    def test_provisional_id_survives_flush_and_eviction(self):
+        store = self.make_store(max_users=1)
+        store.add([(1, 2, 1)])
+        provisional = {line['item_id']: line['id'] for line in store.lines(1)}[2]
+        store.flush()
+        store.lines(2)
+        self.assertNotIn(1, store._carts)
+
+        # Client vẫn gửi id tạm nhận được trước đó
+        store.update(provisional, 6)
+        self.assertEqual({line['item_id']: line['quantity'] for line in store.lines(1)}, {1: 2, 2: 6})
+        store.remove(provisional)
+        store.flush()
+        self.assertNotIn((1, 2), self.table.rows)
+
+    def test_failed_flush_keeps_changes(self):
+        store = self.make_store()
+        store.add([(1, 2, 1)])
+        self.table.fail = True
+        with self.assertRaises(OSError):
+            store.flush()
+        self.assertEqual(store.pending(), 1)
+        self.table.fail = False
+        store.flush()
+        self.assertEqual(self.table.rows[(1, 2)][1], 1)
+
+    def test_crash_recovery_from_journal(self):
+        store = self.make_store()
+        store.add([(1, 2, 2)])
+        store.update(1, 9)
+        # Crash: process chết trước khi flush (không gọi close)
+        store._journal.close()
+        store._journal = None
+        store.close = lambda: None
+
+        recovered = self.make_store()
+        self.assertEqual(recovered.pending(), 2)
+        # Đọc trước khi flush vẫn thấy thay đổi chưa ghi
+        self.assertEqual(sorted((line['item_id'], line['quantity']) for line in recovered.lines(1)),
+                         [(1, 9), (2, 2)])
+        recovered.flush()
+        self.assertEqual(self.table.rows[(1, 1)][1], 9)
+        self.assertEqual(self.table.rows[(1, 2)][1], 2)
+        self.assertEqual(os.path.getsize(self.journal), 0)
+
+    def test_journal_opened_on_first_use(self):
+        with open(self.journal, 'w') as f:
+            f.write('[1, 2, 4]\n')
+        # Tạo store (master trước fork) không nạp/mở journal
+        store = self.make_store()
+        self.assertIsNone(store._journal)
+        store.close()
+        self.assertEqual(os.path.getsize(self.journal), 10)
+
+        store = self.make_store()
+        store.open()
+        self.assertEqual(store.pending(), 1)
+        self.assertIsNotNone(store._journal)
+
+    def test_provisional_ids_differ_across_restarts(self):
+        ids = []
+        for _ in range(2):
+            store = self.make_store()
+            store.add([(1, 2, 1)])
+            ids.append({line['item_id']: line['id'] for line in store.lines(1)}[2])
+            store.close()
+            # Dòng chưa kịp ghi xuống bảng khi restart
+            del self.table.rows[(1, 2)]
+        self.assertNotEqual(ids[0], ids[1])
+
+    def test_truncated_journal_line_ignored(self):
+        with open(self.journal, 'w') as f:
+            f.write('[1, 2, 4]\n[1, 1, ')
+        store = self.make_store()
+        self.assertEqual(store.pending(), 1)
+        store.flush()
+        self.assertEqual(self.table.rows[(1, 2)][1], 4)
+        self.assertEqual(self.table.rows[(1, 1)][1], 2)
+
+    def test_evicts_only_clean_carts(self):
+        store = self.make_store(max_users=1)
+        store.add([(1, 2, 1)])
+        store.lines(2)
+        # Giỏ user 1 còn thay đổi chưa ghi nên vẫn giữ
+        self.assertIn(1, store._carts)
+        store.flush()
+        store.lines(3)
+        self.assertNotIn(1, store._carts)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import json
+from unittest.mock import patch, MagicMock
+import sys
+
+sys.path.append('../backend')
+from main import app, menu_cache
+from cart_view import SHIPPING_FEE, build_cart_view
+
+MENU = {1: {'id': 1, 'name': 'Phở Bò', 'price': 89000, 'image': 'uploads/food4.jpg', 'restaurant': 'Phở Hà Nội'},
+        2: {'id': 2, 'name': 'Pizza', 'price': 299000, 'image': 'uploads/food1.jpg', 'restaurant': 'Pizza House',
+            'srcset': {'webp': 'uploads/a-480.webp 480w'}},
+        3: {'id': 3, 'name': 'Bún Chả', 'price': 65000, 'image': None, 'restaurant': 'Phở Hà Nội'}}
+
+
+class BuildCartViewTestCase(unittest.TestCase):
+    def test_subtotals_and_shipping_per_restaurant(self):
+        view = build_cart_view([{'id': 10, 'item_id': 1, 'quantity': 2},
+                                {'id': 11, 'item_id': 2, 'quantity': 1},
+                                {'id': 12, 'item_id': 3, 'quantity': 1}], MENU)
+        self.assertEqual([item['name'] for item in view['items']], ['Phở Bò', 'Pizza', 'Bún Chả'])
+        self.assertEqual(view['items'][1]['srcset'], MENU[2]['srcset'])
+        self.assertEqual(view['restaurants'], [
+            {'restaurant': 'Phở Hà Nội', 'items': [10, 12], 'subtotal': 243000,
+             'shipping_fee': SHIPPING_FEE, 'total': 273000},
+            {'restaurant': 'Pizza House', 'items': [11], 'subtotal': 299000,
+             'shipping_fee': SHIPPING_FEE, 'total': 329000},
+        ])
+        self.assertEqual((view['subtotal'], view['shipping_fee'], view['total']),
+                         (542000, 2 * SHIPPING_FEE, 602000))
+
+    def test_removed_menu_item_skipped(self):
+        view = build_cart_view([{'id': 10, 'item_id': 99, 'quantity': 1}], MENU)
+        self.assertEqual(view, {'items': [], 'restaurants': [], 'subtotal': 0, 'shipping_fee': 0, 'total': 0})
+
+
+class MenuChangePropagationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.testing = True
+        menu_cache.invalidate()
+        self.menu = [{'id': 1, 'name': 'Pizza', 'price': 150000, 'image': 'pizza.jpg', 'restaurant': 'A'}]
+        self.cursor = MagicMock()
+        # Đặt hàng đọc giá thẳng từ menu_items, giỏ đọc dòng cart
+        self.cursor.fetchall.side_effect = lambda: (
+            [dict(i) for i in self.menu] if 'FROM menu_items' in self.cursor.execute.call_args[0][0]
+            else [{'id': 5, 'item_id': 1, 'quantity': 2}])
+        self.cursor.lastrowid = 1
+        conn = MagicMock()
+        conn.cursor.return_value = self.cursor
+        for target in (patch('main.get_db_connection', return_value=conn),
+                       patch('main._load_menu_items', side_effect=lambda: [dict(i) for i in self.menu])):
+            target.start()
+            self.addCleanup(target.stop)
+
+    def get_cart(self):
+        return json.loads(self.app.get('/api/cart/1').data)
+
+    def test_price_change_reaches_cart_and_order(self):
+        self.assertEqual(self.get_cart()['total'], 2 * 150000 + SHIPPING_FEE)
+
+        # Đổi giá trong menu_items: snapshot cũ còn dùng tới khi bị invalidate
+        self.menu[0]['price'] = 120000
+        self.assertEqual(self.get_cart()['items'][0]['price'], 150000)
+
+        # ... nhưng đặt hàng tính theo giá trong menu_items ngay
+        self.cursor.execute.reset_mock()
+        self.cursor.executemany.reset_mock()
+        response = self.app.post('/api/order', data=json.dumps({'user_id': 1}),
+                                 content_type='application/json')
+        self.assertTrue(json.loads(response.data)['success'])
+        sql, params = self.cursor.execute.call_args_list[2][0]
+        self.assertTrue(sql.startswith('INSERT INTO orders'))
+        self.assertEqual(params, (1, 'A', 240000 + SHIPPING_FEE))
+        self.assertEqual(self.cursor.executemany.call_args[0][1], [(1, 1, 2, 120000)])
+
+        menu_cache.invalidate()
+        cart = self.get_cart()
+        self.assertEqual(cart['items'][0]['price'], 120000)
+        self.assertEqual(cart['restaurants'][0]['subtotal'], 240000)
+        self.assertEqual(cart['total'], 240000 + SHIPPING_FEE)
+
+    def test_price_change_visible_after_ttl(self):
+        self.get_cart()
+        self.menu[0]['price'] = 99000
+        with patch.object(menu_cache, 'ttl', 0):
+            self.assertEqual(self.get_cart()['items'][0]['price'], 99000)
+
+
+if __name__ == '__main__':
+    unittest.main()
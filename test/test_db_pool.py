@@ -0,0 +1,156 @@
+import unittest
+import threading
+import sys
+
+sys.path.append('../backend')
+from db_pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.ping_ok = True
+        self.rollbacks = 0
+
+    def cursor(self, dictionary=False):
+        return object()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        if self.closed:
+            raise RuntimeError("closed")
+        self.rollbacks += 1
+
+    def ping(self, reconnect=False):
+        if not self.ping_ok:
+            raise RuntimeError("gone away")
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ConnectionPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.created = []
+
+    def creator(self):
+        conn = FakeConnection()
+        self.created.append(conn)
+        return conn
+
+    def test_reuses_connection(self):
+        pool = ConnectionPool(self.creator, size=2, max_overflow=0)
+        db = pool.connect()
+        db.commit()
+        db.close()
+        db = pool.connect()
+        db.close()
+
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(self.created[0].rollbacks, 2)
+        stats = pool.stats()
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['idle'], 1)
+        self.assertEqual(stats['in_use'], 0)
+
+    def test_double_close_releases_once(self):
+        pool = ConnectionPool(self.creator, size=1, max_overflow=0)
+        db = pool.connect()
+        db.close()
+        db.close()
+        self.assertEqual(pool.stats()['idle'], 1)
+
+    def test_overflow_connections_are_closed(self):
+        pool = ConnectionPool(self.creator, size=1, max_overflow=1)
+        first = pool.connect()
+        second = pool.connect()
+        first.close()
+        second.close()
+
+        self.assertEqual(len(self.created), 2)
+        self.assertTrue(self.created[1].closed)
+        self.assertEqual(pool.stats()['opened'], 1)
+
+    def test_timeout_when_exhausted(self):
+        pool = ConnectionPool(self.creator, size=1, max_overflow=0, timeout=0.05)
+        db = pool.connect()
+        with self.assertRaises(PoolTimeout):
+            pool.connect()
+        db.close()
+
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+
+    def test_waiter_gets_released_connection(self):
+        pool = ConnectionPool(self.creator, size=1, max_overflow=0, timeout=5)
+        db = pool.connect()
+        result = []
+
+        def worker():
+            conn = pool.connect()
+            result.append(conn)
+            conn.close()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        db.close()
+        thread.join()
+
+        self.assertEqual(len(result), 1)
+        self.assertEqual(len(self.created), 1)
+        self.assertGreater(pool.stats()['wait_time'], 0)
+
+    def test_failed_ping_replaces_connection(self):
+        pool = ConnectionPool(self.creator, size=1, max_overflow=0)
+        pool.connect().close()
+        self.created[0].ping_ok = False
+        pool.connect().close()
+
+        self.assertEqual(len(self.created), 2)
+        self.assertTrue(self.created[0].closed)
+        self.assertEqual(pool.stats()['ping_failures'], 1)
+
+    def test_recycle_old_connection(self):
+        clock = FakeClock()
+        pool = ConnectionPool(self.creator, size=1, max_overflow=0,
+                              recycle=60, clock=clock)
+        pool.connect().close()
+        clock.now = 61
+        pool.connect().close()
+
+        self.assertEqual(len(self.created), 2)
+        self.assertEqual(pool.stats()['recycled'], 1)
+
+    def test_broken_connection_is_discarded(self):
+        pool = ConnectionPool(self.creator, size=1, max_overflow=0)
+        db = pool.connect()
+        self.created[0].closed = True
+        db.close()
+
+        stats = pool.stats()
+        self.assertEqual(stats['discarded'], 1)
+        self.assertEqual(stats['opened'], 0)
+
+    def test_create_failure_frees_slot(self):
+        def failing():
+            raise RuntimeError("cannot connect")
+
+        pool = ConnectionPool(failing, size=1, max_overflow=0)
+        with self.assertRaises(RuntimeError):
+            pool.connect()
+        self.assertEqual(pool.stats()['opened'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import json
+from unittest.mock import patch, MagicMock
+import sys
+
+sys.path.append('../backend')
+from main import app
+from events import InProcessBroker
+
+
+class BrokerTestCase(unittest.TestCase):
+    def test_publish_reaches_only_channel_subscribers(self):
+        broker = InProcessBroker()
+        user = broker.subscribe(['user:1'])
+        other = broker.subscribe(['user:2'])
+
+        broker.publish('user:1', 'status', {'id': 5})
+
+        event = user.get(timeout=0.1)
+        self.assertEqual(event.data, {'id': 5})
+        self.assertIsNone(other.get(timeout=0.01))
+
+    def test_resume_from_last_event_id(self):
+        broker = InProcessBroker(history=10)
+        first = broker.publish('restaurant:A', 'created', {'id': 1})
+        broker.publish('restaurant:A', 'created', {'id': 2})
+
+        subscription = broker.subscribe(['restaurant:A'], last_event_id=first.id)
+
+        self.assertEqual(subscription.get(timeout=0.1).data, {'id': 2})
+        self.assertIsNone(subscription.get(timeout=0.01))
+
+    def test_close_unsubscribes(self):
+        broker = InProcessBroker()
+        subscription = broker.subscribe(['user:1'])
+        subscription.close()
+        self.assertEqual(broker.subscriber_count('user:1'), 0)
+
+    def test_slow_subscriber_drops_instead_of_blocking(self):
+        broker = InProcessBroker(queue_size=1)
+        subscription = broker.subscribe(['user:1'])
+        broker.publish('user:1', 'status', {'id': 1})
+        broker.publish('user:1', 'status', {'id': 2})
+        self.assertEqual(subscription.dropped, 1)
+
+
+class OrderStreamTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.testing = True
+        self.broker = InProcessBroker()
+        self.patches = [patch('main.order_events', self.broker),
+                        patch('main.SSE_HEARTBEAT', 0.01)]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def read_event(self, chunks):
+        for chunk in chunks:
+            chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+            if chunk.startswith('id:'):
+                lines = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+                return lines['event'], json.loads(lines['data'])
+
+    @patch('main.get_db_connection')
+    def test_status_change_pushed_to_user_and_restaurant(self, mock_db):
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_db.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+        mock_cursor.fetchone.return_value = {'user_id': 3, 'restaurant': 'Pizza House'}
+
+        user_stream = self.app.get('/api/orders/user/3/stream', buffered=False)
+        restaurant_stream = self.app.get('/api/orders/restaurant/Pizza%20House/stream', buffered=False)
+        self.assertEqual(user_stream.mimetype, 'text/event-stream')
+        user_chunks = iter(user_stream.response)
+        restaurant_chunks = iter(restaurant_stream.response)
+        # Chunk đầu tiên (retry) đăng ký subscription
+        next(user_chunks)
+        next(restaurant_chunks)
+
+        self.app.put('/api/orders/9/status',
+                     data=json.dumps({'status': 'confirmed'}),
+                     content_type='application/json')
+
+        for chunks in (user_chunks, restaurant_chunks):
+            name, data = self.read_event(chunks)
+            self.assertEqual(name, 'status')
+            self.assertEqual(data['id'], 9)
+            self.assertEqual(data['status'], 'confirmed')
+        user_stream.close()
+        restaurant_stream.close()
+
+    @patch('main.get_db_connection')
+    def test_created_order_published(self, mock_db):
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_db.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.side_effect = [
+            [{'id': 1, 'item_id': 1, 'quantity': 2}],
+            [{'id': 1, 'name': 'Pizza', 'price': 150000, 'restaurant': 'Pizza House'}]]
+        mock_cursor.lastrowid = 4
+        subscription = self.broker.subscribe(['restaurant:Pizza House'])
+
+        self.app.post('/api/order',
+                      data=json.dumps({'user_id': 1}),
+                      content_type='application/json')
+
+        event = subscription.get(timeout=0.1)
+        self.assertEqual(event.name, 'created')
+        self.assertEqual(event.data['id'], 4)
+        self.assertEqual(event.data['total_amount'], 330000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,195 @@
+import unittest
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest.mock import patch, MagicMock
+import sys
+
+sys.path.append('../backend')
+from main import app
+import sqlite_db
+from db_pool import ConnectionPool
+from dialects import SQLITE
+from idempotency import IdempotencyConflict, MemoryIdempotencyStore, TableIdempotencyStore, CachedResponse
+
+
+class IdempotencyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.testing = True
+        self.store = MemoryIdempotencyStore(max_entries=100, wait_timeout=5)
+        self.store_patch = patch('main.idempotency_store', self.store)
+        self.store_patch.start()
+
+    def tearDown(self):
+        self.store_patch.stop()
+
+    def mock_order_db(self, mock_db, delay=0.0):
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_db.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+        # Cùng một dòng cho SELECT giỏ và SELECT menu_items (id dòng = id món)
+        mock_cursor.fetchall.return_value = [self.cart_row(2)]
+        mock_cursor.lastrowid = 7
+
+        def execute(sql, params=None):
+            if sql.startswith('INSERT INTO orders'):
+                time.sleep(delay)
+        mock_cursor.execute.side_effect = execute
+        return mock_conn, mock_cursor
+
+    @staticmethod
+    def cart_row(quantity):
+        return {'id': 1, 'item_id': 1, 'quantity': quantity, 'name': 'Pizza', 'price': 150000,
+                'restaurant': 'Pizza House'}
+
+    def post_order(self, key, user_id=1, client=None):
+        return (client or self.app).post('/api/order',
+                                         data=json.dumps({'user_id': user_id}),
+                                         content_type='application/json',
+                                         headers={'Idempotency-Key': key})
+
+    @staticmethod
+    def order_inserts(mock_cursor):
+        return [c for c in mock_cursor.execute.call_args_list
+                if c[0][0].startswith('INSERT INTO orders')]
+
+    @patch('main.get_db_connection')
+    def test_replay_returns_cached_response(self, mock_db):
+        mock_conn, mock_cursor = self.mock_order_db(mock_db)
+
+        first = self.post_order('abc')
+        second = self.post_order('abc')
+
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(second.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(len(self.order_inserts(mock_cursor)), 1)
+        self.assertEqual(mock_db.call_count, 1)
+
+    @patch('main.get_db_connection')
+    def test_long_keys_with_shared_prefix_do_not_collide(self, mock_db):
+        mock_conn, mock_cursor = self.mock_order_db(mock_db)
+        prefix = 'k' * 300
+
+        self.post_order(prefix + '-1')
+        second = self.post_order(prefix + '-2')
+
+        self.assertNotIn('Idempotent-Replayed', second.headers)
+        self.assertEqual(len(self.order_inserts(mock_cursor)), 2)
+        self.assertTrue(all(len(key) == 64 for key in self.store._entries))
+
+    @patch('main.get_db_connection')
+    def test_concurrent_duplicates_write_one_order(self, mock_db):
+        mock_conn, mock_cursor = self.mock_order_db(mock_db, delay=0.1)
+        responses = []
+        lock = threading.Lock()
+
+        def worker():
+            response = self.post_order('same-key', client=app.test_client())
+            with lock:
+                responses.append(response)
+
+        threads = [threading.Thread(target=worker) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(self.order_inserts(mock_cursor)), 1)
+        mock_conn.commit.assert_called_once()
+        bodies = {r.data for r in responses}
+        self.assertEqual(len(bodies), 1)
+        self.assertEqual(json.loads(bodies.pop())['orders'], [7])
+
+    @patch('main.get_db_connection')
+    def test_key_reused_with_different_body(self, mock_db):
+        self.mock_order_db(mock_db)
+
+        self.post_order('abc', user_id=1)
+        response = self.post_order('abc', user_id=2)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertFalse(json.loads(response.data)['success'])
+
+    @patch('main.get_db_connection')
+    def test_failure_is_not_cached(self, mock_db):
+        mock_conn, mock_cursor = self.mock_order_db(mock_db)
+        mock_cursor.fetchall.return_value = []
+
+        first = self.post_order('retry')
+        self.assertFalse(json.loads(first.data)['success'])
+
+        mock_cursor.fetchall.return_value = [self.cart_row(1)]
+        second = self.post_order('retry')
+        self.assertTrue(json.loads(second.data)['success'])
+        self.assertNotIn('Idempotent-Replayed', second.headers)
+
+    @patch('main.get_db_connection')
+    def test_add_to_cart_replay(self, mock_db):
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_db.return_value = mock_conn
+        mock_conn.cursor.return_value = mock_cursor
+
+        for _ in range(3):
+            self.app.post('/api/cart',
+                          data=json.dumps({'user_id': 1, 'item_id': 1, 'quantity': 1}),
+                          content_type='application/json',
+                          headers={'Idempotency-Key': 'tap-1'})
+
+        self.assertEqual(mock_cursor.execute.call_count, 1)
+
+    def test_store_evicts_oldest_completed(self):
+        store = MemoryIdempotencyStore(max_entries=2)
+        for key in ('a', 'b', 'c'):
+            self.assertIsNone(store.begin(key, 'f'))
+            store.complete(key, CachedResponse(200, b'{}', 'application/json'))
+
+        self.assertEqual(len(store), 2)
+        self.assertIsNone(store.begin('a', 'f'))
+
+
+class TableIdempotencyStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'test.sqlite3')
+        sqlite_db.create_schema(path)
+        pool = ConnectionPool(lambda: sqlite_db.connect(path), size=2)
+        self.addCleanup(pool.dispose)
+        self.get_connection = pool.connect
+
+    def store(self, lease=60):
+        return TableIdempotencyStore(self.get_connection, wait_timeout=0.1, poll_interval=0.01,
+                                     lease=lease, dialect=SQLITE)
+
+    def test_replay_and_conflict(self):
+        store = self.store()
+        self.assertIsNone(store.begin('k', 'f'))
+        with self.assertRaises(TimeoutError):
+            store.begin('k', 'f')
+        store.complete('k', CachedResponse(200, b'{"success": true}', 'application/json'))
+        cached = store.begin('k', 'f')
+        self.assertEqual((cached.status, cached.body), (200, b'{"success": true}'))
+        with self.assertRaises(IdempotencyConflict):
+            store.begin('k', 'other')
+
+    def test_expired_lease_taken_over(self):
+        # Request đầu chết khi còn PENDING (không complete/abort)
+        self.assertIsNone(self.store(lease=0.05).begin('k', 'f'))
+        time.sleep(0.1)
+        store = self.store()
+        self.assertIsNone(store.begin('k', 'f'))
+        # Người lấy lại key giữ lease mới
+        with self.assertRaises(TimeoutError):
+            store.begin('k', 'f')
+        # Nội dung khác không được lấy lại key
+        with self.assertRaises(IdempotencyConflict):
+            self.store(lease=0.05).begin('k', 'other')
+
+
+if __name__ == '__main__':
+    unittest.main()
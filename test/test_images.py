@@ -0,0 +1,169 @@
+import unittest
+import io
+import os
+import tempfile
+import tracemalloc
+from unittest.mock import patch, MagicMock
+import sys
+
+sys.path.append('../backend')
+import images
+from main import app, _normalize_image
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+JPEG = b'\xff\xd8\xff\xe0'
+
+
+class ZeroStream:
+    """Stream JPEG giả dài ``size`` byte, không giữ dữ liệu trong bộ nhớ."""
+
+    def __init__(self, size):
+        self.remaining = size
+        self.first = True
+
+    def read(self, n):
+        n = min(n, self.remaining)
+        self.remaining -= n
+        if self.first and n:
+            self.first = False
+            return JPEG + bytes(n - len(JPEG))
+        return bytes(n)
+
+
+class ImageStorageTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def store(self, data, max_size=1024 * 1024):
+        return images.store_upload(self.dir, io.BytesIO(data), max_size)
+
+    def test_content_addressed_names(self):
+        first = self.store(JPEG + b'abc')
+        again = self.store(JPEG + b'abc')
+        different = self.store(b'\x89PNG\r\n\x1a\n' + b'xyz')
+
+        self.assertEqual(first, again)
+        self.assertNotEqual(first, different)
+        self.assertTrue(first.endswith('.jpg'))
+        self.assertTrue(different.endswith('.png'))
+        self.assertEqual(sorted(os.listdir(self.dir)), sorted([first, different]))
+
+    def test_rejects_non_image_and_oversized(self):
+        with self.assertRaises(images.InvalidImage):
+            self.store(b'<html>not an image</html>')
+        with self.assertRaises(images.InvalidImage):
+            self.store(b'')
+        with self.assertRaises(images.ImageTooLarge):
+            self.store(JPEG + bytes(2000), max_size=1000)
+        # File tạm được dọn
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_sniff_waits_for_header_across_short_reads(self):
+        class ShortReads(io.BytesIO):
+            def read(self, n=-1):
+                return super().read(min(n, 5))
+
+        webp = b'RIFF\x00\x00\x00\x00WEBPVP8 ' + bytes(100)
+        name = images.store_upload(self.dir, ShortReads(webp), 1024)
+        self.assertTrue(name.endswith('.webp'))
+        with open(os.path.join(self.dir, name), 'rb') as f:
+            self.assertEqual(f.read(), webp)
+
+    def test_large_upload_constant_memory(self):
+        size = 50 * 1024 * 1024
+        tracemalloc.start()
+        try:
+            name = images.store_upload(self.dir, ZeroStream(size), max_size=size)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(os.path.getsize(os.path.join(self.dir, name)), size)
+        self.assertLess(peak, 1024 * 1024)
+
+    @unittest.skipIf(Image is None, 'Pillow chưa được cài')
+    def test_render_variants_and_srcset(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 600), 'red').save(buffer, format='PNG')
+        name = self.store(buffer.getvalue())
+
+        future = images.ImagePipeline(workers=1).submit(self.dir, name)
+        manifest = future.result()
+
+        # 800px: thumb 160, card 480, full giữ nguyên 800
+        self.assertEqual([v['width'] for v in manifest['variants']], [160, 480, 800])
+        for variant in manifest['variants']:
+            self.assertIn('jpeg', variant['files'])
+            for file in variant['files'].values():
+                self.assertTrue(os.path.exists(os.path.join(self.dir, file)))
+
+        with patch('main.UPLOADS_DIR', self.dir):
+            item = _normalize_image({'image': f'uploads/{name}'})
+        stem = os.path.splitext(name)[0]
+        self.assertEqual(item['srcset']['jpeg'],
+                         f'uploads/{stem}-thumb.jpg 160w, uploads/{stem}-card.jpg 480w, uploads/{stem}-full.jpg 800w')
+
+    def test_unreadable_image_keeps_original(self):
+        name = self.store(JPEG + b'corrupt')
+        future = images.ImagePipeline(workers=1).submit(self.dir, name)
+        if future is not None:
+            self.assertIsNone(future.result())
+        self.assertIsNone(images.load_manifest(self.dir, name))
+        with patch('main.UPLOADS_DIR', self.dir):
+            self.assertNotIn('srcset', _normalize_image({'image': name}))
+
+
+class MenuUploadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.patch = patch('main.UPLOADS_DIR', self.tmp.name)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        self.tmp.cleanup()
+
+    def post(self, data, filename='dish.jpg'):
+        return self.app.post('/api/menu', data={'name': 'Dish', 'price': '1',
+                                                'image': (io.BytesIO(data), filename)},
+                             content_type='multipart/form-data')
+
+    @patch('main.get_db_connection')
+    def test_rejects_non_image(self, mock_db):
+        response = self.post(b'#!/bin/sh\necho hi')
+        self.assertFalse(response.get_json()['success'])
+        mock_db.assert_not_called()
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    @patch('main.get_db_connection')
+    def test_rejects_oversized(self, mock_db):
+        with patch('main.UPLOAD_MAX_BYTES', 1000):
+            response = self.post(JPEG + bytes(5000))
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(response.get_json()['success'])
+        mock_db.assert_not_called()
+
+        with patch.dict(app.config, MAX_CONTENT_LENGTH=1000):
+            response = self.post(JPEG + bytes(5000))
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(response.get_json()['success'])
+
+    @patch('main.get_db_connection')
+    def test_stores_hashed_name(self, mock_db):
+        mock_db.return_value = MagicMock()
+        response = self.post(JPEG + b'pho')
+        image = response.get_json()['image']
+        self.assertRegex(image, r'^uploads/[0-9a-f]{32}\.jpg$')
+        self.assertEqual(os.listdir(self.tmp.name), [image[len('uploads/'):]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+import unittest
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from unittest.mock import patch, MagicMock
+import sys
+
+sys.path.append('../backend')
+from jobs import JobQueue, Worker
+from main import app, menu_cache
+
+
+class JobQueueTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.now = 1000.0
+
+    def make_queue(self, **kwargs):
+        return JobQueue(os.path.join(self.tmp.name, 'jobs.sqlite3'), clock=lambda: self.now, **kwargs)
+
+    def test_enqueue_claim_ack(self):
+        queue = self.make_queue()
+        queue.enqueue_many([('a', {'n': 1}), ('b', {'n': 2})])
+        claimed = queue.claim('w1', limit=10)
+        self.assertEqual([(job.name, job.payload) for job in claimed], [('a', {'n': 1}), ('b', {'n': 2})])
+        # Đã claim: worker khác không thấy
+        self.assertEqual(queue.claim('w2'), [])
+        self.assertTrue(queue.ack(claimed[0]))
+        self.assertEqual(queue.stats(), {'queued': 1, 'dead': 0})
+
+    def test_visibility_timeout_redelivers(self):
+        queue = self.make_queue(visibility_timeout=30)
+        queue.enqueue('a', {})
+        first = queue.claim('w1')[0]
+        self.now += 31  # w1 chết hoặc quá chậm
+        second = queue.claim('w2')[0]
+        self.assertEqual((second.id, second.attempts), (first.id, 2))
+        # Ack muộn của w1 không xoá lần claim của w2
+        self.assertFalse(queue.ack(first))
+        self.assertTrue(queue.ack(second))
+
+    def test_timed_out_last_attempt_goes_dead(self):
+        queue = self.make_queue(visibility_timeout=30, max_attempts=2)
+        queue.enqueue('a', {})
+        for attempt in (1, 2):
+            self.assertEqual(queue.claim('w')[0].attempts, attempt)
+            self.now += 31  # worker chết, không ack/fail
+        self.assertEqual(queue.claim('w'), [])
+        self.assertEqual(queue.stats(), {'queued': 0, 'dead': 1})
+        error = sqlite3.connect(queue.path).execute('SELECT last_error FROM jobs').fetchone()[0]
+        self.assertIn('visibility_timeout', error)
+
+    def test_retry_with_backoff_then_dead(self):
+        queue = self.make_queue(max_attempts=3, backoff=10)
+        queue.enqueue('flaky', {'id': 1})
+        calls = []
+
+        def handler(payload):
+            calls.append(self.now)
+            raise RuntimeError('smtp down')
+
+        worker = Worker(queue, {'flaky': handler})
+        self.assertEqual(worker.run_once(), 1)
+        self.assertEqual(worker.run_once(), 0)  # chưa tới hạn thử lại
+        self.now += 10  # lần 1 lỗi: chờ 5-10 giây
+        self.assertEqual(worker.run_once(), 1)
+        self.now += 5
+        self.assertEqual(worker.run_once(), 0)
+        self.now += 15  # lần 2 lỗi: chờ 10-20 giây
+        self.assertEqual(worker.run_once(), 1)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(queue.stats(), {'queued': 0, 'dead': 1})
+        self.now += 1000
+        self.assertEqual(worker.run_once(), 0)
+
+        error = sqlite3.connect(queue.path).execute('SELECT last_error FROM jobs').fetchone()[0]
+        self.assertEqual(error, 'RuntimeError: smtp down')
+
+    def test_retry_succeeds(self):
+        queue = self.make_queue(backoff=1)
+        queue.enqueue('x', {})
+        outcomes = iter([RuntimeError('lỗi tạm'), None])
+
+        def handler(payload):
+            error = next(outcomes)
+            if error:
+                raise error
+
+        worker = Worker(queue, {'x': handler})
+        worker.run_once()
+        self.now += 1
+        worker.run_once()
+        self.assertEqual(queue.stats(), {'queued': 0, 'dead': 0})
+
+    def test_unknown_job_name_fails(self):
+        queue = self.make_queue(max_attempts=1)
+        queue.enqueue('missing', {})
+        Worker(queue, {}).run_once()
+        self.assertEqual(queue.stats()['dead'], 1)
+
+
+class WorkerThroughputTestCase(unittest.TestCase):
+    def test_parallel_workers_run_each_job_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = JobQueue(os.path.join(tmp, 'jobs.sqlite3'))
+            total = 2000
+            queue.enqueue_many([('count', {'n': n}) for n in range(total)])
+
+            seen = []
+            lock = threading.Lock()
+
+            def handler(payload):
+                with lock:
+                    seen.append(payload['n'])
+
+            stop = threading.Event()
+            workers = [Worker(queue, {'count': handler}, name=f'w{i}', batch_size=50, poll_interval=0.01)
+                       for i in range(4)]
+            threads = [threading.Thread(target=worker.run, args=(stop,)) for worker in workers]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            while len(seen) < total and time.perf_counter() - start < 30:
+                time.sleep(0.01)
+            elapsed = time.perf_counter() - start
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(sorted(seen), list(range(total)))
+            self.assertEqual(queue.stats(), {'queued': 0, 'dead': 0})
+            # Ngưỡng rộng để không chập chờn trên máy chậm
+            self.assertGreater(total / elapsed, 200)
+
+
+class CheckoutEnqueueTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.testing = True
+        menu_cache.invalidate()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.queue = JobQueue(os.path.join(self.tmp.name, 'jobs.sqlite3'))
+        self.conn = MagicMock()
+        self.cursor = self.conn.cursor.return_value
+        # Cùng một dòng cho SELECT giỏ và SELECT menu_items (id dòng = id món)
+        self.cursor.fetchall.return_value = [
+            {'id': 1, 'item_id': 1, 'quantity': 2, 'name': 'Pizza', 'price': 100000, 'restaurant': 'A'}]
+        self.cursor.lastrowid = 12
+        for target in (patch('main.job_queue', self.queue),
+                       patch('main.get_db_connection', return_value=self.conn)):
+            target.start()
+            self.addCleanup(target.stop)
+
+    def post_order(self):
+        return json.loads(self.app.post('/api/order', data=json.dumps({'user_id': 1}),
+                                        content_type='application/json').data)
+
+    def test_order_jobs_enqueued_after_commit(self):
+        committed = []
+        self.conn.commit.side_effect = lambda: committed.append(self.queue.stats()['queued'])
+        self.assertTrue(self.post_order()['success'])
+        self.assertEqual(committed, [0])
+
+        handled = []
+        worker = Worker(self.queue, {'order.created': handled.append})
+        worker.run_once()
+        self.assertEqual(handled[0]['id'], 12)
+        self.assertEqual(handled[0]['restaurant'], 'A')
+
+        self.cursor.fetchone.return_value = {'user_id': 1, 'restaurant': 'A', 'status': 'pending'}
+        self.app.put('/api/orders/12/status', data=json.dumps({'status': 'confirmed'}),
+                     content_type='application/json')
+        [job] = self.queue.claim('w')
+        self.assertEqual((job.name, job.payload['status']), ('order.status', 'confirmed'))
+
+    def test_queue_failure_does_not_fail_checkout(self):
+        with patch.object(self.queue, 'enqueue_many', side_effect=sqlite3.OperationalError('database is locked')), \
+                patch.object(app.logger, 'exception'):
+            self.assertTrue(self.post_order()['success'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+import unittest
+import io
+import json
+import os
+import tempfile
+import zipfile
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+import sys
+
+sys.path.append('../backend')
+import mysql.connector
+import menu_import
+from main import app, menu_cache, session_tokens
+
+JPEG = b'\xff\xd8\xff\xe0' + bytes(100)
+
+
+def csv_body(rows, header='name,price,restaurant,category'):
+    return (header + '\n' + ''.join(f'{row}\n' for row in rows)).encode('utf-8')
+
+
+class MenuImportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.testing = True
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.conn = MagicMock()
+        self.cursor = self.conn.cursor.return_value
+        for target in (patch('main.get_db_connection', return_value=self.conn),
+                       patch('main.UPLOADS_DIR', self.tmp.name),
+                       patch('main.image_pipeline')):
+            target.start()
+            self.addCleanup(target.stop)
+
+    def post(self, body, content_type='text/csv', query=''):
+        response = self.app.post(f'/api/menu/import{query}', data=body, content_type=content_type)
+        return response.get_json()
+
+    def inserted_rows(self):
+        return [row for c in self.cursor.executemany.call_args_list for row in c[0][1]]
+
+    def test_csv_batches_and_bounded_transactions(self):
+        rows = [f'Món {n},{50000 + n},A,Món chính' for n in range(9)]
+        with patch('main.MENU_IMPORT_BATCH', 2), patch('main.MENU_IMPORT_TRANSACTION_ROWS', 4):
+            result = self.post(csv_body(rows))
+        self.assertEqual((result['inserted'], result['failed']), (9, 0))
+        sizes = [len(c[0][1]) for c in self.cursor.executemany.call_args_list]
+        self.assertEqual(sizes, [2, 2, 2, 2, 1])
+        self.assertTrue(all(c[0][0] == menu_import.INSERT_SQL for c in self.cursor.executemany.call_args_list))
+        # Commit sau mỗi 4 dòng và phần còn lại
+        self.assertEqual(self.conn.commit.call_count, 3)
+        first = dict(zip(menu_import.IMPORT_COLUMNS, self.inserted_rows()[0]))
+        self.assertEqual(first['price'], Decimal(50000))
+        self.assertEqual((first['delivery_time'], first['rating'], first['image']), (30, Decimal(0), None))
+
+    def test_row_errors_reported_and_skipped(self):
+        rows = ['Phở,50000,A,', ',1000,A,', 'Bún,abc,A,', 'Cơm,1.234,A,', 'Lẩu,100,A,x,thừa', 'Gà,-5,A,']
+        result = self.post(csv_body(rows))
+        self.assertTrue(result['success'])
+        self.assertEqual((result['inserted'], result['failed']), (1, 5))
+        self.assertEqual([e['row'] for e in result['errors']], [2, 3, 4, 5, 6])
+        self.assertEqual(result['errors'][0]['message'], 'thiếu name')
+        self.assertEqual(len(self.inserted_rows()), 1)
+
+    def test_error_details_capped(self):
+        importer = menu_import.MenuImporter(lambda: self.conn, None, 'A', max_errors=2)
+        result = importer.run(menu_import.read_rows(io.BytesIO(csv_body([',1,A,'] * 5)), 'csv'))
+        self.assertEqual((result['failed'], len(result['errors']), result['errors_truncated']), (5, 2, True))
+
+    def test_ndjson_with_restaurant_scope(self):
+        lines = [{'name': 'Pizza', 'price': '120000.00'}, {'name': 'Phở', 'price': 50000, 'restaurant': 'B'},
+                 'không phải json', [1, 2]]
+        body = '\n'.join(line if isinstance(line, str) else json.dumps(line) for line in lines).encode()
+        result = self.post(body, 'application/x-ndjson', '?restaurant=A')
+        self.assertEqual(result['inserted'], 1)
+        self.assertEqual([e['message'] for e in result['errors']],
+                         ['món của nhà hàng khác (B)', 'JSON không hợp lệ', 'mỗi dòng phải là một object JSON'])
+
+    def test_restaurant_account_imports_only_own_menu(self):
+        token = session_tokens.sign({'id': 3, 'name': 'A', 'role': 'restaurant'})
+        headers = {'Authorization': f'Bearer {token}'}
+        response = self.app.post('/api/menu/import', data=csv_body(['Phở,1,A,', 'Bún,1,B,']),
+                                 content_type='text/csv', headers=headers)
+        self.assertEqual(response.get_json()['failed'], 1)
+        response = self.app.post('/api/menu/import?restaurant=B', data=csv_body([]),
+                                 content_type='text/csv', headers=headers)
+        self.assertEqual(response.status_code, 403)
+
+    def test_zip_images_stored_once(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.writestr('pho.jpg', JPEG)
+            zf.writestr('note.txt', b'not an image')
+        archive.seek(0)
+        body = csv_body(['Phở,1,A,pho.jpg', 'Phở lớn,2,A,pho.jpg', 'Bún,1,A,bun.jpg', 'Ghi chú,1,A,note.txt'],
+                        header='name,price,restaurant,image')
+        response = self.app.post('/api/menu/import', data={
+            'file': (io.BytesIO(body), 'menu.csv'),
+            'images': (archive, 'images.zip'),
+        }, content_type='multipart/form-data')
+        result = response.get_json()
+        self.assertEqual((result['inserted'], result['failed']), (2, 2))
+        self.assertIn('không có ảnh bun.jpg', result['errors'][0]['message'])
+        images = {dict(zip(menu_import.IMPORT_COLUMNS, row))['image'] for row in self.inserted_rows()}
+        self.assertEqual(len(images), 1)
+        stored = images.pop()
+        self.assertTrue(os.path.isfile(os.path.join(self.tmp.name, stored[len('uploads/'):])))
+
+    def test_existing_upload_without_zip(self):
+        with open(os.path.join(self.tmp.name, 'food1.jpg'), 'wb') as f:
+            f.write(JPEG)
+        body = csv_body(['Phở,1,A,uploads/food1.jpg', 'Bún,1,A,../main.py'], header='name,price,restaurant,image')
+        result = self.post(body)
+        self.assertEqual((result['inserted'], result['failed']), (1, 1))
+        self.assertEqual(self.inserted_rows()[0][3], 'uploads/food1.jpg')
+
+    def test_database_error_keeps_committed_batches(self):
+        self.cursor.executemany.side_effect = [None, None, mysql.connector.Error('mất kết nối')]
+        with patch('main.MENU_IMPORT_BATCH', 2), patch('main.MENU_IMPORT_TRANSACTION_ROWS', 2):
+            result = self.post(csv_body([f'Món {n},1,A,' for n in range(6)]))
+        self.assertFalse(result['success'])
+        self.assertEqual(result['inserted'], 4)
+        self.conn.close.assert_called_once()
+
+    def test_cache_invalidated_after_import(self):
+        version = menu_cache.version
+        self.post(csv_body(['Phở,1,A,']))
+        self.assertEqual(menu_cache.version, version + 1)
+        self.post(csv_body([',1,A,']))
+        self.assertEqual(menu_cache.version, version + 1)
+
+    def test_unknown_format(self):
+        self.assertFalse(self.post(b'<xml/>', 'application/xml')['success'])
+
+
+class MenuExportTestCase(unittest.TestCase):
+    ROWS = [(1, 'Phở', 'Nước dùng "đặc biệt"', Decimal('50000.00'), 'uploads/food1.jpg', 'A', Decimal('4.5'),
+             10, 30, Decimal('1.5'), 'Món chính', None, None),
+            (2, 'Bún, chả', None, Decimal('45000.00'), None, 'A', Decimal('0'), 0, 30, Decimal('0'), None, None,
+             None)]
+
+    def setUp(self):
+        self.app = app.test_client()
+        self.conn = MagicMock()
+        self.cursor = self.conn.cursor.return_value
+        self.cursor.fetchmany.side_effect = [self.ROWS[:1], self.ROWS[1:], []]
+        target = patch('main.get_db_connection', return_value=self.conn)
+        target.start()
+        self.addCleanup(target.stop)
+
+    def test_ndjson_export_round_trips(self):
+        response = self.app.get('/api/menu/export?restaurant=A')
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        self.assertEqual([line['name'] for line in lines], ['Phở', 'Bún, chả'])
+        self.assertEqual(lines[0]['price'], '50000.00')
+        sql, params = self.cursor.execute.call_args[0]
+        self.assertIn('WHERE restaurant = %s ORDER BY id', sql)
+        self.assertEqual(params, ('A',))
+        self.conn.close.assert_called_once()
+
+        # File xuất ra nhập lại được (bỏ qua id, created_at)
+        with tempfile.TemporaryDirectory() as tmp:
+            open(os.path.join(tmp, 'food1.jpg'), 'wb').close()
+            importer = menu_import.MenuImporter(None, menu_import.ImageResolver(tmp), 'A')
+            self.assertEqual(importer.validate(lines[0]),
+                             ('Phở', 'Nước dùng "đặc biệt"', Decimal('50000.00'), 'uploads/food1.jpg', 'A',
+                              Decimal('4.5'), 10, 30, Decimal('1.5'), 'Món chính', None))
+
+    def test_csv_export(self):
+        response = self.app.get('/api/menu/export?format=csv')
+        self.assertEqual(response.mimetype, 'text/csv')
+        rows = list(menu_import.read_rows(io.BytesIO(response.data), 'csv'))
+        self.assertEqual([row['name'] for _, row, _ in rows], ['Phở', 'Bún, chả'])
+        self.assertEqual(rows[0][1]['description'], 'Nước dùng "đặc biệt"')
+        self.assertEqual(self.cursor.execute.call_args[0][1], ())
+
+    def test_json_export_streams_one_document(self):
+        response = self.app.get('/api/menu/export?format=json')
+        self.assertEqual(response.mimetype, 'application/json')
+        result = json.loads(response.data)
+        self.assertTrue(result['success'])
+        self.assertEqual([item['name'] for item in result['items']], ['Phở', 'Bún, chả'])
+        self.assertEqual(result['items'][0]['price'], '50000.00')
+        self.conn.close.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
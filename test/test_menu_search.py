@@ -0,0 +1,95 @@
+import unittest
+import sys
+from decimal import Decimal
+
+sys.path.append('../backend')
+from menu_search import MenuIndex, MenuQuery, InvalidQuery, fold
+
+
+ITEMS = [
+    {'id': 1, 'name': 'Pizza Margherita', 'restaurant': 'Bella Vista Italian',
+     'description': 'Phô mai mozzarella', 'category': 'pizza',
+     'price': Decimal('299000.00'), 'distance': Decimal('1.2'),
+     'rating': Decimal('4.8'), 'reviews': 156},
+    {'id': 2, 'name': 'Phở Bò Đặc Biệt', 'restaurant': 'Phở Hà Nội Xưa',
+     'description': 'Nước dùng ninh 12 tiếng', 'category': 'vietnamese',
+     'price': Decimal('89000.00'), 'distance': Decimal('0.5'),
+     'rating': Decimal('4.7'), 'reviews': 342},
+    {'id': 3, 'name': 'Bún Bò Huế Cay', 'restaurant': 'Cô Ba Huế',
+     'description': 'Chả cá Huế', 'category': 'vietnamese',
+     'price': Decimal('65000.00'), 'distance': Decimal('2.0'),
+     'rating': Decimal('4.7'), 'reviews': 289},
+    {'id': 4, 'name': 'Set Sushi Premium', 'restaurant': 'Tokyo Sushi Bar',
+     'description': 'Cá hồi Na Uy', 'category': 'sushi',
+     'price': Decimal('469000.00'), 'distance': Decimal('5.0'),
+     'rating': Decimal('4.9'), 'reviews': 89},
+]
+
+
+def ids(items):
+    return [item['id'] for item in items]
+
+
+class MenuSearchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.index = MenuIndex(ITEMS)
+
+    def search(self, **args):
+        return self.index.search(MenuQuery.from_args(args))
+
+    def test_fold_removes_vietnamese_diacritics(self):
+        self.assertEqual(fold('Phở Bò Đặc Biệt'), 'pho bo dac biet')
+
+    def test_search_is_diacritic_insensitive(self):
+        # 'pho' khớp cả 'Phở' và 'Phô mai'
+        items, _ = self.search(q='pho')
+        self.assertEqual(ids(items), [1, 2])
+        items, _ = self.search(q='HUẾ')
+        self.assertEqual(ids(items), [3])
+
+    def test_search_matches_prefix_of_every_term(self):
+        items, _ = self.search(q='bo hu')
+        self.assertEqual(ids(items), [3])
+
+    def test_filters(self):
+        items, _ = self.search(category='vietnamese', sort='price-low')
+        self.assertEqual(ids(items), [3, 2])
+        items, _ = self.search(distance='near')
+        self.assertEqual(ids(items), [1, 2])
+        items, _ = self.search(price='premium')
+        self.assertEqual(ids(items), [4])
+        items, _ = self.search(min_price='80000', max_price='300000')
+        self.assertEqual(ids(items), [1, 2])
+        items, _ = self.search(min_rating='4.8')
+        self.assertEqual(ids(items), [1, 4])
+        items, _ = self.search(restaurant='pho ha noi xua')
+        self.assertEqual(ids(items), [2])
+
+    def test_sort_ties_broken_by_id(self):
+        items, _ = self.search(sort='rating')
+        self.assertEqual(ids(items), [4, 1, 2, 3])
+
+    def test_keyset_pagination(self):
+        seen = []
+        cursor = None
+        while True:
+            args = {'sort': 'popular', 'limit': '2'}
+            if cursor:
+                args['cursor'] = cursor
+            items, cursor = self.search(**args)
+            seen.extend(ids(items))
+            if not cursor:
+                break
+        self.assertEqual(seen, [2, 3, 1, 4])
+
+    def test_invalid_query(self):
+        with self.assertRaises(InvalidQuery):
+            MenuQuery.from_args({'sort': 'random'})
+        with self.assertRaises(InvalidQuery):
+            MenuQuery.from_args({'min_price': 'abc'})
+        with self.assertRaises(InvalidQuery):
+            MenuQuery.from_args({'cursor': '!!!'})
+
+
+if __name__ == '__main__':
+    unittest.main()
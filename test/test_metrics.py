@@ -0,0 +1,153 @@
+import unittest
+import os
+import tempfile
+import threading
+from collections import Counter
+from unittest.mock import patch, MagicMock
+import sys
+
+sys.path.append('../backend')
+from metrics import Histogram, Metrics, SamplingProfiler, statement_kind
+from main import app, metrics
+
+
+class HistogramTestCase(unittest.TestCase):
+    def test_render_cumulative_buckets(self):
+        histogram = Histogram('latency_seconds', 'test', ('route',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3):
+            histogram.observe(('/a"b',), value)
+        lines = histogram.render()
+        self.assertIn('latency_seconds_bucket{route="/a\\"b",le="0.1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{route="/a\\"b",le="1.0"} 3', lines)
+        self.assertIn('latency_seconds_bucket{route="/a\\"b",le="+Inf"} 4', lines)
+        self.assertIn('latency_seconds_sum{route="/a\\"b"} 4.05', lines)
+        self.assertIn('latency_seconds_count{route="/a\\"b"} 4', lines)
+
+    def test_statement_kind(self):
+        self.assertEqual(statement_kind('\n    select * from cart'), 'SELECT')
+        self.assertEqual(statement_kind('INSERT INTO orders ...'), 'INSERT')
+        self.assertEqual(statement_kind(''), 'OTHER')
+
+
+class TimedConnectionTestCase(unittest.TestCase):
+    def test_queries_recorded_under_current_route(self):
+        registry = Metrics()
+        raw = MagicMock()
+        raw.cursor.return_value.fetchall.return_value = [{'id': 1}]
+        registry.begin('GET', '/api/cart/<int:user_id>')
+        conn = registry.connect(lambda: raw)
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute('SELECT id FROM cart WHERE user_id = %s', (1,))
+        self.assertEqual(cursor.fetchall(), [{'id': 1}])
+        cursor.executemany('INSERT INTO cart VALUES (%s)', [(1,), (2,)])
+        conn.commit()
+        conn.close()
+        raw.cursor.assert_called_once_with(dictionary=True)
+        raw.close.assert_called_once()
+        self.assertEqual(registry.current.queries, 3)
+
+        elapsed, trace = registry.finish(200, 120)
+        self.assertIsNone(registry.current)
+        text = registry.render()
+        for statement in ('SELECT', 'INSERT', 'COMMIT'):
+            self.assertIn(f'db_query_duration_seconds_count{{route="/api/cart/<int:user_id>",'
+                          f'statement="{statement}"}} 1', text)
+        self.assertIn('db_connect_seconds_count{route="/api/cart/<int:user_id>"} 1', text)
+        self.assertIn('http_response_size_bytes_count{route="/api/cart/<int:user_id>"} 1', text)
+
+        # Ngoài request: nhãn route "-"
+        registry.connect(lambda: raw).cursor().execute('DELETE FROM cart')
+        self.assertIn('db_query_duration_seconds_count{route="-",statement="DELETE"} 1', registry.render())
+
+    def test_disabled_returns_raw_connection(self):
+        registry = Metrics(enabled=False)
+        raw = MagicMock()
+        self.assertIs(registry.connect(lambda: raw), raw)
+        self.assertIsNone(registry.begin('GET', '/'))
+        self.assertIsNone(registry.finish(200, 0))
+
+
+class MetricsEndpointTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.testing = True
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def test_request_latency_db_time_and_server_timing(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+        cursor.fetchall.return_value = []
+        with patch('main.db_pool') as pool:
+            pool.connect.return_value = conn
+            pool.stats.return_value = {'size': 5, 'in_use': 1, 'checkouts': 7}
+            response = self.app.get('/api/orders/user/1')
+            self.assertIn('db;dur=', response.headers['Server-Timing'])
+            self.assertIn('desc="1 queries"', response.headers['Server-Timing'])
+            text = self.app.get('/metrics').get_data(as_text=True)
+
+        route = 'route="/api/orders/user/<int:user_id>"'
+        self.assertIn(f'http_request_duration_seconds_count{{method="GET",{route},status="200"}} 1', text)
+        self.assertIn(f'db_query_duration_seconds_count{{{route},statement="SELECT"}} 1', text)
+        self.assertIn(f'http_request_db_seconds_count{{{route}}} 1', text)
+        self.assertIn(f'json_serialize_seconds_count{{{route}}} 1', text)
+        self.assertIn('db_pool_size 5', text)
+        self.assertIn('# TYPE db_pool_checkouts_total counter', text)
+
+    def test_unmatched_routes_share_one_label(self):
+        self.app.get('/no/such/path')
+        self.app.get('/another/missing')
+        text = metrics.render()
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="<unmatched>",status="404"} 2', text)
+
+    def test_rejected_token_still_measured(self):
+        self.app.get('/api/orders/user/1', headers={'Authorization': 'Bearer hỏng'})
+        self.assertIn('status="401"} 1', metrics.render())
+
+
+def busy_handler(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class SamplingProfilerTestCase(unittest.TestCase):
+    def test_slow_request_dumps_folded_stacks(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            profiler = SamplingProfiler(tmp, slow=0.05, interval=0.001)
+            paths = []
+
+            def request(duration):
+                profiler.start()
+                stop = threading.Event()
+                threading.Timer(duration, stop.set).start()
+                busy_handler(stop)
+                paths.append(profiler.stop(duration, 'GET /api/menu'))
+
+            thread = threading.Thread(target=request, args=(0.2,))
+            thread.start()
+            thread.join()
+            self.assertTrue(paths[0].endswith('ms.folded'))
+            with open(paths[0]) as f:
+                lines = f.read().splitlines()
+            stack, count = lines[0].rsplit(' ', 1)
+            self.assertGreater(int(count), 0)
+            self.assertIn('busy_handler_(test_metrics.py:', stack)
+            # Gốc stack đứng trước
+            self.assertLess(stack.index('request_('), stack.index('busy_handler_('))
+
+            # Request nhanh: không ghi file
+            thread = threading.Thread(target=request, args=(0.01,))
+            thread.start()
+            thread.join()
+            self.assertIsNone(paths[1])
+            self.assertEqual(len(os.listdir(tmp)), 1)
+
+    def test_keeps_newest_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            profiler = SamplingProfiler(tmp, slow=0, max_files=2)
+            paths = [profiler._dump(Counter({'a;b': 1}), 1, f'GET /{n}') for n in range(3)]
+            self.assertEqual(sorted(os.listdir(tmp)), sorted(os.path.basename(p) for p in paths[1:]))
+
+
+if __name__ == '__main__':
+    unittest.main()
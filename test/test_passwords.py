@@ -0,0 +1,125 @@
+import unittest
+import threading
+import sys
+
+sys.path.append('../backend')
+import passwords
+from passwords import HasherBusy, PasswordHasher, PasswordTooLong
+from rate_limit import LoginLimiter, TokenBucket
+
+FAST = 'pbkdf2:sha256:1000'
+
+
+class PasswordHasherTestCase(unittest.TestCase):
+    def test_hash_and_verify(self):
+        hasher = PasswordHasher(scheme=FAST, workers=1)
+        stored = hasher.hash('secret')
+        self.assertTrue(stored.startswith('pbkdf2:sha256:1000$'))
+        self.assertEqual(hasher.verify(stored, 'secret'), (True, False))
+        self.assertEqual(hasher.verify(stored, 'wrong'), (False, False))
+
+    def test_legacy_plaintext_needs_rehash(self):
+        hasher = PasswordHasher(scheme=FAST, workers=1)
+        self.assertEqual(hasher.verify('password123', 'password123'), (True, True))
+        self.assertEqual(hasher.verify('password123', 'password124'), (False, True))
+
+    def test_scheme_change_needs_rehash(self):
+        old = PasswordHasher(scheme='pbkdf2:sha256:500', workers=1).hash('secret')
+        self.assertEqual(PasswordHasher(scheme=FAST, workers=1).verify(old, 'secret'), (True, True))
+
+    @unittest.skipIf(passwords.argon2 is None, 'argon2-cffi chưa được cài')
+    def test_argon2_cost(self):
+        cheap = PasswordHasher(scheme='argon2', cost=1, workers=1)
+        stored = cheap.hash('secret')
+        self.assertTrue(stored.startswith('$argon2'))
+        self.assertEqual(cheap.verify(stored, 'secret'), (True, False))
+        self.assertEqual(PasswordHasher(scheme='argon2', cost=2, workers=1).verify(stored, 'secret'),
+                         (True, True))
+
+    @unittest.skipIf(passwords.bcrypt is None, 'bcrypt chưa được cài')
+    def test_bcrypt_cost(self):
+        stored = PasswordHasher(scheme='bcrypt', cost=4, workers=1).hash('secret')
+        self.assertEqual(PasswordHasher(scheme='bcrypt', cost=4, workers=1).verify(stored, 'secret'),
+                         (True, False))
+        self.assertEqual(PasswordHasher(scheme='bcrypt', cost=5, workers=1).verify(stored, 'secret'),
+                         (True, True))
+
+    @unittest.skipIf(passwords.bcrypt is None, 'bcrypt chưa được cài')
+    def test_bcrypt_rejects_over_72_bytes(self):
+        hasher = PasswordHasher(scheme='bcrypt', cost=4, workers=1)
+        # 72 byte UTF-8 vẫn được; 'ệ' là 3 byte nên 25 ký tự là 75 byte
+        stored = hasher.hash('a' * 72)
+        with self.assertRaises(PasswordTooLong):
+            hasher.hash('ệ' * 25)
+        self.assertEqual(hasher.verify(stored, 'a' * 73), (False, False))
+
+    def test_busy_when_queue_full(self):
+        hasher = PasswordHasher(scheme=FAST, workers=1, max_pending=1, wait_timeout=0.05)
+        release = threading.Event()
+        started = threading.Event()
+
+        def slow(_):
+            started.set()
+            release.wait()
+
+        hasher._hash = slow
+        worker = threading.Thread(target=hasher.hash, args=('x',))
+        worker.start()
+        started.wait()
+        with self.assertRaises(HasherBusy):
+            hasher.verify('plain', 'plain')
+        release.set()
+        worker.join()
+
+
+class TokenBucketTestCase(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+
+    def clock(self):
+        return self.now
+
+    def test_burst_then_refill(self):
+        bucket = TokenBucket(rate=1, burst=3, clock=self.clock)
+        self.assertEqual([bucket.take('a') for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(bucket.take('a'), 1.0)
+        # Key khác không bị ảnh hưởng
+        self.assertEqual(bucket.take('b'), 0)
+        self.now += 1.5
+        self.assertEqual(bucket.take('a'), 0)
+        self.assertAlmostEqual(bucket.take('a'), 0.5)
+
+    def test_evicts_least_recently_used(self):
+        bucket = TokenBucket(rate=1, burst=1, max_keys=2, clock=self.clock)
+        bucket.take('a')
+        bucket.take('b')
+        self.now += 1
+        bucket.take('c')
+        self.assertEqual(list(bucket._buckets), ['b', 'c'])
+
+    def test_drained_bucket_not_evicted(self):
+        bucket = TokenBucket(rate=0.01, burst=1, max_keys=2, clock=self.clock)
+        bucket.take('victim')
+        self.assertGreater(bucket.take('victim'), 0)
+        # Rải key khác không làm bucket đang cạn được tạo lại đầy
+        for n in range(10):
+            bucket.take('spray-%d' % n)
+        self.assertIn('victim', bucket._buckets)
+        # Đã hồi đầy thì bị đẩy ra như bình thường
+        self.now += 100
+        bucket.take('spray-x')
+        self.assertNotIn('victim', bucket._buckets)
+        self.assertEqual(len(bucket._buckets), 2)
+
+    def test_login_limiter_per_user_and_ip(self):
+        limiter = LoginLimiter(per_ip=TokenBucket(1, 10, clock=self.clock),
+                               per_user=TokenBucket(1, 2, clock=self.clock))
+        self.assertEqual(limiter.check('1.1.1.1', 'Alice'), 0)
+        self.assertEqual(limiter.check('2.2.2.2', 'alice'), 0)
+        # Username bị dò từ nhiều IP vẫn bị chặn
+        self.assertGreater(limiter.check('3.3.3.3', 'ALICE'), 0)
+        self.assertEqual(limiter.check('3.3.3.3', 'bob'), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,278 @@
+import unittest
+import json
+import os
+import tempfile
+from unittest.mock import patch, MagicMock
+import sys
+
+sys.path.append('../backend')
+import mysql.connector
+import main
+import sqlite_db
+from cart_store import TableCartStore
+from db_pool import ConnectionPool
+from dialects import SQLITE
+from main import app, menu_cache
+from replicas import Replica, ReplicaRouter, replica_lag
+from repository import Repository
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def fake_pool(name):
+    pool = MagicMock()
+    pool.connect.return_value.label = name
+    return pool
+
+
+class ReplicaRouterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.lags = {'r1': 0.0, 'r2': 0.0}
+        self.primary = fake_pool('primary')
+        self.replicas = [Replica(name, fake_pool(name)) for name in ('r1', 'r2')]
+        self.router = ReplicaRouter(self.primary, self.replicas, lag=lambda conn: self.lags[conn.label],
+                                    max_lag=5, check_interval=0, window=3, clock=self.clock)
+
+    def read(self, *keys, router=None):
+        return (router or self.router).read(*keys).label
+
+    def test_no_replicas_reads_primary(self):
+        router = ReplicaRouter(self.primary, check_interval=0)
+        self.assertEqual(self.read(('user', 1), router=router), 'primary')
+        router.wrote(('user', 1))
+        self.assertEqual(router.stats()['replicas'], [])
+
+    def test_unchecked_replicas_not_used(self):
+        self.assertEqual(self.read(), 'primary')
+        self.assertEqual(self.router.fallback_reads, 1)
+
+    def test_round_robin(self):
+        self.router.check()
+        self.assertEqual([self.read() for _ in range(4)], ['r1', 'r2', 'r1', 'r2'])
+        self.assertEqual([r['reads'] for r in self.router.stats()['replicas']], [2, 2])
+
+    def test_lagging_replica_skipped(self):
+        self.lags['r2'] = 30.0
+        self.router.check()
+        self.assertEqual({self.read() for _ in range(4)}, {'r1'})
+
+        # Replication dừng (Seconds_Behind_Source NULL) cũng bị loại
+        self.lags['r1'] = None
+        self.router.check()
+        self.assertEqual(self.read(), 'primary')
+
+        self.lags.update(r1=1.0, r2=2.0)
+        self.router.check()
+        self.assertEqual({self.read() for _ in range(4)}, {'r1', 'r2'})
+
+    def test_failed_replica_marked_down_until_next_check(self):
+        self.router.check()
+        self.replicas[0].pool.connect.side_effect = mysql.connector.errors.InterfaceError(msg='down')
+        self.assertEqual([self.read() for _ in range(3)], ['r2', 'r2', 'r2'])
+        stats = self.router.stats()['replicas'][0]
+        self.assertEqual((stats['usable'], stats['failures']), (False, 1))
+        self.assertIn('down', stats['error'])
+
+        # Cả hai hỏng: đọc primary
+        self.replicas[1].pool.connect.side_effect = mysql.connector.errors.InterfaceError(msg='down')
+        self.assertEqual(self.read(), 'primary')
+
+        # Kiểm tra lại sau khi replica sống lại
+        for replica in self.replicas:
+            replica.pool.connect.side_effect = None
+        self.router.check()
+        self.assertEqual({self.read() for _ in range(2)}, {'r1', 'r2'})
+
+    def test_read_your_writes_window(self):
+        self.router.check()
+        self.router.wrote(('user', 1), ('restaurant', 'A'))
+        self.assertEqual(self.read(('ip', '10.0.0.1'), ('user', 1)), 'primary')
+        self.assertEqual(self.read(None, ('restaurant', 'A')), 'primary')
+        self.assertIn(self.read(('user', 2)), ('r1', 'r2'))
+        self.assertEqual(self.router.pinned_reads, 2)
+
+        self.clock.now += 3
+        self.assertIn(self.read(('user', 1)), ('r1', 'r2'))
+
+    def test_client_carried_write_reads_primary(self):
+        self.router.check()
+        self.assertEqual(self.router.read(('user', 1), pinned=True).label, 'primary')
+        self.assertEqual(self.router.pinned_reads, 1)
+
+    def test_default_window_covers_max_lag_and_check_interval(self):
+        router = ReplicaRouter(self.primary, self.replicas, max_lag=5, check_interval=2)
+        self.assertEqual(router.window, 7)
+
+    def test_expired_writes_pruned(self):
+        self.router.max_keys = 2
+        self.router.wrote(('user', 1), ('user', 2))
+        self.clock.now += 5
+        self.router.wrote(('user', 3))
+        self.assertEqual(list(self.router._written), [('user', 3)])
+
+
+class ReplicaLagTestCase(unittest.TestCase):
+    def connection(self, rows, unsupported=False):
+        cursor = MagicMock()
+        if unsupported:
+            cursor.execute.side_effect = [mysql.connector.errors.ProgrammingError(msg='syntax'), None]
+        cursor.fetchall.return_value = rows
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        return conn, cursor
+
+    def test_seconds_behind_source(self):
+        conn, cursor = self.connection([{'Seconds_Behind_Source': 3}])
+        self.assertEqual(replica_lag(conn), 3.0)
+        cursor.execute.assert_called_once_with('SHOW REPLICA STATUS')
+        cursor.close.assert_called_once()
+
+    def test_old_server_uses_slave_status(self):
+        conn, cursor = self.connection([{'Seconds_Behind_Master': 0}], unsupported=True)
+        self.assertEqual(replica_lag(conn), 0.0)
+        cursor.execute.assert_called_with('SHOW SLAVE STATUS')
+
+    def test_not_replicating(self):
+        self.assertIsNone(replica_lag(self.connection([{'Seconds_Behind_Source': None}])[0]))
+        self.assertIsNone(replica_lag(self.connection([])[0]))
+
+
+class SQLiteReplicaRoutingTestCase(unittest.TestCase):
+    """Primary và replica stand-in (cùng file SQLite, mở chỉ đọc) qua các route."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'test.sqlite3')
+        sqlite_db.create_schema(path)
+        primary = ConnectionPool(lambda: sqlite_db.connect(path), size=2)
+        replica = Replica('standin', ConnectionPool(lambda: sqlite_db.connect(path, readonly=True), size=2))
+        self.router = ReplicaRouter(primary, [replica], lag=lambda conn: 0.0, check_interval=0, window=60)
+        self.addCleanup(primary.dispose)
+        self.addCleanup(self.router.close)
+        self.router.check()
+
+        read = lambda scope=None: main.get_read_connection(scope)
+        cart_store = TableCartStore(primary.connect, SQLITE, read=read)
+        for target in (patch('main.get_db_connection', primary.connect),
+                       patch('main.db_router', self.router),
+                       patch('main.cart_store', cart_store),
+                       patch('main.repository', Repository(primary.connect, SQLITE, cart=cart_store, read=read)),
+                       patch('main._enqueue_order_jobs')):
+            target.start()
+            self.addCleanup(target.stop)
+        menu_cache.invalidate()
+        self.addCleanup(menu_cache.invalidate)
+
+        db = primary.connect()
+        cursor = db.cursor()
+        cursor.execute("INSERT INTO user (username, email, password) VALUES ('khach', 'k@test.local', '-')")
+        self.user_id = cursor.lastrowid
+        cursor.execute("INSERT INTO menu_items (name, price, restaurant) VALUES ('Phở', '50000.00', 'Quán A')")
+        self.item_id = cursor.lastrowid
+        db.commit()
+        cursor.close()
+        db.close()
+
+    def client(self, ip):
+        client = app.test_client()
+        client.environ_base['REMOTE_ADDR'] = ip
+        return client
+
+    def replica_reads(self):
+        return self.router.stats()['replicas'][0]['reads']
+
+    def test_writer_reads_primary_others_read_replica(self):
+        customer, other = self.client('10.0.0.1'), self.client('10.0.0.2')
+        self.assertTrue(customer.post('/api/cart', data=json.dumps(
+            {'user_id': self.user_id, 'item_id': self.item_id, 'quantity': 2}),
+            content_type='application/json').get_json()['success'])
+        created = customer.post('/api/order', data=json.dumps({'user_id': self.user_id}),
+                                content_type='application/json').get_json()
+        self.assertTrue(created['success'], created)
+
+        # Người vừa đặt thấy đơn ngay (đọc primary)
+        before = self.replica_reads()
+        orders = customer.get(f'/api/orders/user/{self.user_id}').get_json()['orders']
+        self.assertEqual([order['id'] for order in orders], created['orders'])
+        self.assertEqual(self.replica_reads(), before)
+
+        # Request khác đọc replica (snapshot menu + dòng giỏ), trừ dữ liệu vừa
+        # đổi (đơn của nhà hàng)
+        self.assertEqual(other.get('/api/cart/%d' % (self.user_id + 1)).get_json()['items'], [])
+        self.assertEqual(self.replica_reads(), before + 2)
+        self.assertEqual(len(other.get('/api/orders/restaurant/Quán A').get_json()['orders']), 1)
+        self.assertEqual(self.replica_reads(), before + 2)
+
+        # Hết cửa sổ read-your-writes
+        self.router._written.clear()
+        customer.delete_cookie(main.READ_YOUR_WRITES_COOKIE)
+        self.assertEqual(len(customer.get(f'/api/orders/user/{self.user_id}').get_json()['orders']), 1)
+        self.assertEqual(self.replica_reads(), before + 3)
+
+    def test_write_deadline_carried_by_client(self):
+        customer = self.client('10.0.0.4')
+        response = customer.post('/api/cart', data=json.dumps(
+            {'user_id': self.user_id, 'item_id': self.item_id, 'quantity': 1}),
+            content_type='application/json')
+        until = response.headers[main.READ_YOUR_WRITES_HEADER]
+        self.assertIn('%s=%s' % (main.READ_YOUR_WRITES_COOKIE, until), response.headers['Set-Cookie'])
+
+        # Worker khác không có mốc trong bộ nhớ: cookie vẫn giữ đọc primary
+        self.router._written.clear()
+        before = self.replica_reads()
+        self.assertEqual(len(customer.get(f'/api/cart/{self.user_id}').get_json()['items']), 1)
+        self.assertEqual(self.replica_reads(), before)
+
+        # Client không dùng cookie gửi lại qua header
+        self.client('10.0.0.5').get(f'/api/cart/{self.user_id}',
+                                    headers={main.READ_YOUR_WRITES_HEADER: until})
+        self.assertEqual(self.replica_reads(), before)
+
+        # Mốc đã qua hoặc xa hơn một cửa sổ bị bỏ qua (menu đã có trong cache:
+        # mỗi request đọc dòng giỏ từ replica)
+        for forged in ('1', '%.3f' % (float(until) + 3600), 'abc'):
+            self.client('10.0.0.5').get(f'/api/cart/{self.user_id}',
+                                        headers={main.READ_YOUR_WRITES_HEADER: forged})
+        self.assertEqual(self.replica_reads(), before + 3)
+
+    def test_failed_write_does_not_pin(self):
+        customer = self.client('10.0.0.6')
+        # Lỗi trả 200 kèm success = false
+        response = customer.post('/api/cart/batch', data=json.dumps({'user_id': self.user_id, 'items': 'x'}),
+                                 content_type='application/json')
+        self.assertFalse(response.get_json()['success'])
+        self.assertNotIn(main.READ_YOUR_WRITES_HEADER, response.headers)
+        self.assertNotIn('Set-Cookie', response.headers)
+        self.assertEqual(self.router._written, {})
+
+    def test_standin_replica_is_read_only(self):
+        db = self.router.replicas[0].pool.connect()
+        cursor = db.cursor()
+        try:
+            with self.assertRaises(mysql.connector.Error):
+                cursor.execute("DELETE FROM cart")
+        finally:
+            cursor.close()
+            db.close()
+
+    def test_stats_and_metrics(self):
+        self.client('10.0.0.3').get(f'/api/cart/{self.user_id}')
+        stats = app.test_client().get('/api/pool/stats').get_json()['replicas']
+        self.assertEqual((stats['replicas'][0]['name'], stats['replicas'][0]['usable']), ('standin', True))
+        text = app.test_client().get('/metrics').get_data(as_text=True)
+        self.assertIn('db_replica_up{replica="standin"} 1', text)
+        # Snapshot menu + dòng giỏ
+        self.assertIn('db_replica_reads_total{replica="standin"} 2', text)
+        self.assertEqual(text.count('# TYPE db_primary_reads_total counter'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
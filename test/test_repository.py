@@ -0,0 +1,242 @@
+import unittest
+import json
+import os
+import tempfile
+import uuid
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+import sys
+
+sys.path.append('../backend')
+import mysql.connector
+import main
+import sqlite_db
+from cart_store import TableCartStore
+from cart_view import SHIPPING_FEE
+from db_pool import ConnectionPool
+from dialects import MYSQL, SQLITE
+from main import app, menu_cache
+from passwords import PasswordHasher
+from rate_limit import LoginLimiter, TokenBucket
+from repository import PreparedStatementConnection, Repository
+
+
+class PreparedStatementConnectionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.raw = MagicMock()
+        self.statements = []
+
+        def new_cursor(**kwargs):
+            cursor = MagicMock()
+            cursor.with_rows = False
+            self.statements.append((kwargs, cursor))
+            return cursor
+
+        self.raw.cursor.side_effect = new_cursor
+
+    def test_statement_prepared_once_per_connection(self):
+        conn = PreparedStatementConnection(self.raw)
+        sql = "SELECT id FROM user WHERE username=%s"
+        for name in ('a', 'b'):
+            cursor = conn.cursor(prepared=True, dictionary=True)
+            # Chuỗi bằng nhau nhưng khác đối tượng (vd. dựng lại mỗi request)
+            cursor.execute(''.join(sql), (name,))
+            cursor.close()
+        self.assertEqual(len(self.statements), 1)
+        kwargs, statement = self.statements[0]
+        self.assertEqual(kwargs, {'prepared': True, 'dictionary': True})
+        # Connector chỉ bỏ qua PREPARE khi chạy lại đúng đối tượng chuỗi cũ
+        first, second = [c[0][0] for c in statement.execute.call_args_list]
+        self.assertIs(first, second)
+        self.assertEqual((conn.prepared, conn.reused), (1, 1))
+
+    def test_lru_eviction_closes_statement(self):
+        conn = PreparedStatementConnection(self.raw, size=2)
+        cursor = conn.cursor(prepared=True)
+        for sql in ('SELECT 1', 'SELECT 2', 'SELECT 1', 'SELECT 3'):
+            cursor.execute(sql)
+        closed = [kwargs_cursor[1].close.called for kwargs_cursor in self.statements]
+        self.assertEqual(closed, [False, True, False])
+
+        conn.close()
+        self.assertTrue(all(statement.close.called for _, statement in self.statements))
+        self.raw.close.assert_called_once()
+
+    def test_unread_rows_drained_before_next_statement(self):
+        conn = PreparedStatementConnection(self.raw)
+        cursor = conn.cursor(prepared=True)
+        cursor.execute('SELECT id FROM cart WHERE user_id=%s', (1,))
+        statement = self.statements[0][1]
+        statement.with_rows = True
+        cursor.fetchone()
+        cursor.close()
+        statement.fetchall.assert_called_once()
+        statement.close.assert_not_called()
+
+    def test_plain_cursor_and_disabled_cache(self):
+        conn = PreparedStatementConnection(self.raw)
+        conn.cursor(dictionary=True)
+        self.assertEqual(self.statements[0][0], {'dictionary': True})
+
+        conn = PreparedStatementConnection(self.raw, size=0)
+        conn.cursor(prepared=True)
+        self.assertEqual(self.statements[1][0], {'prepared': True})
+
+
+class ApiFlowTests:
+    """Luồng đăng ký -> đặt hàng -> nhà hàng xác nhận qua các route, chạy trên
+    database thật của từng backend (lớp con cung cấp get_connection)."""
+
+    dialect = None
+
+    def setUp(self):
+        self.suffix = uuid.uuid4().hex[:8]
+        self.restaurant = f'Test Restaurant {self.suffix}'
+        self.app = app.test_client()
+        get_connection = self.get_connection
+        cart_store = TableCartStore(get_connection, self.dialect)
+        limiter = LoginLimiter(per_ip=TokenBucket(rate=1, burst=1000), per_user=TokenBucket(rate=1, burst=1000))
+        for target in (patch('main.get_db_connection', get_connection),
+                       patch('main.db_dialect', self.dialect),
+                       patch('main.cart_store', cart_store),
+                       patch('main.repository', Repository(get_connection, self.dialect, cart=cart_store)),
+                       patch('main.login_limiter', limiter),
+                       patch('main.password_hasher', PasswordHasher(scheme='pbkdf2:sha256:1000', workers=1)),
+                       patch('main._enqueue_order_jobs')):
+            target.start()
+            self.addCleanup(target.stop)
+        menu_cache.invalidate()
+        self.addCleanup(menu_cache.invalidate)
+
+    def post(self, path, data, method='post'):
+        response = getattr(self.app, method)(path, data=json.dumps(data), content_type='application/json')
+        return response.get_json()
+
+    def register(self, name):
+        username = f'{name}_{self.suffix}'
+        result = self.post('/api/register', {'username': username, 'email': f'{username}@test.local',
+                                             'password': 'secret', 'confirm_password': 'secret'})
+        self.assertTrue(result['success'], result)
+        return username
+
+    def test_order_flow(self):
+        username = self.register('customer')
+        self.assertFalse(self.post('/api/register', {'username': username, 'email': 'x@test.local',
+                                                     'password': 'a', 'confirm_password': 'a'})['success'])
+        self.assertFalse(self.post('/api/login', {'username': username, 'password': 'sai'})['success'])
+        login = self.post('/api/login', {'username': username, 'password': 'secret'})
+        self.assertTrue(login['success'])
+        user_id = login['user']['id']
+
+        for name, price in (('Phở', '50000.00'), ('Bún', '45000.50')):
+            main.repository.menu.add(name, price, None, 'Món chính', 30, 1, None, self.restaurant, None)
+        menu = {item['name']: item for item in menu_cache.get(main._load_menu_items).by_id.values()
+                if item['restaurant'] == self.restaurant}
+        pho, bun = menu['Phở']['id'], menu['Bún']['id']
+
+        self.assertTrue(self.post('/api/cart', {'user_id': user_id, 'item_id': pho, 'quantity': 1})['success'])
+        self.assertTrue(self.post('/api/cart/batch', {'user_id': user_id, 'items': [
+            {'item_id': pho, 'quantity': 1}, {'item_id': bun, 'quantity': 2}]})['success'])
+        cart = self.app.get(f'/api/cart/{user_id}').get_json()
+        lines = {line['item_id']: line for line in cart['items']}
+        self.assertEqual((lines[pho]['quantity'], lines[bun]['quantity']), (2, 2))
+
+        self.assertTrue(self.post('/api/cart/update', {'cart_id': lines[bun]['id'], 'quantity': 1}, 'put')['success'])
+        self.assertTrue(self.app.delete(f"/api/cart/{lines[pho]['id']}").get_json()['success'])
+        self.assertTrue(self.post('/api/cart', {'user_id': user_id, 'item_id': pho, 'quantity': 1})['success'])
+
+        created = self.post('/api/order', {'user_id': user_id})
+        self.assertTrue(created['success'], created)
+        self.assertEqual(len(created['orders']), 1)
+        self.assertEqual(self.app.get(f'/api/cart/{user_id}').get_json()['items'], [])
+        self.assertFalse(self.post('/api/order', {'user_id': user_id})['success'])
+
+        orders = self.app.get(f'/api/orders/user/{user_id}').get_json()['orders']
+        self.assertEqual([order['id'] for order in orders], created['orders'])
+        # 50000 + 45000.50 + phí ship
+        self.assertEqual(Decimal(orders[0]['total_amount']), Decimal('95000.50') + SHIPPING_FEE)
+
+        order_id = created['orders'][0]
+        self.assertTrue(self.post(f'/api/orders/{order_id}/status', {'status': 'confirmed'}, 'put')['success'])
+        restaurant_orders = self.app.get(f'/api/orders/restaurant/{self.restaurant}').get_json()['orders']
+        self.assertEqual([(order['id'], order['status'], order['username']) for order in restaurant_orders],
+                         [(order_id, 'confirmed', username)])
+
+        # Rollup doanh thu được cập nhật cùng transaction theo dialect
+        report = self.app.get(f'/api/analytics/restaurant/{self.restaurant}?granularity=hour').get_json()
+        self.assertTrue(report['success'], report)
+        self.assertEqual((report['totals']['orders'], Decimal(str(report['totals']['revenue']))),
+                         (1, Decimal('95000.50') + SHIPPING_FEE))
+
+    def test_order_prices_from_menu_items_not_snapshot(self):
+        username = self.register('buyer')
+        user_id = self.post('/api/login', {'username': username, 'password': 'secret'})['user']['id']
+        main.repository.menu.add('Cơm', '40000.00', None, None, 30, 1, None, self.restaurant, None)
+        item_id = next(item['id'] for item in menu_cache.get(main._load_menu_items).by_id.values()
+                       if item['restaurant'] == self.restaurant)
+        self.assertTrue(self.post('/api/cart', {'user_id': user_id, 'item_id': item_id, 'quantity': 2})['success'])
+
+        # Đổi giá thẳng trong bảng: snapshot menu (giỏ hàng) vẫn giữ giá cũ
+        db = self.get_connection()
+        cursor = db.cursor()
+        cursor.execute("UPDATE menu_items SET price = %s WHERE id = %s", ('35000.00', item_id))
+        db.commit()
+        cursor.close()
+        db.close()
+        cart = self.app.get(f'/api/cart/{user_id}').get_json()
+        self.assertEqual(Decimal(str(cart['items'][0]['price'])), Decimal('40000'))
+
+        created = self.post('/api/order', {'user_id': user_id})
+        self.assertTrue(created['success'], created)
+        orders = self.app.get(f'/api/orders/user/{user_id}').get_json()['orders']
+        self.assertEqual(Decimal(orders[0]['total_amount']), Decimal('70000') + SHIPPING_FEE)
+
+
+class SQLiteApiFlowTestCase(ApiFlowTests, unittest.TestCase):
+    dialect = SQLITE
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'test.sqlite3')
+        sqlite_db.create_schema(path)
+        pool = ConnectionPool(lambda: sqlite_db.connect(path), size=2)
+        self.addCleanup(pool.dispose)
+        self.get_connection = pool.connect
+        super().setUp()
+
+    def test_integrity_error_is_mysql_error(self):
+        self.register('dup')
+        with self.assertRaises(mysql.connector.IntegrityError):
+            main.repository.users.create(f'dup_{self.suffix}', 'other@test.local', '-')
+
+
+@unittest.skipUnless(os.environ.get('TEST_MYSQL_DATABASE'),
+                     'đặt TEST_MYSQL_DATABASE (database đã tạo bằng qldapm_2.sql) để chạy trên MySQL')
+class MySQLApiFlowTestCase(ApiFlowTests, unittest.TestCase):
+    dialect = MYSQL
+
+    def setUp(self):
+        config = dict(main.DB_CONFIG, database=os.environ['TEST_MYSQL_DATABASE'])
+        pool = ConnectionPool(lambda: PreparedStatementConnection(mysql.connector.connect(**config)), size=2)
+        self.addCleanup(pool.dispose)
+        self.get_connection = pool.connect
+        super().setUp()
+        self.addCleanup(self.cleanup)
+
+    def cleanup(self):
+        db = self.get_connection()
+        cursor = db.cursor()
+        # Giỏ/đơn của user test xoá theo ON DELETE CASCADE
+        cursor.execute("DELETE FROM user WHERE username LIKE %s", (f'%_{self.suffix}',))
+        cursor.execute("DELETE FROM orders WHERE restaurant = %s", (self.restaurant,))
+        cursor.execute("DELETE FROM menu_items WHERE restaurant = %s", (self.restaurant,))
+        for table in ('sales_hourly', 'item_sales_hourly'):
+            cursor.execute(f"DELETE FROM {table} WHERE restaurant = %s", (self.restaurant,))
+        db.commit()
+        cursor.close()
+        db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
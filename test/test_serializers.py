@@ -0,0 +1,98 @@
+import unittest
+import importlib
+import json
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import patch
+import sys
+
+sys.path.append('../backend')
+import serializers
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date as werkzeug_http_date
+from serializers import ORDER_SUMMARY, RESTAURANT_ORDER, dumps, fetch_batches, http_date, stream_array
+from main import app
+
+PAYLOAD = {
+    'success': True,
+    'orders': [
+        {'id': 1, 'restaurant': 'Phở Hà Nội', 'total_amount': Decimal('180000.00'), 'status': 'pending',
+         'created_at': datetime(2025, 1, 1, 7, 5, 9), 'updated_at': datetime(2025, 1, 1, 7, 5, 9, 123456)},
+        {'id': 2, 'restaurant': None, 'total_amount': Decimal('0.50'), 'status': 'cancelled',
+         'created_at': date(2024, 2, 29), 'updated_at': None},
+    ],
+    'stats': {1: 2.5, 2: [Decimal('1.10'), 'a"b\n']},
+}
+
+
+class SerializerParityTestCase(unittest.TestCase):
+    def flask_default(self, payload):
+        return json.loads(DefaultJSONProvider(app).dumps(payload))
+
+    def test_same_values_as_jsonify(self):
+        self.assertEqual(json.loads(dumps(PAYLOAD)), self.flask_default(PAYLOAD))
+
+    def test_http_date_matches_werkzeug(self):
+        moments = [datetime(2025, 12, 31, 23, 59, 59), date(2024, 2, 29),
+                   datetime(2025, 6, 1, 8, tzinfo=timezone(timedelta(hours=7)))]
+        for moment in moments:
+            self.assertEqual(http_date(moment), werkzeug_http_date(moment))
+        for day in range(7):
+            moment = datetime(2025, 3, 3) + timedelta(days=day, hours=day)
+            self.assertEqual(http_date(moment), werkzeug_http_date(moment))
+
+    def test_stdlib_fallback(self):
+        self.addCleanup(importlib.reload, serializers)
+        with patch.dict(sys.modules, {'orjson': None}):
+            fallback = importlib.reload(serializers)
+        self.assertIsNone(fallback.orjson)
+        self.assertEqual(json.loads(fallback.dumps(PAYLOAD)), self.flask_default(PAYLOAD))
+        self.assertIn('Phở'.encode('utf-8'), fallback.dumps(PAYLOAD))
+
+    def test_unknown_type_raises(self):
+        with self.assertRaises(TypeError):
+            dumps({'x': object()})
+
+    def test_jsonify_uses_fast_provider(self):
+        with app.app_context():
+            response = app.json.response(PAYLOAD)
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(response.get_data(), dumps(PAYLOAD))
+        # indent... vẫn đi qua DefaultJSONProvider
+        self.assertIn('\n', app.json.dumps({'a': 1}, indent=2))
+
+
+class StreamTestCase(unittest.TestCase):
+    def test_stream_array_equals_single_document(self):
+        rows = PAYLOAD['orders'] * 5
+        batches = [rows[:3], [], rows[3:7], rows[7:]]
+        body = b''.join(stream_array({'success': True, 'next_cursor': None}, 'orders', batches))
+        self.assertEqual(json.loads(body), json.loads(dumps({'success': True, 'next_cursor': None, 'orders': rows})))
+
+        empty = b''.join(stream_array({}, 'items', []))
+        self.assertEqual(json.loads(empty), {'items': []})
+
+    def test_fetch_batches(self):
+        class Cursor:
+            def __init__(self):
+                self.rows = list(range(5))
+
+            def fetchmany(self, size):
+                batch, self.rows = self.rows[:size], self.rows[size:]
+                return batch
+
+        self.assertEqual(list(fetch_batches(Cursor(), 2)), [[0, 1], [2, 3], [4]])
+
+
+class RowSchemaTestCase(unittest.TestCase):
+    def test_select_and_rows(self):
+        self.assertEqual(RESTAURANT_ORDER.select,
+                         'o.id, o.user_id, u.username, o.total_amount, o.status, o.created_at, o.updated_at')
+        created = datetime(2025, 1, 1)
+        [row] = ORDER_SUMMARY.rows([(1, 'A', Decimal('5.00'), 'pending', created, created)])
+        self.assertEqual(row, {'id': 1, 'restaurant': 'A', 'total_amount': Decimal('5.00'),
+                               'status': 'pending', 'created_at': created, 'updated_at': created})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+
+sys.path.append('../backend')
+from server import _pre_fork, build_options, parse_args, pool_settings, shared_state_problems, single_worker_only
+
+
+class ServerConfigTestCase(unittest.TestCase):
+    def test_pool_per_thread_by_default(self):
+        self.assertEqual(pool_settings(workers=4, threads=8), {"size": 8, "max_overflow": 8})
+
+    def test_pool_split_connection_budget(self):
+        # 100 kết nối cho 8 worker: mỗi worker tối đa 12
+        self.assertEqual(pool_settings(8, 4, max_connections=100), {"size": 4, "max_overflow": 8})
+        self.assertEqual(pool_settings(8, 16, max_connections=100), {"size": 12, "max_overflow": 0})
+        self.assertEqual(pool_settings(8, 4, max_connections=3), {"size": 1, "max_overflow": 0})
+
+    def test_serve_options(self):
+        args = parse_args(["serve", "--workers", "3", "--threads", "1", "--no-preload"])
+        options = build_options(args)
+        self.assertEqual(options["workers"], 3)
+        self.assertEqual(options["worker_class"], "sync")
+        self.assertFalse(options["preload_app"])
+        self.assertTrue(build_options(parse_args(["serve", "--threads", "4"]))["preload_app"])
+        # Access log không ghi query string (?token=)
+        self.assertNotIn('%(r)s', options["access_log_format"])
+        self.assertIn('%(U)s', options["access_log_format"])
+
+    def test_pre_fork_without_preload_skips_main(self):
+        server = MagicMock()
+        server.cfg.preload_app = False
+        with patch.dict(sys.modules, {'main': None}):
+            # Import main sẽ lỗi nếu _pre_fork thử import
+            _pre_fork(server, MagicMock())
+
+    def test_shared_state_problems(self):
+        self.assertEqual(shared_state_problems(1, {}), [])
+        problems = shared_state_problems(4, {})
+        self.assertIn('IDEMPOTENCY_STORE=table', problems[0])
+        self.assertEqual(len(shared_state_problems(4, {'IDEMPOTENCY_STORE': 'table'})), len(problems) - 1)
+
+    def test_memory_cart_store_single_worker_only(self):
+        self.assertIsNone(single_worker_only(4, {}))
+        self.assertIsNone(single_worker_only(1, {'CART_STORE': 'memory'}))
+        self.assertIn('--workers 1', single_worker_only(4, {'CART_STORE': 'memory'}))
+
+    def test_backfill_command(self):
+        args = parse_args(["backfill-analytics", "--batch-size", "500"])
+        self.assertEqual((args.command, args.batch_size), ("backfill-analytics", 500))
+
+
+if __name__ == '__main__':
+    unittest.main()
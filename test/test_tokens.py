@@ -0,0 +1,164 @@
+import unittest
+import json
+from unittest.mock import patch
+import sys
+
+sys.path.append('../backend')
+from main import app, menu_cache
+from tokens import AccessDenied, InvalidToken, TokenSigner, acting_user, check_restaurant, parse_keys
+
+
+class TokenSignerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.signer = TokenSigner(parse_keys('k1:secret-one'), ttl=60, clock=lambda: self.now)
+
+    def test_roundtrip(self):
+        token = self.signer.sign({'id': 7, 'role': 'user'})
+        claims = self.signer.verify(token)
+        self.assertEqual((claims['id'], claims['role'], claims['exp']), (7, 'user', 1060))
+
+    def test_tampered_or_malformed(self):
+        kid, body, signature = self.signer.sign({'id': 7, 'role': 'user'}).split('.')
+        forged = TokenSigner(parse_keys('k1:other'), clock=lambda: self.now).sign({'id': 1, 'role': 'admin'})
+        for token in (f'{kid}.{body}.{signature[:-2]}xx', forged.replace(forged.split('.')[2], signature),
+                      'garbage', f'{kid}.{body}', f'k9.{body}.{signature}', f'{kid}.{body}.ữ'):
+            with self.assertRaises(InvalidToken, msg=token):
+                self.signer.verify(token)
+
+    def test_expired(self):
+        token = self.signer.sign({'id': 7, 'role': 'user'})
+        self.now += 61
+        with self.assertRaises(InvalidToken):
+            self.signer.verify(token)
+
+    def test_key_rotation(self):
+        old_token = self.signer.sign({'id': 7, 'role': 'user'})
+        rotated = TokenSigner(parse_keys('k2:secret-two,k1:secret-one'), clock=lambda: self.now)
+        self.assertEqual(rotated.verify(old_token)['id'], 7)
+        self.assertTrue(rotated.sign({'id': 7, 'role': 'user'}).startswith('k2.'))
+        # Bỏ key cũ: token cũ hết hiệu lực
+        with self.assertRaises(InvalidToken):
+            TokenSigner(parse_keys('k2:secret-two')).verify(old_token)
+
+    def test_acting_user(self):
+        user = {'id': 7, 'role': 'user'}
+        self.assertEqual(acting_user(None, '3'), '3')
+        self.assertEqual(acting_user(user, None), 7)
+        self.assertEqual(acting_user(user, 7), 7)
+        self.assertEqual(acting_user({'id': 1, 'role': 'admin'}, 3), 3)
+        with self.assertRaises(AccessDenied) as ctx:
+            acting_user(user, 3)
+        self.assertEqual(ctx.exception.status, 403)
+        with self.assertRaises(AccessDenied) as ctx:
+            acting_user(None, 3, required=True)
+        self.assertEqual(ctx.exception.status, 401)
+
+        check_restaurant({'id': 2, 'role': 'restaurant', 'name': 'Pizza Hut'}, 'Pizza Hut')
+        with self.assertRaises(AccessDenied):
+            check_restaurant({'id': 2, 'role': 'restaurant', 'name': 'Pizza Hut'}, 'KFC')
+
+
+class SessionApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        menu_cache.invalidate()
+
+    def login(self, mock_db, user):
+        mock_db.return_value.cursor.return_value.fetchone.return_value = dict(user, password='pw')
+        response = self.app.post('/api/login', data=json.dumps({'username': user['username'], 'password': 'pw'}),
+                                 content_type='application/json')
+        return json.loads(response.data)['token']
+
+    @patch('main.get_db_connection')
+    @patch('main._load_menu_items', return_value=[])
+    def test_token_identifies_user_without_lookup(self, mock_menu, mock_db):
+        token = self.login(mock_db, {'id': 5, 'username': 'an', 'email': 'a@x', 'role': 'user'})
+
+        mock_db.reset_mock()
+        cursor = mock_db.return_value.cursor.return_value
+        cursor.fetchall.return_value = []
+        response = self.app.get('/api/cart/5', headers={'Authorization': f'Bearer {token}'})
+        self.assertTrue(json.loads(response.data)['success'])
+        # Chỉ một câu truy vấn giỏ hàng, không đọc bảng user
+        self.assertEqual(cursor.execute.call_count, 1)
+        self.assertEqual(cursor.execute.call_args[0][1], (5,))
+
+        # user_id lấy từ token khi body không gửi
+        response = self.app.post('/api/cart', data=json.dumps({'item_id': 3}),
+                                 headers={'Authorization': f'Bearer {token}'}, content_type='application/json')
+        self.assertTrue(json.loads(response.data)['success'])
+        self.assertEqual(cursor.execute.call_args[0][1], (5, 3, 1))
+
+    @patch('main.get_db_connection')
+    def test_other_users_data_forbidden(self, mock_db):
+        token = self.login(mock_db, {'id': 5, 'username': 'an', 'email': 'a@x', 'role': 'user'})
+        mock_db.reset_mock()
+
+        for response in (
+            self.app.get('/api/cart/6', headers={'Authorization': f'Bearer {token}'}),
+            self.app.get('/api/orders/user/6', headers={'Authorization': f'Bearer {token}'}),
+            self.app.get('/api/orders/restaurant/KFC', headers={'Authorization': f'Bearer {token}'}),
+            self.app.post('/api/order', data=json.dumps({'user_id': 6}),
+                          headers={'Authorization': f'Bearer {token}'}, content_type='application/json'),
+        ):
+            self.assertEqual(response.status_code, 403)
+            self.assertFalse(json.loads(response.data)['success'])
+        mock_db.assert_not_called()
+
+    @patch('main.get_db_connection')
+    def test_owner_checked_on_existing_rows(self, mock_db):
+        token = self.login(mock_db, {'id': 5, 'username': 'an', 'email': 'a@x', 'role': 'user'})
+        kfc = self.login(mock_db, {'id': 9, 'username': 'kfc', 'email': 'k@x', 'role': 'restaurant'})
+        headers = {'Authorization': f'Bearer {token}'}
+        mock_db.reset_mock()
+        cursor = mock_db.return_value.cursor.return_value
+
+        # Dòng giỏ 42 của user 6
+        cursor.fetchone.return_value = (6,)
+        for response in (
+            self.app.put('/api/cart/update', data=json.dumps({'cart_id': 42, 'quantity': 3}),
+                         headers=headers, content_type='application/json'),
+            self.app.delete('/api/cart/42', headers=headers),
+        ):
+            self.assertEqual(response.status_code, 403)
+        self.assertEqual([c[0][1] for c in cursor.execute.call_args_list], [(42,), (42,)])
+        mock_db.return_value.commit.assert_not_called()
+
+        # Dòng của chính mình thì được sửa
+        cursor.fetchone.return_value = (5,)
+        response = self.app.delete('/api/cart/42', headers=headers)
+        self.assertTrue(json.loads(response.data)['success'])
+
+        # Nhà hàng chỉ đổi trạng thái đơn của mình
+        cursor.reset_mock()
+        cursor.fetchone.return_value = {'user_id': 5, 'restaurant': 'Pizza Hut', 'status': 'pending'}
+        response = self.app.put('/api/orders/3/status', data=json.dumps({'status': 'confirmed'}),
+                                headers={'Authorization': f'Bearer {kfc}'}, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(cursor.execute.call_count, 1)
+
+        response = self.app.post('/api/menu', data={'name': 'Gà', 'price': '1', 'restaurant': 'Pizza Hut'},
+                                 headers={'Authorization': f'Bearer {kfc}'})
+        self.assertEqual(response.status_code, 403)
+        # Khách hàng không thêm món
+        response = self.app.post('/api/menu', data={'name': 'Gà', 'price': '1', 'restaurant': 'kfc'},
+                                 headers=headers)
+        self.assertEqual(response.status_code, 403)
+
+    @patch('main.get_db_connection')
+    def test_invalid_token_rejected(self, mock_db):
+        response = self.app.get('/api/cart/5', headers={'Authorization': 'Bearer dev.e30.bad'})
+        self.assertEqual(response.status_code, 401)
+        mock_db.assert_not_called()
+
+    @patch('main.get_db_connection')
+    def test_token_required_when_configured(self, mock_db):
+        with patch('main.REQUIRE_SESSION_TOKEN', True):
+            response = self.app.get('/api/cart/5')
+        self.assertEqual(response.status_code, 401)
+        mock_db.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import patch
+import sys
+
+sys.path.append('../backend')
+from main import app
+
+HASHED = '0123456789abcdef0123456789abcdef-card.jpg'
+
+
+class UploadsServingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.tmp = tempfile.TemporaryDirectory()
+        for name in (HASHED, 'food1.jpg'):
+            with open(os.path.join(self.tmp.name, name), 'wb') as f:
+                f.write(b'0123456789' * 100)
+        self.patch = patch('main.UPLOADS_DIR', self.tmp.name)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        self.tmp.cleanup()
+
+    def test_content_addressed_is_immutable(self):
+        response = self.app.get(f'/uploads/{HASHED}')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn('max-age=31536000', response.headers['Cache-Control'])
+        self.assertEqual(response.headers['ETag'], '"0123456789abcdef0123456789abcdef-card"')
+        self.assertIn('Last-Modified', response.headers)
+
+        again = self.app.get(f'/uploads/{HASHED}', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+    def test_legacy_name_revalidates(self):
+        response = self.app.get('/uploads/food1.jpg')
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+        self.assertNotIn('immutable', response.headers['Cache-Control'])
+
+        again = self.app.get('/uploads/food1.jpg', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+    def test_range_request(self):
+        response = self.app.get(f'/uploads/{HASHED}', headers={'Range': 'bytes=0-9'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.data, b'0123456789')
+        self.assertEqual(response.headers['Content-Range'], 'bytes 0-9/1000')
+
+    def test_x_accel_offload(self):
+        with patch('main.UPLOADS_OFFLOAD', 'x-accel'):
+            response = self.app.get(f'/uploads/{HASHED}')
+            missing = self.app.get('/uploads/missing.jpg')
+        self.assertEqual(response.headers['X-Accel-Redirect'], f'/_uploads/{HASHED}')
+        self.assertEqual(response.data, b'')
+        self.assertEqual(response.mimetype, 'image/jpeg')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertEqual(missing.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()